@@ -0,0 +1,153 @@
+// Benchmark the frontend run loop without a model.
+//
+// Drives the worker runtime shared by the v1 component (runtime.js) with a
+// stubbed transformers.js whose pipelines return canned outputs instantly,
+// so the numbers are frontend overhead only: pipeline cache lookups, input
+// conversion, the batch loop, tensor packing and the structured clone of
+// each reply (what postMessage does between the worker and the page).
+//
+// Run with `node benchmarks/bench_frontend.mjs [--quick] [--repeat N] [--json results.json]`
+// and compare two result files with benchmarks/compare.py.
+import { execSync } from 'node:child_process';
+import { writeFileSync } from 'node:fs';
+import os from 'node:os';
+import { createRuntime } from '../st_transformers_js/frontend_v1/runtime.js';
+
+const KB = 1 << 10;
+const MB = 1 << 20;
+
+const args = process.argv.slice(2);
+const option = (name, fallback) => {
+  const index = args.indexOf(name);
+  return index === -1 ? fallback : args[index + 1];
+};
+const quick = args.includes('--quick');
+const repeat = Number(option('--repeat', 20));
+const jsonPath = option('--json', null);
+
+const SIZES = quick ? [1 * KB, 64 * KB, 1 * MB] : [1 * KB, 64 * KB, 1 * MB, 10 * MB, 50 * MB];
+
+// Canned outputs shaped like transformers.js results
+function stubOutput(task, input, outputSize) {
+  if (task === 'feature-extraction') {
+    const rows = Array.isArray(input) ? input.length : 1;
+    return { type: 'float32', dims: [rows, outputSize], data: new Float32Array(rows * outputSize) };
+  }
+  if (task === 'token-classification') {
+    const entities = Array.from({ length: outputSize }, (_, i) => ({
+      entity: 'B-PER', score: 0.99, index: i, word: `token${i}`, start: i * 6, end: i * 6 + 5,
+    }));
+    return Array.isArray(input) ? input.map(() => entities) : entities;
+  }
+  const output = [{ label: 'POSITIVE', score: 0.99 }];
+  return Array.isArray(input) ? input.map(() => output) : output;
+}
+
+function createStubRuntime(outputSize) {
+  const transformers = {
+    pipeline: async (task) => {
+      const pipe = async (input) => stubOutput(task, input, outputSize);
+      pipe.dispose = () => {};
+      return pipe;
+    },
+  };
+  return createRuntime(transformers);
+}
+
+// postMessage structured-clones each reply, moving transferable buffers
+function clonePost(message, transfer = []) {
+  structuredClone(message, { transfer });
+}
+
+async function timeRuns(runtime, makeRequest) {
+  const times = [];
+  // One untimed run loads the stub pipeline into the cache
+  await runtime.handleMessage(makeRequest(0), clonePost);
+  for (let i = 1; i <= repeat; i++) {
+    const request = makeRequest(i);
+    const start = performance.now();
+    await runtime.handleMessage(request, clonePost);
+    times.push((performance.now() - start) / 1000);
+  }
+  times.sort((a, b) => a - b);
+  return { best_s: times[0], median_s: times[Math.floor(times.length / 2)] };
+}
+
+const results = [];
+const record = async (benchmark, params, runtime, makeRequest) => {
+  results.push({ benchmark, params, ...(await timeRuns(runtime, makeRequest)) });
+};
+
+const baseRequest = (id, fields) => ({
+  type: 'run', id, client_id: 'bench', pipeline_cache_size: 4, config: {}, ...fields,
+});
+
+// Binary inputs: Uint8Array -> Blob object URL
+for (const size of SIZES) {
+  const bytes = new Uint8Array(size);
+  await record('run_binary_input', { size }, createStubRuntime(1), (id) => baseRequest(id, {
+    pipeline_type: 'image-to-text', model_name: 'stub', inputs: bytes, mime_type: 'image/jpeg',
+  }));
+}
+
+// Base64 inputs: string -> data URL
+for (const size of SIZES) {
+  const base64 = 'A'.repeat(Math.ceil(size / 3) * 4);
+  await record('run_base64_input', { size }, createStubRuntime(1), (id) => baseRequest(id, {
+    pipeline_type: 'image-to-text', model_name: 'stub', inputs: base64, mime_type: 'image/jpeg',
+  }));
+}
+
+// Tensor outputs: packing and transferring embeddings
+for (const dims of quick ? [384, 384 * 64] : [384, 384 * 64, 384 * 1024]) {
+  await record('run_tensor_output', { output_floats: dims }, createStubRuntime(dims), (id) => baseRequest(id, {
+    pipeline_type: 'feature-extraction', model_name: 'stub', inputs: 'text',
+  }));
+}
+
+// List-of-dict outputs
+for (const entities of [10, 1000]) {
+  await record('run_records_output', { entities }, createStubRuntime(entities), (id) => baseRequest(id, {
+    pipeline_type: 'token-classification', model_name: 'stub', inputs: 'text',
+  }));
+}
+
+// Batch loop
+const texts = Array.from({ length: 256 }, (_, i) => `sentence ${i}`);
+for (const batchSize of [1, 8, 32]) {
+  await record('run_batch', { items: texts.length, batch_size: batchSize }, createStubRuntime(1), (id) => baseRequest(id, {
+    mode: 'batch', pipeline_type: 'text-classification', model_name: 'stub',
+    inputs: texts, mime_types: texts.map(() => null), batch_size: batchSize,
+  }));
+}
+
+// Pipeline cache: the same model every run (hits) vs. a new model each run
+// with room for one (a load plus an eviction per run)
+await record('pipeline_cache_hit', {}, createStubRuntime(1), (id) => baseRequest(id, {
+  pipeline_type: 'text-classification', model_name: 'stub', inputs: 'text',
+}));
+await record('pipeline_cache_miss', {}, createStubRuntime(1), (id) => baseRequest(id, {
+  pipeline_type: 'text-classification', model_name: `stub-${id}`, inputs: 'text', pipeline_cache_size: 1,
+}));
+
+for (const row of results) {
+  const params = Object.entries(row.params).map(([k, v]) => `${k}=${v}`).join(' ');
+  console.log(`${row.benchmark.padEnd(22)} ${params.padEnd(36)} ${(row.best_s * 1000).toFixed(3).padStart(10)} ms`);
+}
+
+if (jsonPath) {
+  let commit = null;
+  try {
+    commit = execSync('git rev-parse --short HEAD', { stdio: ['ignore', 'pipe', 'ignore'] }).toString().trim();
+  } catch (error) {
+    // Not a git checkout
+  }
+  writeFileSync(jsonPath, JSON.stringify({
+    suite: 'frontend',
+    commit,
+    node: process.version,
+    platform: `${os.platform()}-${os.release()}-${os.arch()}`,
+    timestamp: new Date().toISOString().replace(/\.\d+Z$/, 'Z'),
+    results,
+  }, null, 2));
+}
@@ -0,0 +1,236 @@
+"""
+Benchmark the Python hot paths across input sizes and types.
+
+Covers input processing (``process_inputs`` for each binary input type and
+transport), MIME detection, building the v2 component payload (the whole
+``transformers_js_pipeline_v2`` call with the component patched out), and
+decoding results (JSON lists vs. typed tensor results). Everything runs
+offline; no browser or model is involved.
+
+Run with ``python benchmarks/bench_python.py [--quick] [--json results.json]``
+and compare two result files with ``benchmarks/compare.py``.
+"""
+import argparse
+import base64
+import io
+import json
+import os
+import pathlib
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from st_transformers_js import helpers  # noqa: E402
+from st_transformers_js.helpers import (  # noqa: E402
+    encode_binary_payload,
+    process_batch_inputs,
+    process_inputs,
+)
+
+KB = 1 << 10
+MB = 1 << 20
+SIZES = [1 * KB, 64 * KB, 1 * MB, 10 * MB, 50 * MB]
+QUICK_SIZES = [1 * KB, 64 * KB, 1 * MB]
+
+
+def _timings(func, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return {"best_s": min(times), "median_s": statistics.median(times)}
+
+
+def _repeat_for(size, repeat):
+    # Keep the large sizes from dominating the run time
+    return max(1, repeat // 3) if size >= 10 * MB else repeat
+
+
+def _jpeg(size):
+    return b"\xff\xd8\xff\xe0" + os.urandom(size - 4)
+
+
+def bench_process_inputs(sizes, repeat, tmp_dir):
+    results = []
+    for size in sizes:
+        data = _jpeg(size)
+        path = os.path.join(tmp_dir, f"input-{size}.jpg")
+        with open(path, "wb") as f:
+            f.write(data)
+
+        sources = {
+            "bytes": lambda: data,
+            "bytearray": lambda: bytearray(data),
+            "memoryview": lambda: memoryview(data),
+            "path": lambda: pathlib.Path(path),
+            "file": lambda: io.BytesIO(data),
+        }
+        for source, make in sources.items():
+            for transport in helpers.TRANSPORTS:
+                inputs = make()
+
+                def run():
+                    if hasattr(inputs, "seek"):
+                        inputs.seek(0)
+                    process_inputs(inputs, transport=transport)
+
+                results.append({
+                    "benchmark": "process_inputs",
+                    "params": {"size": size, "source": source, "transport": transport},
+                    **_timings(run, _repeat_for(size, repeat)),
+                })
+    return results
+
+
+def bench_mime_detection(repeat):
+    samples = {
+        "jpeg": b"\xff\xd8\xff\xe0" + bytes(2044),
+        "png": b"\x89PNG\r\n\x1a\n" + bytes(2040),
+        "webp": b"RIFF\x00\x00\x00\x00WEBP" + bytes(2036),
+        "unknown": bytes(2048),
+    }
+    results = []
+    for name, header in samples.items():
+        results.append({
+            "benchmark": "mime_magic_numbers",
+            "params": {"format": name},
+            **_timings(lambda: helpers._get_mime_type_from_magic_numbers(header), repeat * 100),
+        })
+        if helpers._load_magic() is not None:
+            results.append({
+                "benchmark": "mime_python_magic",
+                "params": {"format": name},
+                **_timings(lambda: helpers._get_mime_type_with_magic(header), repeat * 10),
+            })
+    return results
+
+
+def bench_v2_payload(sizes, repeat):
+    from st_transformers_js import v2
+
+    results = []
+    with patch.object(v2, "_component_func", return_value=None):
+        for size in sizes:
+            data = _jpeg(size)
+            for transport in helpers.TRANSPORTS:
+                def run():
+                    v2.transformers_js_pipeline_v2(
+                        "Xenova/model", "image-to-text", data, transport=transport
+                    )
+
+                results.append({
+                    "benchmark": "v2_payload",
+                    "params": {"size": size, "transport": transport},
+                    **_timings(run, _repeat_for(size, repeat)),
+                })
+
+        texts = ["A short sentence to classify."] * 256
+        results.append({
+            "benchmark": "v2_batch_payload",
+            "params": {"items": len(texts)},
+            **_timings(lambda: v2.transformers_js_pipeline_batch_v2("Xenova/model", "text-classification", texts), repeat),
+        })
+        results.append({
+            "benchmark": "process_batch_inputs",
+            "params": {"items": len(texts)},
+            **_timings(lambda: process_batch_inputs(texts), repeat),
+        })
+    return results
+
+
+def bench_result_decoding(sizes, repeat):
+    try:
+        import numpy as np
+    except ImportError:
+        return []
+    from st_transformers_js.results import decode_result
+    from st_transformers_js.v1 import _decode_component_value
+
+    results = []
+    for size in sizes:
+        count = size // 4
+        data = np.random.default_rng(0).random(count, dtype=np.float32)
+        raw = data.tobytes()
+
+        # What a result_format="json" tensor costs: a JSON list of numbers
+        json_value = json.dumps({"result": {"type": "float32", "dims": [count], "data": data.tolist()}})
+        # v2 typed result: base64 of the raw bytes inside JSON state
+        b64_value = json.dumps({"result": {
+            "__tensor__": True, "dtype": "float32", "shape": [count],
+            "b64": base64.b64encode(raw).decode("ascii"),
+        }})
+        # v1 typed result: binary payload
+        binary_value = encode_binary_payload(
+            {"result": {"__tensor__": True, "dtype": "float32", "shape": [count], "blob": 0}, "meta": {}},
+            [raw],
+        )
+
+        cases = {
+            "json": (len(json_value), lambda: json.loads(json_value)),
+            "numpy_base64": (len(b64_value), lambda: decode_result(json.loads(b64_value)["result"], "numpy")),
+            "numpy_binary": (len(binary_value), lambda: _decode_component_value(binary_value, "numpy")),
+        }
+        for encoding, (payload_bytes, run) in cases.items():
+            results.append({
+                "benchmark": "result_decoding",
+                "params": {"size": size, "encoding": encoding},
+                "payload_bytes": payload_bytes,
+                **_timings(run, _repeat_for(size, repeat)),
+            })
+    return results
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes, repeat):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        results = bench_process_inputs(sizes, repeat, tmp_dir)
+    results += bench_mime_detection(repeat)
+    results += bench_v2_payload(sizes, repeat)
+    results += bench_result_decoding([s for s in sizes if s <= 10 * MB], repeat)
+    return {
+        "suite": "python",
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "results": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help=f"Only sizes up to {QUICK_SIZES[-1] >> 20} MB")
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args(argv)
+
+    report = run(QUICK_SIZES if args.quick else SIZES, args.repeat)
+
+    for row in report["results"]:
+        params = " ".join(f"{k}={v}" for k, v in row["params"].items())
+        print(f"{row['benchmark']:<20} {params:<50} {row['best_s'] * 1000:>10.3f} ms")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
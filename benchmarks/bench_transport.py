@@ -0,0 +1,99 @@
+"""
+Compare the base64 and binary input transports.
+
+For each input size this measures the size of the payload handed to
+Streamlit and the time to build it in Python and to turn it back into raw
+bytes on the receiving side (base64 decode vs. slicing the binary frame),
+which is the part of time-to-inference the transport controls. Model time
+is the same for both paths and is not included.
+
+Run with ``python benchmarks/bench_transport.py [--json results.json]``.
+"""
+import argparse
+import base64
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from st_transformers_js.helpers import (  # noqa: E402
+    decode_binary_payload,
+    encode_binary_payload,
+    process_inputs,
+)
+
+SIZES = [1 << 20, 5 << 20, 10 << 20, 20 << 20]
+
+
+def _best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_size(size, repeat):
+    data = b"\xff\xd8" + os.urandom(size - 2)
+    header = {"model_name": "m", "pipeline_type": "image-to-text", "config": {}}
+
+    def base64_path():
+        processed, mime_type = process_inputs(data, transport="base64")
+        payload = json.dumps({**header, "inputs": processed, "mime_type": mime_type})
+        return payload
+
+    def binary_path():
+        processed, mime_type = process_inputs(data, transport="binary")
+        return encode_binary_payload({**header, "inputs": {"blob": 0}, "mime_type": mime_type}, [processed])
+
+    base64_payload = base64_path()
+    binary_payload = binary_path()
+
+    def base64_decode():
+        return base64.b64decode(json.loads(base64_payload)["inputs"])
+
+    def binary_decode():
+        return decode_binary_payload(binary_payload)[1][0]
+
+    return {
+        "input_bytes": size,
+        "base64": {
+            "payload_bytes": len(base64_payload),
+            "encode_s": _best_of(base64_path, repeat),
+            "decode_s": _best_of(base64_decode, repeat),
+        },
+        "binary": {
+            "payload_bytes": len(binary_payload),
+            "encode_s": _best_of(binary_path, repeat),
+            "decode_s": _best_of(binary_decode, repeat),
+        },
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="Write results to this file")
+    args = parser.parse_args(argv)
+
+    results = [bench_size(size, args.repeat) for size in SIZES]
+
+    print(f"{'input':>10} {'transport':>9} {'payload':>12} {'encode ms':>10} {'decode ms':>10}")
+    for row in results:
+        for transport in ("base64", "binary"):
+            stats = row[transport]
+            print(
+                f"{row['input_bytes'] >> 20:>8}MB {transport:>9} {stats['payload_bytes']:>12} "
+                f"{stats['encode_s'] * 1000:>10.2f} {stats['decode_s'] * 1000:>10.2f}"
+            )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Compare two benchmark result files written with ``--json``.
+
+Rows are matched by benchmark name and parameters; each line shows the
+best time before and after and the relative change. Rows slower by more
+than ``--threshold`` are flagged, and ``--fail`` makes the exit status
+non-zero when any are.
+
+Usage: ``python benchmarks/compare.py before.json after.json``
+"""
+import argparse
+import json
+import sys
+
+
+def _key(row):
+    return row["benchmark"], json.dumps(row["params"], sort_keys=True)
+
+
+def _load(path):
+    with open(path, encoding="utf-8") as f:
+        report = json.load(f)
+    return report, {_key(row): row for row in report["results"]}
+
+
+def compare(before_path, after_path, threshold=0.1):
+    """
+    Return ``(rows, regressions)`` for the benchmarks present in both files.
+
+    Each row is ``(benchmark, params, before_s, after_s, change)``, where
+    ``change`` is the relative change of the best time.
+    """
+    _, before = _load(before_path)
+    _, after = _load(after_path)
+
+    rows = []
+    regressions = []
+    for key, new in after.items():
+        old = before.get(key)
+        if old is None:
+            continue
+        change = (new["best_s"] - old["best_s"]) / old["best_s"] if old["best_s"] else 0.0
+        row = (new["benchmark"], new["params"], old["best_s"], new["best_s"], change)
+        rows.append(row)
+        if change > threshold:
+            regressions.append(row)
+    return rows, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=0.1, help="Relative slowdown to flag (default: 0.1)")
+    parser.add_argument("--fail", action="store_true", help="Exit with status 1 if anything regressed")
+    args = parser.parse_args(argv)
+
+    rows, regressions = compare(args.before, args.after, args.threshold)
+    for benchmark, params, old, new, change in rows:
+        params = " ".join(f"{k}={v}" for k, v in params.items())
+        flag = "  <-- slower" if change > args.threshold else ""
+        print(f"{benchmark:<20} {params:<50} {old * 1000:>10.3f} {new * 1000:>10.3f} ms {change:>+8.1%}{flag}")
+
+    print(f"\n{len(rows)} compared, {len(regressions)} slower by more than {args.threshold:.0%}")
+    if args.fail and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
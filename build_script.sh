@@ -6,6 +6,11 @@ echo "🚀 Building st-transformers-js v1 component..."
 FRONTEND_V1_SRC="st_transformers_js/frontend_v1"
 BUILD_V1_DIR="st_transformers_js/frontend_v1/build"
 
+# Gzip KB budgets for everything a component iframe downloads
+V1_BUDGET_KB=256
+V2_BUDGET_KB=384
+
+rm -rf "$BUILD_V1_DIR"
 mkdir -p "$BUILD_V1_DIR"
 
 # --- Robust Download Function ---
@@ -35,15 +40,27 @@ download_file() {
     fi
 }
 
-# Download streamlit-component-lib if not present
-if [ ! -f "$BUILD_V1_DIR/streamlit.js" ]; then
+# Download streamlit-component-lib once; the build directory is recreated
+# on every build, so keep the download in a cache outside it
+STREAMLIT_JS_CACHE="${XDG_CACHE_HOME:-$HOME/.cache}/st-transformers-js/streamlit-component-lib-2.0.0.js"
+if [ ! -f "$STREAMLIT_JS_CACHE" ]; then
+    mkdir -p "$(dirname "$STREAMLIT_JS_CACHE")"
     download_file \
         "https://cdn.jsdelivr.net/npm/streamlit-component-lib@2.0.0/dist/streamlit.js" \
-        "$BUILD_V1_DIR/streamlit.js"
+        "$STREAMLIT_JS_CACHE"
 fi
 
+cp "$STREAMLIT_JS_CACHE" "$BUILD_V1_DIR/streamlit.js"
 cp "$FRONTEND_V1_SRC/index.html" "$BUILD_V1_DIR/"
+cp "$FRONTEND_V1_SRC/worker.js" "$BUILD_V1_DIR/"
+cp "$FRONTEND_V1_SRC/runtime.js" "$BUILD_V1_DIR/"
 cp "$FRONTEND_V1_SRC/transformers.min.js" "$BUILD_V1_DIR/"
+
+# Content-hash the scripts (index.html is served no-cache and points at the
+# current names), write .gz/.br variants and check the size budget
+python scripts/build_assets.py "$BUILD_V1_DIR" \
+    --hash streamlit.js transformers.min.js runtime.js worker.js \
+    --max-total-kb "$V1_BUDGET_KB"
 echo "✅ v1 Build complete!"
 echo "📂 Files in $BUILD_V1_DIR:"
 ls -lh "$BUILD_V1_DIR"
@@ -60,8 +77,11 @@ popd > /dev/null
 
 BUILD_V2_TARGET="st_transformers_js/frontend_v2/dist"
 echo "🚚 Copying v2 build files to $BUILD_V2_TARGET..."
+rm -rf "$BUILD_V2_TARGET"
 mkdir -p "$BUILD_V2_TARGET"
 cp -r frontend_v2/dist/* "$BUILD_V2_TARGET/"
+# Vite already content-hashes the bundles; add .gz/.br variants and check the budget
+python scripts/build_assets.py "$BUILD_V2_TARGET" --max-total-kb "$V2_BUDGET_KB"
 echo "✅ v2 Build complete!"
 echo "📂 Files in $BUILD_V2_TARGET:"
 ls -lh "$BUILD_V2_TARGET"
@@ -0,0 +1,76 @@
+// Decoding for binary component payloads built by
+// st_transformers_js.helpers.encode_binary_payload:
+//   magic "STJS" | header length (uint32 LE) | JSON header | blobs
+
+const MAGIC = [0x53, 0x54, 0x4a, 0x53];
+
+export const isBinaryPayload = (data: unknown): data is ArrayBuffer | ArrayBufferView =>
+    data instanceof ArrayBuffer || ArrayBuffer.isView(data);
+
+export const decodeBinaryPayload = (data: ArrayBuffer | ArrayBufferView) => {
+    const bytes = data instanceof ArrayBuffer
+        ? new Uint8Array(data)
+        : new Uint8Array(data.buffer, data.byteOffset, data.byteLength);
+
+    if (!MAGIC.every((value, i) => bytes[i] === value)) {
+        throw new Error("Not a binary component payload");
+    }
+
+    const headerLength = new DataView(bytes.buffer, bytes.byteOffset + 4, 4).getUint32(0, true);
+    const header = JSON.parse(new TextDecoder().decode(bytes.subarray(8, 8 + headerLength)));
+    const start = 8 + headerLength;
+    // Views into the payload, no copies
+    const blobs: Uint8Array[] = header.blobs.map(
+        ([offset, length]: [number, number]) => bytes.subarray(start + offset, start + offset + length)
+    );
+    delete header.blobs;
+    return { header, blobs };
+};
+
+// Returns the component data with `{ blob: i }` references in its inputs
+// (or in a batch's list of inputs) replaced by the corresponding raw bytes.
+// Non-binary data is returned unchanged.
+export const decodeComponentData = (data: unknown): any => {
+    if (!isBinaryPayload(data)) {
+        return data;
+    }
+    const { header, blobs } = decodeBinaryPayload(data);
+    const resolve = (input: any) => (input && typeof input.blob === "number" ? blobs[input.blob] : input);
+    header.inputs = Array.isArray(header.inputs) ? header.inputs.map(resolve) : resolve(header.inputs);
+    return header;
+};
+
+const toBase64 = (bytes: Uint8Array): string => {
+    let binary = "";
+    for (let i = 0; i < bytes.length; i += 0x8000) {
+        binary += String.fromCharCode(...bytes.subarray(i, i + 0x8000));
+    }
+    return btoa(binary);
+};
+
+// For result_format != "json": tensors in a worker result become
+// `{ __tensor__, dtype, shape, b64 }` with their raw little-endian bytes
+// base64-encoded, decoded into numpy arrays by st_transformers_js.results.
+// Component state is JSON, so this is far smaller and faster to parse than
+// a list of numbers, if not as compact as a binary payload.
+export const encodeTypedResult = (value: any): any => {
+    if (value && typeof value === "object") {
+        if (value.__tensor__) {
+            const data = value.data as ArrayBufferView;
+            const bytes = new Uint8Array(data.buffer, data.byteOffset, data.byteLength);
+            return { __tensor__: true, dtype: value.type, shape: value.dims, b64: toBase64(bytes) };
+        }
+        if (ArrayBuffer.isView(value)) {
+            return Array.from(value as unknown as ArrayLike<number>);
+        }
+        if (Array.isArray(value)) {
+            return value.map(encodeTypedResult);
+        }
+        const plain: Record<string, any> = {};
+        for (const [key, item] of Object.entries(value)) {
+            plain[key] = encodeTypedResult(item);
+        }
+        return plain;
+    }
+    return value;
+};
@@ -1,16 +1,39 @@
 import { Component, ComponentState } from "@streamlit/component-v2-lib"
-import React, { useState, useEffect } from "react"
-import { createRoot } from "react-dom/client"
-import { pipeline, env } from "@xenova/transformers";
-
-// Skip local model checks for faster loading in a web environment.
-env.allowLocalModels = false;
+import React, { useState, useEffect, useRef } from "react"
+import { createRoot, type Root } from "react-dom/client"
+import type { PipelineCacheStats } from "./pipelineCache";
+import type { Priority, SchedulerStats } from "./scheduler";
+import { decodeComponentData, encodeTypedResult } from "./binaryPayload";
+import { useStateSync } from "./stateSync";
+import { now } from "./runtime";
+import type { PreloadModelSpec, PreloadModelStatus, RunQueue, RunTimings, StreamOptions, WasmOptions, WasmSettings } from "./runtime";
+import { runCacheAction } from "./modelCache";
+import { runInWorker, preloadInWorker, releaseClient, toSerializable, finishTimings } from "./workerClient";
 
 interface ComponentData {
+    mode?: "single" | "batch" | "preload";
     model_name: string;
     pipeline_type: any;
-    inputs: string | undefined;
+    inputs: any;
     mime_type: string | undefined;
+    mime_types?: (string | null)[];
+    batch_size?: number;
+    audio_chunks?: [number, number][] | ([number, number][] | null)[] | null;
+    text_chunks?: [number, number][] | null;
+    stream?: StreamOptions | null;
+    // Hash of the run's arguments, from Python
+    run_id: string;
+    cancel?: boolean;
+    pipeline_cache_size?: number;
+    max_concurrency?: number;
+    priority?: Priority;
+    shared_worker?: boolean;
+    model_source?: "hub" | "local";
+    local_model_path?: string | null;
+    load_options?: object;
+    runtime?: WasmOptions;
+    progress_interval_ms?: number;
+    result_format?: "json" | "numpy" | "arrow" | "pandas";
     config: object | undefined;
 }
 
@@ -20,11 +43,53 @@ interface ComponentStatus extends ComponentState {
     progress?: number;
     result?: any;
     error?: string;
+    errors?: (string | null)[];
+    completed?: number;
+    total?: number;
+    pipeline_cache?: PipelineCacheStats;
+    timings?: RunTimings;
+    runtime?: WasmSettings;
+    // The run's place in the worker's inference queue
+    queue?: RunQueue;
+    scheduler?: SchedulerStats;
+    // Streamed runs: the text generated so far
+    partial?: { text: string; tokens: number };
+    // Lets Python tell this run's state from an earlier run's
+    run_id?: string;
+}
+
+interface PreloadData {
+    mode: "preload";
+    models: PreloadModelSpec[];
+    pipeline_cache_size?: number;
+    shared_worker?: boolean;
+    model_source?: "hub" | "local";
+    local_model_path?: string | null;
+    runtime?: WasmOptions;
+    progress_interval_ms?: number;
 }
 
+interface CacheData {
+    mode: "cache";
+    action: "list" | "evict" | "budget";
+    model_name?: string;
+    budget_bytes?: number | null;
+    persist?: boolean;
+}
+
+type PreloadModelState = PreloadModelStatus & { progress?: number };
+
 const TransformersComponent: React.FC<{ data: ComponentData; setStateValue: (name: string, value: any) => void }> = ({ data, setStateValue }) => {
     const [message, setMessage] = useState("Component loaded.");
     const [progress, setProgress] = useState<number | undefined>(undefined);
+    // Identifies this instance to the worker for model reference counting
+    const clientId = useRef(Math.random().toString(36).slice(2)).current;
+    const sync = useStateSync(setStateValue, data.progress_interval_ms);
+
+    useEffect(() => () => {
+        sync.dispose();
+        releaseClient(clientId);
+    }, [clientId]);
 
      // --- Unified State Update Function ---
      const updateState = (newState: Partial<ComponentStatus>) => {
@@ -34,67 +99,191 @@ const TransformersComponent: React.FC<{ data: ComponentData; setStateValue: (nam
         }
        setProgress(newState.progress);
 
-
-        // Send state back to Python for each key
-        for (const [key, value] of Object.entries(newState)) {
-            setStateValue(key.toString(), value);
-        }
+        // Coalesced and throttled before it reaches Python
+        sync.update(newState);
     };
 
 
+    // Python hashes every argument that affects the run into `run_id`, so
+    // reruns with the same arguments (and new but equal `config` objects)
+    // keep the run going. A new id aborts the run: the worker drops it unless
+    // another component is running the same arguments, and whatever it
+    // would still report is ignored. `cancel` does the same without starting
+    // another run; the cancelled id is not run again until the arguments
+    // change. A finished run is neither run again nor cancelled.
+    const finishedRunId = useRef<string | null>(null);
+    const cancelledRunId = useRef<string | null>(null);
+
     useEffect(() => {
+        if (finishedRunId.current === data.run_id) {
+            return;
+        }
+        if (data.cancel) {
+            cancelledRunId.current = data.run_id;
+        }
+        if (cancelledRunId.current === data.run_id) {
+            updateState({
+                status: "cancelled",
+                message: "Run cancelled.",
+                progress: undefined,
+                partial: undefined,
+                run_id: data.run_id,
+            });
+            return;
+        }
+        const controller = new AbortController();
+        const signal = controller.signal;
+        const report = (newState: Partial<ComponentStatus>) => {
+            if (!signal.aborted) {
+                updateState(newState);
+            }
+        };
+        const encodeResult = (result: any) =>
+            data.result_format && data.result_format !== "json" ? encodeTypedResult(result) : toSerializable(result);
+
         const runPipeline = async (retries = 3) => {
             for (let attempt = 1; attempt <= retries; attempt++) {
                 try {
-                    updateState({
+                    report({
                         status: "loading",
                         message: `Loading model: ${data.model_name} (attempt ${attempt}/${retries})`,
+                        timings: undefined,
+                        queue: undefined,
+                        partial: undefined,
+                        result: undefined,
+                        error: undefined,
+                        errors: undefined,
+                        completed: undefined,
+                        total: undefined,
+                        run_id: data.run_id,
                     });
+                    let firstToken = true;
 
-                    const pipe = await pipeline(data.pipeline_type, data.model_name, {
-                        progress_callback: (progress: any) => {
-                            updateState({
+                    const { result, meta } = await runInWorker({
+                        client_id: clientId,
+                        mode: data.mode,
+                        pipeline_type: data.pipeline_type,
+                        model_name: data.model_name,
+                        model_source: data.model_source,
+                        local_model_path: data.local_model_path,
+                        load_options: data.load_options,
+                        runtime: data.runtime,
+                        pipeline_cache_size: data.pipeline_cache_size,
+                        max_concurrency: data.max_concurrency,
+                        priority: data.priority,
+                        inputs: data.inputs,
+                        mime_type: data.mime_type,
+                        mime_types: data.mime_types,
+                        batch_size: data.batch_size,
+                        audio_chunks: data.audio_chunks,
+                        text_chunks: data.text_chunks,
+                        stream: data.stream,
+                        run_key: data.run_id,
+                        config: data.config,
+                    }, (message) => {
+                        if (message.type === "progress") {
+                            const progress = message.progress;
+                            report({
                                 status: progress.status,
                                 message: `[${progress.status}] ${progress.file} (${Math.round(progress.progress)}%)`,
                                 progress: progress.progress,
                             });
-                        },
-                    });
-
-                    updateState({
-                        status: "processing",
-                        message: "Running inference...",
-                        progress: undefined, // Hide progress bar
-                    });
+                        } else if (message.type === "loaded") {
+                            report({
+                                status: "processing",
+                                message: "Running inference...",
+                                progress: undefined, // Hide progress bar
+                            });
+                        } else if (message.type === "queued") {
+                            report({
+                                status: "queued",
+                                message: `Waiting for ${message.queue.depth} other run(s)...`,
+                                progress: undefined,
+                                queue: message.queue,
+                            });
+                        } else if (message.type === "started") {
+                            report({
+                                status: "processing",
+                                message: "Running inference...",
+                                queue: message.queue,
+                            });
+                        } else if (message.type === "partial") {
+                            report({
+                                status: "streaming",
+                                message: message.text,
+                                progress: undefined,
+                                partial: { text: message.text, tokens: message.tokens },
+                            });
+                            if (firstToken) {
+                                // Time to first token matters most; later text is throttled
+                                firstToken = false;
+                                sync.flush();
+                            }
+                        } else if (message.type === "batch_progress") {
+                            report({
+                                status: "processing",
+                                message: `Running inference... (${message.completed}/${message.total})`,
+                                progress: (message.completed / message.total) * 100,
+                                completed: message.completed,
+                                total: message.total,
+                            });
+                        }
+                    }, Boolean(data.shared_worker), signal);
 
-                    let processedInputs = data.inputs;
-                    if (data.mime_type && data.mime_type.startsWith("image/")) {
-                        processedInputs = `data:${data.mime_type};base64,${data.inputs}`;
+                    const encodeStarted = now();
+                    if (data.mode === "batch") {
+                        const results = encodeResult(result.results);
+                        report({
+                            status: "complete",
+                            message: "Inference complete!",
+                            result: results,
+                            errors: result.errors,
+                            completed: result.completed,
+                            total: result.total,
+                            progress: undefined, // Hide progress bar
+                            pipeline_cache: meta.pipeline_cache,
+                            timings: finishTimings(meta.timings, [encodeStarted, now()]),
+                            runtime: meta.runtime,
+                            queue: meta.queue,
+                            scheduler: meta.scheduler,
+                        });
+                        return;
                     }
 
-                    const result = await pipe(processedInputs, data.config);
-
-                    updateState({
+                    const encoded = encodeResult(result);
+                    report({
                         status: "complete",
                         message: "Inference complete!",
-                        result: result,
+                        result: encoded,
+                        partial: undefined, // The result has the full text
                         progress: undefined, // Hide progress bar
+                        pipeline_cache: meta.pipeline_cache,
+                        timings: finishTimings(meta.timings, [encodeStarted, now()]),
+                        runtime: meta.runtime,
+                        queue: meta.queue,
+                        scheduler: meta.scheduler,
                     });
 
                     // Success, exit the loop
                     return;
 
                 } catch (error: any) {
+                    if (signal.aborted) {
+                        return;
+                    }
                     console.error(`Pipeline error (attempt ${attempt}/${retries}):`, error);
                     if (attempt === retries) {
-                        updateState({
+                        report({
                             status: "error",
                             message: `Error: ${error.message}`,
                             error: error.message,
                             progress: undefined, // Hide progress bar
+                            timings: finishTimings(error.meta?.timings),
+                            runtime: error.meta?.runtime,
+                            queue: error.meta?.queue,
                         });
                     } else {
-                        updateState({
+                        report({
                             status: "error",
                             message: `Download failed. Retrying in ${attempt * 2}s...`,
                             progress: undefined,
@@ -104,8 +293,13 @@ const TransformersComponent: React.FC<{ data: ComponentData; setStateValue: (nam
                 }
             }
         };
-        runPipeline();
-    }, [data.model_name, data.pipeline_type, data.inputs, data.config, data.mime_type]);
+        runPipeline().then(() => {
+            if (!signal.aborted) {
+                finishedRunId.current = data.run_id;
+            }
+        });
+        return () => controller.abort();
+    }, [data.run_id, data.cancel]);
 
 
     return (
@@ -116,15 +310,112 @@ const TransformersComponent: React.FC<{ data: ComponentData; setStateValue: (nam
     )
 }
 
+// Headless component that loads and warms up models at app start, so
+// later pipeline components on the page start on a loaded model.
+const PreloadComponent: React.FC<{ data: PreloadData; setStateValue: (name: string, value: any) => void }> = ({ data, setStateValue }) => {
+    const clientId = useRef(Math.random().toString(36).slice(2)).current;
+    const sync = useStateSync(setStateValue, data.progress_interval_ms);
+
+    useEffect(() => () => {
+        sync.dispose();
+        releaseClient(clientId);
+    }, [clientId]);
+
+    useEffect(() => {
+        const models: PreloadModelState[] = data.models.map((spec) => ({
+            model_name: spec.model_name,
+            pipeline_type: spec.pipeline_type,
+            status: "loading",
+            load_ms: null,
+            warmup_ms: null,
+            error: null,
+        }));
+        sync.update({ status: "loading", ready: false, models });
+
+        preloadInWorker({
+            client_id: clientId,
+            models: data.models,
+            model_source: data.model_source,
+            local_model_path: data.local_model_path,
+            runtime: data.runtime,
+            pipeline_cache_size: data.pipeline_cache_size,
+        }, (message) => {
+            if (message.type === "preload_progress") {
+                models[message.index] = { ...models[message.index], ...message.model, progress: undefined };
+            } else if (message.type === "progress" && message.index !== undefined && message.progress.progress !== undefined) {
+                models[message.index] = { ...models[message.index], progress: message.progress.progress };
+            } else {
+                return;
+            }
+            sync.update({ models: [...models] });
+        }, Boolean(data.shared_worker)).then(({ result, meta }) => {
+            sync.update({
+                status: result.ready ? "complete" : "error",
+                ready: result.ready,
+                models: result.models,
+                pipeline_cache: meta.pipeline_cache,
+                runtime: meta.runtime,
+            });
+        }).catch((error: Error) => {
+            sync.update({ status: "error", error: error.message });
+        });
+    }, [JSON.stringify(data.models), data.shared_worker, data.model_source, data.local_model_path, JSON.stringify(data.runtime), data.pipeline_cache_size]);
+
+    return null;
+}
+
+// Headless component that inspects or prunes the browser's model cache.
+// It works from the page, so no worker is started.
+const CacheComponent: React.FC<{ data: CacheData; setStateValue: (name: string, value: any) => void }> = ({ data, setStateValue }) => {
+    const sync = useStateSync(setStateValue);
+
+    useEffect(() => () => sync.dispose(), []);
+
+    useEffect(() => {
+        sync.update({ status: "loading" });
+        runCacheAction({
+            action: data.action,
+            model_name: data.model_name,
+            budget_bytes: data.budget_bytes,
+            persist: data.persist,
+        }).then((result) => {
+            sync.update({ status: "complete", result });
+        }).catch((error: Error) => {
+            sync.update({ status: "error", error: error.message });
+        });
+    }, [data.action, data.model_name, data.budget_bytes, data.persist]);
+
+    return null;
+}
+
+// One React root per mount, re-rendered with each new `data`, so a rerun
+// updates the mounted component instead of starting it over
+const roots = new WeakMap<Element, Root>();
+
 const StTransformersComponent: Component = (args) => {
     const rootEl = args.parentElement.querySelector('#root');
     if (rootEl) {
-        const root = createRoot(rootEl);
+        let root = roots.get(rootEl);
+        if (!root) {
+            root = createRoot(rootEl);
+            roots.set(rootEl, root);
+        }
+        const data = decodeComponentData(args.data) as ComponentData | PreloadData | CacheData;
         root.render(
             <React.StrictMode>
-                <TransformersComponent data={args.data as unknown as ComponentData} setStateValue={args.setStateValue} />
+                {data.mode === "preload"
+                    ? <PreloadComponent data={data as PreloadData} setStateValue={args.setStateValue} />
+                    : data.mode === "cache"
+                        ? <CacheComponent data={data as CacheData} setStateValue={args.setStateValue} />
+                        : <TransformersComponent data={data as ComponentData} setStateValue={args.setStateValue} />}
             </React.StrictMode>
         );
+        // Unmounting runs the components' cleanups: pending flushes are
+        // stopped, the run is aborted and model references are released
+        return () => {
+            root!.unmount();
+            roots.delete(rootEl);
+        };
     } else {
         console.error("Root element not found");
     }
@@ -0,0 +1,242 @@
+// Browser model cache. transformers.js keeps downloaded model files in
+// Cache Storage under "transformers-cache", keyed by URL. Cache Storage
+// records no access times, so we keep our own in a second cache: one entry
+// per model with when it was last used, and the byte budget set from
+// Python. Pruning evicts the least recently used models first.
+//
+// The worker records model use and prunes after loads (see runtime.ts);
+// the page lists, evicts and sets the budget with runCacheAction.
+
+export const MODEL_CACHE_NAME = "transformers-cache";
+const USAGE_CACHE_NAME = "st-transformers-js-usage";
+// Cache keys must be URLs; these never leave the browser
+const USAGE_PREFIX = "https://st-transformers-js.invalid/usage/";
+const BUDGET_KEY = "https://st-transformers-js.invalid/budget";
+// A model's last-used time is written at most this often
+const USAGE_WRITE_INTERVAL_MS = 60000;
+
+export interface CachedModel {
+    model_name: string;
+    bytes: number;
+    files: number;
+    // Epoch ms; null if not used since usage tracking began
+    last_used: number | null;
+}
+
+export interface CacheReport {
+    available: boolean;
+    models: CachedModel[];
+    total_bytes: number;
+    budget_bytes: number | null;
+    usage: number | null;
+    quota: number | null;
+    persisted: boolean | null;
+}
+
+export interface EvictionResult {
+    evicted: string[];
+    freed_bytes: number;
+}
+
+export interface CacheRequest {
+    action: "list" | "evict" | "budget";
+    model_name?: string;
+    budget_bytes?: number | null;
+    persist?: boolean;
+}
+
+interface ModelFiles {
+    bytes: number;
+    requests: Request[];
+}
+
+const usageWrites = new Map<string, number>();
+
+const cacheStorage = (): CacheStorage | null => (typeof caches === "undefined" ? null : caches);
+
+const jsonResponse = (value: any) =>
+    new Response(JSON.stringify(value), { headers: { "Content-Type": "application/json" } });
+
+const nothingEvicted = (): EvictionResult => ({ evicted: [], freed_bytes: 0 });
+
+// The model a cached file belongs to. Hub URLs look like
+// <host>/<model>/resolve/<revision>/<file>; local mirror URLs are matched
+// against the models with usage records, or else taken to be the file's
+// directory without a trailing /onnx.
+export const modelFromUrl = (url: string, knownModels: string[] = []): string => {
+    const path = decodeURIComponent(new URL(url).pathname);
+    const resolve = path.indexOf("/resolve/");
+    if (resolve !== -1) {
+        return path.slice(1, resolve);
+    }
+    const known = [...knownModels].sort((a, b) => b.length - a.length).find((model) => path.includes(`/${model}/`));
+    return known ?? path.slice(1, path.lastIndexOf("/")).replace(/\/onnx$/, "");
+};
+
+const readUsage = async (storage: CacheStorage) => {
+    const cache = await storage.open(USAGE_CACHE_NAME);
+    const lastUsed: Record<string, number> = {};
+    for (const request of await cache.keys()) {
+        if (request.url.startsWith(USAGE_PREFIX)) {
+            const entry = await (await cache.match(request))!.json();
+            lastUsed[entry.model_name] = entry.last_used;
+        }
+    }
+    const budget = await cache.match(BUDGET_KEY);
+    const budgetBytes: number | null = budget ? (await budget.json()).budget_bytes : null;
+    return { lastUsed, budgetBytes };
+};
+
+const cachedFiles = async (storage: CacheStorage, knownModels: string[]) => {
+    const groups = new Map<string, ModelFiles>();
+    if (!(await storage.has(MODEL_CACHE_NAME))) {
+        return groups;
+    }
+    const cache = await storage.open(MODEL_CACHE_NAME);
+    for (const request of await cache.keys()) {
+        const response = await cache.match(request);
+        const bytes = response ? (await response.blob()).size : 0;
+        const model = modelFromUrl(request.url, knownModels);
+        const group = groups.get(model) ?? { bytes: 0, requests: [] };
+        group.bytes += bytes;
+        group.requests.push(request);
+        groups.set(model, group);
+    }
+    return groups;
+};
+
+const removeModels = async (
+    storage: CacheStorage,
+    groups: Map<string, ModelFiles>,
+    models: string[],
+): Promise<EvictionResult> => {
+    const cache = await storage.open(MODEL_CACHE_NAME);
+    const usage = await storage.open(USAGE_CACHE_NAME);
+    const evicted: string[] = [];
+    let freedBytes = 0;
+    for (const model of models) {
+        const group = groups.get(model);
+        if (group) {
+            await Promise.all(group.requests.map((request) => cache.delete(request)));
+            freedBytes += group.bytes;
+            evicted.push(model);
+        }
+        await usage.delete(USAGE_PREFIX + encodeURIComponent(model));
+        usageWrites.delete(model);
+    }
+    return { evicted, freed_bytes: freedBytes };
+};
+
+// Notes that a model was just used, for least-recently-used pruning
+export const recordModelUse = async (modelName: string, at = Date.now()) => {
+    const storage = cacheStorage();
+    if (!storage || (usageWrites.has(modelName) && at - usageWrites.get(modelName)! < USAGE_WRITE_INTERVAL_MS)) {
+        return;
+    }
+    usageWrites.set(modelName, at);
+    const cache = await storage.open(USAGE_CACHE_NAME);
+    await cache.put(USAGE_PREFIX + encodeURIComponent(modelName), jsonResponse({ model_name: modelName, last_used: at }));
+};
+
+// Cached models, most recently used first, with the origin's storage usage
+// and quota where the browser reports them
+export const listCachedModels = async (): Promise<CacheReport> => {
+    const storage = cacheStorage();
+    const report: CacheReport = {
+        available: Boolean(storage), models: [], total_bytes: 0, budget_bytes: null, usage: null, quota: null, persisted: null,
+    };
+    if (!storage) {
+        return report;
+    }
+    const { lastUsed, budgetBytes } = await readUsage(storage);
+    const groups = await cachedFiles(storage, Object.keys(lastUsed));
+    report.budget_bytes = budgetBytes;
+    for (const [model, group] of groups) {
+        report.models.push({ model_name: model, bytes: group.bytes, files: group.requests.length, last_used: lastUsed[model] ?? null });
+        report.total_bytes += group.bytes;
+    }
+    report.models.sort((a, b) => (b.last_used ?? -1) - (a.last_used ?? -1));
+
+    const storageManager = globalThis.navigator?.storage;
+    if (storageManager?.estimate) {
+        const estimate = await storageManager.estimate();
+        report.usage = estimate.usage ?? null;
+        report.quota = estimate.quota ?? null;
+    }
+    if (storageManager?.persisted) {
+        report.persisted = await storageManager.persisted();
+    }
+    return report;
+};
+
+// Deletes a model's cached files and its usage record
+export const evictCachedModel = async (modelName: string): Promise<EvictionResult> => {
+    const storage = cacheStorage();
+    if (!storage) {
+        return nothingEvicted();
+    }
+    const { lastUsed } = await readUsage(storage);
+    const groups = await cachedFiles(storage, [...Object.keys(lastUsed), modelName]);
+    return removeModels(storage, groups, [modelName]);
+};
+
+// Evicts least recently used models until the cache fits the stored
+// budget. Models in `protect` (e.g. loaded ones) are kept.
+export const enforceCacheBudget = async ({ protect = [] }: { protect?: string[] } = {}): Promise<EvictionResult> => {
+    const storage = cacheStorage();
+    if (!storage) {
+        return nothingEvicted();
+    }
+    const { lastUsed, budgetBytes } = await readUsage(storage);
+    if (budgetBytes === null) {
+        return nothingEvicted();
+    }
+    const groups = await cachedFiles(storage, [...Object.keys(lastUsed), ...protect]);
+    let total = [...groups.values()].reduce((sum, group) => sum + group.bytes, 0);
+    const victims: string[] = [];
+    const oldestFirst = [...groups.keys()]
+        .filter((model) => !protect.includes(model))
+        .sort((a, b) => (lastUsed[a] ?? -1) - (lastUsed[b] ?? -1));
+    for (const model of oldestFirst) {
+        if (total <= budgetBytes) {
+            break;
+        }
+        victims.push(model);
+        total -= groups.get(model)!.bytes;
+    }
+    return removeModels(storage, groups, victims);
+};
+
+// Stores the cache budget in bytes (null for none) and prunes to it
+export const setCacheBudget = async (budgetBytes: number | null): Promise<EvictionResult> => {
+    const storage = cacheStorage();
+    if (!storage) {
+        return nothingEvicted();
+    }
+    const cache = await storage.open(USAGE_CACHE_NAME);
+    if (budgetBytes === null) {
+        await cache.delete(BUDGET_KEY);
+    } else {
+        await cache.put(BUDGET_KEY, jsonResponse({ budget_bytes: budgetBytes }));
+    }
+    return enforceCacheBudget();
+};
+
+// Runs a cache request from Python and returns the listing afterwards with
+// what was evicted. Runs on the page: persisting storage is only possible
+// from a window.
+export const runCacheAction = async (request: CacheRequest): Promise<CacheReport & EvictionResult & { action: string }> => {
+    let outcome = nothingEvicted();
+    if (request.action === "evict") {
+        outcome = await evictCachedModel(request.model_name!);
+    } else if (request.action === "budget") {
+        outcome = await setCacheBudget(request.budget_bytes ?? null);
+    } else if (request.action !== "list") {
+        throw new Error(`Unknown cache action: ${request.action}`);
+    }
+    const storageManager = globalThis.navigator?.storage;
+    if (request.persist && storageManager?.persist) {
+        await storageManager.persist();
+    }
+    return { action: request.action, ...outcome, ...(await listCachedModels()) };
+};
@@ -0,0 +1,130 @@
+// Pipelines keyed by (pipeline_type, model_name, load options), shared by
+// every component the worker serves and kept in least-recently-used order.
+// Entries in use by a component are reference counted and never evicted.
+// With `releaseDelayMs` set, an entry is also disposed that long after its
+// last reference is released.
+
+export interface PipelineCacheStats {
+    hits: number;
+    misses: number;
+    size: number;
+    max_entries: number;
+    referenced: number;
+}
+
+export class PipelineCache {
+    private entries = new Map<string, Promise<any>>();
+    private refs = new Map<string, number>();
+    private releaseTimers = new Map<string, ReturnType<typeof setTimeout>>();
+    private maxEntries: number;
+    private releaseDelayMs: number | null;
+    hits = 0;
+    misses = 0;
+
+    constructor(maxEntries = 4, { releaseDelayMs = null }: { releaseDelayMs?: number | null } = {}) {
+        this.maxEntries = maxEntries;
+        this.releaseDelayMs = releaseDelayMs;
+    }
+
+    static key(pipelineType: string, modelName: string, loadOptions?: object): string {
+        return JSON.stringify([pipelineType, modelName, loadOptions ?? {}]);
+    }
+
+    setMaxEntries(maxEntries: number | undefined) {
+        this.maxEntries = Math.max(1, maxEntries ?? this.maxEntries);
+        this.evict();
+    }
+
+    get(
+        pipelineType: string,
+        modelName: string,
+        loadOptions: object | undefined,
+        create: () => Promise<any>,
+    ): Promise<any> {
+        const key = PipelineCache.key(pipelineType, modelName, loadOptions);
+        const cached = this.entries.get(key);
+        if (cached) {
+            // Re-insert to mark as most recently used
+            this.entries.delete(key);
+            this.entries.set(key, cached);
+            this.hits++;
+            return cached;
+        }
+
+        this.misses++;
+        const created = create();
+        this.entries.set(key, created);
+        // Don't keep failed loads around
+        created.catch(() => {
+            if (this.entries.get(key) === created) {
+                this.entries.delete(key);
+            }
+        });
+        this.evict();
+        return created;
+    }
+
+    retain(key: string) {
+        this.refs.set(key, (this.refs.get(key) ?? 0) + 1);
+        clearTimeout(this.releaseTimers.get(key));
+        this.releaseTimers.delete(key);
+    }
+
+    release(key: string) {
+        const count = (this.refs.get(key) ?? 0) - 1;
+        if (count > 0) {
+            this.refs.set(key, count);
+            return;
+        }
+        this.refs.delete(key);
+        if (this.releaseDelayMs === null) {
+            this.evict();
+            return;
+        }
+        // Grace period so a remounting component doesn't reload the model
+        this.releaseTimers.set(key, setTimeout(() => {
+            this.releaseTimers.delete(key);
+            if (!this.refs.has(key)) {
+                this.remove(key);
+            }
+        }, this.releaseDelayMs));
+    }
+
+    private remove(key: string) {
+        const entry = this.entries.get(key);
+        if (!entry) {
+            return;
+        }
+        this.entries.delete(key);
+        entry
+            .then((pipe) => pipe?.dispose?.())
+            .catch((error) => console.warn("Failed to dispose pipeline:", error));
+    }
+
+    private evict() {
+        // Oldest first, skipping entries that are still referenced
+        for (const key of [...this.entries.keys()]) {
+            if (this.entries.size <= this.maxEntries) {
+                break;
+            }
+            if (!this.refs.has(key)) {
+                this.remove(key);
+            }
+        }
+    }
+
+    // Models with a cached pipeline (loaded or loading)
+    modelNames(): string[] {
+        return [...this.entries.keys()].map((key) => JSON.parse(key)[1]);
+    }
+
+    stats(): PipelineCacheStats {
+        return {
+            hits: this.hits,
+            misses: this.misses,
+            size: this.entries.size,
+            max_entries: this.maxEntries,
+            referenced: this.refs.size,
+        };
+    }
+}
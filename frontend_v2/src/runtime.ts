@@ -0,0 +1,857 @@
+// Model loading and inference, run inside the worker (see worker.ts).
+// Nothing here touches the DOM, so it can also be driven directly with a
+// stubbed transformers.js.
+//
+// Message protocol (component -> worker):
+//   { type: "run", id, client_id, run_key, mode, pipeline_type, model_name, load_options,
+//     model_source, local_model_path, runtime, pipeline_cache_size, max_concurrency,
+//     priority, inputs, mime_type, mime_types, batch_size, audio_chunks, text_chunks,
+//     stream, config }
+//   { type: "preload", id, client_id, models: [{ model_name, pipeline_type,
+//     warmup_input, mime_type, config, load_options }], model_source, local_model_path,
+//     runtime, pipeline_cache_size }            load and warm up models
+//   { type: "cancel", id, client_id }           the run's caller no longer wants it
+//   { type: "release", client_id }              the component is going away
+// Replies (worker -> component):
+//   { type: "progress", id, progress, index? }  transformers.js load progress
+//   { type: "loaded", id, pipeline_cache_hit, index? }
+//   { type: "batch_progress", id, completed, total }
+//   { type: "queued", id, queue }               waiting for the scheduler
+//   { type: "started", id, queue }              a model call started after waiting
+//   { type: "preload_progress", id, index, model }
+//   { type: "partial", id, text, tokens }       streamed generation so far
+//   { type: "result", id, result, meta }
+//   { type: "error", id, error, meta }
+// The browser model cache is managed from the page (see modelCache.ts);
+// the worker only records model use and prunes to the budget after loads.
+// A run's `meta.timings` holds { stages: { name: [start, end] }, pipeline_cache_hit,
+// input_bytes, output_bytes }: stage marks in milliseconds on the clock of
+// `now()`, which the page shares and adds its own stages on, the input size,
+// and the size of the tensor data transferred back.
+// Audio decoded in Python arrives as PCM_MIME_TYPE bytes (mono float32) and
+// is passed to the pipeline as a Float32Array. With `audio_chunks`
+// ([start, end) sample offsets) a single run's recording is run as a batch
+// of its chunks and the result is the batch result, merged in Python. In a
+// batch, `audio_chunks` holds per input null or its recording's chunks,
+// each run as its own batch item.
+// `text_chunks` ([start, end) UTF-16 offsets) does the same for the windows
+// of a long text.
+// With `stream` ({ id, interval_ms }) a single generative run posts the
+// decoded text of its best beam as "partial" messages: the first token at
+// once, then at most one every `interval_ms`. Its time to the first token
+// is the `first_token` stage.
+// `run_key` is a hash of the run's arguments, set by Python. A run with the
+// key of one in progress attaches to it instead of starting another: it gets
+// the latest progress so far, then the same messages and result. A cancelled
+// request gets no reply; once every request attached to a run is cancelled,
+// the run stops at its next check, before a model call (or sub-batch or
+// chunk) or at a streamed run's next token. A model call already running
+// is not interrupted.
+// Model calls go through the worker's scheduler (see scheduler.ts): at most
+// `max_concurrency` at a time, "interactive" runs ahead of "background" ones
+// and each sub-batch of a batch run queued separately, so an interactive run
+// waits for one sub-batch, not the whole batch. Single text runs of
+// MICRO_BATCH_TASKS with the same pipeline and config that queued while it
+// was busy run as one batched call. A run's `meta.queue` holds { priority, depth,
+// wait_ms, batch_size }: the calls queued or running when it was queued, the
+// milliseconds it waited, and the runs that shared its model call.
+
+import { PipelineCache } from "./pipelineCache";
+import { InferenceScheduler } from "./scheduler";
+import type { Job, JobStart, Priority } from "./scheduler";
+import { enforceCacheBudget, recordModelUse } from "./modelCache";
+
+export interface RunRequest {
+    type: "run";
+    id: number;
+    client_id: string;
+    mode?: "single" | "batch";
+    pipeline_type: string;
+    model_name: string;
+    load_options?: object;
+    model_source?: "hub" | "local";
+    local_model_path?: string | null;
+    runtime?: WasmOptions;
+    pipeline_cache_size?: number;
+    max_concurrency?: number;
+    priority?: Priority;
+    inputs: any;
+    mime_type?: string | null;
+    mime_types?: (string | null)[];
+    batch_size?: number;
+    audio_chunks?: [number, number][] | ([number, number][] | null)[] | null;
+    text_chunks?: [number, number][] | null;
+    stream?: StreamOptions | null;
+    run_key?: string | null;
+    config?: object;
+}
+
+export interface CancelRequest {
+    type: "cancel";
+    id: number;
+    client_id: string;
+}
+
+// Set by Python for streamed runs; `id` is a hash of the run's arguments
+export interface StreamOptions {
+    id: string;
+    interval_ms?: number;
+}
+
+// ONNX Runtime WASM settings requested by the Python `runtime` option
+export interface WasmOptions {
+    num_threads?: number | "auto" | null;
+    simd?: boolean;
+    proxy?: boolean;
+}
+
+export interface WasmSettings {
+    num_threads: number;
+    simd: boolean;
+    proxy: boolean;
+    cross_origin_isolated: boolean;
+    notes: string[];
+    requested?: WasmOptions;
+}
+
+export interface PreloadModelSpec {
+    model_name: string;
+    pipeline_type: string;
+    warmup_input: any;
+    mime_type?: string | null;
+    config?: object;
+    load_options?: object;
+}
+
+export interface PreloadRequest {
+    type: "preload";
+    id: number;
+    client_id: string;
+    models: PreloadModelSpec[];
+    model_source?: "hub" | "local";
+    local_model_path?: string | null;
+    runtime?: WasmOptions;
+    pipeline_cache_size?: number;
+}
+
+export interface PreloadModelStatus {
+    model_name: string;
+    pipeline_type: string;
+    status: "loading" | "warming" | "ready" | "error";
+    load_ms: number | null;
+    warmup_ms: number | null;
+    error: string | null;
+}
+
+export interface RunQueue {
+    priority: Priority;
+    depth: number;
+    wait_ms: number;
+    batch_size: number;
+}
+
+export type WorkerMessage =
+    | { type: "progress"; id: number; progress: any; index?: number }
+    | { type: "loaded"; id: number; pipeline_cache_hit: boolean; index?: number }
+    | { type: "batch_progress"; id: number; completed: number; total: number }
+    | { type: "queued"; id: number; queue: RunQueue }
+    | { type: "started"; id: number; queue: RunQueue }
+    | { type: "preload_progress"; id: number; index: number; model: PreloadModelStatus }
+    | { type: "partial"; id: number; text: string; tokens: number }
+    | { type: "result"; id: number; result: any; meta: any }
+    | { type: "error"; id: number; error: string; meta: any };
+
+export interface RunTimings {
+    stages: Record<string, [number, number]>;
+    pipeline_cache_hit: boolean;
+    input_bytes: number;
+    output_bytes: number;
+    // Added by the page (see workerClient.ts)
+    run_id?: string;
+    started_at?: number;
+    total_ms?: number;
+    sent_at?: number;
+}
+
+// Milliseconds since the epoch, at performance.now() resolution
+export const now = () => performance.timeOrigin + performance.now();
+
+// A tiny WASM module using one SIMD instruction (from wasm-feature-detect)
+const SIMD_PROBE = new Uint8Array([
+    0, 97, 115, 109, 1, 0, 0, 0, 1, 5, 1, 96, 0, 1, 123, 3, 2, 1, 0, 10, 10, 1, 8, 0, 65, 0, 253, 15, 253, 98, 11,
+]);
+
+// What the current context supports for ONNX Runtime's WASM backend
+export const detectWasmSupport = () => {
+    let simd = false;
+    try {
+        simd = typeof WebAssembly !== "undefined" && WebAssembly.validate(SIMD_PROBE);
+    } catch {
+        // No WebAssembly at all
+    }
+    return {
+        // Multi-threaded WASM needs SharedArrayBuffer, which needs cross-origin isolation
+        cross_origin_isolated: Boolean(globalThis.crossOriginIsolated) && typeof SharedArrayBuffer !== "undefined",
+        hardware_concurrency: globalThis.navigator?.hardwareConcurrency || 1,
+        simd,
+    };
+};
+
+// Resolves the requested { num_threads, simd, proxy } against what is
+// supported. `num_threads` "auto" (the default) is ONNX Runtime's own
+// default, half the logical cores up to 4.
+export const resolveWasmSettings = (
+    requested: WasmOptions = {},
+    support = detectWasmSupport(),
+): WasmSettings => {
+    const notes: string[] = [];
+    let numThreads = requested.num_threads === undefined || requested.num_threads === null || requested.num_threads === "auto"
+        ? Math.min(4, Math.ceil(support.hardware_concurrency / 2))
+        : requested.num_threads;
+    if (numThreads > support.hardware_concurrency) {
+        notes.push(`num_threads ${numThreads} is more than the ${support.hardware_concurrency} logical cores; using ${support.hardware_concurrency}`);
+        numThreads = support.hardware_concurrency;
+    }
+    if (numThreads > 1 && !support.cross_origin_isolated) {
+        notes.push("The page is not cross-origin isolated, so WASM runs single-threaded");
+        numThreads = 1;
+    }
+
+    const simd = requested.simd !== false && support.simd;
+    if (requested.simd !== false && !support.simd) {
+        notes.push("WASM SIMD is not supported by this browser");
+    }
+
+    // Inference already runs in this worker, off the main thread
+    if (requested.proxy) {
+        notes.push("proxy is not needed: inference already runs in a worker");
+    }
+
+    return { num_threads: numThreads, simd, proxy: false, cross_origin_isolated: support.cross_origin_isolated, notes };
+};
+
+// Decoded audio: mono little-endian float32 samples at the model's rate
+export const PCM_MIME_TYPE = "audio/pcm";
+
+// Float32Array over PCM bytes, from the binary transport or base64. The
+// bytes are only copied if they are not 4-byte aligned in their buffer.
+export const pcmSamples = (input: Uint8Array | string): Float32Array => {
+    let bytes = typeof input === "string" ? Uint8Array.from(atob(input), (c) => c.charCodeAt(0)) : input;
+    if (bytes.byteOffset % 4 !== 0) {
+        bytes = bytes.slice();
+    }
+    return new Float32Array(bytes.buffer, bytes.byteOffset, bytes.byteLength >> 2);
+};
+
+// Approximate size of request inputs: bytes for binary inputs, characters for strings
+const inputSize = (value: any): number => {
+    if (value instanceof Uint8Array) {
+        return value.byteLength;
+    }
+    if (typeof value === "string") {
+        return value.length;
+    }
+    if (Array.isArray(value)) {
+        return value.reduce((total: number, item: any) => total + inputSize(item), 0);
+    }
+    return 0;
+};
+
+export interface ReleaseRequest {
+    type: "release";
+    client_id: string;
+}
+
+export type Post = (message: WorkerMessage, transfer?: Transferable[]) => void;
+
+// Queues one model call of a run; `batch` lets it share a call with other runs
+type Schedule = <T>(task: () => Promise<T>, batch?: Job<T>["batch"]) => Promise<T>;
+
+// A run in progress and the requests attached to it
+interface ActiveRun {
+    key: string;
+    requests: { id: number; client_id: string; post: Post }[];
+    // Latest message of each progress type, replayed to a request that attaches late
+    latest: Map<string, WorkerMessage>;
+    cancelled: boolean;
+}
+
+// The error a cancelled run rejects with
+export const cancelledError = () => Object.assign(new Error("Run cancelled"), { cancelled: true });
+
+export interface PipelineLibrary {
+    pipeline: (task: any, model: string, options?: any) => Promise<any>;
+    env?: {
+        allowLocalModels: boolean;
+        allowRemoteModels: boolean;
+        localModelPath: string;
+        backends?: { onnx?: { wasm?: { numThreads?: number; simd?: boolean; proxy?: boolean } } };
+    };
+}
+
+// Splits the output of a pipeline called on a list of inputs into what a
+// call on each input returns, for the pipelines whose single-input runs are
+// micro-batched. A text-classification call on one input returns a list of
+// its top labels, but each item of a batched call with `topk` 1 is the label
+// itself.
+const splitClassification = (output: any[], index: number, config: any) =>
+    (config?.topk ?? 1) === 1 ? [output[index]] : output[index];
+const splitPerInput = (output: any[], index: number) => output[index];
+
+export const MICRO_BATCH_TASKS: Record<string, (output: any[], index: number, config: any) => any> = {
+    "text-classification": splitClassification,
+    "sentiment-analysis": splitClassification,
+    "token-classification": splitPerInput,
+    "ner": splitPerInput,
+};
+
+// Replace tensors in a pipeline output with plain descriptors and collect
+// their buffers so they can be transferred instead of cloned.
+export const packOutput = (value: any, transfer: Transferable[]): any => {
+    if (value && typeof value === "object") {
+        if (ArrayBuffer.isView(value.data) && Array.isArray(value.dims)) {
+            const data = value.data as ArrayBufferView;
+            if (data.byteOffset === 0 && data.byteLength === data.buffer.byteLength
+                && !transfer.includes(data.buffer as ArrayBuffer)) {
+                transfer.push(data.buffer as ArrayBuffer);
+            }
+            return { __tensor__: true, type: value.type, dims: value.dims, data };
+        }
+        if (Array.isArray(value)) {
+            return value.map((item) => packOutput(item, transfer));
+        }
+        const packed: Record<string, any> = {};
+        for (const [key, item] of Object.entries(value)) {
+            packed[key] = packOutput(item, transfer);
+        }
+        return packed;
+    }
+    return value;
+};
+
+const toPipelineInput = (input: any, mimeType: string | null | undefined, objectUrls: string[]) => {
+    if (mimeType && mimeType.startsWith(PCM_MIME_TYPE)) {
+        return pcmSamples(input);
+    }
+    if (input instanceof Uint8Array) {
+        // Raw bytes from the binary transport; no base64 round trip
+        const url = URL.createObjectURL(new Blob([input], { type: mimeType || "application/octet-stream" }));
+        objectUrls.push(url);
+        return url;
+    }
+    if (mimeType && mimeType.startsWith("image/") && typeof input === "string") {
+        return `data:${mimeType};base64,${input}`;
+    }
+    return input;
+};
+
+export const createRuntime = (
+    transformers: PipelineLibrary,
+    { releaseDelayMs = null }: { releaseDelayMs?: number | null } = {},
+) => {
+    const pipelineCache = new PipelineCache(4, { releaseDelayMs });
+    const scheduler = new InferenceScheduler(1);
+    // WASM settings applied by the first request; ONNX Runtime reads them once
+    let wasmSettings: WasmSettings | null = null;
+    // Model key currently held by each client, for reference counting
+    const clientKeys = new Map<string, string>();
+    // Runs in progress by `run_key`, or by request for runs without one
+    const activeRuns = new Map<string, ActiveRun>();
+
+    const hold = (clientId: string, key: string) => {
+        const previous = clientKeys.get(clientId);
+        if (previous === key) {
+            return;
+        }
+        pipelineCache.retain(key);
+        clientKeys.set(clientId, key);
+        if (previous !== undefined) {
+            pipelineCache.release(previous);
+        }
+    };
+
+    // Also releases the per-model holds of a preload ("<clientId>#<index>")
+    const releaseClient = (clientId: string) => {
+        for (const [holder, key] of [...clientKeys]) {
+            if (holder === clientId || holder.startsWith(`${clientId}#`)) {
+                clientKeys.delete(holder);
+                pipelineCache.release(key);
+            }
+        }
+    };
+
+    // Stops a run nobody is waiting for. Once it has stopped, identical
+    // requests start a new run instead of attaching to it.
+    const throwIfCancelled = (active: ActiveRun) => {
+        if (active.cancelled) {
+            if (activeRuns.get(active.key) === active) {
+                activeRuns.delete(active.key);
+            }
+            throw cancelledError();
+        }
+    };
+
+    // Sends a message to every request attached to the run. Transferred
+    // buffers can only go to one of them; the others get copies.
+    const broadcast = (active: ActiveRun): Post => (message, transfer = []) => {
+        if (message.type !== "result" && message.type !== "error") {
+            active.latest.set(message.type, message);
+        }
+        active.requests.forEach((request, i) => {
+            const last = i === active.requests.length - 1;
+            request.post({ ...message, id: request.id }, last ? transfer : []);
+        });
+    };
+
+    const cancel = (request: CancelRequest) => {
+        for (const active of activeRuns.values()) {
+            const index = active.requests.findIndex((r) => r.id === request.id && r.client_id === request.client_id);
+            if (index !== -1) {
+                active.requests.splice(index, 1);
+                active.cancelled = active.requests.length === 0;
+                return;
+            }
+        }
+    };
+
+    // Runs the pipeline over `inputs` in sub-batches, each queued with the
+    // scheduler on its own. A failed sub-batch is retried item by item so
+    // that one bad input only fails itself.
+    const runBatch = async (
+        pipe: any, request: RunRequest, inputs: any[], post: Post, active: ActiveRun, schedule: Schedule,
+    ) => {
+        const total = inputs.length;
+        const batchSize = Math.max(1, request.batch_size || 1);
+        const results: any[] = new Array(total).fill(null);
+        const errors: (string | null)[] = new Array(total).fill(null);
+        let completed = 0;
+
+        for (let start = 0; start < total; start += batchSize) {
+            const chunk = inputs.slice(start, start + batchSize);
+            const chunkResults = await schedule(async () => {
+                try {
+                    const output = await pipe(chunk.length === 1 ? chunk[0] : chunk, request.config);
+                    if (chunk.length === 1) {
+                        return [output];
+                    } else if (Array.isArray(output) && output.length === chunk.length) {
+                        return output;
+                    }
+                } catch (error) {
+                    console.warn("Batched call failed, retrying items individually:", error);
+                }
+
+                const outputs: any[] = [];
+                for (let i = 0; i < chunk.length; i++) {
+                    throwIfCancelled(active);
+                    try {
+                        outputs.push(await pipe(chunk[i], request.config));
+                    } catch (error: any) {
+                        outputs.push(null);
+                        errors[start + i] = error.message;
+                    }
+                }
+                return outputs;
+            });
+
+            chunkResults.forEach((output, i) => { results[start + i] = output; });
+            completed += chunk.length;
+            post({ type: "batch_progress", id: request.id, completed, total });
+        }
+
+        return { results, errors, completed, total };
+    };
+
+    // Point transformers.js at the hub or at a local mirror before a load.
+    // `env` is global to the worker, so loads from different sources that
+    // overlap in a shared worker can race; an app normally uses one source.
+    const configureModelSource = (request: RunRequest) => {
+        const env = transformers.env;
+        if (!env) {
+            return;
+        }
+        if (request.model_source === "local") {
+            env.allowLocalModels = true;
+            env.allowRemoteModels = false;
+            env.localModelPath = request.local_model_path ?? "/app/static/models/";
+        } else {
+            env.allowLocalModels = false;
+            env.allowRemoteModels = true;
+        }
+    };
+
+    // Applies the request's WASM settings if none have been applied yet, and
+    // returns the settings in effect, with notes on what differs from the request
+    const configureWasm = (request: RunRequest | PreloadRequest): WasmSettings => {
+        const requested = request.runtime ?? {};
+        const resolved = resolveWasmSettings(requested);
+        if (wasmSettings === null) {
+            wasmSettings = resolved;
+            const wasm = transformers.env?.backends?.onnx?.wasm;
+            if (wasm) {
+                wasm.numThreads = resolved.num_threads;
+                wasm.simd = resolved.simd;
+                wasm.proxy = false;
+            }
+            return { ...resolved, requested };
+        }
+        const notes = [...resolved.notes];
+        if (resolved.num_threads !== wasmSettings.num_threads || resolved.simd !== wasmSettings.simd) {
+            notes.push("WASM settings were applied by an earlier load; reload the page to change them");
+        }
+        return { ...wasmSettings, requested, notes };
+    };
+
+    // Updates the model's last use and, after a fresh load (which may have
+    // downloaded files), prunes the browser cache to its budget, keeping the
+    // models this worker has loaded. Neither delays the run.
+    const trackModelUse = (modelName: string, cacheHit: boolean) => {
+        const loaded = pipelineCache.modelNames();
+        recordModelUse(modelName)
+            .then(() => (cacheHit ? null : enforceCacheBudget({ protect: loaded })))
+            .catch((error) => console.warn("Failed to update the model cache:", error));
+    };
+
+    // Loads (or reuses) the pipeline for a request and holds it for the client.
+    // With `timings`, records the load stage and, for a fresh load, its split
+    // into downloading files and creating the session.
+    const load = async (
+        request: Pick<RunRequest, "id" | "client_id" | "pipeline_type" | "model_name" | "load_options"
+            | "model_source" | "local_model_path" | "pipeline_cache_size">,
+        post: Post,
+        timings: RunTimings | null = null,
+    ) => {
+        const started = now();
+        let lastFileDone: number | null = null;
+        // The same model from a different source is a different pipeline
+        const cacheOptions = {
+            ...(request.load_options ?? {}),
+            model_source: request.model_source ?? "hub",
+            local_model_path: request.local_model_path ?? null,
+        };
+        const key = PipelineCache.key(request.pipeline_type, request.model_name, cacheOptions);
+        hold(request.client_id, key);
+        pipelineCache.setMaxEntries(request.pipeline_cache_size);
+        const hitsBefore = pipelineCache.hits;
+        const pipe = await pipelineCache.get(request.pipeline_type, request.model_name, cacheOptions, () => {
+            configureModelSource(request);
+            return transformers.pipeline(request.pipeline_type, request.model_name, {
+                ...(request.load_options ?? {}),
+                progress_callback: (progress: any) => {
+                    if (progress.status === "done") {
+                        lastFileDone = now();
+                    }
+                    post({ type: "progress", id: request.id, progress });
+                },
+            });
+        });
+        const cacheHit = pipelineCache.hits > hitsBefore;
+        trackModelUse(request.model_name, cacheHit);
+        if (timings) {
+            const loaded = now();
+            timings.stages.load = [started, loaded];
+            if (lastFileDone !== null) {
+                timings.stages.download = [started, lastFileDone];
+                timings.stages.session = [lastFileDone, loaded];
+            }
+            timings.pipeline_cache_hit = cacheHit;
+        }
+        post({ type: "loaded", id: request.id, pipeline_cache_hit: cacheHit });
+        return { pipe, key };
+    };
+
+    // Generation callback for a streamed run. Tokens are only decoded when an
+    // update is posted, so a fast model isn't slowed down by decoding every step.
+    // Throwing from it stops generation, so a cancelled run stops at the next token.
+    const streamCallback = (pipe: any, request: RunRequest, post: Post, timings: RunTimings, active: ActiveRun) => {
+        const intervalMs = request.stream?.interval_ms ?? 250;
+        let tokens = 0;
+        let outputIds: number[] = [];
+        let lastSent = 0;
+        let timer: ReturnType<typeof setTimeout> | null = null;
+
+        const send = () => {
+            if (timer !== null) {
+                clearTimeout(timer);
+                timer = null;
+            }
+            lastSent = now();
+            const text: string = pipe.tokenizer.decode(outputIds, { skip_special_tokens: true });
+            post({ type: "partial", id: request.id, text, tokens });
+        };
+
+        const callback = (beams: { output_token_ids: number[] }[]) => {
+            throwIfCancelled(active);
+            tokens++;
+            outputIds = beams[0].output_token_ids;
+            if (tokens === 1) {
+                timings.stages.first_token = [timings.stages.queue[1], now()];
+                send();
+            } else if (timer === null) {
+                timer = setTimeout(send, Math.max(0, intervalMs - (now() - lastSent)));
+            }
+        };
+        // Drop a pending update once the result is on its way
+        const cancel = () => {
+            if (timer !== null) {
+                clearTimeout(timer);
+                timer = null;
+            }
+        };
+        return { callback, cancel };
+    };
+
+    // Queues a run's model calls with the scheduler, recording the queue
+    // stage (up to its first call), the inference stage (to the end of its
+    // last call) and the run's `queue`. A run cancelled while queued never starts.
+    const scheduleRun = (key: string, request: RunRequest, post: Post, timings: RunTimings, active: ActiveRun, queue: RunQueue): Schedule => {
+        let queued: number | null = null;
+        let waiting = false;
+        return async (task, batch) => {
+            if (queued === null) {
+                queued = now();
+                queue.depth = scheduler.depth();
+            }
+            const queuedAt = queued;
+            try {
+                return await scheduler.schedule({
+                    key,
+                    priority: queue.priority,
+                    task,
+                    batch,
+                    check: () => throwIfCancelled(active),
+                    onQueued: () => {
+                        waiting = true;
+                        post({ type: "queued", id: request.id, queue: { ...queue } });
+                    },
+                    onStart: ({ wait_ms, batch_size }: JobStart) => {
+                        queue.wait_ms += wait_ms;
+                        queue.batch_size = Math.max(queue.batch_size, batch_size);
+                        if (!timings.stages.inference) {
+                            const started = now();
+                            timings.stages.queue = [queuedAt, started];
+                            timings.stages.inference = [started, started];
+                        }
+                        if (waiting) {
+                            waiting = false;
+                            post({ type: "started", id: request.id, queue: { ...queue } });
+                        }
+                    },
+                });
+            } finally {
+                if (timings.stages.inference) {
+                    timings.stages.inference[1] = now();
+                }
+            }
+        };
+    };
+
+    // One call of the pipeline on the inputs of micro-batched runs, split into
+    // each run's output. If it fails or its output doesn't line up with the
+    // inputs, they are run one by one so that each run gets its own error.
+    const runMicroBatch = async (pipe: any, request: RunRequest, inputs: any[]): Promise<PromiseSettledResult<any>[]> => {
+        const split = MICRO_BATCH_TASKS[request.pipeline_type];
+        try {
+            const output = await pipe(inputs, request.config);
+            if (Array.isArray(output) && output.length === inputs.length) {
+                return inputs.map((_, i): PromiseSettledResult<any> => ({ status: "fulfilled", value: split(output, i, request.config) }));
+            }
+        } catch (error) {
+            console.warn("Micro-batched call failed, running items individually:", error);
+        }
+        const settled: PromiseSettledResult<any>[] = [];
+        for (const input of inputs) {
+            try {
+                settled.push({ status: "fulfilled", value: await pipe(input, request.config) });
+            } catch (reason) {
+                settled.push({ status: "rejected", reason });
+            }
+        }
+        return settled;
+    };
+
+    const run = async (request: RunRequest, post: Post, timings: RunTimings, active: ActiveRun, queue: RunQueue) => {
+        const { pipe, key } = await load(request, post, timings);
+        throwIfCancelled(active);
+        scheduler.setMaxConcurrency(request.max_concurrency);
+        const schedule = scheduleRun(key, request, post, timings, active, queue);
+        const objectUrls: string[] = [];
+        try {
+            const decodeStarted = now();
+            if (request.mode === "batch") {
+                const inputs: any[] = [];
+                (request.inputs || []).forEach((input: any, i: number) => {
+                    const chunks = (request.audio_chunks as ([number, number][] | null)[] | null | undefined)?.[i];
+                    if (!chunks) {
+                        inputs.push(toPipelineInput(input, request.mime_types?.[i], objectUrls));
+                        return;
+                    }
+                    // One item per chunk, each a view into the recording
+                    const samples = pcmSamples(input);
+                    inputs.push(...chunks.map(([start, end]) => samples.subarray(start, end)));
+                });
+                timings.stages.decode = [decodeStarted, now()];
+                return await runBatch(pipe, request, inputs, post, active, schedule);
+            }
+            if (request.audio_chunks) {
+                // Views into the one recording; overlapping chunks share samples
+                const samples = pcmSamples(request.inputs);
+                const chunks = (request.audio_chunks as [number, number][]).map(
+                    ([start, end]) => samples.subarray(start, end)
+                );
+                timings.stages.decode = [decodeStarted, now()];
+                return await runBatch(pipe, request, chunks, post, active, schedule);
+            }
+            if (request.text_chunks) {
+                const text: string = request.inputs;
+                const chunks = request.text_chunks.map(([start, end]) => text.slice(start, end));
+                timings.stages.decode = [decodeStarted, now()];
+                return await runBatch(pipe, request, chunks, post, active, schedule);
+            }
+            const inputs = toPipelineInput(request.inputs, request.mime_type, objectUrls);
+            timings.stages.decode = [decodeStarted, now()];
+            if (!request.stream || !pipe.tokenizer) {
+                const batch = MICRO_BATCH_TASKS[request.pipeline_type] && typeof inputs === "string"
+                    ? {
+                        key: JSON.stringify([key, request.config ?? {}]),
+                        input: inputs,
+                        runMany: (many: any[]) => runMicroBatch(pipe, request, many),
+                    }
+                    : undefined;
+                return await schedule(() => pipe(inputs, request.config), batch);
+            }
+            const { callback, cancel } = streamCallback(pipe, request, post, timings, active);
+            try {
+                return await schedule(() => pipe(inputs, { ...request.config, callback_function: callback }));
+            } finally {
+                cancel();
+            }
+        } finally {
+            objectUrls.forEach((url) => URL.revokeObjectURL(url));
+        }
+    };
+
+    // Loads each model in turn, holding it for the client, and runs its
+    // warm-up input once so the first real run skips session initialisation.
+    // A model that fails is reported and the rest are still loaded.
+    const preload = async (request: PreloadRequest, post: Post) => {
+        const models: PreloadModelStatus[] = [];
+        for (let index = 0; index < request.models.length; index++) {
+            const spec = request.models[index];
+            const model: PreloadModelStatus = {
+                model_name: spec.model_name,
+                pipeline_type: spec.pipeline_type,
+                status: "loading",
+                load_ms: null,
+                warmup_ms: null,
+                error: null,
+            };
+            models.push(model);
+            const report = () => post({ type: "preload_progress", id: request.id, index, model: { ...model } });
+            report();
+
+            const objectUrls: string[] = [];
+            try {
+                let started = performance.now();
+                const { pipe, key } = await load(
+                    { ...request, ...spec, client_id: `${request.client_id}#${index}` },
+                    (message, transfer) => post({ ...message, index } as WorkerMessage, transfer),
+                );
+                model.load_ms = performance.now() - started;
+
+                if (spec.warmup_input !== null && spec.warmup_input !== undefined) {
+                    model.status = "warming";
+                    report();
+                    const input = toPipelineInput(spec.warmup_input, spec.mime_type, objectUrls);
+                    started = performance.now();
+                    const output = await scheduler.schedule({
+                        key,
+                        priority: "background",
+                        task: () => pipe(input, spec.config ?? {}),
+                    });
+                    output?.dispose?.();
+                    model.warmup_ms = performance.now() - started;
+                }
+                model.status = "ready";
+            } catch (error: any) {
+                model.status = "error";
+                model.error = error?.message ?? String(error);
+            } finally {
+                objectUrls.forEach((url) => URL.revokeObjectURL(url));
+            }
+            report();
+        }
+        return { ready: models.every((model) => model.status === "ready"), models };
+    };
+
+    // `post` sends a reply to the client that sent `request`
+    const handleMessage = async (request: RunRequest | PreloadRequest | CancelRequest | ReleaseRequest, post: Post) => {
+        if (request.type === "release") {
+            releaseClient(request.client_id);
+            return;
+        }
+        if (request.type === "cancel") {
+            cancel(request);
+            return;
+        }
+        if (request.type !== "run" && request.type !== "preload") {
+            return;
+        }
+        if (request.type === "run") {
+            const existing = request.run_key ? activeRuns.get(request.run_key) : undefined;
+            if (existing) {
+                // Follow the identical run in progress, which now can't be cancelled without us
+                existing.requests.push({ id: request.id, client_id: request.client_id, post });
+                existing.cancelled = false;
+                existing.latest.forEach((message) => post({ ...message, id: request.id }));
+                return;
+            }
+        }
+        const runtime = configureWasm(request);
+        if (request.type === "preload") {
+            const result = await preload(request, post);
+            post({ type: "result", id: request.id, result, meta: { pipeline_cache: pipelineCache.stats(), runtime } });
+            return;
+        }
+        const active: ActiveRun = {
+            key: request.run_key || `#${request.client_id}:${request.id}`,
+            requests: [{ id: request.id, client_id: request.client_id, post }],
+            latest: new Map(),
+            cancelled: false,
+        };
+        activeRuns.set(active.key, active);
+        const reply = broadcast(active);
+        const timings: RunTimings = {
+            stages: {},
+            pipeline_cache_hit: false,
+            input_bytes: inputSize(request.inputs),
+            output_bytes: 0,
+        };
+        const queue: RunQueue = { priority: request.priority ?? "interactive", depth: 0, wait_ms: 0, batch_size: 1 };
+        try {
+            const result = await run(request, reply, timings, active, queue);
+            const serializeStarted = now();
+            const transfer: Transferable[] = [];
+            const packed = packOutput(result, transfer);
+            timings.output_bytes = transfer.reduce((total, buffer) => total + (buffer as ArrayBuffer).byteLength, 0);
+            timings.stages.serialize = [serializeStarted, now()];
+            reply(
+                { type: "result", id: request.id, result: packed, meta: { pipeline_cache: pipelineCache.stats(), scheduler: scheduler.stats(), timings, runtime, queue } },
+                transfer,
+            );
+        } catch (error: any) {
+            // A cancelled run has nobody left to tell
+            reply({
+                type: "error",
+                id: request.id,
+                error: error?.message ?? String(error),
+                meta: { pipeline_cache: pipelineCache.stats(), scheduler: scheduler.stats(), timings, runtime, queue },
+            });
+        } finally {
+            if (activeRuns.get(active.key) === active) {
+                activeRuns.delete(active.key);
+            }
+        }
+    };
+
+    return { handleMessage, pipelineCache, scheduler };
+};
@@ -0,0 +1,178 @@
+// Model calls from every component the worker serves, run at most
+// `maxConcurrency` at a time and never two on one pipeline (an ONNX session
+// runs one call at a time). Waiting calls start in priority order, then in
+// order of arrival. Batchable calls with the same `batch.key` that queued
+// while their pipeline was busy run as one batched call when it frees up;
+// a call finding its pipeline idle starts at once, so only queued calls are
+// batched.
+
+export type Priority = "interactive" | "background";
+
+const PRIORITY_RANK: Record<Priority, number> = { interactive: 0, background: 1 };
+
+export interface JobStart {
+    // Milliseconds the job waited before it started
+    wait_ms: number;
+    // Jobs run in the same call, this one included
+    batch_size: number;
+}
+
+export interface Job<T> {
+    // The pipeline the job calls
+    key: string;
+    priority?: Priority;
+    task: () => Promise<T>;
+    // Jobs with the same key (a pipeline and its call options) can run as
+    // one call of `runMany`, which settles each input separately
+    batch?: { key: string; input: any; runMany: (inputs: any[]) => Promise<PromiseSettledResult<T>[]> };
+    // Called when the job is about to start; throwing drops it (e.g. when cancelled)
+    check?: () => void;
+    // Called when the job has to wait for other jobs
+    onQueued?: () => void;
+    onStart?: (start: JobStart) => void;
+}
+
+interface Entry {
+    job: Job<any>;
+    rank: number;
+    queuedAt: number;
+    resolve: (value: any) => void;
+    reject: (error: any) => void;
+}
+
+export interface SchedulerStats {
+    max_concurrency: number;
+    running: number;
+    queued: number;
+    batched_calls: number;
+}
+
+export class InferenceScheduler {
+    private queue: Entry[] = [];
+    private busy = new Set<string>();
+    private maxConcurrency: number;
+    private maxBatchSize: number;
+    running = 0;
+    batchedCalls = 0;
+
+    constructor(
+        maxConcurrency = 1,
+        { maxBatchSize = 8 }: { maxBatchSize?: number } = {},
+    ) {
+        this.maxConcurrency = maxConcurrency;
+        this.maxBatchSize = maxBatchSize;
+    }
+
+    setMaxConcurrency(maxConcurrency: number | undefined) {
+        this.maxConcurrency = Math.max(1, maxConcurrency ?? this.maxConcurrency);
+        this.pump();
+    }
+
+    // Jobs queued or running
+    depth(): number {
+        return this.queue.length + this.running;
+    }
+
+    schedule<T>(job: Job<T>): Promise<T> {
+        return new Promise<T>((resolve, reject) => {
+            const entry: Entry = {
+                job,
+                rank: PRIORITY_RANK[job.priority ?? "interactive"],
+                queuedAt: performance.now(),
+                resolve,
+                reject,
+            };
+            this.queue.push(entry);
+            this.pump();
+            if (this.queue.includes(entry) && (this.running >= this.maxConcurrency || this.busy.has(job.key))) {
+                job.onQueued?.();
+            }
+        });
+    }
+
+    stats(): SchedulerStats {
+        return {
+            max_concurrency: this.maxConcurrency,
+            running: this.running,
+            queued: this.queue.length,
+            batched_calls: this.batchedCalls,
+        };
+    }
+
+    // Starts waiting jobs while there is room
+    private pump() {
+        const reserved = new Set(this.busy);
+        // Highest priority first; the sort is stable, so arrival order within a priority
+        for (const entry of [...this.queue].sort((a, b) => a.rank - b.rank)) {
+            if (this.running >= this.maxConcurrency) {
+                break;
+            }
+            if (!this.queue.includes(entry) || reserved.has(entry.job.key)) {
+                continue;
+            }
+            if (this.start(entry)) {
+                reserved.add(entry.job.key);
+            }
+        }
+    }
+
+    // Starts the entry with the waiting jobs that batch with it; false if all were dropped
+    private start(first: Entry): boolean {
+        const batchKey = first.job.batch?.key;
+        const group = batchKey === undefined
+            ? [first]
+            : [first, ...this.queue.filter((entry) => entry !== first && entry.job.batch?.key === batchKey)
+                .sort((a, b) => a.rank - b.rank)].slice(0, this.maxBatchSize);
+        this.queue = this.queue.filter((entry) => !group.includes(entry));
+
+        const runnable = group.filter((entry) => {
+            try {
+                entry.job.check?.();
+                return true;
+            } catch (error) {
+                entry.reject(error);
+                return false;
+            }
+        });
+        if (runnable.length === 0) {
+            return false;
+        }
+
+        const started = performance.now();
+        runnable.forEach((entry) => entry.job.onStart?.({ wait_ms: started - entry.queuedAt, batch_size: runnable.length }));
+        const key = first.job.key;
+        this.running++;
+        this.busy.add(key);
+        this.run(runnable).finally(() => {
+            this.running--;
+            this.busy.delete(key);
+            this.pump();
+        });
+        return true;
+    }
+
+    private async run(entries: Entry[]) {
+        if (entries.length === 1) {
+            try {
+                entries[0].resolve(await entries[0].job.task());
+            } catch (error) {
+                entries[0].reject(error);
+            }
+            return;
+        }
+        this.batchedCalls++;
+        try {
+            const settled = await entries[0].job.batch!.runMany(entries.map((entry) => entry.job.batch!.input));
+            entries.forEach((entry, i) => {
+                const outcome = settled[i];
+                if (outcome.status === "fulfilled") {
+                    entry.resolve(outcome.value);
+                } else {
+                    entry.reject(outcome.reason);
+                }
+            });
+        } catch (error) {
+            entries.forEach((entry) => entry.reject(error));
+        }
+    }
+}
@@ -0,0 +1,93 @@
+// Coalesces component state updates into one `sync` state value, so Python
+// sees a whole update at once and reruns once per flush instead of once per
+// key. Updates that change nothing are not sent, and intermediate updates
+// (download progress) are throttled to one flush per `intervalMs`. Each flush
+// carries the mount's `session` id and an increasing `seq`, which Python
+// uses to drop stale snapshots.
+
+import { useEffect, useRef } from "react";
+
+export interface StateSnapshot {
+    session: string;
+    seq: number;
+    state: Record<string, any>;
+}
+
+// Statuses sent as soon as they are set
+const IMMEDIATE_STATUSES = new Set(["complete", "error", "cancelled"]);
+
+export const createStateSync = (
+    setStateValue: (name: string, value: any) => void,
+    { intervalMs = 500 }: { intervalMs?: number } = {},
+) => {
+    const session = Math.random().toString(36).slice(2);
+    const current: Record<string, any> = {};
+    let seq = 0;
+    let lastSent: string | null = null;
+    let lastFlush = 0;
+    let timer: ReturnType<typeof setTimeout> | null = null;
+
+    const flush = () => {
+        if (timer !== null) {
+            clearTimeout(timer);
+            timer = null;
+        }
+        const serialized = JSON.stringify(current);
+        if (serialized === lastSent) {
+            return;
+        }
+        lastSent = serialized;
+        lastFlush = Date.now();
+        setStateValue("sync", { session, seq: ++seq, state: JSON.parse(serialized) } as StateSnapshot);
+    };
+
+    // Merge `changes` into the state; keys set to undefined are removed
+    const update = (changes: Record<string, any>) => {
+        for (const [key, value] of Object.entries(changes)) {
+            if (value === undefined) {
+                delete current[key];
+            } else {
+                current[key] = value;
+            }
+        }
+
+        if (lastSent === null || IMMEDIATE_STATUSES.has(changes.status)) {
+            flush();
+        } else if (timer === null) {
+            timer = setTimeout(flush, Math.max(0, intervalMs - (Date.now() - lastFlush)));
+        }
+    };
+
+    // Stop a pending flush, e.g. when the component unmounts
+    const dispose = () => {
+        if (timer !== null) {
+            clearTimeout(timer);
+            timer = null;
+        }
+    };
+
+    // Change the throttle interval, e.g. when `progress_interval` changes on a rerun
+    const setIntervalMs = (ms: number | undefined) => {
+        intervalMs = ms ?? 500;
+    };
+
+    return { update, flush, dispose, setIntervalMs };
+};
+
+export type StateSync = ReturnType<typeof createStateSync>;
+
+// A component's state sync, created on its first render
+export const useStateSync = (
+    setStateValue: (name: string, value: any) => void,
+    intervalMs?: number,
+): StateSync => {
+    const ref = useRef<StateSync | null>(null);
+    if (!ref.current) {
+        ref.current = createStateSync(setStateValue, { intervalMs });
+    }
+    const sync = ref.current;
+    useEffect(() => {
+        sync.setIntervalMs(intervalMs);
+    }, [intervalMs]);
+    return sync;
+};
@@ -0,0 +1,39 @@
+// Module worker that owns model loading and inference, keeping the main
+// thread free for rendering and Streamlit messages. See runtime.ts for the
+// message protocol.
+//
+// Started as a dedicated Worker it serves the component instances on one
+// page. Started as a SharedWorker it serves every page of the app on the
+// origin: each model is loaded once, and released shortly after the last
+// component using it goes away.
+import { pipeline, env } from "@xenova/transformers";
+import { createRuntime, Post } from "./runtime";
+
+// Models come from the hub unless a run asks for the local mirror
+// (see configureModelSource in runtime.ts).
+env.allowLocalModels = false;
+
+// How long a shared model stays loaded after its last user releases it
+const SHARED_RELEASE_DELAY_MS = 30000;
+
+declare const SharedWorkerGlobalScope: any;
+
+if (typeof SharedWorkerGlobalScope !== "undefined" && self instanceof SharedWorkerGlobalScope) {
+    const runtime = createRuntime({ pipeline, env }, { releaseDelayMs: SHARED_RELEASE_DELAY_MS });
+    let nextPortId = 0;
+
+    (self as any).onconnect = (event: MessageEvent) => {
+        const port = event.ports[0];
+        const portId = ++nextPortId;
+        const post: Post = (message, transfer = []) => port.postMessage(message, transfer);
+        port.onmessage = (message: MessageEvent) => {
+            // Client ids are only unique per page, so namespace them by port
+            runtime.handleMessage({ ...message.data, client_id: `${portId}:${message.data.client_id}` }, post);
+        };
+        port.start();
+    };
+} else {
+    const runtime = createRuntime({ pipeline, env });
+    const post: Post = (message, transfer = []) => self.postMessage(message, { transfer });
+    self.onmessage = (event: MessageEvent) => runtime.handleMessage(event.data, post);
+}
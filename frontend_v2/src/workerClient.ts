@@ -0,0 +1,209 @@
+// Main-thread side of the inference worker. Workers are created lazily and
+// reused by every render and every component instance on the page: a
+// dedicated Worker by default, or a SharedWorker (one for all pages of the
+// app) when a component asks for `shared_worker`.
+import { cancelledError, now } from "./runtime";
+import type { PreloadRequest, RunRequest, RunTimings, WorkerMessage } from "./runtime";
+
+type Progress = Exclude<WorkerMessage, { type: "result" } | { type: "error" }>;
+type WorkerKind = "dedicated" | "shared";
+
+interface PendingRun {
+    resolve: (message: { result: any; meta: any }) => void;
+    reject: (error: Error) => void;
+    onMessage: (message: Progress) => void;
+    started: number;
+}
+
+interface WorkerPort {
+    postMessage: (message: any, transfer: Transferable[]) => void;
+}
+
+const workers: Partial<Record<WorkerKind, WorkerPort>> = {};
+const pendingRuns = new Map<number, PendingRun>();
+let nextRunId = 0;
+// Component instances on this page that sent requests, released on pagehide
+const clientIds = new Set<string>();
+// Makes run ids unique across pages of the app
+const pageId = Math.random().toString(36).slice(2);
+
+const round = (ms: number) => Math.round(ms * 10) / 10;
+
+// Tags a run's timings with its id and start, and adds the worker -> page transfer
+const receiveTimings = <T extends { id: number; meta: any }>(message: T, started: number): T => {
+    const timings: RunTimings | undefined = message.meta?.timings;
+    if (timings) {
+        timings.run_id = `${pageId}-${message.id}`;
+        timings.started_at = started;
+        if (timings.stages.serialize) {
+            timings.stages.transfer = [timings.stages.serialize[1], now()];
+        }
+    }
+    return message;
+};
+
+// Makes stage marks relative to the start of the run and stamps when the
+// value is sent to Streamlit, optionally adding the page's encode stage
+export const finishTimings = (timings: RunTimings | undefined, encode?: [number, number]): RunTimings | undefined => {
+    if (!timings || timings.started_at === undefined) {
+        return timings;
+    }
+    const origin = timings.started_at;
+    const stages: Record<string, [number, number]> = {};
+    for (const [name, [start, end]] of Object.entries({ ...timings.stages, ...(encode && { encode }) })) {
+        stages[name] = [round(start - origin), round(end - origin)];
+    }
+    const sentAt = now();
+    return { ...timings, stages, total_ms: round(sentAt - origin), sent_at: sentAt };
+};
+
+const onWorkerMessage = (event: MessageEvent<WorkerMessage>) => {
+    const message = event.data;
+    const run = pendingRuns.get(message.id);
+    if (!run) {
+        return;
+    }
+    if (message.type === "result") {
+        pendingRuns.delete(message.id);
+        run.resolve(receiveTimings(message, run.started));
+    } else if (message.type === "error") {
+        pendingRuns.delete(message.id);
+        run.reject(Object.assign(new Error(message.error), { meta: receiveTimings(message, run.started).meta }));
+    } else {
+        run.onMessage(message);
+    }
+};
+
+const onWorkerError = (kind: WorkerKind) => (event: Event) => {
+    console.error("Transformers.js worker failed:", (event as ErrorEvent).message);
+    for (const run of pendingRuns.values()) {
+        run.reject(new Error("Transformers.js worker failed to load"));
+    }
+    pendingRuns.clear();
+    // Start a fresh worker on the next run
+    delete workers[kind];
+};
+
+const getWorker = (shared: boolean): WorkerPort => {
+    if (shared && typeof SharedWorker === "undefined") {
+        console.warn("SharedWorker is not supported by this browser; using a dedicated worker.");
+        shared = false;
+    }
+    const kind: WorkerKind = shared ? "shared" : "dedicated";
+    const existing = workers[kind];
+    if (existing) {
+        return existing;
+    }
+
+    if (shared) {
+        const sharedWorker = new SharedWorker(new URL("./worker.ts", import.meta.url), {
+            type: "module",
+            name: "st-transformers-js",
+        });
+        sharedWorker.port.onmessage = onWorkerMessage;
+        sharedWorker.onerror = onWorkerError(kind);
+        sharedWorker.port.start();
+        workers[kind] = sharedWorker.port;
+    } else {
+        const worker = new Worker(new URL("./worker.ts", import.meta.url), { type: "module" });
+        worker.onmessage = onWorkerMessage;
+        worker.onerror = onWorkerError(kind);
+        workers[kind] = worker;
+    }
+    return workers[kind]!;
+};
+
+// With `signal`, aborting rejects the run at once and tells the worker,
+// which stops it unless an identical request is attached to it
+const sendRequest = (
+    request: Omit<RunRequest, "id"> | Omit<PreloadRequest, "id">,
+    onMessage: (message: Progress) => void,
+    shared: boolean,
+    transfer: Transferable[] = [],
+    signal?: AbortSignal,
+): Promise<{ result: any; meta: any }> => {
+    const id = ++nextRunId;
+    return new Promise((resolve, reject) => {
+        if (signal?.aborted) {
+            reject(cancelledError());
+            return;
+        }
+        const worker = getWorker(shared);
+        signal?.addEventListener("abort", () => {
+            if (pendingRuns.delete(id)) {
+                worker.postMessage({ type: "cancel", id, client_id: request.client_id }, []);
+                reject(cancelledError());
+            }
+        }, { once: true });
+        clientIds.add(request.client_id);
+        pendingRuns.set(id, { resolve, reject, onMessage, started: now() });
+        worker.postMessage({ ...request, id }, transfer);
+    });
+};
+
+export const runInWorker = (
+    request: Omit<RunRequest, "type" | "id">,
+    onMessage: (message: Progress) => void,
+    shared = false,
+    signal?: AbortSignal,
+): Promise<{ result: any; meta: any }> => {
+    const transfer: Transferable[] = [];
+    // Copy bytes out of the (shared) component payload once, then move the
+    // copy into the worker instead of cloning it again
+    const detach = (input: any) => {
+        if (!(input instanceof Uint8Array)) {
+            return input;
+        }
+        const copy = input.slice();
+        transfer.push(copy.buffer);
+        return copy;
+    };
+    const inputs = Array.isArray(request.inputs) ? request.inputs.map(detach) : detach(request.inputs);
+    return sendRequest({ ...request, inputs, type: "run" }, onMessage, shared, transfer, signal);
+};
+
+// Load and warm up models ahead of the runs that will use them
+export const preloadInWorker = (
+    request: Omit<PreloadRequest, "type" | "id">,
+    onMessage: (message: Progress) => void,
+    shared = false,
+): Promise<{ result: any; meta: any }> => sendRequest({ ...request, type: "preload" }, onMessage, shared);
+
+// Drop a component instance's model reference, e.g. when it unmounts
+export const releaseClient = (clientId: string) => {
+    clientIds.delete(clientId);
+    for (const worker of Object.values(workers)) {
+        worker?.postMessage({ type: "release", client_id: clientId }, []);
+    }
+};
+
+// Drop this page's model references when it goes away; a SharedWorker
+// outlives the page and would otherwise keep its models referenced
+if (typeof window !== "undefined") {
+    window.addEventListener("pagehide", () => {
+        for (const clientId of [...clientIds]) {
+            releaseClient(clientId);
+        }
+    });
+}
+
+// Tensors come back from the worker as { __tensor__, type, dims, data } with
+// a typed array; turn them into JSON-friendly values for Streamlit.
+export const toSerializable = (value: any): any => {
+    if (ArrayBuffer.isView(value)) {
+        return Array.from(value as unknown as ArrayLike<number>);
+    }
+    if (Array.isArray(value)) {
+        return value.map(toSerializable);
+    }
+    if (value && typeof value === "object") {
+        const plain: Record<string, any> = {};
+        for (const [key, item] of Object.entries(value)) {
+            if (key !== "__tensor__") {
+                plain[key] = toSerializable(item);
+            }
+        }
+        return plain;
+    }
+    return value;
+};
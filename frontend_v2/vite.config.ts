@@ -2,14 +2,31 @@ import { defineConfig } from 'vite'
 import react from '@vitejs/plugin-react'
 import { resolve } from 'path'
 
+// Content-hashed file names: index.html is the only file whose URL stays the
+// same between builds, so everything else can be cached indefinitely.
+// build_script.sh adds .gz/.br variants and checks the size budget.
+const hashedOutput = {
+  entryFileNames: 'assets/[name]-[hash].js',
+  chunkFileNames: 'assets/[name]-[hash].js',
+  assetFileNames: 'assets/[name]-[hash][extname]',
+}
+
 export default defineConfig({
   plugins: [react()],
   base: './',
+  worker: {
+    // Module workers so the worker bundle can share chunks with the page
+    format: 'es',
+    rollupOptions: {
+      output: hashedOutput,
+    },
+  },
   build: {
     outDir: 'dist',
     emptyOutDir: true,
     rollupOptions: {
       input: resolve(__dirname, 'index.html'),
+      output: hashedOutput,
     },
   },
 })
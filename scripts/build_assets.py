@@ -0,0 +1,206 @@
+"""
+Fingerprint, precompress and size-check built frontend assets.
+
+Run by ``build_script.sh`` on each build directory after the files are in
+place:
+
+- ``--hash NAME`` renames ``NAME`` to include a hash of its content (e.g.
+  ``runtime.js`` -> ``runtime.3f2a9c1e.js``) and rewrites quoted references
+  to it in the other text assets. Names are hashed in the order given, so
+  list a file after the files it references: its hash then covers theirs.
+- Every compressible asset gets a ``.gz`` variant, and a ``.br`` variant
+  when the ``brotli`` package is installed.
+- ``asset-manifest.json`` records each asset's original name, file name
+  and raw/gzip/brotli sizes.
+- The gzip size of each asset and of all of them together is checked
+  against ``--max-file-kb`` and ``--max-total-kb``; the exit status is 1
+  when either is exceeded.
+
+Usage: ``python scripts/build_assets.py DIR [--hash NAME ...] [--max-total-kb N]``
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+
+MANIFEST_NAME = "asset-manifest.json"
+
+# Extensions worth compressing; images and fonts are already compressed
+COMPRESSIBLE = (".js", ".mjs", ".css", ".html", ".json", ".svg", ".wasm", ".map", ".txt")
+# Files whose references to hashed names are rewritten
+TEXT = (".js", ".mjs", ".css", ".html")
+# Below this, the compressed variant saves less than a request header
+MIN_COMPRESS_BYTES = 1024
+HASH_LENGTH = 8
+
+
+def _load_brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def hashed_name(name, content):
+    """
+    Return ``name`` with a hash of ``content`` before its last extension.
+    """
+    digest = hashlib.sha256(content).hexdigest()[:HASH_LENGTH]
+    stem, ext = os.path.splitext(name)
+    return f"{stem}.{digest}{ext}"
+
+
+def _asset_files(directory):
+    # Assets relative to ``directory``, skipping precompressed variants and the manifest
+    names = []
+    for root, _, files in os.walk(directory):
+        for file in files:
+            if file.endswith((".gz", ".br")) or file == MANIFEST_NAME:
+                continue
+            names.append(os.path.relpath(os.path.join(root, file), directory).replace(os.sep, "/"))
+    return sorted(names)
+
+
+def hash_assets(directory, names):
+    """
+    Rename ``names`` in ``directory`` to content-hashed names.
+
+    Quoted references to each name (``"name"``, ``'name'`` or ``'./name'``)
+    in the other text assets are rewritten before the next name is hashed.
+    Returns a dict mapping each original name to its hashed name.
+    """
+    renamed = {}
+    for name in names:
+        path = os.path.join(directory, name)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Cannot hash {name}: not found in {directory}")
+        with open(path, "rb") as f:
+            content = f.read()
+
+        new_name = hashed_name(name, content)
+        os.replace(path, os.path.join(directory, new_name))
+        renamed[name] = new_name
+
+        pattern = re.compile(r"(?<=['\"])(\./)?" + re.escape(name) + r"(?=['\"])")
+        for other in _asset_files(directory):
+            if not other.endswith(TEXT) or other == new_name:
+                continue
+            other_path = os.path.join(directory, other)
+            with open(other_path, encoding="utf-8") as f:
+                text = f.read()
+            updated = pattern.sub(lambda m: (m.group(1) or "") + new_name, text)
+            if updated != text:
+                with open(other_path, "w", encoding="utf-8") as f:
+                    f.write(updated)
+    return renamed
+
+
+def compress_assets(directory, brotli=None):
+    """
+    Write ``.gz`` (and ``.br`` if ``brotli`` is given) variants of the
+    compressible assets in ``directory``.
+
+    Returns a dict mapping each asset to ``{"bytes", "gzip", "br"}`` sizes;
+    a compressed size is None when no variant was written for it.
+    """
+    sizes = {}
+    for name in _asset_files(directory):
+        path = os.path.join(directory, name)
+        with open(path, "rb") as f:
+            content = f.read()
+        entry = {"bytes": len(content), "gzip": None, "br": None}
+        sizes[name] = entry
+        if not name.endswith(COMPRESSIBLE) or len(content) < MIN_COMPRESS_BYTES:
+            continue
+
+        # mtime=0 keeps the output identical across builds
+        compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        if len(compressed) < len(content):
+            with open(path + ".gz", "wb") as f:
+                f.write(compressed)
+            entry["gzip"] = len(compressed)
+
+        if brotli is not None:
+            compressed = brotli.compress(content, quality=11)
+            if len(compressed) < len(content):
+                with open(path + ".br", "wb") as f:
+                    f.write(compressed)
+                entry["br"] = len(compressed)
+    return sizes
+
+
+def check_budget(sizes, max_total_kb=None, max_file_kb=None):
+    """
+    Return a list of messages for assets over budget.
+
+    Budgets apply to the size sent to browsers: the gzip size, or the raw
+    size of assets that are not compressed.
+    """
+    def sent(entry):
+        return entry["gzip"] if entry["gzip"] is not None else entry["bytes"]
+
+    problems = []
+    if max_file_kb is not None:
+        for name, entry in sizes.items():
+            if sent(entry) > max_file_kb * 1024:
+                problems.append(f"{name} is {sent(entry) / 1024:.1f} KB, over the {max_file_kb} KB per-file budget")
+    if max_total_kb is not None:
+        total = sum(sent(entry) for entry in sizes.values())
+        if total > max_total_kb * 1024:
+            problems.append(f"Assets total {total / 1024:.1f} KB, over the {max_total_kb} KB budget")
+    return problems
+
+
+def build(directory, hash_names=(), max_total_kb=None, max_file_kb=None, brotli=None):
+    """
+    Hash, compress and size-check the assets in ``directory``.
+
+    Writes ``asset-manifest.json`` and returns ``(manifest, problems)``.
+    """
+    renamed = hash_assets(directory, hash_names)
+    sizes = compress_assets(directory, brotli=brotli)
+    original = {new: old for old, new in renamed.items()}
+
+    manifest = {
+        "files": {original.get(name, name): {"file": name, **entry} for name, entry in sizes.items()},
+        "budget": {"max_total_kb": max_total_kb, "max_file_kb": max_file_kb},
+    }
+    with open(os.path.join(directory, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest, check_budget(sizes, max_total_kb, max_file_kb)
+
+
+def _kb(size):
+    return "-" if size is None else f"{size / 1024:.1f}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("directory")
+    parser.add_argument("--hash", nargs="+", default=[], metavar="NAME", help="Assets to rename with a content hash, in order")
+    parser.add_argument("--max-total-kb", type=float, help="Budget for all assets together (gzip KB)")
+    parser.add_argument("--max-file-kb", type=float, help="Budget for any one asset (gzip KB)")
+    args = parser.parse_args(argv)
+
+    brotli = _load_brotli()
+    if brotli is None:
+        print("brotli is not installed; writing .gz variants only (pip install brotli for .br)")
+
+    manifest, problems = build(args.directory, args.hash, args.max_total_kb, args.max_file_kb, brotli)
+
+    print(f"{'asset':<40} {'raw KB':>10} {'gzip KB':>10} {'br KB':>10}")
+    for entry in sorted(manifest["files"].values(), key=lambda e: e["file"]):
+        print(f"{entry['file']:<40} {_kb(entry['bytes']):>10} {_kb(entry['gzip']):>10} {_kb(entry['br']):>10}")
+
+    for problem in problems:
+        print(f"Size budget exceeded: {problem}", file=sys.stderr)
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,13 +1,17 @@
+import importlib
+import json
 import os
 import warnings
 
+from .cache import ResultCache
+
 __version__ = "0.2.0"
 
 # Verify frontend builds exist
 _package_dir = os.path.dirname(os.path.abspath(__file__))
 
 _v1_build_dir = os.path.join(_package_dir, "frontend_v1", "build")
-_v1_required_files = ["index.html", "transformers.min.js"]
+_v1_required_files = ["index.html", "worker.js", "runtime.js", "transformers.min.js"]
 
 _v2_build_dir = os.path.join(_package_dir, "frontend_v2", "dist")
 _v2_required_files = ["index.html"]
@@ -20,13 +24,24 @@ def _verify_build(build_dir: str, required_files: list, version: str) -> bool:
             f"The {version} component will not work. "
             f"Run './build_script.sh' to build frontend assets.",
             RuntimeWarning,
-            stacklevel=2
+            stacklevel=3
         )
         return False
 
+    # build_script.sh renames assets to content-hashed names and records
+    # the mapping in asset-manifest.json
+    hashed = {}
+    manifest_path = os.path.join(build_dir, "asset-manifest.json")
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, encoding="utf-8") as f:
+                hashed = {name: entry["file"] for name, entry in json.load(f)["files"].items()}
+        except (OSError, ValueError, KeyError, TypeError):
+            hashed = {}
+
     missing_files = []
     for file in required_files:
-        if not os.path.exists(os.path.join(build_dir, file)):
+        if not os.path.exists(os.path.join(build_dir, hashed.get(file, file))):
             missing_files.append(file)
 
     if missing_files:
@@ -35,37 +50,86 @@ def _verify_build(build_dir: str, required_files: list, version: str) -> bool:
             f"The {version} component may not work correctly. "
             f"Run './build_script.sh' to rebuild frontend assets.",
             RuntimeWarning,
-            stacklevel=2
+            stacklevel=3
         )
         return False
 
     return True
 
-# Verify builds on import
-_v1_ok = _verify_build(_v1_build_dir, _v1_required_files, "v1")
-_v2_ok = _verify_build(_v2_build_dir, _v2_required_files, "v2")
+# Public name -> (module, attribute). The component modules, and through
+# them Streamlit's component machinery, are imported on first access, so
+# importing the package (e.g. for the CLI) stays cheap.
+_lazy_exports = {
+    "transformers_js_pipeline": ("v1", "transformers_js_pipeline"),
+    "transformers_js_pipeline_v1": ("v1", "transformers_js_pipeline"),
+    "transformers_js_pipeline_batch": ("v1", "transformers_js_pipeline_batch"),
+    "preload_models": ("v1", "preload_models"),
+    "transformers_js_pipeline_v2": ("v2", "transformers_js_pipeline_v2"),
+    "transformers_js_pipeline_batch_v2": ("v2", "transformers_js_pipeline_batch_v2"),
+    "preload_models_v2": ("v2", "preload_models_v2"),
+    "transformers_js_pipeline_fragment_v2": ("fragments", "transformers_js_pipeline_fragment_v2"),
+    "list_cached_models": ("v1", "list_cached_models"),
+    "evict_cached_model": ("v1", "evict_cached_model"),
+    "set_cache_budget": ("v1", "set_cache_budget"),
+    "list_cached_models_v2": ("v2", "list_cached_models_v2"),
+    "evict_cached_model_v2": ("v2", "evict_cached_model_v2"),
+    "set_cache_budget_v2": ("v2", "set_cache_budget_v2"),
+    "MetricsCollector": ("metrics", "MetricsCollector"),
+    "TokenStream": ("streaming", "TokenStream"),
+}
 
-# Import with warnings if builds missing
-if _v1_ok:
-    from .v1 import transformers_js_pipeline
-    from .v1 import transformers_js_pipeline as transformers_js_pipeline_v1
-else:
-    def transformers_js_pipeline(*args, **kwargs):
-        raise RuntimeError(
-            "V1 component frontend not built. Run './build_script.sh' first."
-        )
-    transformers_js_pipeline_v1 = transformers_js_pipeline
+_builds = {
+    "v1": (_v1_build_dir, _v1_required_files),
+    "v2": (_v2_build_dir, _v2_required_files),
+}
+# Modules that use another module's frontend build
+_build_of = {"fragments": "v2"}
+_build_ok = {}
 
-if _v2_ok:
-    from .v2 import transformers_js_pipeline_v2
-else:
-    def transformers_js_pipeline_v2(*args, **kwargs):
+def _missing_build_stub(version: str):
+    def stub(*args, **kwargs):
         raise RuntimeError(
-            "V2 component frontend not built. Run './build_script.sh' first."
+            f"{version.upper()} component frontend not built. Run './build_script.sh' first."
         )
+    return stub
+
+def __getattr__(name: str):
+    if name not in _lazy_exports:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    module, attribute = _lazy_exports[name]
+    build = _build_of.get(module, module)
+    # Verify a component's build on first use, with warnings if it is missing
+    if build in _builds and build not in _build_ok:
+        build_dir, required_files = _builds[build]
+        _build_ok[build] = _verify_build(build_dir, required_files, build)
+
+    if _build_ok.get(build, True):
+        value = getattr(importlib.import_module(f".{module}", __name__), attribute)
+    else:
+        value = _missing_build_stub(build)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_lazy_exports))
 
 __all__ = [
     "transformers_js_pipeline",
     "transformers_js_pipeline_v1",
-    "transformers_js_pipeline_v2"
+    "transformers_js_pipeline_v2",
+    "transformers_js_pipeline_batch",
+    "transformers_js_pipeline_batch_v2",
+    "transformers_js_pipeline_fragment_v2",
+    "preload_models",
+    "preload_models_v2",
+    "list_cached_models",
+    "list_cached_models_v2",
+    "evict_cached_model",
+    "evict_cached_model_v2",
+    "set_cache_budget",
+    "set_cache_budget_v2",
+    "ResultCache",
+    "MetricsCollector",
+    "TokenStream",
 ]
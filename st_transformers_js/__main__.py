@@ -0,0 +1,78 @@
+"""
+Command line tools for st-transformers-js.
+
+    python -m st_transformers_js prefetch Xenova/distilbert-base-uncased-finetuned-sst-2-english
+    python -m st_transformers_js verify
+"""
+import argparse
+import sys
+
+from .mirror import DEFAULT_INCLUDE, DEFAULT_MIRROR_DIR, prefetch_model, verify_mirror
+
+
+def _prefetch(args) -> int:
+    include = None if args.all_files else (args.include or list(DEFAULT_INCLUDE))
+    status = 0
+    for model_name in args.models:
+        try:
+            entry = prefetch_model(
+                model_name,
+                mirror_dir=args.mirror_dir,
+                revision=args.revision,
+                include=include,
+                endpoint=args.endpoint,
+                token=args.token,
+                force=args.force,
+                progress=None if args.quiet else print,
+            )
+        except (RuntimeError, ValueError, OSError) as e:
+            print(f"error: {e}", file=sys.stderr)
+            status = 1
+            continue
+        total = sum(f["size"] for f in entry["files"])
+        print(f"{model_name}@{entry['commit']}: {len(entry['files'])} files, {total} bytes")
+    return status
+
+
+def _verify(args) -> int:
+    problems = verify_mirror(args.mirror_dir, args.models or None)
+    for problem in problems:
+        print(problem, file=sys.stderr)
+    if not problems:
+        print("Mirror OK")
+    return 1 if problems else 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m st_transformers_js")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    prefetch = subparsers.add_parser(
+        "prefetch", help="Download models into a local mirror for model_source='local'"
+    )
+    prefetch.add_argument("models", nargs="+", help="Hugging Face model identifiers")
+    prefetch.add_argument("--mirror-dir", default=DEFAULT_MIRROR_DIR,
+                          help=f"Mirror directory (default: {DEFAULT_MIRROR_DIR})")
+    prefetch.add_argument("--revision", default="main", help="Branch, tag or commit")
+    prefetch.add_argument("--include", action="append", metavar="PATTERN",
+                          help="Glob of repository files to download; repeatable "
+                               f"(default: {' '.join(DEFAULT_INCLUDE)})")
+    prefetch.add_argument("--all-files", action="store_true", help="Download every file")
+    prefetch.add_argument("--endpoint", help="Hub URL (default: $HF_ENDPOINT or https://huggingface.co)")
+    prefetch.add_argument("--token", help="Access token (default: $HF_TOKEN)")
+    prefetch.add_argument("--force", action="store_true", help="Re-download files already mirrored")
+    prefetch.add_argument("--quiet", action="store_true", help="Only print a summary per model")
+    prefetch.set_defaults(func=_prefetch)
+
+    verify = subparsers.add_parser("verify", help="Check mirrored files against the manifest")
+    verify.add_argument("models", nargs="*", help="Models to check (default: all)")
+    verify.add_argument("--mirror-dir", default=DEFAULT_MIRROR_DIR,
+                        help=f"Mirror directory (default: {DEFAULT_MIRROR_DIR})")
+    verify.set_defaults(func=_verify)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,654 @@
+import contextlib
+import hashlib
+import io
+import math
+import re
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from .chunking import merge_chunked, regroup_batch
+
+# Tasks whose binary inputs are decoded to PCM in Python. In a worker
+# transformers.js has no AudioContext to decode audio files itself.
+AUDIO_TASKS = ("automatic-speech-recognition", "audio-classification", "zero-shot-audio-classification")
+
+# Sampling rate models expect unless listed in MODEL_SAMPLING_RATES
+DEFAULT_SAMPLING_RATE = 16000
+
+MODEL_SAMPLING_RATES: Dict[str, int] = {
+    "Xenova/clap-htsat-unfused": 48000,
+    "Xenova/larger_clap_general": 48000,
+    "Xenova/larger_clap_music_and_speech": 48000,
+}
+
+# (window, overlap) in seconds for recordings longer than one window.
+# Whisper sees 30 s at a time; classifiers are trained on ~10 s clips.
+DEFAULT_CHUNKING: Dict[str, Tuple[float, float]] = {
+    "automatic-speech-recognition": (30.0, 5.0),
+    "audio-classification": (10.0, 2.0),
+    "zero-shot-audio-classification": (10.0, 2.0),
+}
+
+# MIME type of decoded audio: mono little-endian float32 samples
+PCM_MIME_TYPE = "audio/pcm;format=f32le"
+
+_DEFAULT_OPTIONS = {"sampling_rate": "auto", "chunk_length_s": "auto", "overlap_s": "auto"}
+
+# Output samples resampled per block, bounding memory for long recordings
+_BLOCK_SAMPLES = 1 << 20
+# Zero crossings on each side of the anti-aliasing filter's centre
+_FILTER_ZERO_CROSSINGS = 8
+_KAISER_BETA = 8.6
+
+_WAVE_FORMAT_PCM = 1
+_WAVE_FORMAT_IEEE_FLOAT = 3
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# Decoded recordings are large, so keep fewer of them than images
+_PROCESSED_CACHE_SIZE = 4
+_processed: "OrderedDict[str, Optional[Tuple[bytes, List[List[int]], dict]]]" = OrderedDict()
+_processed_lock = threading.Lock()
+
+
+def _import_numpy():
+    try:
+        import numpy as np
+    except ImportError as e:
+        raise ImportError(
+            "Audio inputs require numpy. Install it with: pip install st-transformers-js[audio]"
+        ) from e
+    return np
+
+
+def _check_seconds(name: str, value, allow_none: bool) -> None:
+    if value == "auto" or (allow_none and value is None):
+        return
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        raise ValueError(f'audio_options {name} must be a non-negative number or "auto", got {value!r}')
+
+
+def resolve_audio_options(audio_options: Union[bool, dict, None]) -> Optional[dict]:
+    """
+    Validate the ``audio_options`` argument of the pipeline functions.
+
+    Returns None when audio decoding is off (``False``), otherwise the
+    options with defaults filled in: ``sampling_rate`` (int, or "auto" for
+    the model's rate), ``chunk_length_s`` (seconds, None for no chunking,
+    or "auto" for the per-task default) and ``overlap_s``.
+    """
+    if audio_options is False:
+        return None
+    if audio_options is None or audio_options is True:
+        options = dict(_DEFAULT_OPTIONS)
+    elif isinstance(audio_options, dict):
+        unknown = set(audio_options) - set(_DEFAULT_OPTIONS)
+        if unknown:
+            raise ValueError(f"Unknown audio_options: {sorted(unknown)}")
+        options = {**_DEFAULT_OPTIONS, **audio_options}
+    else:
+        raise TypeError(f"audio_options must be a bool or dict, got {type(audio_options)}.")
+
+    sampling_rate = options["sampling_rate"]
+    if sampling_rate != "auto" and (
+        isinstance(sampling_rate, bool) or not isinstance(sampling_rate, int) or sampling_rate < 1
+    ):
+        raise ValueError(f'audio_options sampling_rate must be a positive int or "auto", got {sampling_rate!r}')
+    _check_seconds("chunk_length_s", options["chunk_length_s"], allow_none=True)
+    _check_seconds("overlap_s", options["overlap_s"], allow_none=False)
+    chunk_length_s = options["chunk_length_s"]
+    if chunk_length_s not in (None, "auto"):
+        overlap_s = options["overlap_s"]
+        if chunk_length_s == 0 or (overlap_s != "auto" and overlap_s >= chunk_length_s):
+            raise ValueError("audio_options chunk_length_s must be positive and longer than overlap_s")
+    return options
+
+
+def sampling_rate_for(model_name: str, options: dict) -> int:
+    """
+    Return the sampling rate to resample a model's audio inputs to.
+    """
+    if options["sampling_rate"] != "auto":
+        return options["sampling_rate"]
+    return MODEL_SAMPLING_RATES.get(model_name, DEFAULT_SAMPLING_RATE)
+
+
+def chunking_for(pipeline_type: str, options: dict, config: Optional[dict] = None) -> Optional[Tuple[float, float]]:
+    """
+    Return ``(chunk_length_s, overlap_s)`` for a run, or None for no chunking.
+
+    A ``chunk_length_s`` in the pipeline ``config`` means transformers.js
+    chunks the recording itself, so it is not chunked again here.
+    """
+    if config and config.get("chunk_length_s"):
+        return None
+    default_length, default_overlap = DEFAULT_CHUNKING.get(pipeline_type, (None, 0.0))
+    length = default_length if options["chunk_length_s"] == "auto" else options["chunk_length_s"]
+    if length is None:
+        return None
+    overlap = options["overlap_s"]
+    if overlap == "auto":
+        # Keep the default's share of the window
+        overlap = default_overlap * length / default_length if default_length else 0.0
+    return float(length), float(overlap)
+
+
+class _WavReader:
+    """
+    Random access to a WAV file's frames as mono float32, read straight
+    from the buffer (which may be memory-mapped).
+    """
+
+    def __init__(self, buffer):
+        self._buffer = buffer
+        # Release the view before returning so a memory map can be closed
+        with memoryview(buffer) as view:
+            self._parse(view)
+
+    def _parse(self, view):
+        if len(view) < 12 or bytes(view[:4]) not in (b"RIFF", b"RF64") or bytes(view[8:12]) != b"WAVE":
+            raise ValueError("Not a WAV file")
+        fmt = None
+        position = 12
+        while position + 8 <= len(view):
+            chunk_id = bytes(view[position:position + 4])
+            (size,) = struct.unpack("<I", view[position + 4:position + 8])
+            body = position + 8
+            if chunk_id == b"fmt ":
+                fmt = bytes(view[body:body + size])
+            elif chunk_id == b"data":
+                if fmt is None:
+                    raise ValueError("WAV data chunk comes before its fmt chunk")
+                # Streamed and RF64 files may not record the data size
+                self._offset = body
+                self._size = min(size, len(view) - body)
+                break
+            # Chunks are padded to an even size
+            position = body + size + (size & 1)
+        else:
+            raise ValueError("WAV file has no data chunk")
+
+        if len(fmt) < 16:
+            raise ValueError("WAV fmt chunk is too short")
+        format_tag, self.channels, self.samplerate, _, block_align, bits = struct.unpack("<HHIIHH", fmt[:16])
+        if format_tag == _WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+            (format_tag,) = struct.unpack("<H", fmt[24:26])
+        if self.channels < 1 or self.samplerate < 1 or block_align < 1:
+            raise ValueError("WAV fmt chunk is invalid")
+        if (format_tag, bits) not in {
+            (_WAVE_FORMAT_PCM, 8), (_WAVE_FORMAT_PCM, 16), (_WAVE_FORMAT_PCM, 24), (_WAVE_FORMAT_PCM, 32),
+            (_WAVE_FORMAT_IEEE_FLOAT, 32), (_WAVE_FORMAT_IEEE_FLOAT, 64),
+        }:
+            raise ValueError(f"Unsupported WAV encoding (format {format_tag}, {bits}-bit)")
+        self._float = format_tag == _WAVE_FORMAT_IEEE_FLOAT
+        self._sample_bytes = bits // 8
+        self._block_align = block_align
+        self.frames = self._size // block_align
+
+    def read(self, start: int, stop: int):
+        np = _import_numpy()
+        frames = stop - start
+        offset = self._offset + start * self._block_align
+        width = self._sample_bytes
+        if width == 3 or self._block_align != self.channels * width:
+            raw = np.frombuffer(self._buffer, dtype=np.uint8, count=frames * self._block_align, offset=offset)
+            # Drop any padding between samples of a frame
+            raw = raw.reshape(frames, self._block_align)[:, :self.channels * width]
+            raw = raw.reshape(frames, self.channels, width)
+            if width == 3:
+                # Sign-extend 24-bit samples into the top of an int32
+                padded = np.zeros((frames, self.channels, 4), dtype=np.uint8)
+                padded[:, :, 1:] = raw
+                raw, width = padded, 4
+            samples = np.ascontiguousarray(raw).view(self._dtype(width)).reshape(frames, self.channels)
+        else:
+            samples = np.frombuffer(
+                self._buffer, dtype=self._dtype(width), count=frames * self.channels, offset=offset
+            ).reshape(frames, self.channels)
+
+        # Downmix by summing channels into one float32 array
+        mono = samples[:, 0].astype(np.float32)
+        for channel in range(1, self.channels):
+            mono += samples[:, channel]
+        if self.channels > 1:
+            mono *= np.float32(1 / self.channels)
+        if self._float:
+            return mono
+        if width == 1:
+            # 8-bit WAV is unsigned
+            return (mono - 128) * np.float32(1 / 128)
+        return mono * np.float32(1 / 2 ** (8 * width - 1))
+
+    def _dtype(self, width: int) -> str:
+        if self._float:
+            return "<f4" if width == 4 else "<f8"
+        return {1: "u1", 2: "<i2", 4: "<i4"}[width]
+
+
+class _SoundFileReader:
+    """
+    Random access to any format libsndfile reads (FLAC, Ogg, MP3...) as mono float32.
+    """
+
+    def __init__(self, soundfile, buffer):
+        self._file = soundfile.SoundFile(io.BytesIO(buffer))
+        self.channels = self._file.channels
+        self.samplerate = self._file.samplerate
+        self.frames = self._file.frames
+
+    def read(self, start: int, stop: int):
+        np = _import_numpy()
+        self._file.seek(start)
+        samples = self._file.read(stop - start, dtype="float32", always_2d=True)
+        return samples.mean(axis=1, dtype=np.float32) if self.channels > 1 else samples[:, 0]
+
+    def close(self):
+        self._file.close()
+
+
+def _open_reader(stack: contextlib.ExitStack, buffer):
+    header = bytes(buffer[:12])
+    if header[:4] in (b"RIFF", b"RF64") and header[8:12] == b"WAVE":
+        return _WavReader(buffer)
+    try:
+        import soundfile
+    except ImportError as e:
+        raise ImportError(
+            "Decoding audio other than WAV requires soundfile. "
+            "Install it with: pip install st-transformers-js[audio]"
+        ) from e
+    reader = _SoundFileReader(soundfile, buffer)
+    stack.callback(reader.close)
+    return reader
+
+
+def _lowpass_kernel(ratio: float):
+    # Windowed-sinc filter cutting off just below the target Nyquist rate
+    np = _import_numpy()
+    half = int(math.ceil(_FILTER_ZERO_CROSSINGS * ratio))
+    cutoff = 0.5 / ratio * 0.94
+    n = np.arange(-half, half + 1)
+    kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(2 * half + 1, _KAISER_BETA)
+    return (kernel / kernel.sum()).astype(np.float32), half
+
+
+def _resample_reader(reader, sampling_rate: int):
+    """
+    Read and resample a whole recording a block at a time, so memory holds
+    the output plus one block of input.
+    """
+    np = _import_numpy()
+    frames, source_rate = reader.frames, reader.samplerate
+    if source_rate == sampling_rate:
+        output = np.empty(frames, dtype=np.float32)
+        for start in range(0, frames, _BLOCK_SAMPLES):
+            stop = min(frames, start + _BLOCK_SAMPLES)
+            output[start:stop] = reader.read(start, stop)
+        return output
+
+    ratio = source_rate / sampling_rate
+    kernel, half = _lowpass_kernel(ratio) if ratio > 1 else (None, 0)
+    output = np.empty(int(frames / ratio), dtype=np.float32)
+    for start in range(0, len(output), _BLOCK_SAMPLES):
+        stop = min(len(output), start + _BLOCK_SAMPLES)
+        positions = np.arange(start, stop) * ratio
+        first = max(0, int(positions[0]) - half)
+        last = min(frames, int(positions[-1]) + half + 2)
+        block = reader.read(first, last)
+        if kernel is not None:
+            block = np.convolve(block, kernel)[half:half + len(block)]
+        output[start:stop] = np.interp(positions - first, np.arange(len(block)), block)
+    return output
+
+
+def resample(samples, source_rate: int, sampling_rate: int):
+    """
+    Resample mono float32 ``samples`` from ``source_rate`` to ``sampling_rate``.
+
+    Downsampling low-pass filters first (windowed sinc) so content above the
+    new Nyquist rate does not alias; upsampling interpolates linearly.
+    """
+    np = _import_numpy()
+
+    class _ArrayReader:
+        channels = 1
+        samplerate = source_rate
+        frames = len(samples)
+
+        @staticmethod
+        def read(start, stop):
+            return np.asarray(samples[start:stop], dtype=np.float32)
+
+    return _resample_reader(_ArrayReader, sampling_rate)
+
+
+def chunk_bounds(samples: int, sampling_rate: int, chunk_length_s: float, overlap_s: float) -> List[List[int]]:
+    """
+    Split ``samples`` into windows of ``chunk_length_s`` seconds where
+    consecutive windows overlap by ``overlap_s`` seconds.
+
+    Returns ``[start, end)`` sample offsets; a recording that fits one
+    window is one chunk.
+    """
+    length = max(1, int(round(chunk_length_s * sampling_rate)))
+    step = max(1, length - int(round(overlap_s * sampling_rate)))
+    bounds = []
+    start = 0
+    while True:
+        end = min(samples, start + length)
+        bounds.append([start, end])
+        if end >= samples:
+            return bounds
+        start += step
+
+
+def decode_audio(data, sampling_rate: int):
+    """
+    Decode an audio file to mono float32 samples at ``sampling_rate``.
+
+    WAV (8/16/24/32-bit PCM and 32/64-bit float) is decoded with NumPy
+    alone; other formats need the ``soundfile`` package. Returns
+    ``(samples, info)`` where ``info`` has the source ``sampling_rate``
+    and ``channels``.
+    """
+    with contextlib.ExitStack() as stack:
+        reader = _open_reader(stack, data)
+        samples = _resample_reader(reader, sampling_rate)
+        return samples, {"sampling_rate": reader.samplerate, "channels": reader.channels}
+
+
+def _is_audio(header: bytes) -> bool:
+    from .helpers import _get_mime_type_from_magic_numbers
+
+    mime_type = _get_mime_type_from_magic_numbers(header)
+    return mime_type is not None and mime_type.startswith("audio/")
+
+
+def preprocess_audio(
+    data,
+    sampling_rate: int,
+    chunking: Optional[Tuple[float, float]],
+) -> Optional[Tuple[bytes, List[List[int]], dict]]:
+    """
+    Decode one audio file to PCM and split it into chunks.
+
+    Returns ``(pcm, chunks, report)``, or None if ``data`` is not a
+    recognised audio format. ``pcm`` is the ``PCM_MIME_TYPE`` bytes of the
+    whole recording and ``chunks`` the ``chunk_bounds`` sample offsets into
+    it (one chunk without ``chunking``). The report has ``original_bytes``,
+    ``bytes``, ``original_sampling_rate``, ``sampling_rate``, ``channels``,
+    ``duration_s``, ``chunks``, ``mime_type`` and ``elapsed_ms``. Results
+    for the last few distinct inputs are reused across reruns.
+    """
+    if not _is_audio(bytes(data[:12])):
+        return None
+    hasher = hashlib.sha256(data)
+    hasher.update(f"|{sampling_rate}|{chunking}".encode("utf-8"))
+    digest = hasher.hexdigest()
+    with _processed_lock:
+        if digest in _processed:
+            _processed.move_to_end(digest)
+            return _processed[digest]
+
+    started = time.perf_counter()
+    samples, info = decode_audio(data, sampling_rate)
+    chunks = chunk_bounds(len(samples), sampling_rate, *chunking) if chunking else [[0, len(samples)]]
+    pcm = samples.astype("<f4", copy=False).tobytes()
+    processed = pcm, chunks, {
+        "original_bytes": len(data),
+        "bytes": len(pcm),
+        "original_sampling_rate": info["sampling_rate"],
+        "sampling_rate": sampling_rate,
+        "channels": info["channels"],
+        "duration_s": len(samples) / sampling_rate,
+        "chunks": len(chunks),
+        "mime_type": PCM_MIME_TYPE,
+        "elapsed_ms": (time.perf_counter() - started) * 1000,
+    }
+    with _processed_lock:
+        _processed[digest] = processed
+        while len(_processed) > _PROCESSED_CACHE_SIZE:
+            _processed.popitem(last=False)
+    return processed
+
+
+def preprocess_audio_input(
+    inputs,
+    model_name: str,
+    pipeline_type: str,
+    options: Optional[dict],
+    config: Optional[dict] = None,
+):
+    """
+    Decode a pipeline input to PCM if it is an audio file for an audio task.
+
+    Returns ``(pcm, chunks, report)`` as for ``preprocess_audio``, or None
+    when decoding is off, the task is not an audio task or the input is not
+    a binary audio file.
+    """
+    from .helpers import _binary_buffer, _is_binary_input
+
+    if options is None or pipeline_type not in AUDIO_TASKS or not _is_binary_input(inputs):
+        return None
+    with contextlib.ExitStack() as stack:
+        buffer = _binary_buffer(stack, inputs)
+        processed = preprocess_audio(
+            buffer, sampling_rate_for(model_name, options), chunking_for(pipeline_type, options, config)
+        )
+    if processed is None:
+        return None
+    pcm, chunks, report = processed
+    return pcm, chunks, dict(report)
+
+
+def _words(text: str) -> List[str]:
+    return text.split()
+
+
+def _normalize(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def _merge_words(merged: List[str], words: List[str]) -> List[str]:
+    # Both windows transcribe their overlap; find how many leading words of
+    # the next window repeat the end of the text so far. Words cut at a
+    # window's edge may differ, so the best mostly-matching overlap wins,
+    # and each window keeps the half of it away from its edge.
+    best_length, best_score = 0, 0.0
+    for length in range(1, min(len(merged), len(words)) + 1):
+        tail = [_normalize(word) for word in merged[-length:]]
+        head = [_normalize(word) for word in words[:length]]
+        matches = sum(a == b for a, b in zip(tail, head))
+        score = matches / length + length / 1e4
+        if matches * 2 > length and score > best_score:
+            best_length, best_score = length, score
+    keep = best_length // 2
+    return merged[:len(merged) - best_length + keep] + words[keep:]
+
+
+def merge_transcriptions(
+    outputs: Sequence[dict],
+    chunks: Sequence[Sequence[int]],
+    sampling_rate: int,
+) -> dict:
+    """
+    Stitch the speech recognition outputs of overlapping chunks.
+
+    With timestamps (``return_timestamps`` in the config), each segment is
+    shifted to the recording's time and kept by the chunk whose share of the
+    overlaps contains its middle. Otherwise the text repeated in each
+    overlap is found by matching words and dropped.
+    """
+    if len(outputs) == 1:
+        return outputs[0]
+
+    if all(isinstance(output.get("chunks"), list) for output in outputs):
+        segments = []
+        for index, (output, (start, end)) in enumerate(zip(outputs, chunks)):
+            offset = start / sampling_rate
+            # Each chunk owns its span up to the middle of its overlaps
+            low = (start + chunks[index - 1][1]) / 2 / sampling_rate if index > 0 else 0.0
+            high = (end + chunks[index + 1][0]) / 2 / sampling_rate if index + 1 < len(chunks) else math.inf
+            for segment in output["chunks"]:
+                begin, finish = segment["timestamp"]
+                finish = begin if finish is None else finish
+                middle = offset + (begin + finish) / 2
+                if low <= middle < high:
+                    segments.append({
+                        **segment,
+                        "timestamp": [offset + begin, None if segment["timestamp"][1] is None else offset + finish],
+                    })
+        return {"text": "".join(segment["text"] for segment in segments).strip(), "chunks": segments}
+
+    merged: List[str] = []
+    for output in outputs:
+        merged = _merge_words(merged, _words(output.get("text", "")))
+    return {"text": " ".join(merged)}
+
+
+def merge_classifications(outputs: Sequence[list], chunks: Sequence[Sequence[int]]) -> list:
+    """
+    Combine the classification outputs of chunks into one ranking.
+
+    Each label's score is averaged over the chunks, weighted by chunk
+    length; a label missing from a chunk's top results counts as 0 there.
+    """
+    weights = [end - start for start, end in chunks]
+    total = sum(weights) or 1
+    scores: Dict[str, float] = {}
+    for output, weight in zip(outputs, weights):
+        for item in output:
+            scores[item["label"]] = scores.get(item["label"], 0.0) + item["score"] * weight / total
+    ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+    top = max(len(output) for output in outputs)
+    return [{"label": label, "score": score} for label, score in ranked[:top]]
+
+
+def merge_chunk_results(pipeline_type: str, outputs: Sequence, chunks: Sequence[Sequence[int]], sampling_rate: int):
+    """
+    Merge the outputs of a recording's chunks into the output for the whole recording.
+    """
+    if len(outputs) == 1:
+        return outputs[0]
+    if pipeline_type == "automatic-speech-recognition":
+        return merge_transcriptions(outputs, chunks, sampling_rate)
+    return merge_classifications(outputs, chunks)
+
+
+def merge_chunked_result(
+    pipeline_type: str,
+    batch: dict,
+    chunks: Sequence[Sequence[int]],
+    sampling_rate: int,
+) -> Tuple[Optional[object], Optional[str]]:
+    """
+    Merge the batch result of a chunked recording, as sent by the frontend
+    (``{"results", "errors", ...}``), into one output.
+
+    Returns ``(result, error)``; a chunk that failed fails the recording.
+    """
+    return merge_chunked(
+        batch,
+        len(chunks),
+        lambda outputs: merge_chunk_results(pipeline_type, outputs, chunks, sampling_rate),
+        "Audio chunk",
+    )
+
+
+def preprocess_audio_batch(inputs, model_name: str, pipeline_type: str, options: Optional[dict], config=None):
+    """
+    Decode the audio files in a batch's inputs to PCM.
+
+    Returns ``(inputs, groups, report)``. Each decoded input is replaced by
+    its whole PCM; the frontend runs each of its chunks as its own batch
+    item. ``groups`` maps those items back to the original inputs for
+    ``merge_audio_batch``: per input, None if it was not decoded, otherwise
+    ``(first_item, chunks, sampling_rate)``. The report totals the inputs'
+    reports, or is None if nothing was decoded.
+    """
+    if options is None or pipeline_type not in AUDIO_TASKS or not isinstance(inputs, (list, tuple)):
+        return inputs, None, None
+    items, groups, reports = [], [], []
+    position = 0
+    for item in inputs:
+        audio = preprocess_audio_input(item, model_name, pipeline_type, options, config)
+        if audio is None:
+            groups.append(None)
+            items.append(item)
+            position += 1
+            continue
+        pcm, chunks, report = audio
+        groups.append((position, chunks, report["sampling_rate"]))
+        reports.append(report)
+        items.append(pcm)
+        position += len(chunks)
+    if not reports:
+        return inputs, None, None
+    report = {
+        "items": len(reports),
+        "original_bytes": sum(r["original_bytes"] for r in reports),
+        "bytes": sum(r["bytes"] for r in reports),
+        "duration_s": sum(r["duration_s"] for r in reports),
+        "chunks": sum(r["chunks"] for r in reports),
+        "mime_type": PCM_MIME_TYPE,
+        "elapsed_ms": sum(r["elapsed_ms"] for r in reports),
+    }
+    return items, groups, report
+
+
+def pcm_blobs(inputs: Sequence, groups: Sequence) -> Tuple[list, List[bytes], list]:
+    """
+    Move the decoded audio of ``preprocess_audio_batch`` out of the inputs.
+
+    Returns ``(inputs, blobs, chunks)``: each PCM input is replaced by a
+    ``{"blob": index}`` reference into ``blobs``, to be sent once in a
+    binary payload, and ``chunks`` holds, per input, None or its chunk
+    sample bounds, which the frontend turns into views of the blob.
+    """
+    items, blobs, chunks = [], [], []
+    for item, group in zip(inputs, groups):
+        if group is None:
+            items.append(item)
+            chunks.append(None)
+            continue
+        items.append({"blob": len(blobs)})
+        blobs.append(item)
+        chunks.append(group[1])
+    return items, blobs, chunks
+
+
+def merge_audio_batch(pipeline_type: str, batch: dict, groups: Sequence) -> dict:
+    """
+    Regroup a batch result for the items of ``preprocess_audio_batch`` into
+    one result and error per original input.
+    """
+    return regroup_batch(
+        batch,
+        groups,
+        lambda part, chunks, sampling_rate: merge_chunked_result(pipeline_type, part, chunks, sampling_rate),
+    )
+
+__all__ = [
+    "AUDIO_TASKS",
+    "DEFAULT_CHUNKING",
+    "DEFAULT_SAMPLING_RATE",
+    "MODEL_SAMPLING_RATES",
+    "PCM_MIME_TYPE",
+    "chunk_bounds",
+    "chunking_for",
+    "decode_audio",
+    "merge_audio_batch",
+    "merge_chunk_results",
+    "merge_chunked_result",
+    "merge_classifications",
+    "merge_transcriptions",
+    "pcm_blobs",
+    "preprocess_audio",
+    "preprocess_audio_batch",
+    "preprocess_audio_input",
+    "resample",
+    "resolve_audio_options",
+    "sampling_rate_for",
+]
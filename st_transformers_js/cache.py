@@ -0,0 +1,257 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import warnings
+from collections import OrderedDict
+from typing import Any, Optional, Sequence, Tuple, Union
+
+_MISSING = object()
+
+
+def make_cache_key(
+    model_name: str,
+    pipeline_type: str,
+    inputs: Any,
+    config: Optional[dict] = None,
+    blobs: Sequence[Any] = (),
+    **extra: Any,
+) -> str:
+    """
+    Build a stable cache key for a pipeline call.
+
+    The key is a SHA-256 digest of the model, pipeline type, config, any extra
+    call options and the processed inputs. Bytes-like inputs, and the
+    ``blobs`` sent alongside them in a binary payload, are hashed as raw
+    bytes without being copied into a JSON string.
+    """
+    hasher = hashlib.sha256()
+    header = [model_name, pipeline_type, config or {}, extra]
+    hasher.update(json.dumps(header, sort_keys=True, default=str).encode("utf-8"))
+
+    if isinstance(inputs, (bytes, bytearray, memoryview)):
+        hasher.update(b"bytes:")
+        hasher.update(inputs)
+    elif isinstance(inputs, str):
+        hasher.update(b"str:")
+        hasher.update(inputs.encode("utf-8"))
+    else:
+        hasher.update(b"json:")
+        hasher.update(json.dumps(inputs, sort_keys=True, default=str).encode("utf-8"))
+    for blob in blobs:
+        hasher.update(f"blob:{len(blob)}:".encode("utf-8"))
+        hasher.update(blob)
+
+    return hasher.hexdigest()
+
+
+class ResultCache:
+    """
+    Cache of pipeline results shared by every session in the process.
+
+    Results are kept in an in-memory LRU tier and, if ``disk_dir`` is given,
+    also written as JSON files to an on-disk tier that survives restarts and
+    can be shared between server processes.
+
+    Parameters
+    ----------
+    max_entries : int
+        Maximum number of results kept in memory
+    ttl : float, optional
+        Seconds after which a cached result expires. None means never.
+    disk_dir : str, optional
+        Directory for the on-disk tier. Disabled if None.
+    max_disk_bytes : int, optional
+        Size cap for the on-disk tier. Oldest files are removed first.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl: Optional[float] = None,
+        disk_dir: Optional[str] = None,
+        max_disk_bytes: Optional[int] = None,
+    ):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        if ttl is not None and ttl <= 0:
+            raise ValueError("ttl must be positive")
+
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        if disk_dir is not None:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _expired(self, created: float) -> bool:
+        return self.ttl is not None and time.time() - created > self.ttl
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        Return the cached result for ``key``, or ``default`` if missing or expired.
+        """
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, value = entry
+                if not self._expired(created):
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._memory[key]
+
+            value = self._read_disk(key)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, persist: bool = True) -> None:
+        """
+        Store a result in the memory tier and, if enabled, the disk tier.
+
+        With ``persist=False`` the result is kept in memory only, e.g. for
+        numpy arrays or tables that can't be stored as JSON.
+        """
+        created = time.time()
+        with self._lock:
+            self._memory[key] = (created, value)
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+            if persist:
+                self._write_disk(key, created, value)
+
+    def invalidate(self, key: str) -> None:
+        """
+        Remove a single result from both tiers.
+        """
+        with self._lock:
+            self._memory.pop(key, None)
+            if self.disk_dir is not None:
+                try:
+                    os.remove(self._disk_path(key))
+                except FileNotFoundError:
+                    pass
+
+    def clear(self) -> None:
+        """
+        Remove every result from both tiers.
+        """
+        with self._lock:
+            self._memory.clear()
+            if self.disk_dir is not None:
+                for name in os.listdir(self.disk_dir):
+                    if name.endswith(".json"):
+                        os.remove(os.path.join(self.disk_dir, name))
+
+    def _read_disk(self, key: str) -> Any:
+        if self.disk_dir is None:
+            return _MISSING
+
+        path = self._disk_path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            return _MISSING
+        except (OSError, ValueError):
+            # Unreadable or partially written entry
+            return _MISSING
+        if not isinstance(record, dict) or "value" not in record or not isinstance(record.get("created"), (int, float)):
+            # Not an entry written by this cache
+            return _MISSING
+
+        if self._expired(record["created"]):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return _MISSING
+
+        # Promote to the memory tier
+        self._memory[key] = (record["created"], record["value"])
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+        return record["value"]
+
+    def _write_disk(self, key: str, created: float, value: Any) -> None:
+        if self.disk_dir is None:
+            return
+
+        path = self._disk_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"created": created, "value": value}, f)
+            os.replace(tmp_path, path)
+        except (OSError, TypeError, ValueError) as e:
+            # Results that can't be stored as JSON stay memory-only
+            warnings.warn(f"Could not write result cache entry to disk: {e}", RuntimeWarning)
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        self._enforce_disk_budget()
+
+    def _enforce_disk_budget(self) -> None:
+        if self.max_disk_bytes is None:
+            return
+
+        files = []
+        total = 0
+        for name in os.listdir(self.disk_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.disk_dir, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+# Process-wide cache used when ``result_cache=True`` is passed to a pipeline
+default_result_cache = ResultCache()
+
+
+def resolve_result_cache(result_cache: Union[bool, ResultCache, None]) -> Optional[ResultCache]:
+    """
+    Map the ``result_cache`` argument of the pipeline functions to a cache instance.
+    """
+    if result_cache is None or result_cache is False:
+        return None
+    if result_cache is True:
+        return default_result_cache
+    if isinstance(result_cache, ResultCache):
+        return result_cache
+    raise TypeError(
+        f"result_cache must be a bool or ResultCache, got {type(result_cache)}."
+    )
+
+
+__all__ = ["ResultCache", "make_cache_key", "default_result_cache"]
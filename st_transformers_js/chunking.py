@@ -0,0 +1,60 @@
+from typing import Callable, Optional, Sequence, Tuple
+
+# Long inputs (recordings, texts) are run as one batch item per chunk. The
+# frontend reports a batch result ({"results", "errors", ...}); these helpers
+# turn the chunk results back into one result per original input. How the
+# outputs of one input's chunks are combined is up to the caller.
+
+
+def merge_chunked(
+    batch: dict,
+    count: int,
+    merge: Callable[[Sequence], object],
+    label: str,
+) -> Tuple[Optional[object], Optional[str]]:
+    """
+    Merge the batch result of one chunked input with ``merge(outputs)``.
+
+    Returns ``(result, error)``; a chunk that failed fails the input, with
+    an error naming the chunk (e.g. "Audio chunk 2 of 3 failed: ...").
+    """
+    for index, error in enumerate(batch.get("errors") or []):
+        if error is not None:
+            return None, f"{label} {index + 1} of {count} failed: {error}"
+    return merge(batch["results"]), None
+
+
+def regroup_batch(
+    batch: dict,
+    groups: Sequence,
+    merge: Callable[[dict, Sequence[Sequence[int]], object], Tuple[Optional[object], Optional[str]]],
+) -> dict:
+    """
+    Regroup a batch result into one result and error per original input.
+
+    ``groups`` holds, per input, None if it was sent as a single item,
+    otherwise ``(first_item, chunks, extra)``. The chunk items of a group
+    are merged with ``merge(part, chunks, extra)``, where ``part`` is their
+    batch result, returning ``(result, error)``.
+    """
+    results, errors = [], []
+    position = 0
+    for group in groups:
+        if group is None:
+            results.append(batch["results"][position])
+            errors.append(batch["errors"][position])
+            position += 1
+            continue
+        first, chunks, extra = group
+        part = {
+            "results": batch["results"][first:first + len(chunks)],
+            "errors": batch["errors"][first:first + len(chunks)],
+        }
+        result, error = merge(part, chunks, extra)
+        results.append(result)
+        errors.append(error)
+        position = first + len(chunks)
+    return {**batch, "results": results, "errors": errors, "completed": len(groups), "total": len(groups)}
+
+
+__all__ = ["merge_chunked", "regroup_batch"]
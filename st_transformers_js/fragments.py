@@ -0,0 +1,214 @@
+from typing import Callable, Optional, Sequence, Union
+
+from .helpers import InputType
+from .streaming import TokenStream
+
+# Session state entry holding a fragment's latest value, by component key
+_SLOT_PREFIX = "st_transformers_js_fragment:"
+
+
+def _session_slot(key: str) -> dict:
+    import streamlit as st
+
+    slot_key = _SLOT_PREFIX + key
+    if slot_key not in st.session_state:
+        st.session_state[slot_key] = {"value": None, "announced": None, "in_app_run": False}
+    return st.session_state[slot_key]
+
+
+class PipelineHandle:
+    """
+    The latest state of a pipeline run mounted in a fragment.
+
+    Returned by ``transformers_js_pipeline_fragment_v2``. The attributes are
+    read from the session state when accessed, so the handle always shows
+    the latest update seen by the fragment, including updates from fragment
+    reruns the rest of the script did not see.
+
+    Attributes
+    ----------
+    status : str
+        "pending" until the component reports, then the state's status:
+        e.g. "loading", "queued", "processing", "streaming", "complete",
+        "error" or "cancelled"
+    progress : float or None
+        Download or batch progress from 0 to 1, or None when there is none
+    result : any
+        The pipeline output once complete, otherwise None
+    error : str or None
+        The error message if the run failed
+    done : bool
+        Whether the run has completed, failed or been cancelled
+    state : dict or None
+        The component's full state (for streamed runs, the stream's ``meta``)
+    value : dict, TokenStream or None
+        What the pipeline function returned on the fragment's latest run
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+
+    @property
+    def value(self) -> Union[dict, TokenStream, None]:
+        return _session_slot(self.key)["value"]
+
+    @property
+    def state(self) -> Optional[dict]:
+        value = self.value
+        if isinstance(value, TokenStream):
+            return value.meta or None
+        return value
+
+    @property
+    def status(self) -> str:
+        value = self.value
+        if isinstance(value, TokenStream):
+            return value.status
+        return (value or {}).get("status") or "pending"
+
+    @property
+    def progress(self) -> Optional[float]:
+        state = self.state or {}
+        if state.get("total"):
+            return min(1.0, (state.get("completed") or 0) / state["total"])
+        if isinstance(state.get("progress"), (int, float)):
+            return min(1.0, max(0.0, state["progress"] / 100))
+        return None
+
+    @property
+    def result(self):
+        value = self.value
+        if isinstance(value, TokenStream):
+            return value.result
+        if self.status != "complete":
+            return None
+        return value.get("result")
+
+    @property
+    def error(self) -> Optional[str]:
+        value = self.value
+        if isinstance(value, TokenStream):
+            return value.error
+        return (value or {}).get("error")
+
+    @property
+    def done(self) -> bool:
+        # An "error" status without an error message is a download being retried
+        return self.status in ("complete", "cancelled") or (self.status == "error" and self.error is not None)
+
+    def __repr__(self) -> str:
+        return f"PipelineHandle(key={self.key!r}, status={self.status!r}, done={self.done})"
+
+
+def render_status(handle: PipelineHandle) -> None:
+    """
+    Default contents of the fragment: a progress bar with the frontend's
+    message while the run is going (the text so far for streamed runs) and
+    the error if it fails. Nothing is shown once the run is complete.
+    """
+    import streamlit as st
+
+    if handle.status == "error" and handle.done:
+        st.error(handle.error)
+    elif not handle.done:
+        if isinstance(handle.value, TokenStream) and handle.value.text:
+            st.markdown(handle.value.text)
+            return
+        state = handle.state or {}
+        st.progress(handle.progress or 0.0, text=state.get("message") or "Starting...")
+
+
+def transformers_js_pipeline_fragment_v2(
+    model_name: str,
+    pipeline_type: str,
+    inputs: Union[InputType, Sequence[InputType]],
+    key: str,
+    batch: bool = False,
+    render: Optional[Callable[[PipelineHandle], None]] = None,
+    rerun_on_done: bool = True,
+    **pipeline_kwargs,
+) -> PipelineHandle:
+    """
+    Run a transformers.js pipeline (v2 component) inside an ``st.fragment``.
+
+    Every progress update of the component reruns only the fragment, not
+    the whole script, so the rest of the page (charts, tables, other
+    expensive elements) is not redrawn while the model downloads and runs.
+    Once the run is complete, fails or is cancelled, the whole script is
+    rerun once (with ``rerun_on_done``), so code after this call sees the
+    result through the returned handle.
+
+    Keep expensive elements outside the fragment: they run on full reruns
+    only. ``render`` draws inside the fragment on every update.
+
+    Parameters
+    ----------
+    model_name : str
+        Hugging Face model identifier
+    pipeline_type : str
+        Type of pipeline (e.g., "text-classification", "image-to-text")
+    inputs : str, bytes, dict, or list of them
+        Input data for the pipeline, or the list of input items with ``batch``
+    key : str
+        Unique key for the component; it also identifies the handle's
+        state in ``st.session_state``
+    batch : bool
+        Run ``transformers_js_pipeline_batch_v2`` over a list of inputs
+        instead of ``transformers_js_pipeline_v2``
+    render : callable, optional
+        Called with the handle inside the fragment on every update, to show
+        progress or partial output. Defaults to ``render_status``: a
+        progress bar while the run is going and the error if it fails.
+    rerun_on_done : bool
+        Rerun the whole script once when the run finishes. Without it, the
+        rest of the script sees the result on its next rerun.
+    **pipeline_kwargs
+        Other arguments of ``transformers_js_pipeline_v2`` or
+        ``transformers_js_pipeline_batch_v2`` (e.g. ``config``, ``stream``,
+        ``priority``)
+
+    Returns
+    -------
+    PipelineHandle
+        The run's ``status``, ``progress``, ``result``, ``error`` and
+        ``done``, read from the latest update
+    """
+    import streamlit as st
+
+    from .v2 import transformers_js_pipeline_batch_v2, transformers_js_pipeline_v2
+
+    if not isinstance(key, str) or not key:
+        raise ValueError("key must be a non-empty string")
+    if "key" in pipeline_kwargs:
+        raise TypeError("key is given twice")
+    pipeline = transformers_js_pipeline_batch_v2 if batch else transformers_js_pipeline_v2
+    handle = PipelineHandle(key)
+
+    @st.fragment
+    def run_pipeline():
+        slot = _session_slot(key)
+        slot["value"] = pipeline(model_name, pipeline_type, inputs, key=key, **pipeline_kwargs)
+        (render or render_status)(handle)
+
+        if handle.done:
+            run_id = (handle.state or {}).get("run_id")
+            if slot["announced"] != run_id:
+                slot["announced"] = run_id
+                # On a full run the rest of the script is about to see the result anyway
+                if rerun_on_done and not slot["in_app_run"]:
+                    st.rerun(scope="app")
+
+    slot = _session_slot(key)
+    slot["in_app_run"] = True
+    try:
+        run_pipeline()
+    finally:
+        slot["in_app_run"] = False
+    return handle
+
+
+__all__ = [
+    "PipelineHandle",
+    "render_status",
+    "transformers_js_pipeline_fragment_v2",
+]
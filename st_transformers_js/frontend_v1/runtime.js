@@ -0,0 +1,1187 @@
+// Model loading and inference for the v1 component. This module has no
+// DOM dependencies: worker.js wires it to the worker's message port, and it
+// can be driven directly with a stubbed transformers.js.
+//
+// Message protocol (component -> worker):
+//   { type: 'run', id, client_id, run_key, mode, pipeline_type, model_name, load_options,
+//     model_source, local_model_path, runtime, pipeline_cache_size, max_concurrency,
+//     priority, inputs, mime_type, mime_types, batch_size, audio_chunks, text_chunks,
+//     stream, config }
+//   { type: 'preload', id, client_id, models: [{ model_name, pipeline_type,
+//     warmup_input, mime_type, config, load_options }], model_source, local_model_path,
+//     runtime, pipeline_cache_size }            load and warm up models
+//   { type: 'cancel', id, client_id }           the run's caller no longer wants it
+//   { type: 'release', client_id }              the component is going away
+// Replies (worker -> component):
+//   { type: 'progress', id, progress, index? }  transformers.js load progress
+//   { type: 'loaded', id, pipeline_cache_hit, index? }
+//   { type: 'batch_progress', id, completed, total }
+//   { type: 'queued', id, queue }               waiting for the scheduler
+//   { type: 'started', id, queue }              a model call started after waiting
+//   { type: 'preload_progress', id, index, model }
+//   { type: 'partial', id, text, tokens }       streamed generation so far
+//   { type: 'result', id, result, meta }
+//   { type: 'error', id, error, meta }
+// The browser model cache is managed from the page with runCacheAction;
+// the worker only records model use and prunes to the budget after loads.
+// A run's `meta.timings` holds { stages: { name: [start, end] }, pipeline_cache_hit,
+// input_bytes, output_bytes }: stage marks in milliseconds on the clock of
+// `now()`, which the page shares and adds its own stages on, the input size,
+// and the size of the tensor data transferred back.
+// Audio decoded in Python arrives as PCM_MIME_TYPE bytes (mono float32) and
+// is passed to the pipeline as a Float32Array. With `audio_chunks`
+// ([start, end) sample offsets) a single run's recording is run as a batch
+// of its chunks and the result is the batch result, merged in Python. In a
+// batch, `audio_chunks` holds per input null or its recording's chunks,
+// each run as its own batch item.
+// `text_chunks` ([start, end) UTF-16 offsets) does the same for the windows
+// of a long text.
+// With `stream` ({ id, interval_ms }) a single generative run posts the
+// decoded text of its best beam as 'partial' messages: the first token at
+// once, then at most one every `interval_ms`. Its time to the first token
+// is the `first_token` stage.
+// `run_key` is a hash of the run's arguments, set by Python. A run with the
+// key of one in progress attaches to it instead of starting another: it gets
+// the latest progress so far, then the same messages and result. A cancelled
+// request gets no reply; once every request attached to a run is cancelled,
+// the run stops at its next check, before a model call (or sub-batch or
+// chunk) or at a streamed run's next token. A model call already running
+// is not interrupted.
+// Model calls go through the worker's InferenceScheduler: at most
+// `max_concurrency` at a time, 'interactive' runs ahead of 'background' ones
+// and each sub-batch of a batch run queued separately, so an interactive run
+// waits for one sub-batch, not the whole batch. Single text runs of
+// MICRO_BATCH_TASKS with the same pipeline and config that queued while it
+// was busy run as one batched call. A run's `meta.queue` holds { priority, depth,
+// wait_ms, batch_size }: the calls queued or running when it was queued, the
+// milliseconds it waited, and the runs that shared its model call.
+
+// Milliseconds since the epoch, at performance.now() resolution
+export const now = () => performance.timeOrigin + performance.now();
+
+// A tiny WASM module using one SIMD instruction (from wasm-feature-detect)
+const SIMD_PROBE = new Uint8Array([
+  0, 97, 115, 109, 1, 0, 0, 0, 1, 5, 1, 96, 0, 1, 123, 3, 2, 1, 0, 10, 10, 1, 8, 0, 65, 0, 253, 15, 253, 98, 11,
+]);
+
+// What the current context supports for ONNX Runtime's WASM backend
+export function detectWasmSupport() {
+  let simd = false;
+  try {
+    simd = typeof WebAssembly !== 'undefined' && WebAssembly.validate(SIMD_PROBE);
+  } catch (error) {
+    // No WebAssembly at all
+  }
+  return {
+    // Multi-threaded WASM needs SharedArrayBuffer, which needs cross-origin isolation
+    cross_origin_isolated: Boolean(globalThis.crossOriginIsolated) && typeof SharedArrayBuffer !== 'undefined',
+    hardware_concurrency: (globalThis.navigator && globalThis.navigator.hardwareConcurrency) || 1,
+    simd,
+  };
+}
+
+// Resolves the requested { num_threads, simd, proxy } against what is
+// supported. `num_threads` 'auto' (the default) is ONNX Runtime's own
+// default, half the logical cores up to 4.
+export function resolveWasmSettings(requested = {}, support = detectWasmSupport()) {
+  const notes = [];
+  let numThreads = requested.num_threads === undefined || requested.num_threads === null || requested.num_threads === 'auto'
+    ? Math.min(4, Math.ceil(support.hardware_concurrency / 2))
+    : requested.num_threads;
+  if (numThreads > support.hardware_concurrency) {
+    notes.push(`num_threads ${numThreads} is more than the ${support.hardware_concurrency} logical cores; using ${support.hardware_concurrency}`);
+    numThreads = support.hardware_concurrency;
+  }
+  if (numThreads > 1 && !support.cross_origin_isolated) {
+    notes.push('The page is not cross-origin isolated, so WASM runs single-threaded');
+    numThreads = 1;
+  }
+
+  const simd = requested.simd !== false && support.simd;
+  if (requested.simd !== false && !support.simd) {
+    notes.push('WASM SIMD is not supported by this browser');
+  }
+
+  // Inference already runs in this worker, off the main thread
+  if (requested.proxy) {
+    notes.push('proxy is not needed: inference already runs in a worker');
+  }
+
+  return { num_threads: numThreads, simd, proxy: false, cross_origin_isolated: support.cross_origin_isolated, notes };
+}
+
+// Browser model cache. transformers.js keeps downloaded model files in
+// Cache Storage under 'transformers-cache', keyed by URL. Cache Storage
+// records no access times, so the runtime keeps its own in a second cache:
+// one entry per model with when it was last used, and the byte budget set
+// from Python. Pruning evicts the least recently used models first.
+export const MODEL_CACHE_NAME = 'transformers-cache';
+const USAGE_CACHE_NAME = 'st-transformers-js-usage';
+// Cache keys must be URLs; these never leave the browser
+const USAGE_PREFIX = 'https://st-transformers-js.invalid/usage/';
+const BUDGET_KEY = 'https://st-transformers-js.invalid/budget';
+// A model's last-used time is written at most this often
+const USAGE_WRITE_INTERVAL_MS = 60000;
+
+const usageWrites = new Map();
+
+function cacheStorage() {
+  return typeof caches === 'undefined' ? null : caches;
+}
+
+const jsonResponse = (value) => new Response(JSON.stringify(value), { headers: { 'Content-Type': 'application/json' } });
+
+// The model a cached file belongs to. Hub URLs look like
+// <host>/<model>/resolve/<revision>/<file>; local mirror URLs are matched
+// against the models with usage records, or else taken to be the file's
+// directory without a trailing /onnx.
+export function modelFromUrl(url, knownModels = []) {
+  const path = decodeURIComponent(new URL(url).pathname);
+  const resolve = path.indexOf('/resolve/');
+  if (resolve !== -1) {
+    return path.slice(1, resolve);
+  }
+  const known = [...knownModels].sort((a, b) => b.length - a.length).find((model) => path.includes(`/${model}/`));
+  return known || path.slice(1, path.lastIndexOf('/')).replace(/\/onnx$/, '');
+}
+
+async function readUsage(storage) {
+  const cache = await storage.open(USAGE_CACHE_NAME);
+  const lastUsed = {};
+  for (const request of await cache.keys()) {
+    if (request.url.startsWith(USAGE_PREFIX)) {
+      const entry = await (await cache.match(request)).json();
+      lastUsed[entry.model_name] = entry.last_used;
+    }
+  }
+  const budget = await cache.match(BUDGET_KEY);
+  return { lastUsed, budgetBytes: budget ? (await budget.json()).budget_bytes : null };
+}
+
+// Cached files grouped by model: Map of model -> { bytes, requests }
+async function cachedFiles(storage, knownModels) {
+  const groups = new Map();
+  if (!(await storage.has(MODEL_CACHE_NAME))) {
+    return groups;
+  }
+  const cache = await storage.open(MODEL_CACHE_NAME);
+  for (const request of await cache.keys()) {
+    const response = await cache.match(request);
+    const bytes = response ? (await response.blob()).size : 0;
+    const model = modelFromUrl(request.url, knownModels);
+    const group = groups.get(model) || { bytes: 0, requests: [] };
+    group.bytes += bytes;
+    group.requests.push(request);
+    groups.set(model, group);
+  }
+  return groups;
+}
+
+async function removeModels(storage, groups, models) {
+  const cache = await storage.open(MODEL_CACHE_NAME);
+  const usage = await storage.open(USAGE_CACHE_NAME);
+  const evicted = [];
+  let freedBytes = 0;
+  for (const model of models) {
+    const group = groups.get(model);
+    if (group) {
+      await Promise.all(group.requests.map((request) => cache.delete(request)));
+      freedBytes += group.bytes;
+      evicted.push(model);
+    }
+    await usage.delete(USAGE_PREFIX + encodeURIComponent(model));
+    usageWrites.delete(model);
+  }
+  return { evicted, freed_bytes: freedBytes };
+}
+
+// Notes that a model was just used, for least-recently-used pruning
+export async function recordModelUse(modelName, at = Date.now()) {
+  const storage = cacheStorage();
+  if (!storage || (usageWrites.has(modelName) && at - usageWrites.get(modelName) < USAGE_WRITE_INTERVAL_MS)) {
+    return;
+  }
+  usageWrites.set(modelName, at);
+  const cache = await storage.open(USAGE_CACHE_NAME);
+  await cache.put(USAGE_PREFIX + encodeURIComponent(modelName), jsonResponse({ model_name: modelName, last_used: at }));
+}
+
+// Cached models, most recently used first, with their size in bytes and
+// last use (epoch ms, null if not used since usage tracking began), and
+// the origin's storage usage and quota where the browser reports them
+export async function listCachedModels() {
+  const storage = cacheStorage();
+  const report = {
+    available: Boolean(storage), models: [], total_bytes: 0, budget_bytes: null, usage: null, quota: null, persisted: null,
+  };
+  if (!storage) {
+    return report;
+  }
+  const { lastUsed, budgetBytes } = await readUsage(storage);
+  const groups = await cachedFiles(storage, Object.keys(lastUsed));
+  report.budget_bytes = budgetBytes;
+  for (const [model, group] of groups) {
+    report.models.push({ model_name: model, bytes: group.bytes, files: group.requests.length, last_used: lastUsed[model] ?? null });
+    report.total_bytes += group.bytes;
+  }
+  report.models.sort((a, b) => (b.last_used ?? -1) - (a.last_used ?? -1));
+
+  const storageManager = globalThis.navigator && globalThis.navigator.storage;
+  if (storageManager && storageManager.estimate) {
+    const estimate = await storageManager.estimate();
+    report.usage = estimate.usage ?? null;
+    report.quota = estimate.quota ?? null;
+  }
+  if (storageManager && storageManager.persisted) {
+    report.persisted = await storageManager.persisted();
+  }
+  return report;
+}
+
+// Deletes a model's cached files and its usage record
+export async function evictCachedModel(modelName) {
+  const storage = cacheStorage();
+  if (!storage) {
+    return { evicted: [], freed_bytes: 0 };
+  }
+  const { lastUsed } = await readUsage(storage);
+  const groups = await cachedFiles(storage, [...Object.keys(lastUsed), modelName]);
+  return removeModels(storage, groups, [modelName]);
+}
+
+// Evicts least recently used models until the cache fits the stored
+// budget. Models in `protect` (e.g. loaded ones) are kept.
+export async function enforceCacheBudget({ protect = [] } = {}) {
+  const storage = cacheStorage();
+  if (!storage) {
+    return { evicted: [], freed_bytes: 0 };
+  }
+  const { lastUsed, budgetBytes } = await readUsage(storage);
+  if (budgetBytes === null) {
+    return { evicted: [], freed_bytes: 0 };
+  }
+  const groups = await cachedFiles(storage, [...Object.keys(lastUsed), ...protect]);
+  let total = [...groups.values()].reduce((sum, group) => sum + group.bytes, 0);
+  const victims = [];
+  const oldestFirst = [...groups.keys()]
+    .filter((model) => !protect.includes(model))
+    .sort((a, b) => (lastUsed[a] ?? -1) - (lastUsed[b] ?? -1));
+  for (const model of oldestFirst) {
+    if (total <= budgetBytes) {
+      break;
+    }
+    victims.push(model);
+    total -= groups.get(model).bytes;
+  }
+  return removeModels(storage, groups, victims);
+}
+
+// Stores the cache budget in bytes (null for none) and prunes to it
+export async function setCacheBudget(budgetBytes) {
+  const storage = cacheStorage();
+  if (!storage) {
+    return { evicted: [], freed_bytes: 0 };
+  }
+  const cache = await storage.open(USAGE_CACHE_NAME);
+  if (budgetBytes === null || budgetBytes === undefined) {
+    await cache.delete(BUDGET_KEY);
+  } else {
+    await cache.put(BUDGET_KEY, jsonResponse({ budget_bytes: budgetBytes }));
+  }
+  return enforceCacheBudget();
+}
+
+// Runs a cache request from Python ({ action: 'list' | 'evict' | 'budget',
+// model_name, budget_bytes, persist }) and returns the listing afterwards
+// with what was evicted. Runs on the page: persisting storage is only
+// possible from a window.
+export async function runCacheAction(request) {
+  let outcome = { evicted: [], freed_bytes: 0 };
+  if (request.action === 'evict') {
+    outcome = await evictCachedModel(request.model_name);
+  } else if (request.action === 'budget') {
+    outcome = await setCacheBudget(request.budget_bytes ?? null);
+  } else if (request.action !== 'list') {
+    throw new Error(`Unknown cache action: ${request.action}`);
+  }
+  const storageManager = globalThis.navigator && globalThis.navigator.storage;
+  if (request.persist && storageManager && storageManager.persist) {
+    await storageManager.persist();
+  }
+  return { action: request.action, ...outcome, ...(await listCachedModels()) };
+}
+
+// Decoded audio: mono little-endian float32 samples at the model's rate
+export const PCM_MIME_TYPE = 'audio/pcm';
+
+// Float32Array over PCM bytes, from the binary transport or base64. The
+// bytes are only copied if they are not 4-byte aligned in their buffer.
+export function pcmSamples(input) {
+  let bytes = input;
+  if (typeof input === 'string') {
+    const binary = atob(input);
+    bytes = new Uint8Array(binary.length);
+    for (let i = 0; i < binary.length; i++) {
+      bytes[i] = binary.charCodeAt(i);
+    }
+  }
+  if (bytes.byteOffset % 4 !== 0) {
+    bytes = bytes.slice();
+  }
+  return new Float32Array(bytes.buffer, bytes.byteOffset, bytes.byteLength >> 2);
+}
+
+// Approximate size of request inputs: bytes for binary inputs, characters for strings
+function inputSize(value) {
+  if (value instanceof Uint8Array) {
+    return value.byteLength;
+  }
+  if (typeof value === 'string') {
+    return value.length;
+  }
+  if (Array.isArray(value)) {
+    return value.reduce((total, item) => total + inputSize(item), 0);
+  }
+  return 0;
+}
+
+// Pipelines keyed by (pipeline_type, model_name, load options), kept
+// across runs in least-recently-used order. Entries in use by a component
+// are reference counted and never evicted. With `releaseDelayMs` set, an
+// entry is also disposed that long after its last reference is released.
+export class PipelineCache {
+  constructor(maxEntries = 4, { releaseDelayMs = null } = {}) {
+    this.maxEntries = maxEntries;
+    this.releaseDelayMs = releaseDelayMs;
+    this.entries = new Map();
+    this.refs = new Map();
+    this.releaseTimers = new Map();
+    this.hits = 0;
+    this.misses = 0;
+  }
+
+  static key(pipelineType, modelName, loadOptions) {
+    return JSON.stringify([pipelineType, modelName, loadOptions || {}]);
+  }
+
+  setMaxEntries(maxEntries) {
+    this.maxEntries = Math.max(1, maxEntries || this.maxEntries);
+    this.evict();
+  }
+
+  get(pipelineType, modelName, loadOptions, create) {
+    const key = PipelineCache.key(pipelineType, modelName, loadOptions);
+    if (this.entries.has(key)) {
+      const cached = this.entries.get(key);
+      // Re-insert to mark as most recently used
+      this.entries.delete(key);
+      this.entries.set(key, cached);
+      this.hits++;
+      return cached;
+    }
+
+    this.misses++;
+    const created = create();
+    this.entries.set(key, created);
+    // Don't keep failed loads around
+    created.catch(() => {
+      if (this.entries.get(key) === created) {
+        this.entries.delete(key);
+      }
+    });
+    this.evict();
+    return created;
+  }
+
+  retain(key) {
+    this.refs.set(key, (this.refs.get(key) || 0) + 1);
+    clearTimeout(this.releaseTimers.get(key));
+    this.releaseTimers.delete(key);
+  }
+
+  release(key) {
+    const count = (this.refs.get(key) || 0) - 1;
+    if (count > 0) {
+      this.refs.set(key, count);
+      return;
+    }
+    this.refs.delete(key);
+    if (this.releaseDelayMs === null) {
+      this.evict();
+      return;
+    }
+    // Grace period so a remounting component doesn't reload the model
+    this.releaseTimers.set(key, setTimeout(() => {
+      this.releaseTimers.delete(key);
+      if (!this.refs.has(key)) {
+        this.remove(key);
+      }
+    }, this.releaseDelayMs));
+  }
+
+  remove(key) {
+    const entry = this.entries.get(key);
+    if (!entry) {
+      return;
+    }
+    this.entries.delete(key);
+    entry
+      .then((pipe) => pipe && typeof pipe.dispose === 'function' && pipe.dispose())
+      .catch((error) => console.warn('Failed to dispose pipeline:', error));
+  }
+
+  evict() {
+    // Oldest first, skipping entries that are still referenced
+    for (const key of [...this.entries.keys()]) {
+      if (this.entries.size <= this.maxEntries) {
+        break;
+      }
+      if (!this.refs.has(key)) {
+        this.remove(key);
+      }
+    }
+  }
+
+  // Models with a cached pipeline (loaded or loading)
+  modelNames() {
+    return [...this.entries.keys()].map((key) => JSON.parse(key)[1]);
+  }
+
+  stats() {
+    return {
+      hits: this.hits,
+      misses: this.misses,
+      size: this.entries.size,
+      max_entries: this.maxEntries,
+      referenced: this.refs.size,
+    };
+  }
+}
+
+const PRIORITY_RANK = { interactive: 0, background: 1 };
+
+// Model calls from every component the worker serves, run at most
+// `maxConcurrency` at a time and never two on one pipeline (an ONNX session
+// runs one call at a time). Waiting calls start in priority order, then in
+// order of arrival. Batchable calls with the same `batch.key` that queued
+// while their pipeline was busy run as one batched call when it frees up;
+// a call finding its pipeline idle starts at once, so only queued calls are
+// batched.
+//
+// A job is { key, priority, task, batch, check, onQueued, onStart }: `key`
+// is the pipeline it calls and `task` makes the call. With `batch`
+// ({ key, input, runMany }), jobs with the same batch key can run as one call
+// of `runMany(inputs)`, which settles each input separately like
+// Promise.allSettled. `check` is called when the job is about to start and
+// throwing drops it (e.g. when cancelled), `onQueued` when it has to wait for
+// other jobs, and `onStart({ wait_ms, batch_size })` when it starts.
+export class InferenceScheduler {
+  constructor(maxConcurrency = 1, { maxBatchSize = 8 } = {}) {
+    this.maxConcurrency = maxConcurrency;
+    this.maxBatchSize = maxBatchSize;
+    this.queue = [];
+    this.busy = new Set();
+    this.running = 0;
+    this.batchedCalls = 0;
+  }
+
+  setMaxConcurrency(maxConcurrency) {
+    this.maxConcurrency = Math.max(1, maxConcurrency || this.maxConcurrency);
+    this.pump();
+  }
+
+  // Jobs queued or running
+  depth() {
+    return this.queue.length + this.running;
+  }
+
+  schedule(job) {
+    return new Promise((resolve, reject) => {
+      const entry = {
+        job,
+        rank: PRIORITY_RANK[job.priority || 'interactive'],
+        queuedAt: performance.now(),
+        resolve,
+        reject,
+      };
+      this.queue.push(entry);
+      this.pump();
+      if (this.queue.includes(entry) && (this.running >= this.maxConcurrency || this.busy.has(job.key))) {
+        if (job.onQueued) {
+          job.onQueued();
+        }
+      }
+    });
+  }
+
+  stats() {
+    return {
+      max_concurrency: this.maxConcurrency,
+      running: this.running,
+      queued: this.queue.length,
+      batched_calls: this.batchedCalls,
+    };
+  }
+
+  // Starts waiting jobs while there is room
+  pump() {
+    const reserved = new Set(this.busy);
+    // Highest priority first; the sort is stable, so arrival order within a priority
+    for (const entry of [...this.queue].sort((a, b) => a.rank - b.rank)) {
+      if (this.running >= this.maxConcurrency) {
+        break;
+      }
+      if (!this.queue.includes(entry) || reserved.has(entry.job.key)) {
+        continue;
+      }
+      if (this.start(entry)) {
+        reserved.add(entry.job.key);
+      }
+    }
+  }
+
+  // Starts the entry with the waiting jobs that batch with it; false if all were dropped
+  start(first) {
+    const batchKey = first.job.batch ? first.job.batch.key : undefined;
+    const group = batchKey === undefined
+      ? [first]
+      : [first, ...this.queue.filter((entry) => entry !== first && entry.job.batch && entry.job.batch.key === batchKey)
+        .sort((a, b) => a.rank - b.rank)].slice(0, this.maxBatchSize);
+    this.queue = this.queue.filter((entry) => !group.includes(entry));
+
+    const runnable = group.filter((entry) => {
+      try {
+        if (entry.job.check) {
+          entry.job.check();
+        }
+        return true;
+      } catch (error) {
+        entry.reject(error);
+        return false;
+      }
+    });
+    if (runnable.length === 0) {
+      return false;
+    }
+
+    const started = performance.now();
+    runnable.forEach((entry) => {
+      if (entry.job.onStart) {
+        entry.job.onStart({ wait_ms: started - entry.queuedAt, batch_size: runnable.length });
+      }
+    });
+    const key = first.job.key;
+    this.running++;
+    this.busy.add(key);
+    this.run(runnable).finally(() => {
+      this.running--;
+      this.busy.delete(key);
+      this.pump();
+    });
+    return true;
+  }
+
+  async run(entries) {
+    if (entries.length === 1) {
+      try {
+        entries[0].resolve(await entries[0].job.task());
+      } catch (error) {
+        entries[0].reject(error);
+      }
+      return;
+    }
+    this.batchedCalls++;
+    try {
+      const settled = await entries[0].job.batch.runMany(entries.map((entry) => entry.job.batch.input));
+      entries.forEach((entry, i) => {
+        const outcome = settled[i];
+        if (outcome.status === 'fulfilled') {
+          entry.resolve(outcome.value);
+        } else {
+          entry.reject(outcome.reason);
+        }
+      });
+    } catch (error) {
+      entries.forEach((entry) => entry.reject(error));
+    }
+  }
+}
+
+// Splits the output of a pipeline called on a list of inputs into what a
+// call on each input returns, for the pipelines whose single-input runs are
+// micro-batched. A text-classification call on one input returns a list of
+// its top labels, but each item of a batched call with `topk` 1 is the label
+// itself.
+const splitClassification = (output, index, config) =>
+  ((config && config.topk) ?? 1) === 1 ? [output[index]] : output[index];
+const splitPerInput = (output, index) => output[index];
+
+export const MICRO_BATCH_TASKS = {
+  'text-classification': splitClassification,
+  'sentiment-analysis': splitClassification,
+  'token-classification': splitPerInput,
+  'ner': splitPerInput,
+};
+
+// Replace tensors in a pipeline output with plain descriptors and collect
+// their buffers so they can be transferred instead of cloned.
+export function packOutput(value, transfer) {
+  if (value && typeof value === 'object') {
+    if (ArrayBuffer.isView(value.data) && Array.isArray(value.dims)) {
+      const data = value.data;
+      if (data.byteOffset === 0 && data.byteLength === data.buffer.byteLength
+          && !transfer.includes(data.buffer)) {
+        transfer.push(data.buffer);
+      }
+      return { __tensor__: true, type: value.type, dims: value.dims, data };
+    }
+    if (Array.isArray(value)) {
+      return value.map((item) => packOutput(item, transfer));
+    }
+    const packed = {};
+    for (const [key, item] of Object.entries(value)) {
+      packed[key] = packOutput(item, transfer);
+    }
+    return packed;
+  }
+  return value;
+}
+
+// The error a cancelled run rejects with
+export function cancelledError() {
+  const error = new Error('Run cancelled');
+  error.cancelled = true;
+  return error;
+}
+
+export function createRuntime(transformers, { releaseDelayMs = null } = {}) {
+  const pipelineCache = new PipelineCache(4, { releaseDelayMs });
+  const scheduler = new InferenceScheduler(1);
+  // WASM settings applied by the first request; ONNX Runtime reads them once
+  let wasmSettings = null;
+  // Model key currently held by each client, for reference counting
+  const clientKeys = new Map();
+  // Runs in progress by `run_key`, or by request for runs without one:
+  // { key, requests: [{ id, client_id, post }], latest, cancelled }, where
+  // `latest` holds the latest message of each progress type, replayed to a
+  // request that attaches late
+  const activeRuns = new Map();
+
+  function hold(clientId, key) {
+    const previous = clientKeys.get(clientId);
+    if (previous === key) {
+      return;
+    }
+    pipelineCache.retain(key);
+    clientKeys.set(clientId, key);
+    if (previous !== undefined) {
+      pipelineCache.release(previous);
+    }
+  }
+
+  // Also releases the per-model holds of a preload ("<clientId>#<index>")
+  function releaseClient(clientId) {
+    for (const [holder, key] of [...clientKeys]) {
+      if (holder === clientId || holder.startsWith(`${clientId}#`)) {
+        clientKeys.delete(holder);
+        pipelineCache.release(key);
+      }
+    }
+  }
+
+  function toPipelineInput(input, mimeType, objectUrls) {
+    if (mimeType && mimeType.startsWith(PCM_MIME_TYPE)) {
+      return pcmSamples(input);
+    }
+    if (input instanceof Uint8Array) {
+      // Raw bytes from the binary transport; hand the pipeline an object URL
+      const url = URL.createObjectURL(new Blob([input], { type: mimeType || 'application/octet-stream' }));
+      objectUrls.push(url);
+      return url;
+    }
+    if (mimeType && typeof input === 'string') {
+      return `data:${mimeType};base64,${input}`;
+    }
+    return input;
+  }
+
+  // Stops a run nobody is waiting for. Once it has stopped, identical
+  // requests start a new run instead of attaching to it.
+  function throwIfCancelled(active) {
+    if (active.cancelled) {
+      if (activeRuns.get(active.key) === active) {
+        activeRuns.delete(active.key);
+      }
+      throw cancelledError();
+    }
+  }
+
+  // Sends a message to every request attached to the run. Transferred
+  // buffers can only go to one of them; the others get copies.
+  function broadcast(active) {
+    return (message, transfer = []) => {
+      if (message.type !== 'result' && message.type !== 'error') {
+        active.latest.set(message.type, message);
+      }
+      active.requests.forEach((request, i) => {
+        const last = i === active.requests.length - 1;
+        request.post({ ...message, id: request.id }, last ? transfer : []);
+      });
+    };
+  }
+
+  function cancel(request) {
+    for (const active of activeRuns.values()) {
+      const index = active.requests.findIndex((r) => r.id === request.id && r.client_id === request.client_id);
+      if (index !== -1) {
+        active.requests.splice(index, 1);
+        active.cancelled = active.requests.length === 0;
+        return;
+      }
+    }
+  }
+
+  // Runs the pipeline over `inputs` in sub-batches, each queued with the
+  // scheduler on its own
+  async function runBatch(pipe, request, inputs, post, active, schedule) {
+    const total = inputs.length;
+    const batchSize = Math.max(1, request.batch_size || 1);
+    const results = new Array(total).fill(null);
+    const errors = new Array(total).fill(null);
+    let completed = 0;
+
+    for (let start = 0; start < total; start += batchSize) {
+      const chunk = inputs.slice(start, start + batchSize);
+      const chunkResults = await schedule(async () => {
+        try {
+          const output = await pipe(chunk.length === 1 ? chunk[0] : chunk, request.config || {});
+          if (chunk.length === 1) {
+            return [output];
+          } else if (Array.isArray(output) && output.length === chunk.length) {
+            return output;
+          }
+        } catch (error) {
+          console.warn('Batched call failed, retrying items individually:', error);
+        }
+
+        // Fall back to one call per item so a bad item only fails itself
+        const outputs = [];
+        for (let i = 0; i < chunk.length; i++) {
+          throwIfCancelled(active);
+          try {
+            outputs.push(await pipe(chunk[i], request.config || {}));
+          } catch (error) {
+            outputs.push(null);
+            errors[start + i] = error.message;
+          }
+        }
+        return outputs;
+      });
+
+      chunkResults.forEach((output, i) => { results[start + i] = output; });
+      completed += chunk.length;
+      post({ type: 'batch_progress', id: request.id, completed, total });
+    }
+
+    return { results, errors, completed, total };
+  }
+
+  // Point transformers.js at the hub or at a local mirror before a load.
+  // `env` is global to the worker, so loads from different sources that
+  // overlap in a shared worker can race; an app normally uses one source.
+  function configureModelSource(request) {
+    const env = transformers.env;
+    if (!env) {
+      return;
+    }
+    if (request.model_source === 'local') {
+      env.allowLocalModels = true;
+      env.allowRemoteModels = false;
+      env.localModelPath = request.local_model_path;
+    } else {
+      env.allowLocalModels = false;
+      env.allowRemoteModels = true;
+    }
+  }
+
+  // Applies the request's WASM settings if none have been applied yet, and
+  // returns the settings in effect, with notes on what differs from the request
+  function configureWasm(request) {
+    const requested = request.runtime || {};
+    const resolved = resolveWasmSettings(requested);
+    if (wasmSettings === null) {
+      wasmSettings = resolved;
+      const wasm = transformers.env && transformers.env.backends && transformers.env.backends.onnx
+        && transformers.env.backends.onnx.wasm;
+      if (wasm) {
+        wasm.numThreads = resolved.num_threads;
+        wasm.simd = resolved.simd;
+        wasm.proxy = false;
+      }
+      return { ...resolved, requested };
+    }
+    const notes = [...resolved.notes];
+    if (resolved.num_threads !== wasmSettings.num_threads || resolved.simd !== wasmSettings.simd) {
+      notes.push('WASM settings were applied by an earlier load; reload the page to change them');
+    }
+    return { ...wasmSettings, requested, notes };
+  }
+
+  // Updates the model's last use and, after a fresh load (which may have
+  // downloaded files), prunes the browser cache to its budget, keeping the
+  // models this worker has loaded. Neither delays the run.
+  function trackModelUse(modelName, cacheHit) {
+    const loaded = pipelineCache.modelNames();
+    recordModelUse(modelName)
+      .then(() => (cacheHit ? null : enforceCacheBudget({ protect: loaded })))
+      .catch((error) => console.warn('Failed to update the model cache:', error));
+  }
+
+  // Generation callback for a streamed run. Tokens are only decoded when an
+  // update is posted, so a fast model isn't slowed down by decoding every step.
+  // Throwing from it stops generation, so a cancelled run stops at the next token.
+  function streamCallback(pipe, request, post, timings, active) {
+    const intervalMs = request.stream.interval_ms ?? 250;
+    let tokens = 0;
+    let outputIds = null;
+    let lastSent = 0;
+    let timer = null;
+
+    const send = () => {
+      clearTimeout(timer);
+      timer = null;
+      lastSent = now();
+      const text = pipe.tokenizer.decode(outputIds, { skip_special_tokens: true });
+      post({ type: 'partial', id: request.id, text, tokens });
+    };
+
+    const callback = (beams) => {
+      throwIfCancelled(active);
+      tokens++;
+      outputIds = beams[0].output_token_ids;
+      if (tokens === 1) {
+        timings.stages.first_token = [timings.stages.queue[1], now()];
+        send();
+      } else if (timer === null) {
+        timer = setTimeout(send, Math.max(0, intervalMs - (now() - lastSent)));
+      }
+    };
+    // Drop a pending update once the result is on its way
+    callback.cancel = () => {
+      clearTimeout(timer);
+      timer = null;
+    };
+    return callback;
+  }
+
+  // Loads (or reuses) the pipeline for a request and holds it for the client.
+  // With `timings`, records the load stage and, for a fresh load, its split
+  // into downloading files and creating the session.
+  async function load(request, post, timings = null) {
+    const started = now();
+    let lastFileDone = null;
+    // The same model from a different source is a different pipeline
+    const cacheOptions = {
+      ...(request.load_options || {}),
+      model_source: request.model_source || 'hub',
+      local_model_path: request.local_model_path || null,
+    };
+    const key = PipelineCache.key(request.pipeline_type, request.model_name, cacheOptions);
+    hold(request.client_id, key);
+    pipelineCache.setMaxEntries(request.pipeline_cache_size);
+    const hitsBefore = pipelineCache.hits;
+    const pipe = await pipelineCache.get(
+      request.pipeline_type,
+      request.model_name,
+      cacheOptions,
+      () => {
+        configureModelSource(request);
+        return transformers.pipeline(request.pipeline_type, request.model_name, {
+          ...(request.load_options || {}),
+          progress_callback: (progress) => {
+            if (progress.status === 'done') {
+              lastFileDone = now();
+            }
+            post({ type: 'progress', id: request.id, progress });
+          },
+        });
+      }
+    );
+    const cacheHit = pipelineCache.hits > hitsBefore;
+    trackModelUse(request.model_name, cacheHit);
+    if (timings) {
+      const loaded = now();
+      timings.stages.load = [started, loaded];
+      if (lastFileDone !== null) {
+        timings.stages.download = [started, lastFileDone];
+        timings.stages.session = [lastFileDone, loaded];
+      }
+      timings.pipeline_cache_hit = cacheHit;
+    }
+    post({ type: 'loaded', id: request.id, pipeline_cache_hit: cacheHit });
+    return { pipe, key, cacheHit };
+  }
+
+  // Returns `schedule(task, batch)`, which queues one model call of a run
+  // with the scheduler (`batch` lets it share a call with other runs),
+  // recording the queue stage (up to its first call), the inference stage
+  // (to the end of its last call) and the run's `queue`. A run cancelled
+  // while queued never starts.
+  function scheduleRun(key, request, post, timings, active, queue) {
+    let queued = null;
+    let waiting = false;
+    return async (task, batch) => {
+      if (queued === null) {
+        queued = now();
+        queue.depth = scheduler.depth();
+      }
+      const queuedAt = queued;
+      try {
+        return await scheduler.schedule({
+          key,
+          priority: queue.priority,
+          task,
+          batch,
+          check: () => throwIfCancelled(active),
+          onQueued: () => {
+            waiting = true;
+            post({ type: 'queued', id: request.id, queue: { ...queue } });
+          },
+          onStart: ({ wait_ms, batch_size }) => {
+            queue.wait_ms += wait_ms;
+            queue.batch_size = Math.max(queue.batch_size, batch_size);
+            if (!timings.stages.inference) {
+              const started = now();
+              timings.stages.queue = [queuedAt, started];
+              timings.stages.inference = [started, started];
+            }
+            if (waiting) {
+              waiting = false;
+              post({ type: 'started', id: request.id, queue: { ...queue } });
+            }
+          },
+        });
+      } finally {
+        if (timings.stages.inference) {
+          timings.stages.inference[1] = now();
+        }
+      }
+    };
+  }
+
+  // One call of the pipeline on the inputs of micro-batched runs, split into
+  // each run's output. If it fails or its output doesn't line up with the
+  // inputs, they are run one by one so that each run gets its own error.
+  async function runMicroBatch(pipe, request, inputs) {
+    const split = MICRO_BATCH_TASKS[request.pipeline_type];
+    const config = request.config || {};
+    try {
+      const output = await pipe(inputs, config);
+      if (Array.isArray(output) && output.length === inputs.length) {
+        return inputs.map((_, i) => ({ status: 'fulfilled', value: split(output, i, config) }));
+      }
+    } catch (error) {
+      console.warn('Micro-batched call failed, running items individually:', error);
+    }
+    const settled = [];
+    for (const input of inputs) {
+      try {
+        settled.push({ status: 'fulfilled', value: await pipe(input, config) });
+      } catch (reason) {
+        settled.push({ status: 'rejected', reason });
+      }
+    }
+    return settled;
+  }
+
+  async function run(request, post, timings, active, queue) {
+    const { pipe, key } = await load(request, post, timings);
+    throwIfCancelled(active);
+    scheduler.setMaxConcurrency(request.max_concurrency);
+    const schedule = scheduleRun(key, request, post, timings, active, queue);
+    const objectUrls = [];
+    try {
+      const decodeStarted = now();
+      if (request.mode === 'batch') {
+        const inputs = [];
+        (request.inputs || []).forEach((input, i) => {
+          const item = toPipelineInput(input, (request.mime_types || [])[i], objectUrls);
+          const chunks = (request.audio_chunks || [])[i];
+          // One item per chunk, each a view into the recording
+          inputs.push(...(chunks ? chunks.map(([start, end]) => item.subarray(start, end)) : [item]));
+        });
+        timings.stages.decode = [decodeStarted, now()];
+        return await runBatch(pipe, request, inputs, post, active, schedule);
+      }
+
+      if (request.audio_chunks) {
+        // Views into the one recording; overlapping chunks share samples
+        const samples = toPipelineInput(request.inputs, request.mime_type, objectUrls);
+        const chunks = request.audio_chunks.map(([start, end]) => samples.subarray(start, end));
+        timings.stages.decode = [decodeStarted, now()];
+        return await runBatch(pipe, request, chunks, post, active, schedule);
+      }
+
+      if (request.text_chunks) {
+        const chunks = request.text_chunks.map(([start, end]) => request.inputs.slice(start, end));
+        timings.stages.decode = [decodeStarted, now()];
+        return await runBatch(pipe, request, chunks, post, active, schedule);
+      }
+
+      let inputs = toPipelineInput(request.inputs, request.mime_type, objectUrls);
+      if (!request.mime_type && typeof inputs === 'string' && inputs.length > 100) {
+        // Legacy behaviour: long strings without a MIME type are base64 images
+        inputs = `data:image/jpeg;base64,${inputs}`;
+      }
+      timings.stages.decode = [decodeStarted, now()];
+      let config = request.config || {};
+      const callback = request.stream && pipe.tokenizer ? streamCallback(pipe, request, post, timings, active) : null;
+      let batch;
+      if (callback) {
+        config = { ...config, callback_function: callback };
+      } else if (MICRO_BATCH_TASKS[request.pipeline_type] && typeof inputs === 'string') {
+        batch = {
+          key: JSON.stringify([key, config]),
+          input: inputs,
+          runMany: (many) => runMicroBatch(pipe, request, many),
+        };
+      }
+      try {
+        return await schedule(() => pipe(inputs, config), batch);
+      } finally {
+        if (callback) {
+          callback.cancel();
+        }
+      }
+    } finally {
+      objectUrls.forEach((url) => URL.revokeObjectURL(url));
+    }
+  }
+
+  // Loads each model in turn, holding it for the client, and runs its
+  // warm-up input once so the first real run skips session initialisation.
+  // A model that fails is reported and the rest are still loaded.
+  async function preload(request, post) {
+    const models = [];
+    for (let index = 0; index < request.models.length; index++) {
+      const spec = request.models[index];
+      const model = {
+        model_name: spec.model_name,
+        pipeline_type: spec.pipeline_type,
+        status: 'loading',
+        load_ms: null,
+        warmup_ms: null,
+        error: null,
+      };
+      models.push(model);
+      const report = () => post({ type: 'preload_progress', id: request.id, index, model: { ...model } });
+      report();
+
+      const objectUrls = [];
+      try {
+        let started = performance.now();
+        const { pipe, key } = await load(
+          { ...request, ...spec, client_id: `${request.client_id}#${index}` },
+          (message, transfer) => post({ ...message, index }, transfer)
+        );
+        model.load_ms = performance.now() - started;
+
+        if (spec.warmup_input !== null && spec.warmup_input !== undefined) {
+          model.status = 'warming';
+          report();
+          const input = toPipelineInput(spec.warmup_input, spec.mime_type, objectUrls);
+          started = performance.now();
+          const output = await scheduler.schedule({
+            key,
+            priority: 'background',
+            task: () => pipe(input, spec.config || {}),
+          });
+          if (output && typeof output.dispose === 'function') {
+            output.dispose();
+          }
+          model.warmup_ms = performance.now() - started;
+        }
+        model.status = 'ready';
+      } catch (error) {
+        model.status = 'error';
+        model.error = error && error.message ? error.message : String(error);
+      } finally {
+        objectUrls.forEach((url) => URL.revokeObjectURL(url));
+      }
+      report();
+    }
+    return { ready: models.every((model) => model.status === 'ready'), models };
+  }
+
+  // `post` sends a reply to the client that sent `request`
+  async function handleMessage(request, post) {
+    if (request.type === 'release') {
+      releaseClient(request.client_id);
+      return;
+    }
+    if (request.type === 'cancel') {
+      cancel(request);
+      return;
+    }
+    if (request.type !== 'run' && request.type !== 'preload') {
+      return;
+    }
+    if (request.type === 'run') {
+      const existing = request.run_key ? activeRuns.get(request.run_key) : undefined;
+      if (existing) {
+        // Follow the identical run in progress, which now can't be cancelled without us
+        existing.requests.push({ id: request.id, client_id: request.client_id, post });
+        existing.cancelled = false;
+        existing.latest.forEach((message) => post({ ...message, id: request.id }));
+        return;
+      }
+    }
+    const runtime = configureWasm(request);
+    if (request.type === 'preload') {
+      const result = await preload(request, post);
+      post({ type: 'result', id: request.id, result, meta: { pipeline_cache: pipelineCache.stats(), runtime } });
+      return;
+    }
+    const active = {
+      key: request.run_key || `#${request.client_id}:${request.id}`,
+      requests: [{ id: request.id, client_id: request.client_id, post }],
+      latest: new Map(),
+      cancelled: false,
+    };
+    activeRuns.set(active.key, active);
+    const reply = broadcast(active);
+    const timings = { stages: {}, pipeline_cache_hit: false, input_bytes: inputSize(request.inputs), output_bytes: 0 };
+    const queue = { priority: request.priority || 'interactive', depth: 0, wait_ms: 0, batch_size: 1 };
+    try {
+      const result = await run(request, reply, timings, active, queue);
+      const serializeStarted = now();
+      const transfer = [];
+      const packed = packOutput(result, transfer);
+      timings.output_bytes = transfer.reduce((total, buffer) => total + buffer.byteLength, 0);
+      timings.stages.serialize = [serializeStarted, now()];
+      const meta = {
+        pipeline_cache: pipelineCache.stats(),
+        pipeline_cache_hit: timings.pipeline_cache_hit,
+        scheduler: scheduler.stats(),
+        timings,
+        runtime,
+        queue,
+      };
+      reply({ type: 'result', id: request.id, result: packed, meta }, transfer);
+    } catch (error) {
+      // A cancelled run has nobody left to tell
+      reply({
+        type: 'error',
+        id: request.id,
+        error: error && error.message ? error.message : String(error),
+        meta: { pipeline_cache: pipelineCache.stats(), scheduler: scheduler.stats(), timings, runtime, queue },
+      });
+    } finally {
+      if (activeRuns.get(active.key) === active) {
+        activeRuns.delete(active.key);
+      }
+    }
+  }
+
+  return { handleMessage, pipelineCache, scheduler };
+}
@@ -0,0 +1,34 @@
+// Module worker that owns model loading and inference, so the log, spinner
+// and Streamlit messages on the main thread stay responsive. See runtime.js
+// for the message protocol.
+//
+// Started as a dedicated Worker it serves one component iframe. Started as
+// a SharedWorker it serves every component iframe on the origin: each model
+// is loaded once, and released shortly after the last component using it
+// goes away.
+import * as transformers from './transformers.min.js';
+import { createRuntime } from './runtime.js';
+
+// How long a shared model stays loaded after its last user releases it
+const SHARED_RELEASE_DELAY_MS = 30000;
+
+if (typeof SharedWorkerGlobalScope !== 'undefined' && self instanceof SharedWorkerGlobalScope) {
+  const runtime = createRuntime(transformers, { releaseDelayMs: SHARED_RELEASE_DELAY_MS });
+  let nextPortId = 0;
+
+  self.onconnect = (event) => {
+    const port = event.ports[0];
+    const portId = ++nextPortId;
+    const post = (message, transfer = []) => port.postMessage(message, transfer);
+    port.onmessage = (message) => {
+      // Client ids are only unique per page, so namespace them by port
+      const request = { ...message.data, client_id: `${portId}:${message.data.client_id}` };
+      runtime.handleMessage(request, post);
+    };
+    port.start();
+  };
+} else {
+  const runtime = createRuntime(transformers);
+  const post = (message, transfer = []) => self.postMessage(message, transfer);
+  self.onmessage = (event) => runtime.handleMessage(event.data, post);
+}
@@ -1,9 +1,49 @@
 import base64
-from typing import Union, Tuple, Optional
+import contextlib
+import io
+import json
+import mmap
+import os
+import struct
+import sys
+from datetime import datetime, timezone
+from typing import Union, Tuple, Optional, List, Sequence, BinaryIO
+
+TRANSPORTS = ("base64", "binary")
+
+# Only this many leading bytes are passed to MIME sniffing
+MIME_SNIFF_BYTES = 2048
+
+# Files at least this large are memory-mapped instead of read
+MMAP_THRESHOLD = 1 << 20
+
+InputType = Union[str, bytes, bytearray, memoryview, dict, "os.PathLike[str]", BinaryIO]
+
+_magic_import_failed = False
+
+# Framing for binary component payloads:
+#   magic (4 bytes) | header length (uint32 LE) | JSON header | blobs
+BINARY_PAYLOAD_MAGIC = b"STJS"
+
+# Inputs used to warm up a preloaded pipeline when none is given
+DEFAULT_WARMUP_INPUTS = {
+    "text-classification": "Warm-up input.",
+    "sentiment-analysis": "Warm-up input.",
+    "token-classification": "Warm-up input.",
+    "ner": "Warm-up input.",
+    "feature-extraction": "Warm-up input.",
+    "summarization": "Warm-up input.",
+    "translation": "Warm-up input.",
+    "text2text-generation": "Warm-up input.",
+    "text-generation": "Warm-up input.",
+}
+
+# Generation tasks only need one step to initialise the decoder
+_GENERATION_TASKS = {"summarization", "translation", "text2text-generation", "text-generation"}
 
 def _get_mime_type_from_magic_numbers(data: bytes) -> Optional[str]:
     """
-    Fallback MIME type detection using magic numbers for common image formats.
+    Fallback MIME type detection using magic numbers for common image and audio formats.
     """
     if len(data) >= 8 and data.startswith(b'\x89PNG\r\n\x1a\n'):
         return 'image/png'
@@ -19,40 +59,381 @@ def _get_mime_type_from_magic_numbers(data: bytes) -> Optional[str]:
         return 'image/tiff'
     if len(data) >= 4 and data.startswith(b'\x00\x00\x01\x00'):
         return 'image/x-icon'
+    if len(data) >= 12 and data[:4] in (b'RIFF', b'RF64') and data[8:12] == b'WAVE':
+        return 'audio/wav'
+    if len(data) >= 4 and data.startswith(b'fLaC'):
+        return 'audio/flac'
+    if len(data) >= 4 and data.startswith(b'OggS'):
+        return 'audio/ogg'
+    if len(data) >= 3 and (data.startswith(b'ID3') or (data[0] == 0xFF and data[1] & 0xE0 == 0xE0)):
+        return 'audio/mpeg'
+    if len(data) >= 12 and data[4:8] == b'ftyp' and data[8:12] in (b'M4A ', b'M4B '):
+        return 'audio/mp4'
     return None
 
-def _get_mime_type_with_magic(data: bytes) -> Optional[str]:
+def _load_magic():
     """
-    Try to get MIME type using python-magic, handling import errors gracefully.
+    Return the python-magic module, or None if it is unavailable.
+
+    A failed import is remembered so a missing library isn't searched for on
+    every call. python-magic keeps its libmagic handle in a module-level cache,
+    so reusing the module also reuses the initialised detector.
     """
+    global _magic_import_failed
+    if "magic" in sys.modules:
+        return sys.modules["magic"]
+    if _magic_import_failed:
+        return None
     try:
         import magic
-        return magic.from_buffer(data, mime=True)
+        return magic
     except ImportError:
+        _magic_import_failed = True
+        return None
+
+def _get_mime_type_with_magic(data: bytes) -> Optional[str]:
+    """
+    Try to get MIME type using python-magic, handling import errors gracefully.
+    """
+    magic = _load_magic()
+    if magic is None:
         # python-magic is not installed
         return None
+    try:
+        return magic.from_buffer(data, mime=True)
     except Exception as e:
         # Other unexpected errors from the magic library
         print(f"An error occurred with python-magic: {e}")
         return None
 
-def process_inputs(inputs: Union[str, bytes, dict]) -> Tuple[Union[str, dict], Optional[str]]:
+def _is_binary_input(inputs) -> bool:
+    return isinstance(inputs, (bytes, bytearray, memoryview, os.PathLike)) or (
+        hasattr(inputs, "read") and not isinstance(inputs, (str, dict))
+    )
+
+def _open_file_buffer(stack: contextlib.ExitStack, f) -> Union[bytes, mmap.mmap]:
     """
-    Process the inputs for the component.
+    Memory-map a real file if it is large enough, otherwise read it.
+
+    Like ``read()``, the file is taken from its current position to the end
+    and the position is left at the end. Only files at position 0 are mapped.
     """
-    if not isinstance(inputs, (str, bytes, dict)):
-        raise TypeError(f"Input type not supported: {type(inputs)}. Must be str, bytes, or dict.")
+    try:
+        fileno = f.fileno()
+        size = os.fstat(fileno).st_size
+        position = f.tell()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return f.read()
+
+    if size < MMAP_THRESHOLD or position != 0:
+        return f.read()
+    buffer = stack.enter_context(mmap.mmap(fileno, 0, access=mmap.ACCESS_READ))
+    f.seek(size)
+    return buffer
 
-    processed_inputs = inputs
-    mime_type = None
+def _binary_buffer(stack: contextlib.ExitStack, inputs) -> Union[bytes, memoryview, mmap.mmap]:
+    """
+    Return a buffer over binary inputs without copying where possible.
 
+    Resources (memoryviews, maps, opened files) are released when ``stack``
+    closes.
+    """
     if isinstance(inputs, bytes):
+        return inputs
+    if isinstance(inputs, (bytearray, memoryview)):
+        return stack.enter_context(memoryview(inputs))
+    if isinstance(inputs, os.PathLike):
+        f = stack.enter_context(open(inputs, "rb"))
+        return _open_file_buffer(stack, f)
+    if hasattr(inputs, "getbuffer"):
+        # BytesIO and Streamlit's UploadedFile expose their buffer directly
+        return stack.enter_context(inputs.getbuffer())
+    if hasattr(inputs, "read"):
+        if isinstance(inputs, io.TextIOBase):
+            raise TypeError("File-like inputs must be opened in binary mode.")
+        data = _open_file_buffer(stack, inputs)
+        if isinstance(data, str):
+            raise TypeError("File-like inputs must be opened in binary mode.")
+        return data
+    raise TypeError(f"Input type not supported: {type(inputs)}.")
+
+def process_inputs(
+    inputs: InputType,
+    transport: str = "base64",
+) -> Tuple[Union[str, bytes, dict], Optional[str]]:
+    """
+    Process the inputs for the component.
+
+    Binary inputs can be bytes, bytearray, memoryview, an ``os.PathLike``
+    path or a binary file-like object (e.g. an ``UploadedFile``). Large files
+    are memory-mapped so that only the encoded output is held in memory.
+
+    With ``transport="base64"`` binary inputs are base64-encoded into a str.
+    With ``transport="binary"`` they are returned as bytes so they can be
+    sent to the frontend as a binary payload.
+    """
+    if not isinstance(inputs, (str, dict)) and not _is_binary_input(inputs):
+        raise TypeError(
+            f"Input type not supported: {type(inputs)}. "
+            "Must be str, bytes, bytearray, memoryview, dict, a path or a binary file-like object."
+        )
+    if transport not in TRANSPORTS:
+        raise ValueError(f"Unknown transport: {transport!r}. Must be one of {TRANSPORTS}.")
+
+    if not _is_binary_input(inputs):
+        return inputs, None
+
+    with contextlib.ExitStack() as stack:
+        buffer = _binary_buffer(stack, inputs)
+        header = bytes(buffer[:MIME_SNIFF_BYTES])
+
         # Try python-magic first
-        mime_type = _get_mime_type_with_magic(inputs)
+        mime_type = _get_mime_type_with_magic(header)
         # Fallback to magic numbers if python-magic is not available or fails
         if not mime_type:
-            mime_type = _get_mime_type_from_magic_numbers(inputs)
+            mime_type = _get_mime_type_from_magic_numbers(header)
 
-        processed_inputs = base64.b64encode(inputs).decode('utf-8')
+        if transport == "base64":
+            processed_inputs = base64.b64encode(buffer).decode('utf-8')
+        elif isinstance(buffer, bytes):
+            processed_inputs = buffer
+        else:
+            processed_inputs = bytes(buffer)
 
     return processed_inputs, mime_type
+
+def encode_binary_payload(header: dict, blobs: Sequence[bytes]) -> bytes:
+    """
+    Pack a JSON header and raw byte blobs into a single binary payload.
+
+    The blob offsets and lengths are stored in the header under ``"blobs"``
+    so the frontend can slice each blob out of the payload without copying.
+    Blobs are 8-byte aligned, so typed arrays (e.g. float32 PCM) can view
+    them in place.
+    """
+    offsets = []
+    parts = []
+    position = 0
+    for blob in blobs:
+        padding = -position % 8
+        parts.append(b"\0" * padding)
+        parts.append(blob)
+        position += padding
+        offsets.append([position, len(blob)])
+        position += len(blob)
+
+    header_bytes = json.dumps({**header, "blobs": offsets}).encode("utf-8")
+    header_bytes += b" " * (-(8 + len(header_bytes)) % 8)
+    return b"".join([
+        BINARY_PAYLOAD_MAGIC,
+        struct.pack("<I", len(header_bytes)),
+        header_bytes,
+        *parts,
+    ])
+
+def decode_binary_payload(payload: bytes) -> Tuple[dict, List[memoryview]]:
+    """
+    Inverse of ``encode_binary_payload``; blobs are returned as memoryviews.
+    """
+    view = memoryview(payload)
+    if bytes(view[:4]) != BINARY_PAYLOAD_MAGIC:
+        raise ValueError("Not a binary component payload")
+    (header_length,) = struct.unpack("<I", view[4:8])
+    header = json.loads(bytes(view[8:8 + header_length]).decode("utf-8"))
+    start = 8 + header_length
+    blobs = [view[start + offset:start + offset + length] for offset, length in header["blobs"]]
+    return header, blobs
+
+def process_batch_inputs(
+    inputs: Sequence[InputType],
+) -> Tuple[List[str], List[Optional[str]]]:
+    """
+    Process a list of inputs for a batch component call.
+
+    Each item goes through ``process_inputs``; the processed values and MIME
+    types are returned as two parallel lists in input order. ``{"blob": i}``
+    references to a binary payload's blobs are passed through.
+    """
+    if isinstance(inputs, (str, bytes, dict)) or not isinstance(inputs, (list, tuple)):
+        raise TypeError(
+            f"Batch inputs must be a list or tuple, got {type(inputs)}."
+        )
+
+    processed_inputs = []
+    mime_types = []
+    for index, item in enumerate(inputs):
+        if isinstance(item, dict) and isinstance(item.get("blob"), int):
+            # A reference to a blob sent in the binary payload
+            processed_inputs.append(item)
+            mime_types.append(None)
+            continue
+        if not isinstance(item, str) and not _is_binary_input(item):
+            raise TypeError(
+                f"Batch input at index {index} has unsupported type {type(item)}. "
+                "Must be str or binary input."
+            )
+        processed, mime_type = process_inputs(item)
+        processed_inputs.append(processed)
+        mime_types.append(mime_type)
+
+    return processed_inputs, mime_types
+
+def process_load_options(load_options: Optional[dict]) -> dict:
+    """
+    Validate the options passed to ``pipeline()`` when a model is loaded.
+
+    They are sent to the browser, so they must be JSON-serialisable, and the
+    frontend sets ``progress_callback`` itself.
+    """
+    if load_options is None:
+        return {}
+    if not isinstance(load_options, dict):
+        raise TypeError(f"load_options must be a dict, got {type(load_options)}.")
+    if "progress_callback" in load_options:
+        raise ValueError("load_options must not set progress_callback; it is set by the frontend")
+    try:
+        json.dumps(load_options)
+    except (TypeError, ValueError) as e:
+        raise TypeError(f"load_options must be JSON-serialisable: {e}") from e
+    return dict(load_options)
+
+def process_runtime_options(runtime: Optional[dict]) -> dict:
+    """
+    Validate the ONNX Runtime WASM settings of the ``runtime`` option.
+
+    Accepts ``num_threads`` (a positive int, or "auto"/None for ONNX
+    Runtime's default), ``simd`` and ``proxy`` (bools).
+    """
+    if runtime is None:
+        return {}
+    if not isinstance(runtime, dict):
+        raise TypeError(f"runtime must be a dict, got {type(runtime)}.")
+    unknown = set(runtime) - {"num_threads", "simd", "proxy"}
+    if unknown:
+        raise ValueError(f"Unknown runtime options: {sorted(unknown)}")
+
+    num_threads = runtime.get("num_threads")
+    if num_threads not in (None, "auto") and (
+        isinstance(num_threads, bool) or not isinstance(num_threads, int) or num_threads < 1
+    ):
+        raise ValueError(f'runtime num_threads must be a positive int or "auto", got {num_threads!r}')
+    for flag in ("simd", "proxy"):
+        if flag in runtime and not isinstance(runtime[flag], bool):
+            raise TypeError(f"runtime {flag} must be a bool, got {type(runtime[flag])}.")
+    return dict(runtime)
+
+# Priorities of the frontend's inference queue, highest first
+PRIORITIES = ("interactive", "background")
+
+def process_scheduling(priority: str, max_concurrency: int) -> dict:
+    """
+    Validate the options for the browser's inference scheduler.
+
+    ``priority`` places the run's model calls in the queue and
+    ``max_concurrency`` bounds the model calls running at once across every
+    component of the worker.
+    """
+    if priority not in PRIORITIES:
+        raise ValueError(f"priority must be one of {PRIORITIES}, got {priority!r}")
+    if isinstance(max_concurrency, bool) or not isinstance(max_concurrency, int) or max_concurrency < 1:
+        raise ValueError(f"max_concurrency must be a positive int, got {max_concurrency!r}")
+    return {"priority": priority, "max_concurrency": max_concurrency}
+
+def process_model_specs(
+    models: Sequence[Union[Tuple[str, str], dict]],
+    warmup: bool = True,
+    load_options: Optional[dict] = None,
+) -> List[dict]:
+    """
+    Normalise the model list of a preload call.
+
+    Each model is a ``(model_name, pipeline_type)`` tuple or a dict with
+    ``model_name`` and ``pipeline_type`` and optionally ``warmup_input``,
+    ``config`` and ``load_options`` (default: the ``load_options`` argument).
+    With ``warmup`` set, models without a ``warmup_input`` use the default for
+    their task if there is one; warm-up inputs are processed like pipeline
+    inputs.
+    """
+    if isinstance(models, (str, dict)) or not isinstance(models, (list, tuple)):
+        raise TypeError(f"models must be a list or tuple, got {type(models)}.")
+    if not models:
+        raise ValueError("models must not be empty")
+
+    specs = []
+    for index, model in enumerate(models):
+        if isinstance(model, dict):
+            spec = dict(model)
+        elif isinstance(model, (list, tuple)) and len(model) == 2:
+            spec = {"model_name": model[0], "pipeline_type": model[1]}
+        else:
+            raise TypeError(
+                f"Model at index {index} must be a (model_name, pipeline_type) "
+                f"tuple or a dict, got {model!r}."
+            )
+        if not spec.get("model_name") or not spec.get("pipeline_type"):
+            raise ValueError(f"Model at index {index} needs a model_name and a pipeline_type")
+
+        warmup_input = spec.pop("warmup_input", None)
+        if warmup and warmup_input is None:
+            warmup_input = DEFAULT_WARMUP_INPUTS.get(spec["pipeline_type"])
+        config = spec.pop("config", None)
+        model_load_options = process_load_options(spec.pop("load_options", load_options))
+        if config is None and spec["pipeline_type"] in _GENERATION_TASKS:
+            config = {"max_new_tokens": 1}
+
+        mime_type = None
+        if warmup and warmup_input is not None:
+            warmup_input, mime_type = process_inputs(warmup_input)
+        else:
+            warmup_input = None
+
+        specs.append({
+            "model_name": spec.pop("model_name"),
+            "pipeline_type": spec.pop("pipeline_type"),
+            "warmup_input": warmup_input,
+            "mime_type": mime_type,
+            "config": config or {},
+            "load_options": model_load_options,
+        })
+        if spec:
+            raise ValueError(f"Unknown keys for model at index {index}: {sorted(spec)}")
+
+    return specs
+
+def process_cache_request(
+    action: str,
+    model_name: Optional[str] = None,
+    max_bytes: Optional[int] = None,
+    persist: bool = False,
+) -> dict:
+    """
+    Validate a browser model cache request ("list", "evict" or "budget").
+
+    ``evict`` needs a ``model_name``; ``budget`` takes a non-negative
+    ``max_bytes``, or None to remove the budget.
+    """
+    if action not in ("list", "evict", "budget"):
+        raise ValueError(f'action must be "list", "evict" or "budget", got {action!r}')
+    if action == "evict" and (not isinstance(model_name, str) or not model_name):
+        raise ValueError("model_name must be a non-empty string")
+    if max_bytes is not None and (isinstance(max_bytes, bool) or not isinstance(max_bytes, int)):
+        raise TypeError(f"max_bytes must be an int or None, got {type(max_bytes)}.")
+    if max_bytes is not None and max_bytes < 0:
+        raise ValueError("max_bytes must not be negative")
+    if not isinstance(persist, bool):
+        raise TypeError(f"persist must be a bool, got {type(persist)}.")
+    return {"action": action, "model_name": model_name, "budget_bytes": max_bytes, "persist": persist}
+
+def process_cache_report(report):
+    """
+    Turn the ``last_used`` epoch milliseconds of a cache listing into UTC datetimes.
+    """
+    if not isinstance(report, dict) or not isinstance(report.get("models"), list):
+        return report
+    models = []
+    for model in report["models"]:
+        last_used = model.get("last_used")
+        if last_used is not None:
+            model = {**model, "last_used": datetime.fromtimestamp(last_used / 1000, tz=timezone.utc)}
+        models.append(model)
+    return {**report, "models": models}
@@ -0,0 +1,278 @@
+import contextlib
+import hashlib
+import io
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Union
+
+# Longest image side kept per task. Image processors resize far below a
+# phone photo's resolution, so sending more only costs transfer and
+# browser decode time. Values stay at or above what common processors use
+# (ViT/CLIP 224, TrOCR 384, DETR 800x1333, Donut 2560); tasks not listed,
+# e.g. image-to-image super-resolution, are not resized.
+DEFAULT_MAX_SIDES: Dict[str, int] = {
+    "image-classification": 512,
+    "zero-shot-image-classification": 512,
+    "image-feature-extraction": 512,
+    "image-to-text": 1280,
+    "depth-estimation": 1024,
+    "object-detection": 1333,
+    "zero-shot-object-detection": 1333,
+    "image-segmentation": 1333,
+    "document-question-answering": 2560,
+}
+
+# Per-model overrides of DEFAULT_MAX_SIDES, e.g. for a model trained on
+# larger inputs than its task's default. None turns resizing off.
+MODEL_MAX_SIDES: Dict[str, Optional[int]] = {}
+
+IMAGE_FORMATS = ("jpeg", "webp", "png")
+
+_DEFAULT_OPTIONS = {"max_side": "auto", "format": "jpeg", "quality": 90}
+
+# Formats browsers decode; anything else (TIFF, HEIF with a plugin...) is
+# always re-encoded
+_BROWSER_FORMATS = {"JPEG", "PNG", "WEBP", "GIF"}
+
+# EXIF tag for how the stored pixels are rotated or flipped
+_ORIENTATION = 0x0112
+
+# Streamlit reruns the script on every interaction, so the same upload is
+# preprocessed again and again; keep the last few results by content hash
+_PROCESSED_CACHE_SIZE = 16
+_processed: "OrderedDict[str, Optional[Tuple[bytes, dict]]]" = OrderedDict()
+_processed_lock = threading.Lock()
+
+
+def resolve_image_options(image_preprocessing: Union[bool, dict, None]) -> Optional[dict]:
+    """
+    Validate the ``image_preprocessing`` argument of the pipeline functions.
+
+    Returns None when preprocessing is off, otherwise the options with
+    defaults filled in: ``max_side`` (int, None for no resizing, or "auto"
+    for the model's or task's default), ``format`` ("jpeg", "webp" or
+    "png") and ``quality`` (1-100, for JPEG and WebP).
+    """
+    if image_preprocessing is None or image_preprocessing is False:
+        return None
+    if image_preprocessing is True:
+        options = dict(_DEFAULT_OPTIONS)
+    elif isinstance(image_preprocessing, dict):
+        unknown = set(image_preprocessing) - set(_DEFAULT_OPTIONS)
+        if unknown:
+            raise ValueError(f"Unknown image_preprocessing options: {sorted(unknown)}")
+        options = {**_DEFAULT_OPTIONS, **image_preprocessing}
+    else:
+        raise TypeError(
+            f"image_preprocessing must be a bool or dict, got {type(image_preprocessing)}."
+        )
+
+    max_side = options["max_side"]
+    if max_side not in (None, "auto") and (
+        isinstance(max_side, bool) or not isinstance(max_side, int) or max_side < 1
+    ):
+        raise ValueError(f'image_preprocessing max_side must be a positive int, None or "auto", got {max_side!r}')
+    if options["format"] not in IMAGE_FORMATS:
+        raise ValueError(f"image_preprocessing format must be one of {IMAGE_FORMATS}, got {options['format']!r}")
+    quality = options["quality"]
+    if isinstance(quality, bool) or not isinstance(quality, int) or not 1 <= quality <= 100:
+        raise ValueError(f"image_preprocessing quality must be an int from 1 to 100, got {quality!r}")
+
+    try:
+        import PIL  # noqa: F401
+    except ImportError as e:
+        raise ImportError(
+            "image_preprocessing requires Pillow. "
+            "Install it with: pip install st-transformers-js[image-preprocessing]"
+        ) from e
+    return options
+
+
+def max_side_for(model_name: str, pipeline_type: str, options: dict) -> Optional[int]:
+    """
+    Return the longest side to resize images to for a model, or None.
+    """
+    if options["max_side"] != "auto":
+        return options["max_side"]
+    if model_name in MODEL_MAX_SIDES:
+        return MODEL_MAX_SIDES[model_name]
+    return DEFAULT_MAX_SIDES.get(pipeline_type)
+
+
+def _flatten(image):
+    # Models see RGB; composite transparency onto white rather than black
+    from PIL import Image
+
+    if image.mode in ("RGB", "L"):
+        return image
+    if image.mode == "P" and "transparency" in image.info:
+        image = image.convert("RGBA")
+    if image.mode in ("RGBA", "LA", "PA"):
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def _encode(image, options: dict) -> bytes:
+    output = io.BytesIO()
+    if options["format"] == "jpeg":
+        image.save(output, "JPEG", quality=options["quality"], optimize=True)
+    elif options["format"] == "webp":
+        image.save(output, "WEBP", quality=options["quality"], method=4)
+    else:
+        image.save(output, "PNG", optimize=False)
+    return output.getvalue()
+
+
+def preprocess_image(data, max_side: Optional[int], options: dict) -> Optional[Tuple[bytes, dict]]:
+    """
+    Downscale, normalise and re-encode one encoded image.
+
+    The image is rotated upright from its EXIF orientation, converted to
+    RGB (or kept greyscale), shrunk so its longest side is at most
+    ``max_side`` and encoded in ``options["format"]``. An image that needed
+    none of that is only re-encoded if the result is smaller, and is
+    otherwise returned as is.
+
+    Returns ``(encoded, report)``, or None if ``data`` is not an image
+    Pillow can read. The report has ``original_bytes``, ``bytes``,
+    ``saved_bytes``, ``original_size`` and ``size`` (width, height),
+    ``mime_type``, ``reencoded`` and ``elapsed_ms``. Results for the last
+    few distinct inputs are reused, so reruns with the same upload are cheap.
+    Raises ValueError for an image over Pillow's decompression bomb limit.
+    """
+    original = bytes(data)
+    hasher = hashlib.sha256(original)
+    hasher.update(f"|{max_side}|{options['format']}|{options['quality']}".encode("utf-8"))
+    digest = hasher.hexdigest()
+    with _processed_lock:
+        if digest in _processed:
+            _processed.move_to_end(digest)
+            return _processed[digest]
+
+    processed = _preprocess(original, max_side, options)
+    with _processed_lock:
+        _processed[digest] = processed
+        while len(_processed) > _PROCESSED_CACHE_SIZE:
+            _processed.popitem(last=False)
+    return processed
+
+
+def _preprocess(original: bytes, max_side: Optional[int], options: dict) -> Optional[Tuple[bytes, dict]]:
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    started = time.perf_counter()
+    try:
+        image = Image.open(io.BytesIO(original))
+        original_format = image.format
+        original_size = image.size
+        if max_side is not None and original_format == "JPEG":
+            # Let the JPEG decoder downscale by 1/2..1/8 while decoding
+            image.draft("RGB", (max_side, max_side))
+        rotated = image.getexif().get(_ORIENTATION, 1) != 1
+        upright = ImageOps.exif_transpose(image) if rotated else image
+
+        # Rotating and resizing must be applied; otherwise the original is
+        # kept unless re-encoding makes it smaller or browsers can't decode it
+        required = rotated or original_format not in _BROWSER_FORMATS
+        converted = _flatten(upright)
+        if max_side is not None and max(converted.size) > max_side:
+            converted.thumbnail((max_side, max_side), Image.Resampling.LANCZOS)
+            required = True
+        elif converted.size != original_size:
+            # Decoded at reduced scale but already within max_side
+            required = True
+        encoded = _encode(converted, options)
+    except Image.DecompressionBombError as e:
+        raise ValueError(
+            f"Image is too large to preprocess safely ({e}). "
+            "Pass image_preprocessing=False to send it to the browser unchanged."
+        ) from e
+    except (UnidentifiedImageError, OSError):
+        # Not an image, or one Pillow can't decode: send it unchanged
+        return None
+
+    if not required and len(encoded) >= len(original):
+        encoded, mime_type, size, reencoded = original, Image.MIME[original_format], original_size, False
+    else:
+        mime_type, size, reencoded = f"image/{options['format']}", converted.size, True
+
+    return encoded, {
+        "original_bytes": len(original),
+        "bytes": len(encoded),
+        "saved_bytes": len(original) - len(encoded),
+        "original_size": list(original_size),
+        "size": list(size),
+        "mime_type": mime_type,
+        "reencoded": reencoded,
+        "elapsed_ms": (time.perf_counter() - started) * 1000,
+    }
+
+
+def preprocess_image_input(inputs, model_name: str, pipeline_type: str, options: Optional[dict]):
+    """
+    Preprocess a pipeline input if it is a binary image.
+
+    Returns ``(inputs, report)``: the re-encoded bytes and the report of
+    ``preprocess_image``, or the input unchanged and None when
+    preprocessing is off or the input is not an image.
+    """
+    from .helpers import _binary_buffer, _is_binary_input
+
+    if options is None or not _is_binary_input(inputs):
+        return inputs, None
+
+    with contextlib.ExitStack() as stack:
+        buffer = _binary_buffer(stack, inputs)
+        processed = preprocess_image(buffer, max_side_for(model_name, pipeline_type, options), options)
+        if processed is None and hasattr(inputs, "read") and not hasattr(inputs, "getbuffer"):
+            # A plain file object may have been consumed by reading it
+            inputs = bytes(buffer)
+    if processed is None:
+        return inputs, None
+    encoded, report = processed
+    return encoded, dict(report)
+
+
+def preprocess_batch_inputs(inputs, model_name: str, pipeline_type: str, options: Optional[dict]):
+    """
+    Preprocess the binary images in a batch's inputs.
+
+    Returns ``(inputs, report)`` with the report of ``summarize_reports``.
+    """
+    if options is None or not isinstance(inputs, (list, tuple)):
+        return inputs, None
+    processed = [preprocess_image_input(item, model_name, pipeline_type, options) for item in inputs]
+    return [item for item, _ in processed], summarize_reports(report for _, report in processed)
+
+
+def summarize_reports(reports) -> Optional[dict]:
+    """
+    Total the reports of a batch's preprocessed images, or None if none were.
+    """
+    reports = [report for report in reports if report is not None]
+    if not reports:
+        return None
+    original_bytes = sum(report["original_bytes"] for report in reports)
+    total_bytes = sum(report["bytes"] for report in reports)
+    return {
+        "images": len(reports),
+        "original_bytes": original_bytes,
+        "bytes": total_bytes,
+        "saved_bytes": original_bytes - total_bytes,
+        "elapsed_ms": sum(report["elapsed_ms"] for report in reports),
+    }
+
+
+__all__ = [
+    "DEFAULT_MAX_SIDES",
+    "MODEL_MAX_SIDES",
+    "max_side_for",
+    "preprocess_batch_inputs",
+    "preprocess_image",
+    "preprocess_image_input",
+    "resolve_image_options",
+    "summarize_reports",
+]
@@ -0,0 +1,248 @@
+import logging
+import threading
+import time
+import warnings
+from collections import OrderedDict, deque
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+# Stages of a run, in order. The frontend reports the ones it measured as
+# [start_ms, end_ms] marks relative to when the page sent the request:
+#   load       getting the pipeline (a cache lookup, or download + session)
+#   download   fetching model files (network or browser cache)
+#   session    creating the ONNX session after the last file arrived
+#   decode     turning the inputs into pipeline inputs
+#   queue      waiting in the inference scheduler for its first model call
+#   inference  from the first model call's start to the last one's end
+#   first_token  from the start of the pipeline call to its first generated
+#              token, for streamed runs
+#   serialize  packing the output in the worker
+#   transfer   worker -> page message
+#   encode     encoding the result for Streamlit
+# "streamlit" is added in Python: from the page sending the value to the
+# server receiving it. It compares browser and server clocks, so it is only
+# meaningful when they agree (e.g. both on one machine or NTP-synced).
+STAGES = (
+    "load", "download", "session", "decode", "queue", "inference",
+    "first_token", "serialize", "transfer", "encode", "streamlit",
+)
+
+Exporter = Callable[[dict], None]
+
+
+def stage_durations(timings: dict) -> Dict[str, float]:
+    """
+    Return the milliseconds spent in each stage of a frontend ``timings`` block.
+    """
+    durations = {}
+    for name, span in (timings.get("stages") or {}).items():
+        try:
+            start, end = span
+            durations[name] = max(0.0, float(end) - float(start))
+        except (TypeError, ValueError):
+            continue
+    return durations
+
+
+def _percentile(values: Sequence[float], q: float) -> float:
+    # Linear interpolation between the closest ranks of sorted values
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+class MetricsCollector:
+    """
+    Aggregates per-stage timings of pipeline runs across every session.
+
+    The pipeline functions record the ``timings`` block of each completed
+    or failed run once (reruns returning the same result are skipped).
+    ``summary`` gives percentiles per model over the last ``window`` runs,
+    and every recorded sample is passed to the exporters, e.g. to log it or
+    forward it to a metrics system.
+
+    Parameters
+    ----------
+    window : int
+        Number of most recent runs per model kept for percentiles
+    exporters : iterable of callables, optional
+        Functions called with each recorded sample dict
+    """
+
+    def __init__(self, window: int = 1000, exporters: Optional[Iterable[Exporter]] = None):
+        if window < 1:
+            raise ValueError("window must be at least 1")
+
+        self.window = window
+        self.exporters: List[Exporter] = list(exporters or [])
+        self._samples: Dict[tuple, deque] = {}
+        self._counts: Dict[tuple, Dict[str, int]] = {}
+        # Recently recorded run ids, to skip results seen again on a rerun
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+        self._max_seen = max(4096, window)
+        self._lock = threading.Lock()
+
+    def add_exporter(self, exporter: Exporter) -> None:
+        """
+        Call ``exporter`` with every sample recorded from now on.
+        """
+        self.exporters.append(exporter)
+
+    def remove_exporter(self, exporter: Exporter) -> None:
+        """
+        Stop calling ``exporter``.
+        """
+        self.exporters.remove(exporter)
+
+    def record(
+        self,
+        timings: dict,
+        model_name: str,
+        pipeline_type: str,
+        status: str = "complete",
+        received_at: Optional[float] = None,
+        **fields: Any,
+    ) -> Optional[dict]:
+        """
+        Record one run's ``timings`` block.
+
+        Returns the sample passed to the exporters, or None if the run was
+        already recorded. ``received_at`` is the server time in epoch
+        milliseconds when the result arrived (default: now); extra keyword
+        arguments are added to the sample.
+        """
+        if received_at is None:
+            received_at = time.time() * 1000
+        run_id = timings.get("run_id")
+
+        with self._lock:
+            if run_id is not None:
+                if run_id in self._seen:
+                    return None
+                self._seen[run_id] = None
+                while len(self._seen) > self._max_seen:
+                    self._seen.popitem(last=False)
+
+        stages = stage_durations(timings)
+        if timings.get("sent_at") is not None:
+            stages["streamlit"] = max(0.0, received_at - timings["sent_at"])
+
+        sample = {
+            "run_id": run_id,
+            "model_name": model_name,
+            "pipeline_type": pipeline_type,
+            "status": status,
+            "pipeline_cache_hit": bool(timings.get("pipeline_cache_hit")),
+            "input_bytes": timings.get("input_bytes"),
+            "output_bytes": timings.get("output_bytes"),
+            "total_ms": timings.get("total_ms"),
+            "stages": stages,
+            **fields,
+        }
+
+        group = (model_name, pipeline_type)
+        with self._lock:
+            samples = self._samples.setdefault(group, deque(maxlen=self.window))
+            samples.append(sample)
+            counts = self._counts.setdefault(group, {"runs": 0, "errors": 0, "pipeline_cache_hits": 0})
+            counts["runs"] += 1
+            counts["errors"] += status == "error"
+            counts["pipeline_cache_hits"] += sample["pipeline_cache_hit"]
+
+        for exporter in list(self.exporters):
+            try:
+                exporter(sample)
+            except Exception as e:
+                warnings.warn(f"Metrics exporter {exporter!r} failed: {e}", RuntimeWarning)
+        return sample
+
+    def summary(self, percentiles: Sequence[float] = (50, 90, 99)) -> List[dict]:
+        """
+        Return latency percentiles per model over the recent runs.
+
+        Each entry has ``model_name``, ``pipeline_type``, lifetime ``runs``,
+        ``errors`` and ``pipeline_cache_hits`` counts, ``samples`` (runs in
+        the window) and ``stages`` mapping each stage, plus "total", to
+        ``{"p50": ms, ...}``.
+        """
+        with self._lock:
+            groups = [
+                (group, list(samples), dict(self._counts[group]))
+                for group, samples in self._samples.items()
+            ]
+
+        summaries = []
+        for (model_name, pipeline_type), samples, counts in groups:
+            values: Dict[str, List[float]] = {}
+            for sample in samples:
+                for name, duration in sample["stages"].items():
+                    values.setdefault(name, []).append(duration)
+                if sample["total_ms"] is not None:
+                    values.setdefault("total", []).append(sample["total_ms"])
+
+            order = {name: i for i, name in enumerate(STAGES + ("total",))}
+            stages = {}
+            for name in sorted(values, key=lambda n: (order.get(n, len(order)), n)):
+                ordered = sorted(values[name])
+                stages[name] = {f"p{q:g}": _percentile(ordered, q) for q in percentiles}
+
+            summaries.append({
+                "model_name": model_name,
+                "pipeline_type": pipeline_type,
+                **counts,
+                "samples": len(samples),
+                "stages": stages,
+            })
+        return summaries
+
+    def reset(self) -> None:
+        """
+        Forget every recorded run.
+        """
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+            self._seen.clear()
+
+
+def logging_exporter(logger: Optional[logging.Logger] = None, level: int = logging.INFO) -> Exporter:
+    """
+    Return an exporter that logs one line per run with its stage timings.
+    """
+    logger = logger or logging.getLogger(__name__)
+
+    def export(sample: dict) -> None:
+        stages = " ".join(f"{name}={ms:.1f}ms" for name, ms in sample["stages"].items())
+        logger.log(
+            level,
+            "%s %s %s total=%sms %s",
+            sample["pipeline_type"],
+            sample["model_name"],
+            sample["status"],
+            "?" if sample["total_ms"] is None else f"{sample['total_ms']:.1f}",
+            stages,
+        )
+
+    return export
+
+
+# Process-wide collector used when ``metrics=True`` (the default) is passed to a pipeline
+default_metrics = MetricsCollector()
+
+
+def resolve_metrics(metrics: Union[bool, MetricsCollector, None]) -> Optional[MetricsCollector]:
+    """
+    Map the ``metrics`` argument of the pipeline functions to a collector.
+    """
+    if metrics is None or metrics is False:
+        return None
+    if metrics is True:
+        return default_metrics
+    if isinstance(metrics, MetricsCollector):
+        return metrics
+    raise TypeError(
+        f"metrics must be a bool or MetricsCollector, got {type(metrics)}."
+    )
+
+
+__all__ = ["MetricsCollector", "STAGES", "default_metrics", "logging_exporter", "stage_durations"]
@@ -0,0 +1,294 @@
+import fnmatch
+import hashlib
+import json
+import os
+import posixpath
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# Streamlit serves ``<app dir>/static`` at ``/app/static`` when
+# ``server.enableStaticServing`` is on, so this is the mirror the components
+# find by default.
+DEFAULT_MIRROR_DIR = os.path.join("static", "models")
+DEFAULT_ENDPOINT = "https://huggingface.co"
+MANIFEST_NAME = "manifest.json"
+
+# Config, tokenizer and the quantized ONNX weights transformers.js loads by default
+DEFAULT_INCLUDE = ("*.json", "*.txt", "*.model", "onnx/*_quantized.onnx")
+
+MODEL_SOURCES = ("hub", "local")
+
+_CHUNK_SIZE = 1 << 20
+
+
+def _check_relative_path(path: str) -> str:
+    normalized = posixpath.normpath(path)
+    if (
+        not path
+        or posixpath.isabs(path)
+        or normalized == ".."
+        or normalized.startswith("../")
+        or "\\" in path
+    ):
+        raise ValueError(f"Refusing unsafe path in model repository: {path!r}")
+    return normalized
+
+
+def _request(url: str, token: Optional[str] = None):
+    headers = {"User-Agent": "st-transformers-js"}
+    if token:
+        headers["Authorization"] = f"Bearer {token}"
+    return urllib.request.urlopen(urllib.request.Request(url, headers=headers))
+
+
+def list_model_files(
+    model_name: str,
+    revision: str = "main",
+    endpoint: Optional[str] = None,
+    token: Optional[str] = None,
+) -> Tuple[str, List[str]]:
+    """
+    List the files of a model repository on the hub.
+
+    Returns the commit hash ``revision`` resolves to and the repository's
+    file names.
+    """
+    endpoint = (endpoint or os.environ.get("HF_ENDPOINT") or DEFAULT_ENDPOINT).rstrip("/")
+    url = (
+        f"{endpoint}/api/models/{urllib.parse.quote(model_name)}"
+        f"/revision/{urllib.parse.quote(revision, safe='')}"
+    )
+    try:
+        with _request(url, token) as response:
+            info = json.load(response)
+    except urllib.error.HTTPError as e:
+        raise RuntimeError(
+            f"Could not list files for {model_name}@{revision}: HTTP {e.code}"
+        ) from e
+    except urllib.error.URLError as e:
+        raise RuntimeError(f"Could not reach {endpoint}: {e.reason}") from e
+
+    files = [sibling["rfilename"] for sibling in info.get("siblings", [])]
+    return info.get("sha") or revision, files
+
+
+def _sha256_file(path: str) -> str:
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b""):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def _download(url: str, path: str, token: Optional[str]) -> Tuple[int, str]:
+    """
+    Stream ``url`` to ``path``, returning the size and SHA-256 of the file.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.part"
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with _request(url, token) as response, open(tmp_path, "wb") as f:
+            for chunk in iter(lambda: response.read(_CHUNK_SIZE), b""):
+                f.write(chunk)
+                hasher.update(chunk)
+                size += len(chunk)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return size, hasher.hexdigest()
+
+
+def read_manifest(mirror_dir: str = DEFAULT_MIRROR_DIR) -> dict:
+    """
+    Read the mirror manifest, or return an empty one if there is none yet.
+    """
+    try:
+        with open(os.path.join(mirror_dir, MANIFEST_NAME), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"models": {}}
+
+
+def _write_manifest(mirror_dir: str, manifest: dict) -> None:
+    path = os.path.join(mirror_dir, MANIFEST_NAME)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def prefetch_model(
+    model_name: str,
+    mirror_dir: str = DEFAULT_MIRROR_DIR,
+    revision: str = "main",
+    include: Optional[Sequence[str]] = DEFAULT_INCLUDE,
+    endpoint: Optional[str] = None,
+    token: Optional[str] = None,
+    force: bool = False,
+    progress: Optional[Callable[[str], None]] = None,
+) -> dict:
+    """
+    Download a model from the hub into a local mirror.
+
+    Files are laid out as ``<mirror_dir>/<model_name>/<file>``, the layout
+    transformers.js expects under ``env.localModelPath``, and recorded with
+    their size and SHA-256 in ``<mirror_dir>/manifest.json``. Files already
+    in the mirror with a matching hash are not downloaded again.
+
+    Parameters
+    ----------
+    model_name : str
+        Hugging Face model identifier (e.g. "Xenova/distilbert-base-uncased-finetuned-sst-2-english")
+    mirror_dir : str
+        Mirror directory. The default is served by Streamlit at ``/app/static/models/``.
+    revision : str
+        Branch, tag or commit to download
+    include : sequence of str, optional
+        Glob patterns of repository files to download. None downloads every file.
+    endpoint : str, optional
+        Hub URL. Defaults to ``$HF_ENDPOINT`` or https://huggingface.co.
+    token : str, optional
+        Access token for private or gated models. Defaults to ``$HF_TOKEN``.
+    force : bool
+        Download files even if the mirror already has them
+    progress : callable, optional
+        Called with a message for every file
+
+    Returns
+    -------
+    dict
+        The manifest entry for the model
+    """
+    _check_relative_path(model_name)
+    token = token or os.environ.get("HF_TOKEN")
+    endpoint = (endpoint or os.environ.get("HF_ENDPOINT") or DEFAULT_ENDPOINT).rstrip("/")
+    report = progress or (lambda message: None)
+
+    commit, files = list_model_files(model_name, revision, endpoint, token)
+    if include is not None:
+        files = [f for f in files if any(fnmatch.fnmatch(f, pattern) for pattern in include)]
+    if not files:
+        raise RuntimeError(f"No files in {model_name}@{revision} match {list(include or [])}")
+
+    manifest = read_manifest(mirror_dir)
+    previous = {
+        entry["path"]: entry
+        for entry in manifest.get("models", {}).get(model_name, {}).get("files", [])
+    }
+
+    entries: List[Dict] = []
+    for filename in sorted(files):
+        relative = _check_relative_path(filename)
+        path = os.path.join(mirror_dir, *model_name.split("/"), *relative.split("/"))
+        known = previous.get(relative)
+
+        if (
+            not force
+            and known is not None
+            and os.path.exists(path)
+            and os.path.getsize(path) == known["size"]
+            and _sha256_file(path) == known["sha256"]
+        ):
+            entries.append(known)
+            report(f"{model_name}/{relative}: up to date")
+            continue
+
+        url = (
+            f"{endpoint}/{urllib.parse.quote(model_name)}/resolve/"
+            f"{urllib.parse.quote(commit, safe='')}/{urllib.parse.quote(relative)}"
+        )
+        try:
+            size, sha256 = _download(url, path, token)
+        except urllib.error.HTTPError as e:
+            raise RuntimeError(f"Could not download {model_name}/{relative}: HTTP {e.code}") from e
+        except urllib.error.URLError as e:
+            raise RuntimeError(f"Could not download {model_name}/{relative}: {e.reason}") from e
+
+        entries.append({"path": relative, "size": size, "sha256": sha256})
+        report(f"{model_name}/{relative}: {size} bytes")
+
+    entry = {
+        "revision": revision,
+        "commit": commit,
+        "fetched_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "files": entries,
+    }
+    # Re-read so concurrent prefetches of other models are kept
+    manifest = read_manifest(mirror_dir)
+    manifest.setdefault("models", {})[model_name] = entry
+    _write_manifest(mirror_dir, manifest)
+    return entry
+
+
+def verify_mirror(
+    mirror_dir: str = DEFAULT_MIRROR_DIR,
+    model_names: Optional[Sequence[str]] = None,
+) -> List[str]:
+    """
+    Check mirrored files against the manifest.
+
+    Returns a list of problems, empty if every file is present and matches
+    its recorded size and hash.
+    """
+    models = read_manifest(mirror_dir).get("models", {})
+    problems = []
+    for model_name in model_names if model_names is not None else sorted(models):
+        if model_name not in models:
+            problems.append(f"{model_name}: not in manifest")
+            continue
+        for entry in models[model_name]["files"]:
+            path = os.path.join(mirror_dir, *model_name.split("/"), *entry["path"].split("/"))
+            if not os.path.exists(path):
+                problems.append(f"{model_name}/{entry['path']}: missing")
+            elif os.path.getsize(path) != entry["size"] or _sha256_file(path) != entry["sha256"]:
+                problems.append(f"{model_name}/{entry['path']}: hash mismatch")
+    return problems
+
+
+def default_local_model_path() -> str:
+    """
+    URL path of the default mirror as served by Streamlit's static file serving.
+    """
+    base_url_path = ""
+    try:
+        import streamlit as st
+
+        base_url_path = (st.get_option("server.baseUrlPath") or "").strip("/")
+    except Exception:
+        pass
+    prefix = f"/{base_url_path}" if base_url_path else ""
+    return f"{prefix}/app/static/models/"
+
+
+def resolve_model_source(model_source: str, local_model_path: Optional[str] = None) -> dict:
+    """
+    Map the ``model_source`` arguments of the pipeline functions to component args.
+    """
+    if model_source not in MODEL_SOURCES:
+        raise ValueError(
+            f"model_source must be one of {MODEL_SOURCES}, got {model_source!r}"
+        )
+    if model_source == "hub":
+        return {"model_source": "hub", "local_model_path": None}
+    path = local_model_path or default_local_model_path()
+    if not path.endswith("/"):
+        path += "/"
+    return {"model_source": "local", "local_model_path": path}
+
+
+__all__ = [
+    "prefetch_model",
+    "list_model_files",
+    "read_manifest",
+    "verify_mirror",
+    "DEFAULT_MIRROR_DIR",
+]
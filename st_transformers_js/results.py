@@ -0,0 +1,112 @@
+import base64
+from typing import Any, Optional, Sequence
+
+# "json" returns results as plain JSON values. The other formats send tensor
+# data as raw little-endian buffers decoded into numpy arrays, and "arrow" /
+# "pandas" also turn list-of-dict outputs into a table.
+RESULT_FORMATS = ("json", "numpy", "arrow", "pandas")
+
+# transformers.js tensor types; typed arrays are little-endian in practice
+TENSOR_DTYPES = {
+    "float32": "<f4",
+    "float64": "<f8",
+    "float16": "<f2",
+    "int8": "i1",
+    "uint8": "u1",
+    "int16": "<i2",
+    "uint16": "<u2",
+    "int32": "<i4",
+    "uint32": "<u4",
+    "int64": "<i8",
+    "uint64": "<u8",
+    "bool": "?",
+}
+
+_REQUIRED_MODULES = {
+    "numpy": ["numpy"],
+    "arrow": ["numpy", "pyarrow"],
+    "pandas": ["numpy", "pandas"],
+}
+
+
+def check_result_format(result_format: str) -> None:
+    """
+    Validate ``result_format`` and check that its libraries are installed.
+    """
+    if result_format not in RESULT_FORMATS:
+        raise ValueError(
+            f"Unknown result_format: {result_format!r}. Must be one of {RESULT_FORMATS}."
+        )
+    for module in _REQUIRED_MODULES.get(result_format, []):
+        try:
+            __import__(module)
+        except ImportError as e:
+            raise ImportError(
+                f'result_format="{result_format}" requires {module}. '
+                "Install it with: pip install st-transformers-js[typed-results]"
+            ) from e
+
+
+def _decode_tensor(descriptor: dict, blobs: Optional[Sequence[memoryview]]):
+    import numpy as np
+
+    if "blob" in descriptor:
+        buffer = blobs[descriptor["blob"]]
+    else:
+        buffer = base64.b64decode(descriptor["b64"])
+    dtype = TENSOR_DTYPES.get(descriptor["dtype"])
+    if dtype is None:
+        raise ValueError(f"Unsupported tensor dtype: {descriptor['dtype']!r}")
+    # A read-only view of the received buffer, not a copy
+    return np.frombuffer(buffer, dtype=dtype).reshape(descriptor["shape"])
+
+
+def _decode_tensors(value: Any, blobs: Optional[Sequence[memoryview]]) -> Any:
+    if isinstance(value, dict):
+        if value.get("__tensor__") and "dtype" in value:
+            return _decode_tensor(value, blobs)
+        return {key: _decode_tensors(item, blobs) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode_tensors(item, blobs) for item in value]
+    return value
+
+
+def _to_table(value: Any, result_format: str) -> Any:
+    if not isinstance(value, list) or not value or not all(isinstance(row, dict) for row in value):
+        return value
+    if result_format == "pandas":
+        import pandas as pd
+
+        return pd.DataFrame(value)
+    import pyarrow as pa
+
+    return pa.Table.from_pylist(value)
+
+
+def decode_result(
+    result: Any,
+    result_format: str,
+    blobs: Optional[Sequence[memoryview]] = None,
+    batch: bool = False,
+) -> Any:
+    """
+    Decode a pipeline result sent with a non-JSON ``result_format``.
+
+    Tensor descriptors become numpy arrays, read from ``blobs`` (binary
+    payloads) or from base64 strings. With "arrow" or "pandas", list-of-dict
+    outputs become a ``pyarrow.Table`` or ``pandas.DataFrame``; with
+    ``batch`` this applies to each item's output.
+    """
+    if result_format == "json" or result is None:
+        return result
+
+    result = _decode_tensors(result, blobs)
+    if result_format in ("arrow", "pandas"):
+        if batch and isinstance(result, list):
+            result = [_to_table(item, result_format) for item in result]
+        else:
+            result = _to_table(result, result_format)
+    return result
+
+
+__all__ = ["RESULT_FORMATS", "check_result_format", "decode_result"]
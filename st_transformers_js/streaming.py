@@ -0,0 +1,153 @@
+from typing import Iterator, Optional, Union
+
+# Pipelines that generate text token by token, whose partial output can be
+# streamed while the model is still running
+STREAMING_TASKS = (
+    "text-generation",
+    "text2text-generation",
+    "summarization",
+    "translation",
+    "image-to-text",
+)
+
+_DEFAULT_OPTIONS = {"interval": 0.25}
+
+# Output keys holding the generated text, by pipeline
+_TEXT_KEYS = ("generated_text", "summary_text", "translation_text", "text")
+
+
+def resolve_stream_options(stream: Union[bool, dict, None], pipeline_type: str) -> Optional[dict]:
+    """
+    Validate the ``stream`` argument of the pipeline functions.
+
+    Returns None when streaming is off, otherwise the options with defaults
+    filled in: ``interval``, the minimum seconds between partial updates
+    after the first token. Each update reruns the script.
+    """
+    if stream is None or stream is False:
+        return None
+    if stream is True:
+        options = dict(_DEFAULT_OPTIONS)
+    elif isinstance(stream, dict):
+        unknown = set(stream) - set(_DEFAULT_OPTIONS)
+        if unknown:
+            raise ValueError(f"Unknown stream options: {sorted(unknown)}")
+        options = {**_DEFAULT_OPTIONS, **stream}
+    else:
+        raise TypeError(f"stream must be a bool or dict, got {type(stream)}.")
+
+    interval = options["interval"]
+    if isinstance(interval, bool) or not isinstance(interval, (int, float)) or interval < 0:
+        raise ValueError(f"stream interval must be a non-negative number of seconds, got {interval!r}")
+    if pipeline_type not in STREAMING_TASKS:
+        raise ValueError(f"stream is only supported for {STREAMING_TASKS}, got {pipeline_type!r}")
+    return options
+
+
+def stream_request(options: dict) -> dict:
+    """
+    Return the ``stream`` value sent to the frontend for a run.
+    """
+    return {"interval_ms": int(options["interval"] * 1000)}
+
+
+def result_text(result) -> Optional[str]:
+    """
+    Return the generated text of a pipeline result, or None if it has none.
+    """
+    if isinstance(result, str):
+        return result
+    if isinstance(result, (list, tuple)) and result:
+        return result_text(result[0])
+    if isinstance(result, dict):
+        for key in _TEXT_KEYS:
+            if isinstance(result.get(key), str):
+                return result[key]
+    return None
+
+
+class TokenStream:
+    """
+    The output so far of a streamed pipeline run.
+
+    Returned by the pipeline functions when called with ``stream``. The
+    browser sends the text generated so far as the model runs, and each
+    update reruns the script, so every run of the script sees a newer
+    snapshot: ``status`` is "pending" (loading, or no token yet),
+    "streaming", "complete", "error" or "cancelled".
+
+    Iterating yields the text so far as one chunk, so
+    ``st.write_stream(stream)`` displays it and returns it. ``result`` is
+    the pipeline's full output once the run is complete.
+
+    Attributes
+    ----------
+    status : str
+        "pending", "streaming", "complete", "error" or "cancelled"
+    text : str
+        The text generated so far, or the final text once complete
+    tokens : int
+        Tokens generated as of the latest partial update
+    result : any
+        The pipeline output once complete, otherwise None
+    error : str or None
+        The error message if the run failed
+    meta : dict
+        Frontend details: v1's ``meta`` envelope or v2's component state
+    """
+
+    def __init__(
+        self,
+        status: str,
+        text: str = "",
+        tokens: int = 0,
+        result=None,
+        error: Optional[str] = None,
+        meta: Optional[dict] = None,
+    ):
+        self.status = status
+        self.text = text
+        self.tokens = tokens
+        self.result = result
+        self.error = error
+        self.meta = meta or {}
+
+    @classmethod
+    def from_value(cls, status: str, partial: Optional[dict] = None, result=None, error=None, meta=None) -> "TokenStream":
+        """
+        Build a snapshot from a run's latest partial output or its final result.
+        """
+        if status == "complete":
+            return cls(status, text=result_text(result) or "", result=result, meta=meta)
+        partial = partial if isinstance(partial, dict) else {}
+        return cls(
+            status,
+            text=partial.get("text") or "",
+            tokens=partial.get("tokens") or 0,
+            error=error,
+            meta=meta,
+        )
+
+    @property
+    def done(self) -> bool:
+        """Whether the run has completed, failed or been cancelled."""
+        return self.status in ("complete", "error", "cancelled")
+
+    def __iter__(self) -> Iterator[str]:
+        if self.text:
+            yield self.text
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __repr__(self) -> str:
+        return f"TokenStream(status={self.status!r}, tokens={self.tokens}, text={self.text!r})"
+
+
+__all__ = [
+    "STREAMING_TASKS",
+    "TokenStream",
+    "resolve_stream_options",
+    "result_text",
+    "stream_request",
+]
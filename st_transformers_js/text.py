@@ -0,0 +1,392 @@
+import bisect
+import itertools
+import math
+import re
+import time
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from .chunking import merge_chunked, regroup_batch
+
+# Tasks whose long text inputs are split into windows in Python. The
+# pipelines truncate inputs to the model's maximum sequence length, so
+# without windows the end of a long document is silently dropped.
+TEXT_TASKS = ("token-classification", "ner", "summarization")
+
+# (window, stride) in estimated tokens: the longest window sent to the
+# model and how much consecutive windows overlap. Estimates err high (see
+# estimate_tokens), so windows stay within BERT's and T5's 512 tokens.
+DEFAULT_CHUNKING: Dict[str, Tuple[int, int]] = {
+    "token-classification": (448, 64),
+    "ner": (448, 64),
+    "summarization": (448, 32),
+}
+
+# Per-model window lengths overriding DEFAULT_CHUNKING, e.g. for models
+# with a longer maximum sequence length.
+MODEL_CHUNK_TOKENS: Dict[str, int] = {
+    "Xenova/distilbart-cnn-6-6": 896,
+    "Xenova/distilbart-cnn-12-6": 896,
+    "Xenova/bart-large-cnn": 896,
+}
+
+_DEFAULT_OPTIONS = {"chunk_tokens": "auto", "stride": "auto"}
+
+# Words, and punctuation marks on their own, roughly as tokenizers
+# pre-split text
+_PIECE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_ENDS = frozenset(".!?。！？")
+
+# Subword tokenizer word-piece markers left in token-classification words
+_WORD_PREFIXES = ("##", "▁", "Ġ")
+
+
+def resolve_text_options(text_chunking: Union[bool, dict, None]) -> Optional[dict]:
+    """
+    Validate the ``text_chunking`` argument of the pipeline functions.
+
+    Returns None when chunking is off (``False``), otherwise the options
+    with defaults filled in: ``chunk_tokens`` (window length in estimated
+    tokens, or "auto" for the model's or task's default) and ``stride``
+    (tokens shared by consecutive windows, or "auto").
+    """
+    if text_chunking is False:
+        return None
+    if text_chunking is None or text_chunking is True:
+        options = dict(_DEFAULT_OPTIONS)
+    elif isinstance(text_chunking, dict):
+        unknown = set(text_chunking) - set(_DEFAULT_OPTIONS)
+        if unknown:
+            raise ValueError(f"Unknown text_chunking options: {sorted(unknown)}")
+        options = {**_DEFAULT_OPTIONS, **text_chunking}
+    else:
+        raise TypeError(f"text_chunking must be a bool or dict, got {type(text_chunking)}.")
+
+    for name, minimum in (("chunk_tokens", 1), ("stride", 0)):
+        value = options[name]
+        if value != "auto" and (isinstance(value, bool) or not isinstance(value, int) or value < minimum):
+            raise ValueError(f'text_chunking {name} must be an int of at least {minimum} or "auto", got {value!r}')
+    if options["chunk_tokens"] != "auto" and options["stride"] != "auto" and options["stride"] >= options["chunk_tokens"]:
+        raise ValueError("text_chunking stride must be less than chunk_tokens")
+    return options
+
+
+def chunking_for(model_name: str, pipeline_type: str, options: dict) -> Tuple[int, int]:
+    """
+    Return ``(chunk_tokens, stride)`` for a model's text inputs.
+    """
+    default_tokens, default_stride = DEFAULT_CHUNKING[pipeline_type]
+    chunk_tokens = options["chunk_tokens"]
+    if chunk_tokens == "auto":
+        chunk_tokens = MODEL_CHUNK_TOKENS.get(model_name, default_tokens)
+    stride = options["stride"]
+    if stride == "auto":
+        # Scale the default stride with the window
+        stride = default_stride * chunk_tokens // default_tokens
+    return chunk_tokens, min(stride, chunk_tokens - 1)
+
+
+def _piece_tokens(piece: str) -> int:
+    # WordPiece and BPE vocabularies hold most short words whole and split
+    # longer ones; a token per 4 letters over-counts common words, so
+    # windows err on the short side. Numbers split into pieces of a few
+    # digits, and IDs and hashes mixing letters and digits into pieces of
+    # one or two characters. Non-Latin scripts often take a token (or more)
+    # per character.
+    if len(piece) == 1:
+        return 1
+    if not piece.isascii():
+        return len(piece)
+    if piece.isdigit():
+        return 1 + (len(piece) - 1) // 2
+    if any(char.isdigit() for char in piece):
+        return len(piece)
+    return 1 + (len(piece) - 1) // 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimate the number of tokens a subword tokenizer splits ``text`` into, erring high.
+    """
+    return sum(_piece_tokens(match.group()) for match in _PIECE.finditer(text))
+
+
+def chunk_text(text: str, chunk_tokens: int, stride: int) -> List[List[int]]:
+    """
+    Split ``text`` into windows of at most ``chunk_tokens`` estimated tokens
+    where consecutive windows share about ``stride`` tokens.
+
+    Windows are cut between words, at the end of a sentence when one falls
+    in a window's last quarter. Returns ``[start, end)`` character offsets;
+    a text that fits one window is one chunk.
+    """
+    pieces = [(match.start(), match.end(), match.group()) for match in _PIECE.finditer(text)]
+    prefix = [0, *itertools.accumulate(_piece_tokens(piece) for _, _, piece in pieces)]
+    if prefix[-1] <= chunk_tokens:
+        return [[0, len(text)]]
+
+    def sentence_end(index: int) -> bool:
+        start, end, piece = pieces[index]
+        following = pieces[index + 1][0] if index + 1 < len(pieces) else len(text)
+        return piece in _SENTENCE_ENDS or "\n" in text[end:following]
+
+    bounds = []
+    first = 0
+    while True:
+        # Pieces [first, last) fit the window; a single longer piece is its own window
+        last = max(first + 1, bisect.bisect_right(prefix, prefix[first] + chunk_tokens) - 1)
+        if last >= len(pieces):
+            bounds.append([pieces[first][0] if bounds else 0, len(text)])
+            return bounds
+        floor = prefix[first] + chunk_tokens * 3 // 4
+        for end in range(last, first + 1, -1):
+            if prefix[end] < floor:
+                break
+            if sentence_end(end - 1):
+                last = end
+                break
+        bounds.append([pieces[first][0] if bounds else 0, pieces[last - 1][1]])
+        # The next window starts `stride` tokens before this one ends
+        first = min(last, max(first + 1, bisect.bisect_left(prefix, prefix[last] - stride)))
+
+
+def utf16_bounds(text: str, bounds: Sequence[Sequence[int]]) -> List[List[int]]:
+    """
+    Convert character offsets into ``text`` to the UTF-16 offsets JavaScript strings use.
+    """
+    if text.isascii():
+        return [list(bound) for bound in bounds]
+    units = {}
+    count, previous = 0, 0
+    for position in sorted({position for bound in bounds for position in bound}):
+        count += len(text[previous:position].encode("utf-16-le")) // 2
+        units[position] = count
+        previous = position
+    return [[units[start], units[end]] for start, end in bounds]
+
+
+def _from_utf16(text: str, offset: int) -> int:
+    if text.isascii():
+        return offset
+    return len(text.encode("utf-16-le")[:offset * 2].decode("utf-16-le", errors="ignore"))
+
+
+def preprocess_text(text: str, chunk_tokens: int, stride: int) -> Optional[Tuple[List[List[int]], dict]]:
+    """
+    Split a long text into windows.
+
+    Returns ``(chunks, report)``, or None if the text fits one window.
+    ``chunks`` are the ``chunk_text`` character offsets. The report has
+    ``characters``, ``estimated_tokens``, ``chunks``, ``chunk_tokens``,
+    ``stride`` and ``elapsed_ms``.
+    """
+    started = time.perf_counter()
+    chunks = chunk_text(text, chunk_tokens, stride)
+    if len(chunks) == 1:
+        return None
+    return chunks, {
+        "characters": len(text),
+        "estimated_tokens": estimate_tokens(text),
+        "chunks": len(chunks),
+        "chunk_tokens": chunk_tokens,
+        "stride": stride,
+        "elapsed_ms": (time.perf_counter() - started) * 1000,
+    }
+
+
+def preprocess_text_input(inputs, model_name: str, pipeline_type: str, options: Optional[dict]):
+    """
+    Split a pipeline input into windows if it is a long text for a text task.
+
+    Returns ``(chunks, report)`` as for ``preprocess_text``, or None when
+    chunking is off, the task is not a text task, or the input is not a
+    string or fits one window.
+    """
+    if options is None or pipeline_type not in TEXT_TASKS or not isinstance(inputs, str):
+        return None
+    return preprocess_text(inputs, *chunking_for(model_name, pipeline_type, options))
+
+
+def _owned_span(chunks: Sequence[Sequence[int]], index: int) -> Tuple[float, float]:
+    # Each window owns the text up to the middle of its overlaps
+    start, end = chunks[index]
+    low = (start + chunks[index - 1][1]) / 2 if index > 0 else -math.inf
+    high = (end + chunks[index + 1][0]) / 2 if index + 1 < len(chunks) else math.inf
+    return low, high
+
+
+def _locate(window: str, word: str, cursor: int) -> Optional[Tuple[int, int]]:
+    for prefix in _WORD_PREFIXES:
+        if word.startswith(prefix):
+            word = word[len(prefix):]
+    word = word.strip()
+    if not word:
+        return None
+    position = window.find(word, cursor)
+    if position == -1:
+        # Uncased models return lower-cased words
+        lowered = window.lower()
+        if len(lowered) == len(window):
+            position = lowered.find(word.lower(), cursor)
+    if position == -1:
+        return None
+    return position, position + len(word)
+
+
+def merge_entities(outputs: Sequence[list], chunks: Sequence[Sequence[int]], text: str) -> list:
+    """
+    Stitch the token-classification outputs of overlapping windows.
+
+    Each entity's ``start`` and ``end`` are set to character offsets into
+    the whole text: offsets the pipeline reported are shifted by the
+    window's start, and otherwise (transformers.js 2 reports none) the
+    entity's word is found in the window after the previous entity.
+    Entities in an overlap are reported by both windows; each is kept by
+    the window whose share of the overlap holds its middle. ``index``
+    stays the token index within its window. Entities that can't be
+    found get ``start`` and ``end`` of None.
+    """
+    merged = []
+    for index, (output, (start, end)) in enumerate(zip(outputs, chunks)):
+        window = text[start:end]
+        low, high = _owned_span(chunks, index)
+        cursor = 0
+        for entity in output or []:
+            if isinstance(entity.get("start"), int) and isinstance(entity.get("end"), int):
+                span = _from_utf16(window, entity["start"]), _from_utf16(window, entity["end"])
+            else:
+                span = _locate(window, entity.get("word") or "", cursor)
+            if span is not None:
+                cursor = span[1]
+                middle = start + (span[0] + span[1]) / 2
+            else:
+                # Unplaced entities come after the previous one
+                middle = start + cursor
+            if low <= middle < high:
+                merged.append({
+                    **entity,
+                    "start": None if span is None else start + span[0],
+                    "end": None if span is None else start + span[1],
+                })
+    return merged
+
+
+def _sentences(text: str) -> List[str]:
+    return [sentence for sentence in re.split(r"(?<=[.!?。！？])\s+", text.strip()) if sentence]
+
+
+def _normalize(sentence: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", "", sentence.lower()).split())
+
+
+def merge_summaries(outputs: Sequence) -> Union[list, dict]:
+    """
+    Join the summaries of a text's windows into one summary.
+
+    A sentence repeating one of the previous window's summary, as
+    overlapping windows can produce, is dropped.
+    """
+    sentences: List[str] = []
+    previous: set = set()
+    for output in outputs:
+        item = output[0] if isinstance(output, list) and output else output
+        current = _sentences((item or {}).get("summary_text", ""))
+        sentences.extend(sentence for sentence in current if _normalize(sentence) not in previous)
+        previous = {_normalize(sentence) for sentence in current}
+    summary = {"summary_text": " ".join(sentences)}
+    return [summary] if isinstance(outputs[0], list) else summary
+
+
+def merge_chunk_results(pipeline_type: str, outputs: Sequence, chunks: Sequence[Sequence[int]], text: str):
+    """
+    Merge the outputs of a text's windows into the output for the whole text.
+    """
+    if len(outputs) == 1:
+        return outputs[0]
+    if pipeline_type == "summarization":
+        return merge_summaries(outputs)
+    return merge_entities(outputs, chunks, text)
+
+
+def merge_chunked_result(
+    pipeline_type: str,
+    batch: dict,
+    chunks: Sequence[Sequence[int]],
+    text: str,
+) -> Tuple[Optional[object], Optional[str]]:
+    """
+    Merge the batch result of a chunked text, as sent by the frontend
+    (``{"results", "errors", ...}``), into one output.
+
+    Returns ``(result, error)``; a window that failed fails the text.
+    """
+    return merge_chunked(
+        batch,
+        len(chunks),
+        lambda outputs: merge_chunk_results(pipeline_type, outputs, chunks, text),
+        "Text chunk",
+    )
+
+
+def preprocess_text_batch(inputs, model_name: str, pipeline_type: str, options: Optional[dict]):
+    """
+    Split the long texts in a batch's inputs, with each window as its own batch item.
+
+    Returns ``(inputs, groups, report)``. ``groups`` maps the items back to
+    the original inputs for ``merge_text_batch``: per input, None if it was
+    not split, otherwise ``(first_item, chunks, text)``. The report totals
+    the split texts' reports, or is None if nothing was split.
+    """
+    if options is None or pipeline_type not in TEXT_TASKS or not isinstance(inputs, (list, tuple)):
+        return inputs, None, None
+    items, groups, reports = [], [], []
+    for item in inputs:
+        split = preprocess_text_input(item, model_name, pipeline_type, options)
+        if split is None:
+            groups.append(None)
+            items.append(item)
+            continue
+        chunks, report = split
+        groups.append((len(items), chunks, item))
+        reports.append(report)
+        items.extend(item[start:end] for start, end in chunks)
+    if not reports:
+        return inputs, None, None
+    report = {
+        "items": len(reports),
+        "characters": sum(r["characters"] for r in reports),
+        "estimated_tokens": sum(r["estimated_tokens"] for r in reports),
+        "chunks": sum(r["chunks"] for r in reports),
+        "elapsed_ms": sum(r["elapsed_ms"] for r in reports),
+    }
+    return items, groups, report
+
+
+def merge_text_batch(pipeline_type: str, batch: dict, groups: Sequence) -> dict:
+    """
+    Regroup a batch result for the items of ``preprocess_text_batch`` into
+    one result and error per original input.
+    """
+    return regroup_batch(
+        batch,
+        groups,
+        lambda part, chunks, text: merge_chunked_result(pipeline_type, part, chunks, text),
+    )
+
+__all__ = [
+    "DEFAULT_CHUNKING",
+    "MODEL_CHUNK_TOKENS",
+    "TEXT_TASKS",
+    "chunk_text",
+    "chunking_for",
+    "estimate_tokens",
+    "merge_chunk_results",
+    "merge_chunked_result",
+    "merge_entities",
+    "merge_summaries",
+    "merge_text_batch",
+    "preprocess_text",
+    "preprocess_text_batch",
+    "preprocess_text_input",
+    "resolve_text_options",
+    "utf16_bounds",
+]
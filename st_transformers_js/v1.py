@@ -1,8 +1,31 @@
-import streamlit as st
-import streamlit.components.v1 as components
 import os
 import base64
-from typing import Union, Optional
+from typing import Union, Optional, Callable, Sequence, Tuple
+
+from .cache import ResultCache, make_cache_key, resolve_result_cache
+from .audio import (
+    PCM_MIME_TYPE,
+    merge_audio_batch,
+    merge_chunked_result,
+    pcm_blobs,
+    preprocess_audio_batch,
+    preprocess_audio_input,
+    resolve_audio_options,
+)
+from .helpers import InputType
+from .images import preprocess_batch_inputs, preprocess_image_input, resolve_image_options
+from .metrics import MetricsCollector, resolve_metrics
+from .mirror import resolve_model_source
+from .results import check_result_format, decode_result
+from .streaming import TokenStream, resolve_stream_options, stream_request
+from .text import (
+    merge_text_batch,
+    preprocess_text_batch,
+    preprocess_text_input,
+    resolve_text_options,
+    utf16_bounds,
+)
+from .text import merge_chunked_result as merge_chunked_text
 
 # The component name must be consistent with the one in pyproject.toml
 COMPONENT_NAME = "st_transformers_js"
@@ -10,24 +33,186 @@ COMPONENT_NAME = "st_transformers_js"
 # For release, Streamlit will serve the assets from the package's asset_dir
 parent_dir = os.path.dirname(os.path.abspath(__file__))
 build_dir = os.path.join(parent_dir, "frontend_v1/build")
-_component_func = components.declare_component(
-    COMPONENT_NAME,
-    path=build_dir,
-)
+
+_component = None
+
+
+def _component_func(*args, **kwargs):
+    """
+    Call the component, declaring it with Streamlit on first use so that
+    importing this module doesn't load Streamlit's component machinery.
+    """
+    global _component
+    if _component is None:
+        import streamlit.components.v1 as components
+
+        _component = components.declare_component(
+            COMPONENT_NAME,
+            path=build_dir,
+        )
+    return _component(*args, **kwargs)
+
+
+def _unwrap_component_value(component_value, return_metadata: bool):
+    """
+    Strip the ``{"result", "meta"}`` envelope sent by the frontend.
+    """
+    if return_metadata or not isinstance(component_value, dict):
+        return component_value
+    if component_value.get("cancelled"):
+        return None
+    if "error" in component_value:
+        return {"error": component_value["error"]}
+    if "result" in component_value:
+        return component_value["result"]
+    return component_value
+
+
+def _decode_component_value(component_value, result_format: str, batch: bool = False):
+    """
+    Decode a binary result payload and the typed result inside the envelope.
+    """
+    from .helpers import decode_binary_payload
+
+    blobs = None
+    if isinstance(component_value, (bytes, bytearray, memoryview)):
+        component_value, blobs = decode_binary_payload(component_value)
+        del component_value["blobs"]
+    if not isinstance(component_value, dict) or component_value.get("result") is None:
+        return component_value
+
+    result = component_value["result"]
+    if batch and isinstance(result, dict):
+        results = decode_result(result.get("results"), result_format, blobs, batch=True)
+        result = {**result, "results": results}
+    else:
+        result = decode_result(result, result_format, blobs)
+    return {**component_value, "result": result}
+
+
+def _record_timings(
+    collector: Optional[MetricsCollector],
+    component_value,
+    raw_value,
+    model_name: str,
+    pipeline_type: str,
+    **fields,
+) -> None:
+    """
+    Record the frontend's ``timings`` for a result in the metrics collector.
+    """
+    if collector is None or not isinstance(component_value, dict):
+        return
+    timings = (component_value.get("meta") or {}).get("timings")
+    if not isinstance(timings, dict):
+        return
+    payload_bytes = len(raw_value) if isinstance(raw_value, (bytes, bytearray, memoryview)) else None
+    collector.record(
+        timings,
+        model_name,
+        pipeline_type,
+        status="error" if "error" in component_value else "complete",
+        component="v1",
+        payload_bytes=payload_bytes,
+        **fields,
+    )
+
+
+def _attach_preprocessing(component_value, report: Optional[dict]):
+    """
+    Add an image or audio preprocessing report to the ``meta`` of the envelope.
+    """
+    if report is None or not isinstance(component_value, dict):
+        return component_value
+    return {**component_value, "meta": {**(component_value.get("meta") or {}), "preprocessing": report}}
+
+
+def _merge_chunks(component_value, merge: Callable[[dict], Tuple[object, Optional[str]]], result_format: str):
+    """
+    Merge the per-chunk results of a chunked input (a long recording or text)
+    into one result with ``merge(batch)``, which returns ``(result, error)``.
+    """
+    if not isinstance(component_value, dict) or not isinstance(component_value.get("result"), dict):
+        return component_value
+    result, error = merge(component_value["result"])
+    if error is not None:
+        return {**{k: v for k, v in component_value.items() if k != "result"}, "error": error}
+    return {**component_value, "result": decode_result(result, result_format)}
+
+
+def _merge_batch(component_value, merge: Callable[[dict], dict], result_format: str):
+    """
+    Merge the chunk results of a batch's long inputs into one result per input
+    with ``merge(batch)``, which regroups the batch result.
+    """
+    if not isinstance(component_value, dict) or not isinstance(component_value.get("result"), dict):
+        return component_value
+    result = merge(component_value["result"])
+    result["results"] = decode_result(result["results"], result_format, batch=True)
+    return {**component_value, "result": result}
+
+
+def _current_value(component_value, run_id: str):
+    """
+    Drop a value left by an earlier run of a keyed component with other arguments.
+    """
+    if isinstance(component_value, dict) and (component_value.get("meta") or {}).get("run_id", run_id) != run_id:
+        return None
+    return component_value
+
+
+def _stream_from_value(component_value) -> TokenStream:
+    """
+    Turn the envelope of a streamed run into a ``TokenStream`` snapshot.
+    """
+    if not isinstance(component_value, dict):
+        return TokenStream("pending")
+    meta = component_value.get("meta") or {}
+    if component_value.get("cancelled"):
+        return TokenStream("cancelled", meta=meta)
+    if "error" in component_value:
+        return TokenStream.from_value("error", error=component_value["error"], meta=meta)
+    if "result" in component_value:
+        return TokenStream.from_value("complete", result=component_value["result"], meta=meta)
+    return TokenStream.from_value("streaming", partial=component_value.get("partial"), meta=meta)
 
 
 def transformers_js_pipeline(
     model_name: str,
     pipeline_type: str,
-    inputs: Union[str, bytes, dict],
+    inputs: InputType,
     config: Optional[dict] = None,
     width: int = 600,
     height: int = 400,
     key: Optional[str] = None,
-) -> Optional[dict]:
+    pipeline_cache_size: int = 4,
+    shared_worker: bool = False,
+    model_source: str = "hub",
+    local_model_path: Optional[str] = None,
+    load_options: Optional[dict] = None,
+    runtime: Optional[dict] = None,
+    return_metadata: bool = False,
+    result_cache: Union[bool, ResultCache, None] = None,
+    transport: str = "base64",
+    result_format: str = "json",
+    metrics: Union[bool, MetricsCollector, None] = True,
+    image_preprocessing: Union[bool, dict, None] = None,
+    audio_options: Union[bool, dict, None] = None,
+    text_chunking: Union[bool, dict, None] = None,
+    stream: Union[bool, dict, None] = None,
+    cancel: bool = False,
+    priority: str = "interactive",
+    max_concurrency: int = 1,
+) -> Union[dict, TokenStream, None]:
     """
     Run a transformers.js pipeline in the browser.
 
+    A run is identified by a hash of its arguments. Reruns of the script
+    with the same arguments don't restart it, and new arguments abort the
+    previous run (an older run never overwrites a newer one's value). With
+    ``shared_worker``, components running the same arguments at the same
+    time share one run.
+
     Parameters:
     -----------
     model_name : str
@@ -36,28 +221,158 @@ def transformers_js_pipeline(
         Type of pipeline (e.g., "image-to-text", "text-classification", "token-classification")
     inputs : str, bytes, or dict
         Input data for the pipeline:
-        - For image tasks: bytes or base64 string
+        - For image tasks: bytes or base64 string, or a path, file-like
+          object (e.g. an ``UploadedFile``), bytearray or memoryview
         - For text tasks: string or dict with text
         - For other tasks: appropriate input format
     config : dict, optional
         Additional configuration for the pipeline
     key : str, optional
         Unique key for the component
+    pipeline_cache_size : int
+        Maximum number of loaded pipelines the component keeps in memory.
+        Least recently used pipelines are disposed first.
+    shared_worker : bool
+        Run the model in a SharedWorker shared by every component on the
+        page (and across pages of the app), so components using the same
+        model load it once. It is released when the last of them goes away.
+    model_source : str
+        "hub" (default) downloads the model from the Hugging Face hub.
+        "local" loads it from a mirror created with
+        ``python -m st_transformers_js prefetch`` and served by Streamlit's
+        static file serving, so no external network access is needed.
+    local_model_path : str, optional
+        URL path of the mirror for ``model_source="local"``. Defaults to
+        ``/app/static/models/`` under the app's base URL path.
+    load_options : dict, optional
+        Options for loading the model, passed to transformers.js
+        ``pipeline()``: e.g. ``{"quantized": False}`` for the full-precision
+        weights instead of the default 8-bit quantized ones, or
+        ``{"revision": "main"}``. Pipelines loaded with different options are
+        cached separately.
+    runtime : dict, optional
+        ONNX Runtime WASM settings: ``num_threads`` (int, or "auto" for
+        half the logical cores up to 4), ``simd`` and ``proxy``. More than
+        one thread needs the page to be cross-origin isolated; otherwise the
+        component falls back to one thread. The settings in effect are
+        reported back in ``meta["runtime"]`` (see ``return_metadata``). They apply to the whole worker and are
+        fixed by its first model load.
+    return_metadata : bool
+        If True, return ``{"result": ..., "meta": ...}`` where ``meta`` holds
+        frontend details such as pipeline cache hit/miss counts and the
+        run's per-stage ``timings``
+    result_cache : bool or ResultCache, optional
+        Cache results server-side and return a cached result without mounting
+        the component. True uses the process-wide default cache.
+    transport : str
+        How bytes inputs are sent to the browser. "base64" (default) encodes
+        them as a string; "binary" sends the raw bytes, avoiding the base64
+        size overhead and decode step.
+    result_format : str
+        "json" (default) returns JSON values. "numpy" returns tensor outputs
+        (e.g. feature-extraction embeddings) as read-only ``numpy.ndarray``
+        views of one binary payload instead of nested lists. "arrow" and
+        "pandas" also return list-of-dict outputs (e.g. token-classification)
+        as a ``pyarrow.Table`` or ``pandas.DataFrame``.
+    metrics : bool or MetricsCollector
+        Record the run's per-stage timings in a metrics collector. True
+        (default) uses the process-wide ``metrics.default_metrics``.
+    image_preprocessing : bool or dict, optional
+        Shrink image inputs before sending them to the browser (needs
+        Pillow). Images are rotated upright from their EXIF orientation,
+        converted to RGB, resized so their longest side is at most
+        ``max_side`` and re-encoded. True uses the defaults; a dict may set
+        ``max_side`` (int, None, or "auto" for the per-task default in
+        ``images.DEFAULT_MAX_SIDES``), ``format`` ("jpeg", "webp" or
+        "png") and ``quality``. The byte savings are reported in
+        ``meta["preprocessing"]`` (see ``return_metadata``).
+    audio_options : bool or dict, optional
+        For audio tasks (``audio.AUDIO_TASKS``), audio file inputs are
+        decoded in Python to mono float32 PCM at the model's sampling rate
+        and sent as raw bytes (needs numpy; formats other than WAV also need
+        soundfile). Recordings longer than ``chunk_length_s`` are split into
+        windows overlapping by ``overlap_s`` that run as a batch, and the
+        outputs are merged. A dict may set ``sampling_rate``,
+        ``chunk_length_s`` (None for no chunking) and ``overlap_s``; False
+        sends audio files unchanged. ``meta["preprocessing"]`` reports the
+        decoded size, duration and chunk count.
+    text_chunking : bool or dict, optional
+        For ``token-classification`` and ``summarization``
+        (``text.TEXT_TASKS``), split a text longer than the model's input
+        limit into overlapping windows that run as a batch, one window per
+        call, and merge the outputs: entities get ``start``/``end`` offsets
+        into the whole text and overlapping ones are reported once;
+        summaries are joined. A dict may set ``chunk_tokens`` (window length
+        in estimated tokens) and ``stride`` (tokens shared by consecutive
+        windows); False sends the text whole, to be truncated by the model.
+        ``meta["preprocessing"]`` reports the number of windows.
+    stream : bool or dict, optional
+        For generative tasks (``streaming.STREAMING_TASKS``), send the text
+        generated so far to Python while the model runs, and return a
+        ``streaming.TokenStream`` instead of the output. The first token is
+        sent at once and later text at most every ``interval`` seconds
+        (default 0.25); each update reruns the script.
+    cancel : bool
+        Stop this call's run if it is still going and don't start it again
+        until the arguments change. The component reports
+        ``{"cancelled": True}`` (see ``return_metadata``). A run already
+        inside a model call finishes that call first; a streamed run stops
+        at its next token.
+    priority : str
+        "interactive" (default) or "background". The browser runs model
+        calls from every component of the worker through one queue, and
+        waiting interactive calls start before background ones.
+    max_concurrency : int
+        Maximum model calls running at once in the worker, across every
+        component (calls on one pipeline always run one at a time). Extra
+        calls wait in the queue; more than 1 lets different models run side
+        by side, at the cost of competing for WASM threads and memory.
+        Waiting single-input text-classification and token-classification
+        runs of the same model and config are combined into one batched
+        call. ``meta["queue"]`` reports the run's ``priority``, the queue
+        ``depth`` when it was queued, its ``wait_ms`` and the ``batch_size``
+        of the call it ran in (see ``return_metadata``).
 
     Returns:
     --------
     dict or None
-        Pipeline output as JSON, or None if still processing
+        Pipeline output as JSON, or None if still processing or cancelled.
+        With ``stream``, a ``TokenStream`` with the text so far and, once
+        complete, the output.
     """
-    from .helpers import process_inputs
+    from .helpers import process_inputs, process_load_options, process_runtime_options, process_scheduling
 
     # Validate required parameters
     if not model_name or not pipeline_type:
         raise ValueError("model_name and pipeline_type are required")
+    if pipeline_cache_size < 1:
+        raise ValueError("pipeline_cache_size must be at least 1")
+    source_args = resolve_model_source(model_source, local_model_path)
+    load_options = process_load_options(load_options)
+    runtime = process_runtime_options(runtime)
+    scheduling = process_scheduling(priority, max_concurrency)
+    check_result_format(result_format)
+    collector = resolve_metrics(metrics)
+    image_options = resolve_image_options(image_preprocessing)
+    audio_options = resolve_audio_options(audio_options)
+    text_options = resolve_text_options(text_chunking)
+    stream_options = resolve_stream_options(stream, pipeline_type)
+    inputs, preprocessing = preprocess_image_input(inputs, model_name, pipeline_type, image_options)
+    audio = preprocess_audio_input(inputs, model_name, pipeline_type, audio_options, config)
+    audio_chunks = None
+    if audio is not None:
+        inputs, audio_chunks, preprocessing = audio
+        # One chunk runs as a plain call
+        audio_chunks = audio_chunks if len(audio_chunks) > 1 else None
+    text_chunks = None
+    text = preprocess_text_input(inputs, model_name, pipeline_type, text_options)
+    if text is not None:
+        text_chunks, preprocessing = text
 
     # Process inputs with error handling
     try:
-        processed_inputs, mime_type = process_inputs(inputs)
+        # Decoded audio is large, so it is always sent as raw bytes
+        processed_inputs, mime_type = process_inputs(inputs, transport="binary" if audio is not None else transport)
     except TypeError as e:
         raise TypeError(
             f"Invalid input type for transformers pipeline. {str(e)}"
@@ -71,19 +386,508 @@ def transformers_js_pipeline(
             f"Unexpected error processing inputs: {str(e)}"
         ) from e
 
+    if audio is not None:
+        mime_type = PCM_MIME_TYPE
+
+    cache = resolve_result_cache(result_cache)
+    # Identifies the run to the frontend and keys the result cache
+    run_id = make_cache_key(
+        model_name,
+        pipeline_type,
+        processed_inputs,
+        config,
+        result_format=result_format,
+        load_options=load_options,
+        **({"audio_chunks": audio_chunks} if audio_chunks else {}),
+        **({"text_chunks": text_chunks} if text_chunks else {}),
+    )
+    if cache is not None:
+        cached = cache.get(run_id)
+        if cached is not None:
+            value = _attach_preprocessing({"result": cached, "meta": {"result_cache_hit": True}}, preprocessing)
+            if stream_options is not None:
+                return _stream_from_value(value)
+            return value if return_metadata else cached
+
+    # Raw bytes go in their own argument so Streamlit sends them as binary
+    inputs_bytes = None
+    if isinstance(processed_inputs, bytes):
+        inputs_bytes, processed_inputs = processed_inputs, None
+
     # Call the component
     component_value = _component_func(
         pipeline_type=pipeline_type,
         model_name=model_name,
         inputs=processed_inputs,
+        inputs_bytes=inputs_bytes,
         mime_type=mime_type,
+        audio_chunks=audio_chunks,
+        text_chunks=utf16_bounds(inputs, text_chunks) if text_chunks else None,
+        stream=stream_request(stream_options) if stream_options is not None else None,
+        run_id=run_id,
+        cancel=cancel,
         config=config if config is not None else {},
+        pipeline_cache_size=pipeline_cache_size,
+        **scheduling,
+        shared_worker=shared_worker,
+        **source_args,
+        load_options=load_options,
+        runtime=runtime,
+        result_format=result_format,
         width=width,
         height=height,
         key=key,
         default=None
     )
+    raw_value = component_value
+    # Chunk outputs are merged as JSON and then converted
+    component_value = _decode_component_value(component_value, "json" if audio_chunks or text_chunks else result_format)
+    component_value = _current_value(component_value, run_id)
+    if audio_chunks:
+        component_value = _merge_chunks(
+            component_value,
+            lambda batch: merge_chunked_result(pipeline_type, batch, audio_chunks, preprocessing["sampling_rate"]),
+            result_format,
+        )
+    if text_chunks:
+        component_value = _merge_chunks(
+            component_value, lambda batch: merge_chunked_text(pipeline_type, batch, text_chunks, inputs), result_format
+        )
+    _record_timings(collector, component_value, raw_value, model_name, pipeline_type, preprocessing=preprocessing)
+
+    if (
+        cache is not None
+        and isinstance(component_value, dict)
+        and "result" in component_value
+        and "error" not in component_value
+    ):
+        # Typed results (numpy arrays, tables) stay in the memory tier
+        cache.set(run_id, component_value["result"], persist=result_format == "json")
+
+    component_value = _attach_preprocessing(component_value, preprocessing)
+    if stream_options is not None:
+        return _stream_from_value(component_value)
+    return _unwrap_component_value(component_value, return_metadata)
+
+
+def transformers_js_pipeline_batch(
+    model_name: str,
+    pipeline_type: str,
+    inputs: Sequence[InputType],
+    config: Optional[dict] = None,
+    batch_size: int = 8,
+    width: int = 600,
+    height: int = 400,
+    key: Optional[str] = None,
+    pipeline_cache_size: int = 4,
+    shared_worker: bool = False,
+    model_source: str = "hub",
+    local_model_path: Optional[str] = None,
+    load_options: Optional[dict] = None,
+    runtime: Optional[dict] = None,
+    return_metadata: bool = False,
+    result_format: str = "json",
+    metrics: Union[bool, MetricsCollector, None] = True,
+    image_preprocessing: Union[bool, dict, None] = None,
+    audio_options: Union[bool, dict, None] = None,
+    text_chunking: Union[bool, dict, None] = None,
+    cancel: bool = False,
+    priority: str = "background",
+    max_concurrency: int = 1,
+) -> Optional[dict]:
+    """
+    Run a transformers.js pipeline over a list of inputs in one component call.
+
+    The pipeline is loaded once and the inputs are run through it in
+    sub-batches of ``batch_size`` items.
+
+    Parameters:
+    -----------
+    model_name : str
+        Hugging Face model identifier
+    pipeline_type : str
+        Type of pipeline (e.g., "text-classification")
+    inputs : list of str or binary inputs
+        Input items, processed the same way as ``transformers_js_pipeline`` inputs
+    config : dict, optional
+        Additional configuration for the pipeline
+    batch_size : int
+        Number of items passed to the pipeline per call in the browser
+    key : str, optional
+        Unique key for the component
+    pipeline_cache_size : int
+        Maximum number of loaded pipelines the component keeps in memory.
+        Least recently used pipelines are disposed first.
+    shared_worker : bool
+        Run the model in a SharedWorker shared by every component on the
+        page (and across pages of the app), so components using the same
+        model load it once. It is released when the last of them goes away.
+    model_source : str
+        "hub" (default) downloads the model from the Hugging Face hub.
+        "local" loads it from a mirror created with
+        ``python -m st_transformers_js prefetch`` and served by Streamlit's
+        static file serving, so no external network access is needed.
+    local_model_path : str, optional
+        URL path of the mirror for ``model_source="local"``. Defaults to
+        ``/app/static/models/`` under the app's base URL path.
+    load_options : dict, optional
+        Options for loading the model, passed to transformers.js
+        ``pipeline()``: e.g. ``{"quantized": False}`` for the full-precision
+        weights instead of the default 8-bit quantized ones, or
+        ``{"revision": "main"}``. Pipelines loaded with different options are
+        cached separately.
+    runtime : dict, optional
+        ONNX Runtime WASM settings: ``num_threads`` (int, or "auto" for
+        half the logical cores up to 4), ``simd`` and ``proxy``. More than
+        one thread needs the page to be cross-origin isolated; otherwise the
+        component falls back to one thread. The settings in effect are
+        reported back in ``meta["runtime"]`` (see ``return_metadata``). They apply to the whole worker and are
+        fixed by its first model load.
+    return_metadata : bool
+        If True, return ``{"result": ..., "meta": ...}`` where ``meta`` holds
+        frontend details such as pipeline cache hit/miss counts
+    result_format : str
+        "json", "numpy", "arrow" or "pandas", as for
+        ``transformers_js_pipeline``; applied to each item's output
+    metrics : bool or MetricsCollector
+        Record the run's per-stage timings, as for ``transformers_js_pipeline``
+    image_preprocessing : bool or dict, optional
+        Shrink image inputs before sending them, as for
+        ``transformers_js_pipeline``. ``meta["preprocessing"]`` totals the
+        savings over the batch's images.
+    audio_options : bool or dict, optional
+        Decode audio file inputs to PCM, as for ``transformers_js_pipeline``.
+        A recording's PCM is sent once and each of its chunks is a separate
+        batch item; the outputs are merged back into one result per input.
+    text_chunking : bool or dict, optional
+        Split long texts into windows, as for ``transformers_js_pipeline``.
+        Each window is a separate batch item, and the outputs are merged
+        back into one result per input.
+    cancel : bool
+        Stop this call's run, as for ``transformers_js_pipeline``; the
+        current sub-batch finishes first.
+    priority : str
+        "background" (default) or "interactive", as for
+        ``transformers_js_pipeline``. Each sub-batch is queued separately,
+        so interactive runs wait for at most one sub-batch.
+    max_concurrency : int
+        Maximum model calls running at once in the worker, as for
+        ``transformers_js_pipeline``
+
+    Returns:
+    --------
+    dict or None
+        ``{"results": [...], "errors": [...], "completed": int, "total": int}``
+        with ``results`` and ``errors`` in input order (``None`` where an item
+        has no result or no error), or None if still processing or cancelled
+    """
+    from .helpers import (
+        encode_binary_payload, process_batch_inputs, process_load_options, process_runtime_options, process_scheduling,
+    )
+
+    # Validate required parameters
+    if not model_name or not pipeline_type:
+        raise ValueError("model_name and pipeline_type are required")
+    if pipeline_cache_size < 1:
+        raise ValueError("pipeline_cache_size must be at least 1")
+    source_args = resolve_model_source(model_source, local_model_path)
+    load_options = process_load_options(load_options)
+    runtime = process_runtime_options(runtime)
+    scheduling = process_scheduling(priority, max_concurrency)
+    check_result_format(result_format)
+    collector = resolve_metrics(metrics)
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    image_options = resolve_image_options(image_preprocessing)
+    audio_options = resolve_audio_options(audio_options)
+    text_options = resolve_text_options(text_chunking)
+    inputs, preprocessing = preprocess_batch_inputs(inputs, model_name, pipeline_type, image_options)
+    inputs, audio_groups, audio_report = preprocess_audio_batch(inputs, model_name, pipeline_type, audio_options, config)
+    inputs, text_groups, text_report = preprocess_text_batch(inputs, model_name, pipeline_type, text_options)
+    preprocessing = audio_report or text_report or preprocessing
+    blobs, audio_chunks = [], None
+    if audio_groups is not None:
+        # Each recording's PCM is sent once; its chunks are views of it
+        inputs, blobs, audio_chunks = pcm_blobs(inputs, audio_groups)
+
+    # Process inputs with error handling
+    try:
+        processed_inputs, mime_types = process_batch_inputs(inputs)
+    except TypeError as e:
+        raise TypeError(
+            f"Invalid input type for transformers pipeline. {str(e)}"
+        ) from e
+    except ValueError as e:
+        raise ValueError(
+            f"Failed to process pipeline inputs. {str(e)}"
+        ) from e
+    except Exception as e:
+        raise RuntimeError(
+            f"Unexpected error processing inputs: {str(e)}"
+        ) from e
+    if audio_chunks is not None:
+        for index, chunks in enumerate(audio_chunks):
+            if chunks is not None:
+                mime_types[index] = PCM_MIME_TYPE
+
+    run_id = make_cache_key(
+        model_name,
+        pipeline_type,
+        processed_inputs,
+        config,
+        blobs=blobs,
+        mode="batch",
+        mime_types=mime_types,
+        result_format=result_format,
+        load_options=load_options,
+        **({"audio_chunks": audio_chunks} if audio_chunks else {}),
+    )
+
+    # Call the component
+    component_value = _component_func(
+        mode="batch",
+        pipeline_type=pipeline_type,
+        model_name=model_name,
+        inputs=processed_inputs,
+        inputs_bytes=encode_binary_payload({}, blobs) if blobs else None,
+        mime_types=mime_types,
+        audio_chunks=audio_chunks,
+        batch_size=batch_size,
+        run_id=run_id,
+        cancel=cancel,
+        config=config if config is not None else {},
+        pipeline_cache_size=pipeline_cache_size,
+        **scheduling,
+        shared_worker=shared_worker,
+        **source_args,
+        load_options=load_options,
+        runtime=runtime,
+        result_format=result_format,
+        width=width,
+        height=height,
+        key=key,
+        default=None
+    )
+    raw_value = component_value
+    grouped = audio_groups is not None or text_groups is not None
+    component_value = _decode_component_value(component_value, "json" if grouped else result_format, batch=True)
+    component_value = _current_value(component_value, run_id)
+    if audio_groups is not None:
+        component_value = _merge_batch(
+            component_value, lambda batch: merge_audio_batch(pipeline_type, batch, audio_groups), result_format
+        )
+    if text_groups is not None:
+        component_value = _merge_batch(
+            component_value, lambda batch: merge_text_batch(pipeline_type, batch, text_groups), result_format
+        )
+    _record_timings(collector, component_value, raw_value, model_name, pipeline_type, preprocessing=preprocessing)
+
+    component_value = _attach_preprocessing(component_value, preprocessing)
+    return _unwrap_component_value(component_value, return_metadata)
+
+def preload_models(
+    models: Sequence[Union[Tuple[str, str], dict]],
+    warmup: bool = True,
+    key: Optional[str] = "st_transformers_js_preload",
+    shared_worker: bool = True,
+    model_source: str = "hub",
+    local_model_path: Optional[str] = None,
+    load_options: Optional[dict] = None,
+    runtime: Optional[dict] = None,
+    return_metadata: bool = False,
+) -> Optional[dict]:
+    """
+    Load and warm up models in the browser before the first pipeline call.
+
+    Mounts a hidden component that downloads and initialises each model in
+    turn and, with ``warmup``, runs one dummy input through it. Call it near
+    the top of the app so the models load while the user is still looking
+    at the page.
+
+    Parameters:
+    -----------
+    models : list
+        ``(model_name, pipeline_type)`` tuples, or dicts with ``model_name``,
+        ``pipeline_type`` and optionally ``warmup_input`` and ``config``
+    warmup : bool
+        Run a warm-up input through each model after loading it. Common text
+        tasks have a default input; other tasks are only warmed up if a
+        ``warmup_input`` is given.
+    key : str, optional
+        Unique key for the component
+    shared_worker : bool
+        Load the models in the SharedWorker. Pipeline calls made with
+        ``shared_worker=True`` then use the preloaded models; other calls
+        still benefit from the model files being in the browser cache.
+    model_source : str
+        "hub" or "local", as for ``transformers_js_pipeline``
+    local_model_path : str, optional
+        URL path of the local model mirror
+    load_options : dict, optional
+        Load options for models that don't set their own ``load_options``,
+        as for the pipeline functions. Preloaded models are only reused by
+        pipeline calls with the same options.
+    runtime : dict, optional
+        ONNX Runtime WASM settings, as for the pipeline functions. As the
+        preload usually loads the first model, it usually fixes them.
+    return_metadata : bool
+        If True, return ``{"result": ..., "meta": ...}``
+
+    Returns:
+    --------
+    dict or None
+        ``{"ready": bool, "models": [...]}`` with each model's ``status``
+        ("loading", "warming", "ready" or "error"), ``load_ms``,
+        ``warmup_ms`` and ``error``. Updated as each model finishes; None
+        before the first model is done.
+    """
+    from .helpers import process_model_specs, process_runtime_options
+
+    specs = process_model_specs(models, warmup=warmup, load_options=load_options)
+    runtime = process_runtime_options(runtime)
+    source_args = resolve_model_source(model_source, local_model_path)
+
+    component_value = _component_func(
+        mode="preload",
+        models=specs,
+        # Preloaded models are held, so they are never evicted from the cache
+        pipeline_cache_size=max(4, len(specs)),
+        shared_worker=shared_worker,
+        **source_args,
+        runtime=runtime,
+        key=key,
+        default=None
+    )
+
+    return _unwrap_component_value(component_value, return_metadata)
+
+
+def _cache_action(request: dict, key: Optional[str], return_metadata: bool):
+    """
+    Mount the hidden component to run a browser model cache request.
+    """
+    from .helpers import process_cache_report
+
+    component_value = _component_func(mode="cache", **request, key=key, default=None)
+    value = _unwrap_component_value(component_value, return_metadata)
+    if return_metadata and isinstance(value, dict):
+        return {**value, "result": process_cache_report(value.get("result"))}
+    return process_cache_report(value)
+
+
+def list_cached_models(
+    key: Optional[str] = "st_transformers_js_cache",
+    persist: bool = False,
+    return_metadata: bool = False,
+) -> Optional[dict]:
+    """
+    List the models in the browser's model cache.
+
+    transformers.js keeps downloaded model files in the browser's Cache
+    Storage, which is shared by every app on the origin. The listing is
+    taken once per mount; use a different ``key`` to take it again.
+
+    Parameters:
+    -----------
+    key : str, optional
+        Unique key for the component
+    persist : bool
+        Also ask the browser to make the origin's storage persistent, so
+        it isn't cleared under storage pressure. Browsers may grant this
+        silently, prompt, or refuse; the result's ``persisted`` says which.
+    return_metadata : bool
+        If True, return ``{"result": ..., "meta": ...}``
+
+    Returns:
+    --------
+    dict or None
+        ``models``, most recently used first, each with ``model_name``,
+        ``bytes``, ``files`` and ``last_used`` (a UTC datetime, or None if
+        it hasn't been used since usage tracking began); ``total_bytes``;
+        ``budget_bytes``; the origin's storage ``usage`` and ``quota`` in
+        bytes and whether it is ``persisted`` (None where the browser
+        doesn't say); and ``available``, False where Cache Storage isn't
+        (e.g. on plain HTTP other than localhost). None until the browser
+        reports.
+    """
+    from .helpers import process_cache_request
+
+    return _cache_action(process_cache_request("list", persist=persist), key, return_metadata)
+
+
+def evict_cached_model(
+    model_name: str,
+    key: Optional[str] = None,
+    return_metadata: bool = False,
+) -> Optional[dict]:
+    """
+    Delete a model's files from the browser's model cache.
+
+    A pipeline that already loaded the model keeps working; the next page
+    load that needs it downloads it again.
+
+    Parameters:
+    -----------
+    model_name : str
+        Model to evict, as listed by ``list_cached_models``
+    key : str, optional
+        Unique key for the component
+    return_metadata : bool
+        If True, return ``{"result": ..., "meta": ...}``
+
+    Returns:
+    --------
+    dict or None
+        The ``list_cached_models`` listing after the eviction, plus
+        ``evicted`` (the evicted model names) and ``freed_bytes``
+    """
+    from .helpers import process_cache_request
+
+    return _cache_action(process_cache_request("evict", model_name=model_name), key, return_metadata)
+
+
+def set_cache_budget(
+    max_bytes: Optional[int],
+    key: Optional[str] = "st_transformers_js_cache_budget",
+    persist: bool = False,
+    return_metadata: bool = False,
+) -> Optional[dict]:
+    """
+    Limit the size of the browser's model cache.
+
+    The budget is stored in the browser and models are evicted least
+    recently used first until the cache fits. It is enforced again after
+    each model load, keeping the models the worker has loaded.
+
+    Parameters:
+    -----------
+    max_bytes : int or None
+        Budget in bytes, or None to remove it
+    key : str, optional
+        Unique key for the component
+    persist : bool
+        Also ask the browser to make the origin's storage persistent, as
+        for ``list_cached_models``
+    return_metadata : bool
+        If True, return ``{"result": ..., "meta": ...}``
+
+    Returns:
+    --------
+    dict or None
+        The ``list_cached_models`` listing after pruning, plus ``evicted``
+        and ``freed_bytes``
+    """
+    from .helpers import process_cache_request
+
+    request = process_cache_request("budget", max_bytes=max_bytes, persist=persist)
+    return _cache_action(request, key, return_metadata)
 
-    return component_value
 
-__all__ = ["transformers_js_pipeline"]
+__all__ = [
+    "transformers_js_pipeline",
+    "transformers_js_pipeline_batch",
+    "preload_models",
+    "list_cached_models",
+    "evict_cached_model",
+    "set_cache_budget",
+]
@@ -1,33 +1,231 @@
 import os
 import base64
-from typing import Union, Optional, Callable
-import streamlit.components.v2 as components
+from collections import OrderedDict
+from typing import Union, Optional, Callable, Sequence, Tuple
+
+from .cache import ResultCache, make_cache_key, resolve_result_cache
+from .audio import (
+    PCM_MIME_TYPE,
+    merge_audio_batch,
+    merge_chunked_result,
+    pcm_blobs,
+    preprocess_audio_batch,
+    preprocess_audio_input,
+    resolve_audio_options,
+)
+from .helpers import InputType
+from .images import preprocess_batch_inputs, preprocess_image_input, resolve_image_options
+from .metrics import MetricsCollector, resolve_metrics
+from .mirror import resolve_model_source
+from .results import check_result_format, decode_result
+from .streaming import TokenStream, resolve_stream_options, stream_request
+from .text import (
+    merge_text_batch,
+    preprocess_text_batch,
+    preprocess_text_input,
+    resolve_text_options,
+    utf16_bounds,
+)
+from .text import merge_chunked_result as merge_chunked_text
 
 COMPONENT_NAME = "st_transformers_js_v2"
 
-# Verify build exists
 ASSET_DIR = os.path.join(os.path.dirname(__file__), "frontend_v2", "dist")
-if not os.path.exists(ASSET_DIR):
-    raise RuntimeError(
-        f"V2 component assets not found at {ASSET_DIR}. "
-        "Run './build_script.sh' to build the frontend."
+
+_component = None
+
+def _component_func(*args, **kwargs):
+    """
+    Call the component, registering it with Streamlit on first use so that
+    importing this module doesn't load Streamlit's component machinery.
+    """
+    global _component
+    if _component is None:
+        # Verify build exists
+        if not os.path.exists(ASSET_DIR):
+            raise RuntimeError(
+                f"V2 component assets not found at {ASSET_DIR}. "
+                "Run './build_script.sh' to build the frontend."
+            )
+        import streamlit.components.v2 as components
+
+        _component = components.component(
+            COMPONENT_NAME,
+            html="index.html",
+        )
+    return _component(*args, **kwargs)
+
+class _ComponentState(dict):
+    """Component state as a dict with attribute access."""
+
+    def __getattr__(self, name):
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+# Session state entry mapping each component mount's session id to the
+# latest (seq, state) it sent. It lives in the user's session, so the
+# states (results included) are freed with it.
+_SYNC_STATE_KEY = "st_transformers_js_sync"
+# Component mounts remembered per user session
+_MAX_SYNC_SESSIONS = 64
+
+def _latest_state(snapshot: dict) -> dict:
+    """
+    Return the newest state a component mount has sent.
+
+    The frontend sends its whole state as one ``sync`` value carrying the
+    mount's session id and a sequence number. A snapshot older than one
+    already seen (e.g. replayed with stale widget state) is replaced by the
+    newest one.
+    """
+    import streamlit as st
+
+    session = snapshot.get("session")
+    seq = snapshot.get("seq", 0)
+    state = snapshot.get("state") or {}
+    if _SYNC_STATE_KEY not in st.session_state:
+        st.session_state[_SYNC_STATE_KEY] = OrderedDict()
+    latest_by_session = st.session_state[_SYNC_STATE_KEY]
+    latest = latest_by_session.get(session)
+    if latest is not None and latest[0] > seq:
+        state = latest[1]
+    else:
+        latest_by_session[session] = (seq, state)
+    latest_by_session.move_to_end(session)
+    while len(latest_by_session) > _MAX_SYNC_SESSIONS:
+        latest_by_session.popitem(last=False)
+    return state
+
+def _resolve_state(state, result_format: str = "json", batch: bool = False):
+    """
+    Unpack the frontend's coalesced ``sync`` value into a flat state and
+    decode a typed result.
+    """
+    if state is None:
+        return None
+    snapshot = state.get("sync")
+    if not isinstance(snapshot, dict):
+        return state
+    resolved = _ComponentState((k, v) for k, v in state.items() if k != "sync")
+    resolved.update(_latest_state(snapshot))
+    if resolved.get("result") is not None:
+        resolved["result"] = decode_result(resolved["result"], result_format, batch=batch)
+    return resolved
+
+def _attach_preprocessing(state, report: Optional[dict]):
+    """
+    Add an image or audio preprocessing report to the state as ``preprocessing``.
+    """
+    if state is None or report is None:
+        return state
+    return _ComponentState(state, preprocessing=report)
+
+def _merge_chunks(state, merge: Callable[[dict], Tuple[object, Optional[str]]], result_format: str):
+    """
+    Merge the per-chunk results of a finished chunked input (a long recording
+    or text) into one result with ``merge(batch)``, which returns ``(result, error)``.
+    """
+    if not state or state.get("status") != "complete" or not isinstance(state.get("result"), dict):
+        return state
+    result, error = merge(state["result"])
+    if error is not None:
+        return _ComponentState(state, status="error", message=f"Error: {error}", error=error, result=None)
+    return _ComponentState(state, result=decode_result(result, result_format))
+
+def _merge_batch(state, merge: Callable[[dict], dict], result_format: str):
+    """
+    Merge the chunk results of a finished batch's long inputs into one result
+    per input with ``merge(batch)``, which regroups the batch result.
+    """
+    if not state or state.get("status") != "complete" or state.get("result") is None:
+        return state
+    batch = {"results": state["result"], "errors": state.get("errors") or [None] * len(state["result"])}
+    merged = merge(batch)
+    return _ComponentState(
+        state,
+        result=decode_result(merged["results"], result_format, batch=True),
+        errors=merged["errors"],
+        completed=merged["completed"],
+        total=merged["total"],
     )
 
-_component_func = components.component(
-    COMPONENT_NAME,
-    html="index.html",
-)
+def _stream_from_state(state) -> TokenStream:
+    """
+    Turn the state of a streamed run into a ``TokenStream`` snapshot.
+    """
+    if not state:
+        return TokenStream("pending")
+    status = state.get("status")
+    if status == "complete":
+        return TokenStream.from_value("complete", result=state.get("result"), meta=state)
+    # An "error" status without an error message is a download being retried
+    if status == "error" and state.get("error") is not None:
+        return TokenStream.from_value("error", error=state["error"], meta=state)
+    if status == "streaming":
+        return TokenStream.from_value("streaming", partial=state.get("partial"), meta=state)
+    if status == "cancelled":
+        return TokenStream("cancelled", meta=state)
+    return TokenStream.from_value("pending", meta=state)
+
+def _current_state(state, run_id: str):
+    """
+    Drop the state left by an earlier run of a keyed component with other arguments.
+    """
+    if state and state.get("run_id", run_id) != run_id:
+        return None
+    return state
+
+def _record_timings(collector: Optional[MetricsCollector], state, model_name: str, pipeline_type: str, **fields):
+    """
+    Record the frontend's ``timings`` for a finished run in the metrics collector.
+    """
+    if collector is None or not isinstance(state, dict) or not isinstance(state.get("timings"), dict):
+        return
+    collector.record(
+        state["timings"],
+        model_name,
+        pipeline_type,
+        status=state.get("status", "complete"),
+        component="v2",
+        **fields,
+    )
 
 def transformers_js_pipeline_v2(
     model_name: str,
     pipeline_type: str,
-    inputs: Union[str, bytes, dict],
+    inputs: InputType,
     config: Optional[dict] = None,
     key: Optional[str] = None,
-) -> Optional[dict]:
+    pipeline_cache_size: int = 4,
+    shared_worker: bool = False,
+    model_source: str = "hub",
+    local_model_path: Optional[str] = None,
+    load_options: Optional[dict] = None,
+    runtime: Optional[dict] = None,
+    progress_interval: float = 0.5,
+    result_cache: Union[bool, ResultCache, None] = None,
+    transport: str = "base64",
+    result_format: str = "json",
+    metrics: Union[bool, MetricsCollector, None] = True,
+    image_preprocessing: Union[bool, dict, None] = None,
+    audio_options: Union[bool, dict, None] = None,
+    text_chunking: Union[bool, dict, None] = None,
+    stream: Union[bool, dict, None] = None,
+    cancel: bool = False,
+    priority: str = "interactive",
+    max_concurrency: int = 1,
+) -> Union[dict, TokenStream, None]:
     """
     Run a transformers.js pipeline in the browser (v2 component).
 
+    A run is identified by a hash of its arguments. Reruns of the script
+    with the same arguments don't restart it, and new arguments abort the
+    previous run (an older run never overwrites a newer one's state). Other
+    components on the page running the same arguments at the same time
+    share one run.
+
     Parameters
     ----------
     model_name : str
@@ -35,26 +233,162 @@ def transformers_js_pipeline_v2(
     pipeline_type : str
         Type of pipeline (e.g., "text-classification", "image-to-text")
     inputs : str, bytes, or dict
-        Input data for the pipeline
+        Input data for the pipeline. Binary inputs can also be given as a
+        path, a file-like object (e.g. an ``UploadedFile``), a bytearray or a
+        memoryview; large files are memory-mapped rather than read.
     config : dict, optional
         Additional pipeline configuration
     key : str, optional
         Unique key for the component instance
+    pipeline_cache_size : int
+        Maximum number of loaded pipelines kept in memory by the page.
+        Least recently used pipelines are disposed first.
+    shared_worker : bool
+        Run the model in a SharedWorker shared by every page of the app, so
+        components using the same model load it once. It is released when
+        the last of them goes away. Without it, components on one page
+        already share a worker.
+    model_source : str
+        "hub" (default) downloads the model from the Hugging Face hub.
+        "local" loads it from a mirror created with
+        ``python -m st_transformers_js prefetch`` and served by Streamlit's
+        static file serving, so no external network access is needed.
+    local_model_path : str, optional
+        URL path of the mirror for ``model_source="local"``. Defaults to
+        ``/app/static/models/`` under the app's base URL path.
+    load_options : dict, optional
+        Options for loading the model, passed to transformers.js
+        ``pipeline()``: e.g. ``{"quantized": False}`` for the full-precision
+        weights instead of the default 8-bit quantized ones, or
+        ``{"revision": "main"}``. Pipelines loaded with different options are
+        cached separately.
+    runtime : dict, optional
+        ONNX Runtime WASM settings: ``num_threads`` (int, or "auto" for
+        half the logical cores up to 4), ``simd`` and ``proxy``. More than
+        one thread needs the page to be cross-origin isolated; otherwise the
+        component falls back to one thread. The settings in effect are
+        reported back in the state's ``runtime`` key. They apply to the whole worker and are
+        fixed by its first model load.
+    progress_interval : float
+        Minimum seconds between progress updates sent to Python. Each
+        update reruns the script; completion and errors are sent at once.
+    result_cache : bool or ResultCache, optional
+        Cache completed results server-side and return a cached result
+        without mounting the component. True uses the process-wide default
+        cache. Cached states have ``result_cache_hit`` set to True.
+    transport : str
+        How bytes inputs are sent to the browser. "base64" (default) encodes
+        them as a string; "binary" sends one raw binary payload, avoiding the
+        base64 size overhead and decode step.
+    result_format : str
+        "json" (default) returns JSON values. "numpy" returns tensor outputs
+        (e.g. feature-extraction embeddings) as ``numpy.ndarray``, sent as
+        base64-encoded raw buffers instead of lists of numbers. "arrow" and
+        "pandas" also return list-of-dict outputs (e.g. token-classification)
+        as a ``pyarrow.Table`` or ``pandas.DataFrame``.
+    metrics : bool or MetricsCollector
+        Record the run's per-stage timings in a metrics collector. True
+        (default) uses the process-wide ``metrics.default_metrics``.
+    image_preprocessing : bool or dict, optional
+        Shrink image inputs before sending them to the browser (needs
+        Pillow): rotate upright from the EXIF orientation, convert to RGB,
+        resize to at most ``max_side`` on the longest side and re-encode.
+        True uses the defaults; a dict may set ``max_side`` (int, None, or
+        "auto" for the per-task default in ``images.DEFAULT_MAX_SIDES``),
+        ``format`` ("jpeg", "webp" or "png") and ``quality``. The returned
+        state's ``preprocessing`` reports the byte savings.
+    audio_options : bool or dict, optional
+        For audio tasks (``audio.AUDIO_TASKS``), decode audio file inputs in
+        Python to mono float32 PCM at the model's sampling rate and send it
+        as raw bytes (needs numpy; formats other than WAV also need
+        soundfile). Recordings longer than ``chunk_length_s`` are split into
+        windows overlapping by ``overlap_s`` that run as a batch, and the
+        outputs are merged. A dict may set ``sampling_rate``,
+        ``chunk_length_s`` (None for no chunking) and ``overlap_s``; False
+        sends audio files unchanged. The state's ``preprocessing`` reports
+        the decoded size, duration and chunk count.
+    text_chunking : bool or dict, optional
+        For ``token-classification`` and ``summarization``
+        (``text.TEXT_TASKS``), split a text longer than the model's input
+        limit into overlapping windows that run as a batch, one window per
+        call, and merge the outputs: entities get ``start``/``end`` offsets
+        into the whole text and overlapping ones are reported once;
+        summaries are joined. A dict may set ``chunk_tokens`` (window length
+        in estimated tokens) and ``stride`` (tokens shared by consecutive
+        windows); False sends the text whole, to be truncated by the model.
+        The state's ``preprocessing`` reports the number of windows.
+    stream : bool or dict, optional
+        For generative tasks (``streaming.STREAMING_TASKS``), send the text
+        generated so far to Python while the model runs, and return a
+        ``streaming.TokenStream`` instead of the state. The first token is
+        sent at once and later text at most every ``interval`` seconds
+        (default 0.25); each update reruns the script.
+    cancel : bool
+        Stop this call's run if it is still going and don't start it again
+        until the arguments change; the state's ``status`` becomes
+        "cancelled". A run already inside a model call finishes that call
+        first; a streamed run stops at its next token.
+    priority : str
+        "interactive" (default) or "background". The browser runs model
+        calls from every component of the worker through one queue, and
+        waiting interactive calls start before background ones.
+    max_concurrency : int
+        Maximum model calls running at once in the worker, across every
+        component (calls on one pipeline always run one at a time). Extra
+        calls wait in the queue, with the state's ``status`` "queued";
+        more than 1 lets different models run side by side, at the cost of
+        competing for WASM threads and memory. Waiting single-input
+        text-classification and token-classification runs of the same
+        model and config are combined into one batched call. The state's
+        ``queue`` reports the run's ``priority``, the queue ``depth`` when
+        it was queued, its ``wait_ms`` and the ``batch_size`` of the call
+        it ran in; ``scheduler`` reports the worker's queue.
 
     Returns
     -------
     dict or None
-        A dictionary with the component's state (status, progress, etc.)
+        A dictionary with the component's state (status, progress, etc.).
+        Once the run completes or fails, ``timings`` holds its per-stage
+        timings, pipeline cache hit flag and payload sizes. With
+        ``stream``, a ``TokenStream`` whose ``meta`` is the state.
     """
-    from .helpers import process_inputs
+    from .helpers import (
+        encode_binary_payload, process_inputs, process_load_options, process_runtime_options, process_scheduling,
+    )
 
     # Validate required parameters
     if not model_name or not pipeline_type:
         raise ValueError("model_name and pipeline_type are required")
+    if pipeline_cache_size < 1:
+        raise ValueError("pipeline_cache_size must be at least 1")
+    source_args = resolve_model_source(model_source, local_model_path)
+    load_options = process_load_options(load_options)
+    runtime = process_runtime_options(runtime)
+    scheduling = process_scheduling(priority, max_concurrency)
+    if progress_interval < 0:
+        raise ValueError("progress_interval must not be negative")
+    check_result_format(result_format)
+    collector = resolve_metrics(metrics)
+    image_options = resolve_image_options(image_preprocessing)
+    audio_options = resolve_audio_options(audio_options)
+    text_options = resolve_text_options(text_chunking)
+    stream_options = resolve_stream_options(stream, pipeline_type)
+    inputs, preprocessing = preprocess_image_input(inputs, model_name, pipeline_type, image_options)
+    audio = preprocess_audio_input(inputs, model_name, pipeline_type, audio_options, config)
+    audio_chunks = None
+    if audio is not None:
+        inputs, audio_chunks, preprocessing = audio
+        # One chunk runs as a plain call
+        audio_chunks = audio_chunks if len(audio_chunks) > 1 else None
+    text_chunks = None
+    text = preprocess_text_input(inputs, model_name, pipeline_type, text_options)
+    if text is not None:
+        text_chunks, preprocessing = text
 
     # Process inputs with error handling
     try:
-        processed_inputs, mime_type = process_inputs(inputs)
+        # Decoded audio is large, so it is always sent as raw bytes
+        processed_inputs, mime_type = process_inputs(inputs, transport="binary" if audio is not None else transport)
     except TypeError as e:
         raise TypeError(
             f"Invalid input type for transformers pipeline. {str(e)}"
@@ -67,6 +401,32 @@ def transformers_js_pipeline_v2(
         raise RuntimeError(
             f"Unexpected error processing inputs: {str(e)}"
         ) from e
+    if audio is not None:
+        mime_type = PCM_MIME_TYPE
+
+    cache = resolve_result_cache(result_cache)
+    # Identifies the run to the frontend and keys the result cache
+    run_id = make_cache_key(
+        model_name,
+        pipeline_type,
+        processed_inputs,
+        config,
+        result_format=result_format,
+        load_options=load_options,
+        **({"audio_chunks": audio_chunks} if audio_chunks else {}),
+        **({"text_chunks": text_chunks} if text_chunks else {}),
+    )
+    if cache is not None:
+        cached = cache.get(run_id)
+        if cached is not None:
+            state = _ComponentState(
+                status="complete",
+                message="Loaded from result cache.",
+                result=cached,
+                result_cache_hit=True,
+            )
+            state = _attach_preprocessing(state, preprocessing)
+            return _stream_from_state(state) if stream_options is not None else state
 
     component_data = {
         "model_name": model_name,
@@ -74,8 +434,445 @@ def transformers_js_pipeline_v2(
         "inputs": processed_inputs,
         "mime_type": mime_type,
         "config": config or {},
+        "pipeline_cache_size": pipeline_cache_size,
+        **scheduling,
+        "shared_worker": shared_worker,
+        **source_args,
+        "load_options": load_options,
+        "runtime": runtime,
+        "progress_interval_ms": int(progress_interval * 1000),
+        "result_format": result_format,
+        "run_id": run_id,
+    }
+    if cancel:
+        component_data["cancel"] = True
+    if audio_chunks:
+        component_data["audio_chunks"] = audio_chunks
+    if text_chunks:
+        component_data["text_chunks"] = utf16_bounds(inputs, text_chunks)
+    if stream_options is not None:
+        component_data["stream"] = stream_request(stream_options)
+
+    if isinstance(processed_inputs, bytes):
+        # The frontend swaps the blob reference for the raw bytes
+        component_data["inputs"] = {"blob": 0}
+        component_data = encode_binary_payload(component_data, [processed_inputs])
+
+    # Chunk outputs are merged as JSON and then converted
+    state = _resolve_state(
+        _component_func(data=component_data, key=key), "json" if audio_chunks or text_chunks else result_format
+    )
+    state = _current_state(state, run_id)
+    if audio_chunks:
+        state = _merge_chunks(
+            state,
+            lambda batch: merge_chunked_result(pipeline_type, batch, audio_chunks, preprocessing["sampling_rate"]),
+            result_format,
+        )
+    if text_chunks:
+        state = _merge_chunks(state, lambda batch: merge_chunked_text(pipeline_type, batch, text_chunks, inputs), result_format)
+    state = _attach_preprocessing(state, preprocessing)
+    _record_timings(collector, state, model_name, pipeline_type, preprocessing=preprocessing)
+
+    if (
+        cache is not None
+        and state
+        and state.get("status") == "complete"
+        and state.get("result") is not None
+    ):
+        # Typed results (numpy arrays, tables) stay in the memory tier
+        cache.set(run_id, state["result"], persist=result_format == "json")
+
+    if stream_options is not None:
+        return _stream_from_state(state)
+    return state
+
+def transformers_js_pipeline_batch_v2(
+    model_name: str,
+    pipeline_type: str,
+    inputs: Sequence[InputType],
+    config: Optional[dict] = None,
+    batch_size: int = 8,
+    key: Optional[str] = None,
+    pipeline_cache_size: int = 4,
+    shared_worker: bool = False,
+    model_source: str = "hub",
+    local_model_path: Optional[str] = None,
+    load_options: Optional[dict] = None,
+    runtime: Optional[dict] = None,
+    progress_interval: float = 0.5,
+    result_format: str = "json",
+    metrics: Union[bool, MetricsCollector, None] = True,
+    image_preprocessing: Union[bool, dict, None] = None,
+    audio_options: Union[bool, dict, None] = None,
+    text_chunking: Union[bool, dict, None] = None,
+    cancel: bool = False,
+    priority: str = "background",
+    max_concurrency: int = 1,
+) -> Optional[dict]:
+    """
+    Run a transformers.js pipeline over a list of inputs (v2 component).
+
+    The pipeline is loaded once and the inputs are run through it in
+    sub-batches of ``batch_size`` items. Runs are identified by their
+    arguments, as for ``transformers_js_pipeline_v2``.
+
+    Parameters
+    ----------
+    model_name : str
+        Hugging Face model identifier
+    pipeline_type : str
+        Type of pipeline (e.g., "text-classification", "image-to-text")
+    inputs : list of str or binary inputs
+        Input items for the pipeline
+    config : dict, optional
+        Additional pipeline configuration
+    batch_size : int
+        Number of items passed to the pipeline per call in the browser
+    key : str, optional
+        Unique key for the component instance
+    pipeline_cache_size : int
+        Maximum number of loaded pipelines kept in memory by the page.
+        Least recently used pipelines are disposed first.
+    shared_worker : bool
+        Run the model in a SharedWorker shared by every page of the app, so
+        components using the same model load it once. It is released when
+        the last of them goes away. Without it, components on one page
+        already share a worker.
+    model_source : str
+        "hub" (default) downloads the model from the Hugging Face hub.
+        "local" loads it from a mirror created with
+        ``python -m st_transformers_js prefetch`` and served by Streamlit's
+        static file serving, so no external network access is needed.
+    local_model_path : str, optional
+        URL path of the mirror for ``model_source="local"``. Defaults to
+        ``/app/static/models/`` under the app's base URL path.
+    load_options : dict, optional
+        Options for loading the model, passed to transformers.js
+        ``pipeline()``: e.g. ``{"quantized": False}`` for the full-precision
+        weights instead of the default 8-bit quantized ones, or
+        ``{"revision": "main"}``. Pipelines loaded with different options are
+        cached separately.
+    runtime : dict, optional
+        ONNX Runtime WASM settings: ``num_threads`` (int, or "auto" for
+        half the logical cores up to 4), ``simd`` and ``proxy``. More than
+        one thread needs the page to be cross-origin isolated; otherwise the
+        component falls back to one thread. The settings in effect are
+        reported back in the state's ``runtime`` key. They apply to the whole worker and are
+        fixed by its first model load.
+    progress_interval : float
+        Minimum seconds between progress updates sent to Python. Each
+        update reruns the script; completion and errors are sent at once.
+    result_format : str
+        "json", "numpy", "arrow" or "pandas", as for
+        ``transformers_js_pipeline_v2``; applied to each item's output
+    metrics : bool or MetricsCollector
+        Record the run's per-stage timings, as for ``transformers_js_pipeline_v2``
+    image_preprocessing : bool or dict, optional
+        Shrink image inputs before sending them, as for
+        ``transformers_js_pipeline_v2``; ``preprocessing`` totals the
+        savings over the batch's images.
+    audio_options : bool or dict, optional
+        Decode audio file inputs to PCM, as for ``transformers_js_pipeline_v2``.
+        A recording's PCM is sent once and each of its chunks is a separate
+        batch item; the outputs are merged back into one result per input.
+    text_chunking : bool or dict, optional
+        Split long texts into windows, as for ``transformers_js_pipeline_v2``.
+        Each window is a separate batch item, and the outputs are merged
+        back into one result per input.
+    cancel : bool
+        Stop this call's run, as for ``transformers_js_pipeline_v2``; the
+        current sub-batch finishes first.
+    priority : str
+        "background" (default) or "interactive", as for
+        ``transformers_js_pipeline_v2``. Each sub-batch is queued
+        separately, so interactive runs wait for at most one sub-batch.
+    max_concurrency : int
+        Maximum model calls running at once in the worker, as for
+        ``transformers_js_pipeline_v2``
+
+    Returns
+    -------
+    dict or None
+        The component's state. Once complete, ``result`` holds the per-item
+        results in input order, ``errors`` the per-item error messages, and
+        ``completed``/``total`` the progress counts, and ``timings`` the
+        run's per-stage timings.
+    """
+    from .helpers import (
+        encode_binary_payload, process_batch_inputs, process_load_options, process_runtime_options, process_scheduling,
+    )
+
+    # Validate required parameters
+    if not model_name or not pipeline_type:
+        raise ValueError("model_name and pipeline_type are required")
+    if pipeline_cache_size < 1:
+        raise ValueError("pipeline_cache_size must be at least 1")
+    source_args = resolve_model_source(model_source, local_model_path)
+    load_options = process_load_options(load_options)
+    runtime = process_runtime_options(runtime)
+    scheduling = process_scheduling(priority, max_concurrency)
+    if progress_interval < 0:
+        raise ValueError("progress_interval must not be negative")
+    check_result_format(result_format)
+    collector = resolve_metrics(metrics)
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1")
+    image_options = resolve_image_options(image_preprocessing)
+    audio_options = resolve_audio_options(audio_options)
+    text_options = resolve_text_options(text_chunking)
+    inputs, preprocessing = preprocess_batch_inputs(inputs, model_name, pipeline_type, image_options)
+    inputs, audio_groups, audio_report = preprocess_audio_batch(inputs, model_name, pipeline_type, audio_options, config)
+    inputs, text_groups, text_report = preprocess_text_batch(inputs, model_name, pipeline_type, text_options)
+    preprocessing = audio_report or text_report or preprocessing
+    blobs, audio_chunks = [], None
+    if audio_groups is not None:
+        # Each recording's PCM is sent once; its chunks are views of it
+        inputs, blobs, audio_chunks = pcm_blobs(inputs, audio_groups)
+
+    # Process inputs with error handling
+    try:
+        processed_inputs, mime_types = process_batch_inputs(inputs)
+    except TypeError as e:
+        raise TypeError(
+            f"Invalid input type for transformers pipeline. {str(e)}"
+        ) from e
+    except ValueError as e:
+        raise ValueError(
+            f"Failed to process pipeline inputs. {str(e)}"
+        ) from e
+    except Exception as e:
+        raise RuntimeError(
+            f"Unexpected error processing inputs: {str(e)}"
+        ) from e
+    if audio_chunks is not None:
+        for index, chunks in enumerate(audio_chunks):
+            if chunks is not None:
+                mime_types[index] = PCM_MIME_TYPE
+
+    run_id = make_cache_key(
+        model_name,
+        pipeline_type,
+        processed_inputs,
+        config,
+        blobs=blobs,
+        mode="batch",
+        mime_types=mime_types,
+        result_format=result_format,
+        load_options=load_options,
+        **({"audio_chunks": audio_chunks} if audio_chunks else {}),
+    )
+
+    component_data = {
+        "mode": "batch",
+        "model_name": model_name,
+        "pipeline_type": pipeline_type,
+        "inputs": processed_inputs,
+        "mime_types": mime_types,
+        "batch_size": batch_size,
+        "config": config or {},
+        "pipeline_cache_size": pipeline_cache_size,
+        **scheduling,
+        "shared_worker": shared_worker,
+        **source_args,
+        "load_options": load_options,
+        "runtime": runtime,
+        "progress_interval_ms": int(progress_interval * 1000),
+        "result_format": result_format,
+        "run_id": run_id,
+    }
+    if cancel:
+        component_data["cancel"] = True
+    if blobs:
+        # The frontend swaps the blob references for the PCM bytes
+        component_data["audio_chunks"] = audio_chunks
+        component_data = encode_binary_payload(component_data, blobs)
+
+    grouped = audio_groups is not None or text_groups is not None
+    state = _resolve_state(_component_func(data=component_data, key=key), "json" if grouped else result_format, batch=True)
+    state = _current_state(state, run_id)
+    if audio_groups is not None:
+        state = _merge_batch(state, lambda batch: merge_audio_batch(pipeline_type, batch, audio_groups), result_format)
+    if text_groups is not None:
+        state = _merge_batch(state, lambda batch: merge_text_batch(pipeline_type, batch, text_groups), result_format)
+    state = _attach_preprocessing(state, preprocessing)
+    _record_timings(collector, state, model_name, pipeline_type, preprocessing=preprocessing)
+    return state
+
+def preload_models_v2(
+    models: Sequence[Union[Tuple[str, str], dict]],
+    warmup: bool = True,
+    key: Optional[str] = "st_transformers_js_preload_v2",
+    shared_worker: bool = False,
+    model_source: str = "hub",
+    local_model_path: Optional[str] = None,
+    load_options: Optional[dict] = None,
+    runtime: Optional[dict] = None,
+    progress_interval: float = 0.5,
+) -> Optional[dict]:
+    """
+    Load and warm up models in the browser before the first pipeline call (v2 component).
+
+    Mounts a headless component that downloads and initialises each model
+    in turn and, with ``warmup``, runs one dummy input through it. Pipeline
+    components on the same page share its worker, so they start on a loaded
+    model.
+
+    Parameters
+    ----------
+    models : list
+        ``(model_name, pipeline_type)`` tuples, or dicts with ``model_name``,
+        ``pipeline_type`` and optionally ``warmup_input`` and ``config``
+    warmup : bool
+        Run a warm-up input through each model after loading it. Common text
+        tasks have a default input; other tasks are only warmed up if a
+        ``warmup_input`` is given.
+    key : str, optional
+        Unique key for the component instance
+    shared_worker : bool
+        Load the models in the SharedWorker, for pipeline calls made with
+        ``shared_worker=True``
+    model_source : str
+        "hub" or "local", as for ``transformers_js_pipeline_v2``
+    local_model_path : str, optional
+        URL path of the local model mirror
+    load_options : dict, optional
+        Load options for models that don't set their own ``load_options``,
+        as for the pipeline functions. Preloaded models are only reused by
+        pipeline calls with the same options.
+    runtime : dict, optional
+        ONNX Runtime WASM settings, as for the pipeline functions. As the
+        preload usually loads the first model, it usually fixes them.
+    progress_interval : float
+        Minimum seconds between progress updates sent to Python
+
+    Returns
+    -------
+    dict or None
+        The component's state: ``status`` ("loading", "complete" or
+        "error"), ``ready``, and ``models`` with each model's ``status``
+        ("loading", "warming", "ready" or "error"), download ``progress``,
+        ``load_ms``, ``warmup_ms`` and ``error``.
+    """
+    from .helpers import process_model_specs, process_runtime_options
+
+    specs = process_model_specs(models, warmup=warmup, load_options=load_options)
+    runtime = process_runtime_options(runtime)
+    source_args = resolve_model_source(model_source, local_model_path)
+    if progress_interval < 0:
+        raise ValueError("progress_interval must not be negative")
+
+    component_data = {
+        "mode": "preload",
+        "models": specs,
+        # Preloaded models are held, so they are never evicted from the cache
+        "pipeline_cache_size": max(4, len(specs)),
+        "shared_worker": shared_worker,
+        **source_args,
+        "runtime": runtime,
+        "progress_interval_ms": int(progress_interval * 1000),
     }
 
-    return _component_func(data=component_data, key=key)
+    return _resolve_state(_component_func(data=component_data, key=key))
+
+def _cache_action(request: dict, key: Optional[str]):
+    """
+    Mount the headless component to run a browser model cache request.
+    """
+    from .helpers import process_cache_report
+
+    state = _resolve_state(_component_func(data={"mode": "cache", **request}, key=key))
+    if isinstance(state, dict) and state.get("result") is not None:
+        state["result"] = process_cache_report(state["result"])
+    return state
+
+def list_cached_models_v2(
+    key: Optional[str] = "st_transformers_js_cache_v2",
+    persist: bool = False,
+) -> Optional[dict]:
+    """
+    List the models in the browser's model cache (v2 component).
+
+    transformers.js keeps downloaded model files in the browser's Cache
+    Storage, which is shared by every app on the origin. The listing is
+    taken once per mount; use a different ``key`` to take it again.
+
+    Parameters
+    ----------
+    key : str, optional
+        Unique key for the component instance
+    persist : bool
+        Also ask the browser to make the origin's storage persistent, so
+        it isn't cleared under storage pressure
+
+    Returns
+    -------
+    dict or None
+        The component's state: ``status`` ("loading", "complete" or
+        "error") and ``result``, the listing described in
+        ``list_cached_models``
+    """
+    from .helpers import process_cache_request
+
+    return _cache_action(process_cache_request("list", persist=persist), key)
+
+def evict_cached_model_v2(model_name: str, key: Optional[str] = None) -> Optional[dict]:
+    """
+    Delete a model's files from the browser's model cache (v2 component).
+
+    Parameters
+    ----------
+    model_name : str
+        Model to evict, as listed by ``list_cached_models_v2``
+    key : str, optional
+        Unique key for the component instance
+
+    Returns
+    -------
+    dict or None
+        The component's state; ``result`` is the listing after the
+        eviction, plus ``evicted`` and ``freed_bytes``
+    """
+    from .helpers import process_cache_request
+
+    return _cache_action(process_cache_request("evict", model_name=model_name), key)
+
+def set_cache_budget_v2(
+    max_bytes: Optional[int],
+    key: Optional[str] = "st_transformers_js_cache_budget_v2",
+    persist: bool = False,
+) -> Optional[dict]:
+    """
+    Limit the size of the browser's model cache (v2 component).
+
+    The budget is stored in the browser and models are evicted least
+    recently used first until the cache fits. It is enforced again after
+    each model load, keeping the models the worker has loaded.
+
+    Parameters
+    ----------
+    max_bytes : int or None
+        Budget in bytes, or None to remove it
+    key : str, optional
+        Unique key for the component instance
+    persist : bool
+        Also ask the browser to make the origin's storage persistent
+
+    Returns
+    -------
+    dict or None
+        The component's state; ``result`` is the listing after pruning,
+        plus ``evicted`` and ``freed_bytes``
+    """
+    from .helpers import process_cache_request
+
+    return _cache_action(process_cache_request("budget", max_bytes=max_bytes, persist=persist), key)
 
-__all__ = ["transformers_js_pipeline_v2"]
+__all__ = [
+    "transformers_js_pipeline_v2",
+    "transformers_js_pipeline_batch_v2",
+    "preload_models_v2",
+    "list_cached_models_v2",
+    "evict_cached_model_v2",
+    "set_cache_budget_v2",
+]
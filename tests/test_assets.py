@@ -0,0 +1,146 @@
+import gzip
+import importlib.util
+import json
+import os
+import tempfile
+import unittest
+import warnings
+from unittest.mock import patch
+
+import st_transformers_js
+from st_transformers_js import _verify_build
+
+_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts", "build_assets.py")
+_spec = importlib.util.spec_from_file_location("build_assets", _SCRIPT)
+build_assets = importlib.util.module_from_spec(_spec)
+_spec.loader.exec_module(build_assets)
+
+_RUNTIME = "export function createRuntime() {}\n" + "// padding\n" * 200
+_WORKER = "import { createRuntime } from './runtime.js';\n" + "// padding\n" * 200
+_INDEX = (
+    '<script src="streamlit.js" defer></script>\n'
+    "<script>new Worker('worker.js', { type: 'module' });</script>\n"
+    "<!-- not a reference: worker.js -->\n"
+)
+
+
+class TestBuildAssets(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.directory = self._tmp.name
+        for name, content in {
+            "index.html": _INDEX,
+            "streamlit.js": "var Streamlit = {};\n",
+            "runtime.js": _RUNTIME,
+            "worker.js": _WORKER,
+        }.items():
+            with open(os.path.join(self.directory, name), "w", encoding="utf-8") as f:
+                f.write(content)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _read(self, name):
+        with open(os.path.join(self.directory, name), encoding="utf-8") as f:
+            return f.read()
+
+    def test_hash_assets_rewrites_references(self):
+        """
+        Test that hashed names are content-based and quoted references follow them.
+        """
+        renamed = build_assets.hash_assets(self.directory, ["streamlit.js", "runtime.js", "worker.js"])
+
+        self.assertEqual(renamed["runtime.js"], build_assets.hashed_name("runtime.js", _RUNTIME.encode()))
+        self.assertRegex(renamed["worker.js"], r"^worker\.[0-9a-f]{8}\.js$")
+        self.assertFalse(os.path.exists(os.path.join(self.directory, "worker.js")))
+
+        # The worker was hashed after its import was rewritten
+        worker = self._read(renamed["worker.js"])
+        self.assertIn(f"from './{renamed['runtime.js']}'", worker)
+        self.assertEqual(renamed["worker.js"], build_assets.hashed_name("worker.js", worker.encode()))
+
+        index = self._read("index.html")
+        self.assertIn(f'src="{renamed["streamlit.js"]}"', index)
+        self.assertIn(f"new Worker('{renamed['worker.js']}'", index)
+        self.assertIn("not a reference: worker.js", index)
+
+        with self.assertRaises(FileNotFoundError):
+            build_assets.hash_assets(self.directory, ["missing.js"])
+
+    def test_build_compresses_and_writes_manifest(self):
+        """
+        Test that compressible assets get a .gz variant and the manifest records sizes.
+        """
+        manifest, problems = build_assets.build(self.directory, ["runtime.js", "worker.js"], max_total_kb=64)
+        self.assertEqual(problems, [])
+
+        runtime = manifest["files"]["runtime.js"]
+        with open(os.path.join(self.directory, runtime["file"] + ".gz"), "rb") as f:
+            compressed = f.read()
+        self.assertEqual(gzip.decompress(compressed).decode(), _RUNTIME)
+        self.assertEqual((runtime["bytes"], runtime["gzip"], runtime["br"]), (len(_RUNTIME), len(compressed), None))
+
+        # Too small to be worth compressing
+        self.assertIsNone(manifest["files"]["streamlit.js"]["gzip"])
+        self.assertFalse(os.path.exists(os.path.join(self.directory, "streamlit.js.gz")))
+
+        with open(os.path.join(self.directory, build_assets.MANIFEST_NAME), encoding="utf-8") as f:
+            self.assertEqual(json.load(f), manifest)
+
+        # Rebuilding skips the existing variants and the manifest
+        manifest, _ = build_assets.build(self.directory)
+        self.assertEqual(len(manifest["files"]), 4)
+        self.assertIn(runtime["file"], manifest["files"])
+
+    def test_size_budget(self):
+        """
+        Test that assets over the per-file or total gzip budget are reported and fail the build.
+        """
+        sizes = {"a.js": {"bytes": 4096, "gzip": 1024, "br": None}, "b.png": {"bytes": 3072, "gzip": None, "br": None}}
+        self.assertEqual(build_assets.check_budget(sizes, max_total_kb=4, max_file_kb=3), [])
+
+        problems = build_assets.check_budget(sizes, max_total_kb=3.5, max_file_kb=2)
+        self.assertEqual(len(problems), 2)
+        self.assertIn("b.png is 3.0 KB", problems[0])
+        self.assertIn("total 4.0 KB", problems[1])
+
+        with self.assertRaises(SystemExit) as raised:
+            build_assets.main([self.directory, "--max-file-kb", "0.1"])
+        self.assertEqual(raised.exception.code, 1)
+
+    def test_verify_build_follows_manifest(self):
+        """
+        Test that the package's build check finds required files under their hashed names.
+        """
+        build_assets.build(self.directory, ["runtime.js", "worker.js"])
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            self.assertTrue(_verify_build(self.directory, ["index.html", "worker.js", "runtime.js"], "v1"))
+
+        with self.assertWarns(RuntimeWarning):
+            self.assertFalse(_verify_build(self.directory, ["transformers.min.js"], "v1"))
+
+    def test_fragments_share_the_v2_build_check(self):
+        """
+        Test that the fragment API reuses the v2 build check and names the v2 build when it is missing.
+        """
+        names = ("transformers_js_pipeline_v2", "transformers_js_pipeline_fragment_v2")
+        cached = {name: st_transformers_js.__dict__.pop(name, None) for name in names}
+        self.addCleanup(lambda: [
+            st_transformers_js.__dict__.pop(name, None) if value is None else setattr(st_transformers_js, name, value)
+            for name, value in cached.items()
+        ])
+
+        with patch.dict(st_transformers_js._build_ok, clear=True), \
+             patch("st_transformers_js._verify_build", return_value=False) as mock_verify:
+            fragment = st_transformers_js.transformers_js_pipeline_fragment_v2
+            st_transformers_js.transformers_js_pipeline_v2
+            mock_verify.assert_called_once()
+            self.assertEqual(mock_verify.call_args.args[2], "v2")
+            with self.assertRaisesRegex(RuntimeError, "V2 component"):
+                fragment()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,317 @@
+import io
+import struct
+import unittest
+import wave
+from unittest.mock import patch
+
+import numpy as np
+
+from st_transformers_js import audio
+from st_transformers_js import transformers_js_pipeline_v1 as transformers_js_pipeline
+from st_transformers_js import v1 as transformers_v1
+from st_transformers_js import v2 as transformers_v2
+from st_transformers_js.helpers import _get_mime_type_from_magic_numbers, decode_binary_payload
+
+
+def _wav_bytes(samples, sampling_rate=16000, width=2):
+    """Integer PCM WAV from float samples shaped (frames,) or (frames, channels)."""
+    samples = np.asarray(samples, dtype=np.float64)
+    channels = 1 if samples.ndim == 1 else samples.shape[1]
+    if width == 1:
+        data = np.round(samples * 127 + 128).astype(np.uint8).tobytes()
+    elif width == 3:
+        ints = np.round(samples * (2 ** 23 - 1)).astype("<i4").reshape(-1, 1).view(np.uint8)
+        data = ints.reshape(-1, 4)[:, :3].tobytes()
+    else:
+        data = np.round(samples * (2 ** (8 * width - 1) - 1)).astype(f"<i{width}").tobytes()
+    output = io.BytesIO()
+    with wave.open(output, "wb") as f:
+        f.setnchannels(channels)
+        f.setsampwidth(width)
+        f.setframerate(sampling_rate)
+        f.writeframes(data)
+    return output.getvalue()
+
+
+def _float_wav_bytes(samples, sampling_rate=16000, extensible=False):
+    """32-bit float mono WAV, optionally with a WAVE_FORMAT_EXTENSIBLE header."""
+    data = np.asarray(samples, dtype="<f4").tobytes()
+    if extensible:
+        fmt = struct.pack("<HHIIHHHHI", 0xFFFE, 1, sampling_rate, sampling_rate * 4, 4, 32, 22, 32, 4)
+        fmt += struct.pack("<H", 3) + b"\x00\x00\x00\x00\x10\x00\x80\x00\x00\xaa\x00\x38\x9b\x71"
+    else:
+        fmt = struct.pack("<HHIIHH", 3, 1, sampling_rate, sampling_rate * 4, 4, 32)
+    chunks = b"fmt " + struct.pack("<I", len(fmt)) + fmt
+    # An odd-sized chunk before the data is padded to an even size
+    chunks += b"LIST" + struct.pack("<I", 3) + b"abc\x00"
+    chunks += b"data" + struct.pack("<I", len(data)) + data
+    return b"RIFF" + struct.pack("<I", 4 + len(chunks)) + b"WAVE" + chunks
+
+
+def _tone(frequency, seconds, sampling_rate, amplitude=0.5):
+    t = np.arange(int(seconds * sampling_rate)) / sampling_rate
+    return amplitude * np.sin(2 * np.pi * frequency * t)
+
+
+def _amplitude(samples, frequency, sampling_rate):
+    spectrum = np.abs(np.fft.rfft(samples)) * 2 / len(samples)
+    frequencies = np.fft.rfftfreq(len(samples), 1 / sampling_rate)
+    return spectrum[np.argmin(np.abs(frequencies - frequency))]
+
+
+class TestAudioDecoding(unittest.TestCase):
+
+    def setUp(self):
+        audio._processed.clear()
+
+    def test_resolve_audio_options(self):
+        """
+        Test that audio options get defaults, can be turned off and are validated.
+        """
+        self.assertEqual(audio.resolve_audio_options(None), {"sampling_rate": "auto", "chunk_length_s": "auto", "overlap_s": "auto"})
+        self.assertIsNone(audio.resolve_audio_options(False))
+        self.assertIsNone(audio.resolve_audio_options({"chunk_length_s": None})["chunk_length_s"])
+
+        for bad in ({"sampling_rate": 0}, {"chunk_length_s": -1}, {"chunk_length_s": 5, "overlap_s": 5}, {"rate": 1}):
+            with self.subTest(options=bad), self.assertRaises(ValueError):
+                audio.resolve_audio_options(bad)
+        with self.assertRaises(TypeError):
+            audio.resolve_audio_options("16k")
+
+    def test_defaults_per_model_and_task(self):
+        """
+        Test that sampling rate and chunking follow the model, the task and the pipeline config.
+        """
+        options = audio.resolve_audio_options(None)
+        self.assertEqual(audio.sampling_rate_for("Xenova/whisper-tiny.en", options), 16000)
+        self.assertEqual(audio.sampling_rate_for("Xenova/clap-htsat-unfused", options), 48000)
+        self.assertEqual(audio.chunking_for("automatic-speech-recognition", options), (30.0, 5.0))
+        self.assertEqual(audio.chunking_for("audio-classification", {**options, "chunk_length_s": 5}), (5.0, 1.0))
+        self.assertIsNone(audio.chunking_for("automatic-speech-recognition", options, {"chunk_length_s": 30}))
+
+    def test_audio_magic_numbers(self):
+        """
+        Test that common audio containers are recognised by their headers.
+        """
+        self.assertEqual(_get_mime_type_from_magic_numbers(_wav_bytes(np.zeros(4))[:16]), "audio/wav")
+        self.assertEqual(_get_mime_type_from_magic_numbers(b"fLaC\x00\x00\x00\x22"), "audio/flac")
+        self.assertEqual(_get_mime_type_from_magic_numbers(b"OggS\x00\x02"), "audio/ogg")
+        self.assertEqual(_get_mime_type_from_magic_numbers(b"ID3\x04\x00"), "audio/mpeg")
+        self.assertEqual(_get_mime_type_from_magic_numbers(b"\x00\x00\x00\x20ftypM4A \x00"), "audio/mp4")
+
+    def test_decodes_wav_encodings(self):
+        """
+        Test that integer and float WAV encodings decode to the same mono float32 samples.
+        """
+        samples = np.array([0.0, 0.5, -0.5, 0.25, -1.0, 1.0])
+        stereo = np.stack([samples, samples], axis=1)
+        for name, data, tolerance in [
+            ("8-bit", _wav_bytes(samples, width=1), 1 / 64),
+            ("16-bit stereo", _wav_bytes(stereo), 1e-4),
+            ("24-bit", _wav_bytes(samples, width=3), 1e-6),
+            ("32-bit", _wav_bytes(samples, width=4), 1e-6),
+            ("float", _float_wav_bytes(samples), 0),
+            ("extensible float", _float_wav_bytes(samples, extensible=True), 0),
+        ]:
+            with self.subTest(name):
+                decoded, info = audio.decode_audio(data, 16000)
+                self.assertEqual(decoded.dtype, np.float32)
+                np.testing.assert_allclose(decoded, samples, atol=tolerance)
+                self.assertEqual(info["sampling_rate"], 16000)
+
+    def test_resampling_filters_aliases(self):
+        """
+        Test that downsampling keeps in-band tones and removes tones above the new Nyquist rate.
+        """
+        signal = _tone(440, 2, 48000) + _tone(12000, 2, 48000, amplitude=0.3)
+        decoded, info = audio.decode_audio(_wav_bytes(signal, 48000), 16000)
+        self.assertEqual((len(decoded), info["sampling_rate"]), (32000, 48000))
+        self.assertAlmostEqual(_amplitude(decoded, 440, 16000), 0.5, places=2)
+        # 12 kHz would alias to 4 kHz without the low-pass filter
+        self.assertLess(_amplitude(decoded, 4000, 16000), 1e-3)
+
+        upsampled = audio.resample(_tone(440, 1, 8000).astype(np.float32), 8000, 16000)
+        self.assertEqual(len(upsampled), 16000)
+        self.assertAlmostEqual(_amplitude(upsampled, 440, 16000), 0.5, places=2)
+
+    def test_non_wav_needs_soundfile(self):
+        """
+        Test that formats other than WAV point to the soundfile extra when it is missing.
+        """
+        with patch.dict("sys.modules", {"soundfile": None}), self.assertRaises(ImportError) as raised:
+            audio.decode_audio(b"fLaC" + b"\x00" * 40, 16000)
+        self.assertIn("st-transformers-js[audio]", str(raised.exception))
+
+    def test_chunk_bounds(self):
+        """
+        Test that chunks overlap by the given amount and the last one ends at the recording's end.
+        """
+        self.assertEqual(audio.chunk_bounds(25, 1, 10, 2), [[0, 10], [8, 18], [16, 25]])
+        self.assertEqual(audio.chunk_bounds(10, 1, 10, 2), [[0, 10]])
+
+    def test_preprocess_audio_reuses_results(self):
+        """
+        Test that a recording is decoded once per options and non-audio is left alone.
+        """
+        data = _wav_bytes(_tone(440, 3, 16000))
+        pcm, chunks, report = audio.preprocess_audio(data, 16000, (1.0, 0.25))
+        self.assertEqual(len(pcm), 3 * 16000 * 4)
+        self.assertEqual(len(chunks), report["chunks"])
+        self.assertEqual((report["duration_s"], report["mime_type"]), (3.0, audio.PCM_MIME_TYPE))
+
+        with patch.object(audio, "decode_audio") as decode:
+            self.assertEqual(audio.preprocess_audio(data, 16000, (1.0, 0.25))[0], pcm)
+            decode.assert_not_called()
+        self.assertIsNone(audio.preprocess_audio(b"\x89PNG\r\n\x1a\n" + b"\x00" * 8, 16000, None))
+        self.assertIsNone(audio.preprocess_audio_input(data, "m", "image-to-text", audio.resolve_audio_options(None)))
+
+
+class TestAudioMerging(unittest.TestCase):
+
+    def test_merge_transcriptions_by_words(self):
+        """
+        Test that words repeated in the overlap are dropped, tolerating a word cut at the edge.
+        """
+        outputs = [{"text": " the quick brown fox jum"}, {"text": " Brown fox jumps over the"}, {"text": " over the lazy dog."}]
+        merged = audio.merge_transcriptions(outputs, [[0, 10], [8, 18], [16, 25]], 1)
+        self.assertEqual(merged["text"], "the quick brown fox jumps over the lazy dog.")
+
+    def test_merge_transcriptions_by_timestamps(self):
+        """
+        Test that timestamped segments are shifted and each overlap is split between its chunks.
+        """
+        outputs = [
+            {"text": " a b", "chunks": [{"text": " a", "timestamp": [0.0, 4.0]}, {"text": " b", "timestamp": [7.0, 9.5]}]},
+            {"text": " b c", "chunks": [{"text": " b", "timestamp": [0.0, 1.5]}, {"text": " c", "timestamp": [3.0, None]}]},
+        ]
+        merged = audio.merge_transcriptions(outputs, [[0, 10], [8, 18]], 1)
+        self.assertEqual(merged["text"], "a b c")
+        self.assertEqual([chunk["timestamp"] for chunk in merged["chunks"]], [[0.0, 4.0], [7.0, 9.5], [11.0, None]])
+
+    def test_merge_classifications(self):
+        """
+        Test that label scores are averaged over chunks, weighted by chunk length.
+        """
+        outputs = [[{"label": "speech", "score": 0.9}, {"label": "music", "score": 0.1}], [{"label": "music", "score": 0.6}]]
+        merged = audio.merge_classifications(outputs, [[0, 30], [20, 30]])
+        self.assertEqual([item["label"] for item in merged], ["speech", "music"])
+        self.assertAlmostEqual(merged[0]["score"], 0.9 * 0.75)
+        self.assertAlmostEqual(merged[1]["score"], 0.1 * 0.75 + 0.6 * 0.25)
+
+    def test_failed_chunk_fails_recording(self):
+        """
+        Test that an error in any chunk is reported for the whole recording.
+        """
+        batch = {"results": [{"text": "a"}, None], "errors": [None, "out of memory"]}
+        result, error = audio.merge_chunked_result("automatic-speech-recognition", batch, [[0, 2], [1, 3]], 1)
+        self.assertIsNone(result)
+        self.assertEqual(error, "Audio chunk 2 of 2 failed: out of memory")
+
+
+class TestPipelineAudio(unittest.TestCase):
+
+    def setUp(self):
+        audio._processed.clear()
+
+    @patch('st_transformers_js.v1._component_func')
+    def test_v1_sends_pcm_chunks_and_merges(self, mock_component_func):
+        """
+        Test that v1 sends one PCM buffer with chunk offsets and returns the merged transcription.
+        """
+        data = _wav_bytes(_tone(440, 70, 8000), sampling_rate=8000)
+        mock_component_func.return_value = {
+            "result": {"results": [{"text": "one two"}, {"text": "two three"}, {"text": "three four"}], "errors": [None] * 3},
+            "meta": {},
+        }
+
+        value = transformers_js_pipeline(
+            "Xenova/whisper-tiny.en", "automatic-speech-recognition", data, return_metadata=True, metrics=False,
+        )
+        kwargs = mock_component_func.call_args.kwargs
+        self.assertEqual(kwargs["mime_type"], audio.PCM_MIME_TYPE)
+        self.assertEqual(len(kwargs["inputs_bytes"]), 70 * 16000 * 4)
+        self.assertEqual(kwargs["audio_chunks"], [[0, 480000], [400000, 880000], [800000, 1120000]])
+        self.assertEqual(value["result"], {"text": "one two three four"})
+        self.assertEqual(value["meta"]["preprocessing"]["original_sampling_rate"], 8000)
+
+        # A short recording runs as one plain call
+        mock_component_func.return_value = {"result": {"text": "hi"}, "meta": {}}
+        result = transformers_js_pipeline("m", "automatic-speech-recognition", _wav_bytes(np.zeros(1600)), metrics=False)
+        self.assertEqual(result, {"text": "hi"})
+        self.assertIsNone(mock_component_func.call_args.kwargs["audio_chunks"])
+
+        # Turned off, the file is sent as it is
+        transformers_js_pipeline("m", "automatic-speech-recognition", data, audio_options=False, metrics=False)
+        self.assertEqual(mock_component_func.call_args.kwargs["mime_type"], "audio/wav")
+
+    @patch('st_transformers_js.v1._component_func')
+    def test_v1_batch_sends_pcm_once(self, mock_component_func):
+        """
+        Test that a v1 batch sends the recordings' PCM as blobs with per-input chunk bounds.
+        """
+        clip = _wav_bytes(_tone(440, 45, 16000))
+        mock_component_func.return_value = None
+        transformers_v1.transformers_js_pipeline_batch(
+            "m", "automatic-speech-recognition", [clip, "hello"], metrics=False,
+        )
+        kwargs = mock_component_func.call_args.kwargs
+        _, blobs = decode_binary_payload(kwargs["inputs_bytes"])
+        self.assertEqual(kwargs["inputs"], [{"blob": 0}, "hello"])
+        self.assertEqual(kwargs["mime_types"], [audio.PCM_MIME_TYPE, None])
+        self.assertEqual(len(blobs[0]), 45 * 16000 * 4)
+        self.assertGreater(len(kwargs["audio_chunks"][0]), 1)
+        self.assertIsNone(kwargs["audio_chunks"][1])
+
+        # The same audio gives the same run id; other audio does not
+        run_id = kwargs["run_id"]
+        transformers_v1.transformers_js_pipeline_batch(
+            "m", "automatic-speech-recognition", [clip, "hello"], metrics=False,
+        )
+        self.assertEqual(mock_component_func.call_args.kwargs["run_id"], run_id)
+        transformers_v1.transformers_js_pipeline_batch(
+            "m", "automatic-speech-recognition", [_wav_bytes(_tone(220, 45, 16000)), "hello"], metrics=False,
+        )
+        self.assertNotEqual(mock_component_func.call_args.kwargs["run_id"], run_id)
+
+    @patch('st_transformers_js.v2._component_func')
+    def test_v2_batch_regroups_chunks(self, mock_component_func):
+        """
+        Test that a v2 batch sends each recording's PCM once, with its chunks
+        as bounds, and merges the chunk results back per input.
+        """
+        long_clip = _wav_bytes(_tone(440, 15, 16000))
+        short_clip = _wav_bytes(_tone(440, 2, 16000))
+        mock_component_func.return_value = {"status": "processing"}
+        transformers_v2.transformers_js_pipeline_batch_v2(
+            "m", "audio-classification", [long_clip, "https://example.com/a.wav", short_clip], metrics=False,
+        )
+        data, blobs = decode_binary_payload(mock_component_func.call_args.kwargs["data"])
+        self.assertEqual(data["mime_types"], [audio.PCM_MIME_TYPE, None, audio.PCM_MIME_TYPE])
+        self.assertEqual(data["inputs"], [{"blob": 0}, "https://example.com/a.wav", {"blob": 1}])
+        self.assertEqual([len(blob) for blob in blobs], [15 * 16000 * 4, 2 * 16000 * 4])
+        # Blobs are aligned for Float32Array views
+        self.assertTrue(all(offset % 8 == 0 for offset, _ in data["blobs"]))
+        self.assertEqual(len(data["audio_chunks"][0]), 2)
+        self.assertIsNone(data["audio_chunks"][1])
+        self.assertEqual(data["audio_chunks"][2], [[0, 2 * 16000]])
+
+        mock_component_func.return_value = {
+            "status": "complete",
+            "result": [[{"label": "a", "score": 1.0}], [{"label": "b", "score": 1.0}], [{"label": "url", "score": 1.0}], None],
+            "errors": [None, None, None, "bad"],
+            "completed": 4,
+            "total": 4,
+        }
+        state = transformers_v2.transformers_js_pipeline_batch_v2(
+            "m", "audio-classification", [long_clip, "https://example.com/a.wav", short_clip], metrics=False,
+        )
+        # Scores are weighted by chunk length (10 s and 7 s) and cut to the chunks' top_k
+        self.assertEqual(state["result"][0], [{"label": "a", "score": 10 / 17}])
+        self.assertEqual(state["result"][1], [{"label": "url", "score": 1.0}])
+        self.assertEqual(state["errors"], [None, None, "Audio chunk 1 of 1 failed: bad"])
+        self.assertEqual((state["completed"], state["total"]), (3, 3))
+        self.assertEqual(state["preprocessing"]["items"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
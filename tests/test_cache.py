@@ -0,0 +1,144 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from st_transformers_js import transformers_js_pipeline_v1 as transformers_js_pipeline
+from st_transformers_js.cache import ResultCache, make_cache_key
+
+
+class TestCacheKey(unittest.TestCase):
+
+    def test_key_is_stable_and_content_based(self):
+        """
+        Test that equal calls share a key and any differing argument changes it.
+        """
+        key = make_cache_key("m", "text-classification", "hello", {"b": 1, "a": 2})
+        self.assertEqual(key, make_cache_key("m", "text-classification", "hello", {"a": 2, "b": 1}))
+        self.assertNotEqual(key, make_cache_key("m", "text-classification", "hello!", {"a": 2, "b": 1}))
+        self.assertNotEqual(key, make_cache_key("m2", "text-classification", "hello", {"a": 2, "b": 1}))
+        self.assertNotEqual(key, make_cache_key("m", "text-classification", "hello", {}))
+        self.assertEqual(
+            make_cache_key("m", "image-to-text", b"\x00\x01"),
+            make_cache_key("m", "image-to-text", memoryview(b"\x00\x01")),
+        )
+
+
+class TestResultCache(unittest.TestCase):
+
+    def test_lru_eviction(self):
+        """
+        Test that the least recently used entry is evicted from memory.
+        """
+        cache = ResultCache(max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), 3)
+        self.assertEqual((cache.hits, cache.misses), (3, 1))
+
+    def test_ttl_expiry(self):
+        """
+        Test that entries older than the TTL are treated as missing.
+        """
+        cache = ResultCache(ttl=10)
+        with patch("st_transformers_js.cache.time.time", return_value=1000.0):
+            cache.set("a", [1])
+        with patch("st_transformers_js.cache.time.time", return_value=1005.0):
+            self.assertEqual(cache.get("a"), [1])
+        with patch("st_transformers_js.cache.time.time", return_value=1011.0):
+            self.assertIsNone(cache.get("a"))
+
+    def test_disk_tier_and_invalidation(self):
+        """
+        Test that results survive in the disk tier and can be invalidated.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            ResultCache(disk_dir=tmp).set("a", {"label": "POSITIVE"})
+
+            # A fresh instance only has the disk tier to go on
+            cache = ResultCache(disk_dir=tmp)
+            self.assertEqual(cache.get("a"), {"label": "POSITIVE"})
+
+            cache.invalidate("a")
+            self.assertIsNone(ResultCache(disk_dir=tmp).get("a"))
+
+            cache.set("b", 1)
+            cache.clear()
+            self.assertEqual(os.listdir(tmp), [])
+
+    def test_disk_write_failure_warns(self):
+        """
+        Test that a result that can't be written to disk warns and stays in memory.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResultCache(disk_dir=tmp)
+            value = {"label": object()}
+            with self.assertWarns(RuntimeWarning):
+                cache.set("a", value)
+            self.assertIs(cache.get("a"), value)
+            self.assertEqual(os.listdir(tmp), [])
+
+    def test_foreign_disk_files_are_misses(self):
+        """
+        Test that JSON files in the disk tier that aren't cache entries count as misses.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            for key, content in [("list", "[1, 2]"), ("no_value", '{"created": 1}'), ("no_created", '{"value": 1}')]:
+                with open(os.path.join(tmp, f"{key}.json"), "w") as f:
+                    f.write(content)
+            cache = ResultCache(disk_dir=tmp)
+            for key in ("list", "no_value", "no_created"):
+                with self.subTest(key=key):
+                    self.assertIsNone(cache.get(key))
+            self.assertEqual(cache.misses, 3)
+
+    def test_disk_size_cap(self):
+        """
+        Test that the oldest files are removed once the disk tier exceeds its cap.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResultCache(disk_dir=tmp, max_disk_bytes=120)
+            for i, key in enumerate(["a", "b", "c"]):
+                cache.set(key, "x" * 40)
+                os.utime(os.path.join(tmp, f"{key}.json"), (i, i))
+                cache._enforce_disk_budget()
+            self.assertEqual(sorted(os.listdir(tmp)), ["c.json"])
+
+
+class TestPipelineResultCache(unittest.TestCase):
+
+    @patch('st_transformers_js.v1._component_func')
+    def test_cache_hit_skips_component(self, mock_component_func):
+        """
+        Test that a cached result is returned without mounting the component.
+        """
+        cache = ResultCache()
+        mock_component_func.return_value = {"result": [{"label": "POSITIVE"}], "meta": {}}
+
+        first = transformers_js_pipeline("m", "text-classification", "hi", result_cache=cache)
+        second = transformers_js_pipeline("m", "text-classification", "hi", result_cache=cache)
+
+        self.assertEqual(first, [{"label": "POSITIVE"}])
+        self.assertEqual(second, [{"label": "POSITIVE"}])
+        mock_component_func.assert_called_once()
+
+    @patch('st_transformers_js.v1._component_func')
+    def test_errors_are_not_cached(self, mock_component_func):
+        """
+        Test that error results are never stored.
+        """
+        cache = ResultCache()
+        mock_component_func.return_value = {"error": "boom", "meta": {}}
+
+        transformers_js_pipeline("m", "text-classification", "hi", result_cache=cache)
+        transformers_js_pipeline("m", "text-classification", "hi", result_cache=cache)
+
+        self.assertEqual(mock_component_func.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
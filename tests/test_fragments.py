@@ -0,0 +1,117 @@
+import unittest
+from unittest.mock import patch
+
+from streamlit.testing.v1 import AppTest
+
+from st_transformers_js import fragments
+from st_transformers_js.streaming import TokenStream
+
+
+def _fragment_app():
+    import streamlit as st
+    from st_transformers_js.fragments import transformers_js_pipeline_fragment_v2
+
+    st.session_state.setdefault("full_runs", 0)
+    st.session_state.full_runs += 1
+    handle = transformers_js_pipeline_fragment_v2("m", "text-classification", "hi", key="clf", priority="background")
+    st.write(f"{handle.status}|{handle.result}|{handle.done}")
+
+
+class TestPipelineHandle(unittest.TestCase):
+
+    def _handle(self, value):
+        slot = {"value": value, "announced": None, "in_app_run": False}
+        patcher = patch("st_transformers_js.fragments._session_slot", return_value=slot)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return fragments.PipelineHandle("clf")
+
+    def test_states(self):
+        """
+        Test that the handle reads status, progress, result and done from the latest state.
+        """
+        handle = self._handle(None)
+        self.assertEqual((handle.status, handle.progress, handle.result, handle.done), ("pending", None, None, False))
+
+        handle = self._handle({"status": "download", "progress": 40.0, "result": None})
+        self.assertEqual((handle.status, handle.progress, handle.done), ("download", 0.4, False))
+
+        handle = self._handle({"status": "processing", "completed": 3, "total": 4})
+        self.assertEqual(handle.progress, 0.75)
+
+        # A failed download being retried is not done
+        handle = self._handle({"status": "error", "message": "Retrying in 2s..."})
+        self.assertFalse(handle.done)
+
+        handle = self._handle({"status": "complete", "result": [{"label": "POSITIVE"}]})
+        self.assertEqual((handle.result, handle.done), ([{"label": "POSITIVE"}], True))
+
+    def test_stream_value(self):
+        """
+        Test that a streamed run's handle reads the stream and its state.
+        """
+        stream = TokenStream.from_value("streaming", partial={"text": "Once", "tokens": 1}, meta={"status": "streaming"})
+        handle = self._handle(stream)
+        self.assertEqual((handle.status, handle.state, handle.result, handle.done), (
+            "streaming", {"status": "streaming"}, None, False,
+        ))
+
+
+class TestPipelineFragment(unittest.TestCase):
+
+    @patch("st_transformers_js.v2._component_func")
+    def test_fragment_run(self, mock_component_func):
+        """
+        Test that the pipeline runs in the fragment and a result seen on a full run doesn't rerun the script.
+        """
+        mock_component_func.return_value = None
+        app = AppTest.from_function(_fragment_app)
+        app.run()
+        self.assertFalse(app.exception)
+        self.assertEqual(app.markdown[-1].value, "pending|None|False")
+        data = mock_component_func.call_args.kwargs["data"]
+        self.assertEqual((mock_component_func.call_args.kwargs["key"], data["priority"]), ("clf", "background"))
+
+        mock_component_func.return_value = {"sync": {"session": "s", "seq": 1, "state": {
+            "status": "complete", "result": [{"label": "POSITIVE"}], "run_id": data["run_id"],
+        }}}
+        app.run()
+        self.assertFalse(app.exception)
+        self.assertEqual(app.markdown[-1].value, "complete|[{'label': 'POSITIVE'}]|True")
+        self.assertEqual(app.session_state.full_runs, 2)
+
+    @patch("streamlit.rerun")
+    @patch("streamlit.fragment")
+    @patch("st_transformers_js.v2._component_func")
+    def test_fragment_rerun_reruns_app_once_done(self, mock_component_func, mock_fragment, mock_rerun):
+        """
+        Test that a run finishing in a fragment rerun reruns the whole script once.
+        """
+        slot = {"value": None, "announced": None, "in_app_run": False}
+        fragment_runs = []
+        mock_fragment.side_effect = lambda func: fragment_runs.append(func) or func
+        mock_component_func.return_value = None
+        with patch("st_transformers_js.fragments._session_slot", return_value=slot):
+            handle = fragments.transformers_js_pipeline_fragment_v2(
+                "m", "text-classification", "hi", key="clf", render=lambda handle: None,
+            )
+            run_id = mock_component_func.call_args.kwargs["data"]["run_id"]
+            mock_component_func.return_value = {"sync": {"session": "f", "seq": 1, "state": {
+                "status": "complete", "result": [{"label": "POSITIVE"}], "run_id": run_id,
+            }}}
+            # Progress updates rerun only the fragment
+            fragment_runs[0]()
+            fragment_runs[0]()
+            self.assertTrue(handle.done)
+        mock_rerun.assert_called_once_with(scope="app")
+
+    def test_key_required(self):
+        """
+        Test that the handle needs a key to find its state.
+        """
+        with self.assertRaises(ValueError):
+            fragments.transformers_js_pipeline_fragment_v2("m", "text-classification", "hi", key="")
+
+
+if __name__ == "__main__":
+    unittest.main()
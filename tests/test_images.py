@@ -0,0 +1,176 @@
+import io
+import unittest
+from unittest.mock import patch
+
+from PIL import Image
+
+from st_transformers_js import transformers_js_pipeline_v1 as transformers_js_pipeline
+from st_transformers_js import images
+from st_transformers_js import v2 as transformers_v2
+
+
+def _image_bytes(size=(64, 48), mode="RGB", fmt="JPEG", orientation=None, color=(200, 30, 30)):
+    image = Image.new(mode, size, color)
+    output = io.BytesIO()
+    kwargs = {}
+    if orientation is not None:
+        exif = Image.Exif()
+        exif[0x0112] = orientation
+        kwargs["exif"] = exif
+    image.save(output, fmt, **kwargs)
+    return output.getvalue()
+
+
+class TestImagePreprocessing(unittest.TestCase):
+
+    def setUp(self):
+        images._processed.clear()
+
+    def test_resolve_image_options(self):
+        """
+        Test that the argument maps to options with defaults and bad options are rejected.
+        """
+        self.assertIsNone(images.resolve_image_options(None))
+        self.assertIsNone(images.resolve_image_options(False))
+        self.assertEqual(images.resolve_image_options(True), {"max_side": "auto", "format": "jpeg", "quality": 90})
+        self.assertEqual(images.resolve_image_options({"format": "webp"})["format"], "webp")
+
+        for bad in ({"max_side": 0}, {"max_side": True}, {"format": "gif"}, {"quality": 101}, {"size": 10}):
+            with self.subTest(options=bad), self.assertRaises(ValueError):
+                images.resolve_image_options(bad)
+        with self.assertRaises(TypeError):
+            images.resolve_image_options("jpeg")
+
+    def test_max_side_for(self):
+        """
+        Test that an explicit max_side wins over model and task defaults.
+        """
+        options = images.resolve_image_options(True)
+        self.assertEqual(images.max_side_for("m", "image-classification", options), 512)
+        self.assertIsNone(images.max_side_for("m", "image-to-image", options))
+        with patch.dict(images.MODEL_MAX_SIDES, {"m": 224}):
+            self.assertEqual(images.max_side_for("m", "image-classification", options), 224)
+        self.assertEqual(images.max_side_for("m", "image-classification", {**options, "max_side": 100}), 100)
+
+    def test_resizes_rotates_and_flattens(self):
+        """
+        Test that a large rotated RGBA image is turned upright, flattened to RGB and downscaled.
+        """
+        data = _image_bytes(size=(2000, 1000), mode="RGBA", fmt="PNG", color=(0, 0, 255, 0))
+        encoded, report = images.preprocess_image(data, 500, images.resolve_image_options(True))
+        with Image.open(io.BytesIO(encoded)) as image:
+            self.assertEqual((image.format, image.mode, image.size), ("JPEG", "RGB", (500, 250)))
+            # Transparent pixels become white, not black
+            self.assertGreater(min(image.getpixel((250, 125))), 240)
+        self.assertEqual(report["original_size"], [2000, 1000])
+        self.assertEqual(report["saved_bytes"], len(data) - len(encoded))
+        self.assertEqual(report["mime_type"], "image/jpeg")
+        self.assertTrue(report["reencoded"])
+
+        # EXIF orientation 6 means the stored pixels are rotated 90 degrees
+        data = _image_bytes(size=(80, 40), orientation=6)
+        encoded, report = images.preprocess_image(data, None, images.resolve_image_options(True))
+        self.assertEqual(report["size"], [40, 80])
+        self.assertTrue(report["reencoded"])
+
+    def test_keeps_small_images_and_skips_non_images(self):
+        """
+        Test that an image needing no changes is kept unless re-encoding is smaller, and non-images pass through.
+        """
+        data = _image_bytes(size=(16, 16), fmt="PNG")
+        options = images.resolve_image_options({"format": "png"})
+        encoded, report = images.preprocess_image(data, 512, options)
+        self.assertLessEqual(len(encoded), len(data))
+        if not report["reencoded"]:
+            self.assertEqual((encoded, report["mime_type"]), (data, "image/png"))
+
+        self.assertIsNone(images.preprocess_image(b"not an image", 512, options))
+        self.assertEqual(images.preprocess_image_input("a photo", "m", "image-classification", options), ("a photo", None))
+        self.assertEqual(images.preprocess_image_input(data, "m", "image-classification", None), (data, None))
+
+        # A plain file object is read once and passed on as bytes
+        buffered = io.BufferedReader(io.BytesIO(b"not an image"))
+        self.assertEqual(images.preprocess_image_input(buffered, "m", "image-classification", options), (b"not an image", None))
+
+    def test_decompression_bomb_is_a_clear_error(self):
+        """
+        Test that an image over Pillow's pixel limit raises a ValueError naming the way out.
+        """
+        data = _image_bytes(size=(64, 48), fmt="PNG")
+        options = images.resolve_image_options(True)
+        with patch.object(Image, "MAX_IMAGE_PIXELS", 100):
+            with self.assertRaisesRegex(ValueError, "image_preprocessing=False"):
+                images.preprocess_image_input(data, "m", "image-classification", options)
+
+    def test_reruns_reuse_results(self):
+        """
+        Test that preprocessing the same image again reuses the earlier result.
+        """
+        data = _image_bytes(size=(1000, 1000))
+        options = images.resolve_image_options(True)
+        first = images.preprocess_image(data, 256, options)
+        with patch.object(images, "_preprocess") as preprocess:
+            self.assertIs(images.preprocess_image(data, 256, options), first)
+            preprocess.assert_not_called()
+            images.preprocess_image(data, 128, options)
+            preprocess.assert_called_once()
+
+    def test_batch_summary(self):
+        """
+        Test that a batch's reports are totalled over its images only.
+        """
+        options = images.resolve_image_options(True)
+        inputs = [_image_bytes(size=(1200, 900)), "text", _image_bytes(size=(900, 1200))]
+        processed, summary = images.preprocess_batch_inputs(inputs, "m", "image-classification", options)
+        self.assertEqual(processed[1], "text")
+        self.assertEqual(summary["images"], 2)
+        self.assertEqual(summary["saved_bytes"], sum(len(i) for i in (inputs[0], inputs[2])) - summary["bytes"])
+        self.assertIsNone(images.summarize_reports([None]))
+
+
+class TestPipelineImagePreprocessing(unittest.TestCase):
+
+    def setUp(self):
+        images._processed.clear()
+
+    @patch('st_transformers_js.v1._component_func')
+    def test_v1_sends_preprocessed_image(self, mock_component_func):
+        """
+        Test that v1 sends the re-encoded image and reports the savings in meta.
+        """
+        data = _image_bytes(size=(1600, 1200), fmt="PNG")
+        mock_component_func.return_value = {"result": [{"label": "cat"}], "meta": {}}
+
+        value = transformers_js_pipeline(
+            "m", "image-classification", data, transport="binary",
+            image_preprocessing=True, return_metadata=True, metrics=False,
+        )
+        kwargs = mock_component_func.call_args.kwargs
+        self.assertEqual(kwargs["mime_type"], "image/jpeg")
+        with Image.open(io.BytesIO(kwargs["inputs_bytes"])) as image:
+            self.assertEqual(image.size, (512, 384))
+        report = value["meta"]["preprocessing"]
+        self.assertEqual((report["original_bytes"], report["bytes"]), (len(data), len(kwargs["inputs_bytes"])))
+
+        # Off by default
+        transformers_js_pipeline("m", "image-classification", data, transport="binary", metrics=False)
+        self.assertEqual(mock_component_func.call_args.kwargs["inputs_bytes"], data)
+
+    @patch('st_transformers_js.v2._component_func')
+    def test_v2_batch_reports_savings(self, mock_component_func):
+        """
+        Test that the v2 batch state carries the totals of the preprocessed images.
+        """
+        mock_component_func.return_value = {"status": "processing"}
+        inputs = [_image_bytes(size=(1600, 1200)), _image_bytes(size=(800, 600))]
+
+        state = transformers_v2.transformers_js_pipeline_batch_v2(
+            "m", "image-classification", inputs, image_preprocessing={"max_side": 256}, metrics=False,
+        )
+        self.assertEqual(state["status"], "processing")
+        self.assertEqual(state["preprocessing"]["images"], 2)
+        self.assertEqual(mock_component_func.call_args.kwargs["data"]["mime_types"], ["image/jpeg", "image/jpeg"])
+
+
+if __name__ == "__main__":
+    unittest.main()
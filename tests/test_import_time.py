@@ -0,0 +1,71 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+# Seconds; override with ST_TRANSFORMERS_JS_IMPORT_BUDGET on slow machines
+IMPORT_BUDGET = float(os.environ.get("ST_TRANSFORMERS_JS_IMPORT_BUDGET", "0.15"))
+
+_IMPORT_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import st_transformers_js
+elapsed = time.perf_counter() - started
+print(json.dumps({
+    "elapsed": elapsed,
+    "modules": sorted(m for m in sys.modules if m.split(".")[0] in ("streamlit", "st_transformers_js")),
+}))
+"""
+
+
+def _measure_import():
+    """Import the package in a fresh interpreter and report time and loaded modules."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    output = subprocess.run(
+        [sys.executable, "-c", _IMPORT_SCRIPT],
+        cwd=root,
+        capture_output=True,
+        check=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+class TestImportTime(unittest.TestCase):
+
+    def test_import_does_not_load_streamlit(self):
+        """
+        Test that importing the package leaves the component modules and Streamlit unloaded.
+        """
+        modules = _measure_import()["modules"]
+        self.assertEqual(modules, ["st_transformers_js", "st_transformers_js.cache"])
+
+    def test_import_time_budget(self):
+        """
+        Test that the best of three cold imports stays within the budget.
+        """
+        best = min(_measure_import()["elapsed"] for _ in range(3))
+        self.assertLess(
+            best,
+            IMPORT_BUDGET,
+            f"Importing st_transformers_js took {best * 1000:.1f} ms "
+            f"(budget {IMPORT_BUDGET * 1000:.0f} ms)",
+        )
+
+    def test_exports_resolve_on_first_access(self):
+        """
+        Test that public names resolve lazily to the component functions.
+        """
+        import st_transformers_js
+
+        self.assertIn("transformers_js_pipeline_v2", dir(st_transformers_js))
+        self.assertEqual(st_transformers_js.transformers_js_pipeline.__module__, "st_transformers_js.v1")
+        self.assertIs(st_transformers_js.transformers_js_pipeline_v1, st_transformers_js.transformers_js_pipeline)
+        self.assertEqual(st_transformers_js.preload_models_v2.__module__, "st_transformers_js.v2")
+        with self.assertRaises(AttributeError):
+            st_transformers_js.not_a_function
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+import logging
+import unittest
+from unittest.mock import patch
+
+from st_transformers_js import transformers_js_pipeline_v1 as transformers_js_pipeline
+from st_transformers_js import v2 as transformers_v2
+from st_transformers_js.metrics import MetricsCollector, logging_exporter, resolve_metrics, stage_durations
+
+
+def _timings(run_id, inference=(2.0, 12.0), cache_hit=False):
+    return {
+        "run_id": run_id,
+        "started_at": 1_000_000.0,
+        "stages": {"load": [0.0, 2.0], "inference": list(inference), "encode": [12.0, 13.0]},
+        "pipeline_cache_hit": cache_hit,
+        "input_bytes": 5,
+        "output_bytes": 0,
+        "total_ms": 13.5,
+        "sent_at": 1_000_013.5,
+    }
+
+
+class TestMetricsCollector(unittest.TestCase):
+
+    def test_stage_durations(self):
+        """
+        Test that stage marks become durations and malformed stages are skipped.
+        """
+        durations = stage_durations({"stages": {"load": [1.0, 4.5], "bad": [1.0], "inference": [4.5, 4.0]}})
+        self.assertEqual(durations, {"load": 3.5, "inference": 0.0})
+
+    def test_record_and_summary(self):
+        """
+        Test that samples are aggregated per model into stage percentiles and counts.
+        """
+        collector = MetricsCollector()
+        for i in range(1, 101):
+            collector.record(
+                _timings(f"run-{i}", inference=(2.0, 2.0 + i), cache_hit=i > 1),
+                "m", "text-classification", received_at=1_000_020.0,
+            )
+        collector.record(_timings("other"), "m2", "image-to-text", status="error")
+
+        summaries = {s["model_name"]: s for s in collector.summary(percentiles=(50, 99))}
+        summary = summaries["m"]
+        self.assertEqual((summary["runs"], summary["errors"], summary["pipeline_cache_hits"]), (100, 0, 99))
+        self.assertEqual(list(summary["stages"]), ["load", "inference", "encode", "streamlit", "total"])
+        self.assertAlmostEqual(summary["stages"]["inference"]["p50"], 50.5)
+        self.assertAlmostEqual(summary["stages"]["inference"]["p99"], 99.01)
+        self.assertAlmostEqual(summary["stages"]["streamlit"]["p50"], 6.5)
+        self.assertEqual(summaries["m2"]["errors"], 1)
+
+    def test_reruns_recorded_once_and_window_bounded(self):
+        """
+        Test that a run seen again on a rerun is skipped and old samples leave the window.
+        """
+        collector = MetricsCollector(window=2)
+        self.assertIsNotNone(collector.record(_timings("a"), "m", "t"))
+        self.assertIsNone(collector.record(_timings("a"), "m", "t"))
+        collector.record(_timings("b"), "m", "t")
+        collector.record(_timings("c"), "m", "t")
+
+        summary = collector.summary()[0]
+        self.assertEqual((summary["runs"], summary["samples"]), (3, 2))
+        collector.reset()
+        self.assertEqual(collector.summary(), [])
+
+        with self.assertRaises(ValueError):
+            MetricsCollector(window=0)
+
+    def test_exporters(self):
+        """
+        Test that exporters receive each sample and a failing exporter only warns.
+        """
+        received = []
+
+        def failing(sample):
+            raise RuntimeError("down")
+
+        collector = MetricsCollector(exporters=[received.append, failing])
+        with self.assertWarns(RuntimeWarning):
+            sample = collector.record(_timings("a"), "m", "t", component="v1")
+        self.assertEqual(received, [sample])
+        self.assertEqual(sample["component"], "v1")
+        self.assertEqual(sample["stages"]["inference"], 10.0)
+
+        collector.remove_exporter(failing)
+        logger = logging.getLogger("test_metrics")
+        collector.add_exporter(logging_exporter(logger))
+        with self.assertLogs(logger, level="INFO") as logs:
+            collector.record(_timings("b"), "m", "text-classification")
+        self.assertIn("text-classification m complete total=13.5ms", logs.output[0])
+        self.assertIn("inference=10.0ms", logs.output[0])
+
+    def test_resolve_metrics(self):
+        """
+        Test that the metrics argument maps to the default collector, a given one, or none.
+        """
+        from st_transformers_js.metrics import default_metrics
+
+        collector = MetricsCollector()
+        self.assertIs(resolve_metrics(True), default_metrics)
+        self.assertIs(resolve_metrics(collector), collector)
+        self.assertIsNone(resolve_metrics(False))
+        with self.assertRaises(TypeError):
+            resolve_metrics("yes")
+
+
+class TestPipelineMetrics(unittest.TestCase):
+
+    @patch('st_transformers_js.v1._component_func')
+    def test_v1_records_result_timings(self, mock_component_func):
+        """
+        Test that v1 records the timings in the result envelope once per run.
+        """
+        collector = MetricsCollector()
+        mock_component_func.return_value = {"result": [1], "meta": {"timings": _timings("v1-run")}}
+
+        for _ in range(2):
+            result = transformers_js_pipeline("m", "text-classification", "hi", metrics=collector)
+        self.assertEqual(result, [1])
+
+        summary = collector.summary()[0]
+        self.assertEqual((summary["model_name"], summary["runs"]), ("m", 1))
+
+        transformers_js_pipeline("m", "text-classification", "hi", metrics=False)
+        with self.assertRaises(TypeError):
+            transformers_js_pipeline("m", "text-classification", "hi", metrics="yes")
+
+    @patch('st_transformers_js.v2._component_func')
+    def test_v2_records_state_timings(self, mock_component_func):
+        """
+        Test that v2 records the timings of a finished run from the component state.
+        """
+        collector = MetricsCollector()
+        mock_component_func.return_value = {"status": "loading"}
+        transformers_v2.transformers_js_pipeline_v2("m", "text-classification", "hi", metrics=collector)
+        self.assertEqual(collector.summary(), [])
+
+        mock_component_func.return_value = {"status": "error", "error": "boom", "timings": _timings("v2-run")}
+        transformers_v2.transformers_js_pipeline_v2("m", "text-classification", "hi", metrics=collector)
+        summary = collector.summary()[0]
+        self.assertEqual((summary["runs"], summary["errors"]), (1, 1))
+
+
+if __name__ == "__main__":
+    unittest.main()
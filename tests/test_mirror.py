@@ -0,0 +1,168 @@
+import hashlib
+import http.server
+import json
+import os
+import tempfile
+import threading
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO
+
+from st_transformers_js.__main__ import main
+from st_transformers_js.mirror import (
+    prefetch_model,
+    read_manifest,
+    resolve_model_source,
+    verify_mirror,
+)
+
+MODEL = "Xenova/tiny-model"
+FILES = {
+    "config.json": b'{"model_type": "bert"}',
+    "tokenizer.json": b'{"version": "1.0"}',
+    "onnx/model.onnx": b"full precision weights",
+    "onnx/model_quantized.onnx": b"quantized weights",
+    "README.md": b"# tiny model",
+}
+
+
+class _HubHandler(http.server.BaseHTTPRequestHandler):
+    """Serves the hub endpoints prefetch uses: the file listing and file downloads."""
+
+    requests = []
+
+    def do_GET(self):
+        type(self).requests.append(self.path)
+        if self.path == f"/api/models/{MODEL}/revision/main":
+            body = json.dumps({
+                "sha": "abc123",
+                "siblings": [{"rfilename": name} for name in FILES],
+            }).encode()
+        elif self.path.startswith(f"/{MODEL}/resolve/abc123/"):
+            body = FILES.get(self.path[len(f"/{MODEL}/resolve/abc123/"):])
+        else:
+            body = None
+
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestPrefetch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _HubHandler)
+        cls.endpoint = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        _HubHandler.requests = []
+        self.tmp = tempfile.TemporaryDirectory()
+        self.mirror_dir = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_prefetch_writes_files_and_manifest(self):
+        """
+        Test that default patterns select config, tokenizer and quantized weights.
+        """
+        entry = prefetch_model(MODEL, mirror_dir=self.mirror_dir, endpoint=self.endpoint)
+
+        paths = [f["path"] for f in entry["files"]]
+        self.assertEqual(paths, ["config.json", "onnx/model_quantized.onnx", "tokenizer.json"])
+        self.assertEqual(entry["commit"], "abc123")
+        for f in entry["files"]:
+            with open(os.path.join(self.mirror_dir, "Xenova", "tiny-model", *f["path"].split("/")), "rb") as fh:
+                data = fh.read()
+            self.assertEqual(data, FILES[f["path"]])
+            self.assertEqual(f["size"], len(data))
+            self.assertEqual(f["sha256"], hashlib.sha256(data).hexdigest())
+
+        self.assertEqual(read_manifest(self.mirror_dir)["models"][MODEL], entry)
+        self.assertEqual(verify_mirror(self.mirror_dir), [])
+
+    def test_prefetch_skips_unchanged_files(self):
+        """
+        Test that a second prefetch only lists files and downloads nothing.
+        """
+        prefetch_model(MODEL, mirror_dir=self.mirror_dir, endpoint=self.endpoint)
+        _HubHandler.requests = []
+        prefetch_model(MODEL, mirror_dir=self.mirror_dir, endpoint=self.endpoint)
+        self.assertEqual(_HubHandler.requests, [f"/api/models/{MODEL}/revision/main"])
+
+    def test_verify_detects_modified_files(self):
+        """
+        Test that verify reports files that no longer match the manifest.
+        """
+        prefetch_model(MODEL, mirror_dir=self.mirror_dir, endpoint=self.endpoint, include=["*.json"])
+        with open(os.path.join(self.mirror_dir, "Xenova", "tiny-model", "config.json"), "wb") as f:
+            f.write(b"{}")
+        os.remove(os.path.join(self.mirror_dir, "Xenova", "tiny-model", "tokenizer.json"))
+
+        self.assertEqual(
+            verify_mirror(self.mirror_dir),
+            [f"{MODEL}/config.json: hash mismatch", f"{MODEL}/tokenizer.json: missing"],
+        )
+        self.assertEqual(verify_mirror(self.mirror_dir, ["other/model"]), ["other/model: not in manifest"])
+
+    def test_cli(self):
+        """
+        Test the prefetch and verify commands, including a failing model.
+        """
+        out, err = StringIO(), StringIO()
+        with redirect_stdout(out), redirect_stderr(err):
+            status = main([
+                "prefetch", MODEL, "missing/model",
+                "--mirror-dir", self.mirror_dir,
+                "--endpoint", self.endpoint,
+                "--all-files",
+                "--quiet",
+            ])
+        self.assertEqual(status, 1)
+        self.assertIn(f"{MODEL}@abc123: 5 files", out.getvalue())
+        self.assertIn("HTTP 404", err.getvalue())
+
+        with redirect_stdout(StringIO()):
+            self.assertEqual(main(["verify", "--mirror-dir", self.mirror_dir]), 0)
+
+    def test_rejects_unsafe_model_names(self):
+        """
+        Test that model names cannot escape the mirror directory.
+        """
+        with self.assertRaises(ValueError):
+            prefetch_model("../outside", mirror_dir=self.mirror_dir, endpoint=self.endpoint)
+
+
+class TestModelSource(unittest.TestCase):
+
+    def test_resolve_model_source(self):
+        """
+        Test the component arguments for each model source.
+        """
+        self.assertEqual(resolve_model_source("hub"), {"model_source": "hub", "local_model_path": None})
+        self.assertEqual(
+            resolve_model_source("local", "/mirror"),
+            {"model_source": "local", "local_model_path": "/mirror/"},
+        )
+        with self.assertRaises(ValueError):
+            resolve_model_source("s3")
+
+
+if __name__ == "__main__":
+    unittest.main()
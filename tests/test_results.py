@@ -0,0 +1,141 @@
+import base64
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+from st_transformers_js import transformers_js_pipeline_v1 as transformers_js_pipeline
+from st_transformers_js import transformers_js_pipeline_batch
+from st_transformers_js.cache import ResultCache
+from st_transformers_js.helpers import encode_binary_payload
+from st_transformers_js.results import check_result_format, decode_result
+
+EMBEDDING = np.arange(6, dtype="<f4").reshape(2, 3)
+ENTITIES = [
+    {"entity": "B-PER", "score": 0.99, "word": "Ada"},
+    {"entity": "B-LOC", "score": 0.97, "word": "London"},
+]
+
+
+def _tensor_payload(envelope, arrays):
+    """Build a result payload like the v1 frontend's encodeResultPayload."""
+    return encode_binary_payload(envelope, [a.tobytes() for a in arrays])
+
+
+class TestDecodeResult(unittest.TestCase):
+
+    def test_base64_tensor_to_numpy(self):
+        """
+        Test that base64 tensor descriptors decode to arrays of the right dtype and shape.
+        """
+        descriptor = {
+            "__tensor__": True,
+            "dtype": "float32",
+            "shape": [2, 3],
+            "b64": base64.b64encode(EMBEDDING.tobytes()).decode("ascii"),
+        }
+        result = decode_result({"embedding": descriptor, "label": "x"}, "numpy")
+        np.testing.assert_array_equal(result["embedding"], EMBEDDING)
+        self.assertEqual(result["embedding"].dtype, np.float32)
+        self.assertEqual(result["label"], "x")
+
+    def test_records_to_tables(self):
+        """
+        Test that list-of-dict outputs become an Arrow table or DataFrame.
+        """
+        table = decode_result(ENTITIES, "arrow")
+        self.assertEqual(table.num_rows, 2)
+        self.assertEqual(table.column("word").to_pylist(), ["Ada", "London"])
+
+        frame = decode_result(ENTITIES, "pandas")
+        self.assertEqual(list(frame["entity"]), ["B-PER", "B-LOC"])
+
+        self.assertEqual(decode_result(ENTITIES, "numpy"), ENTITIES)
+        self.assertEqual(decode_result(ENTITIES, "json"), ENTITIES)
+
+        frames = decode_result([ENTITIES, None], "pandas", batch=True)
+        self.assertEqual(len(frames[0]), 2)
+        self.assertIsNone(frames[1])
+
+    def test_check_result_format(self):
+        """
+        Test that unknown formats and missing libraries are reported up front.
+        """
+        with self.assertRaises(ValueError):
+            check_result_format("msgpack")
+        with patch.dict("sys.modules", {"pyarrow": None}):
+            with self.assertRaises(ImportError):
+                check_result_format("arrow")
+            check_result_format("pandas")
+
+
+class TestV1TypedResults(unittest.TestCase):
+
+    @patch("st_transformers_js.v1._component_func")
+    def test_binary_payload_decoded_without_copy(self, mock_component_func):
+        """
+        Test that a binary result payload becomes a numpy view of the payload.
+        """
+        envelope = {
+            "result": {"__tensor__": True, "dtype": "float32", "shape": [2, 3], "blob": 0},
+            "meta": {"pipeline_cache_hit": False},
+        }
+        mock_component_func.return_value = _tensor_payload(envelope, [EMBEDDING])
+
+        result = transformers_js_pipeline(
+            "m", "feature-extraction", "hello", result_format="numpy"
+        )
+        np.testing.assert_array_equal(result, EMBEDDING)
+        self.assertFalse(result.flags.writeable)
+        self.assertEqual(mock_component_func.call_args.kwargs.get("result_format"), "numpy")
+
+        result = transformers_js_pipeline(
+            "m", "feature-extraction", "hello", result_format="numpy", return_metadata=True
+        )
+        self.assertEqual(result["meta"], {"pipeline_cache_hit": False})
+        self.assertNotIn("blobs", result)
+
+    @patch("st_transformers_js.v1._component_func")
+    def test_batch_results_decoded_per_item(self, mock_component_func):
+        """
+        Test that each batch item's output is decoded and errors are kept.
+        """
+        envelope = {
+            "result": {
+                "results": [ENTITIES, None],
+                "errors": [None, "bad input"],
+                "completed": 2,
+                "total": 2,
+            },
+            "meta": {},
+        }
+        mock_component_func.return_value = _tensor_payload(envelope, [])
+
+        result = transformers_js_pipeline_batch(
+            "m", "token-classification", ["a", "b"], result_format="pandas"
+        )
+        self.assertEqual(list(result["results"][0]["word"]), ["Ada", "London"])
+        self.assertEqual(result["errors"], [None, "bad input"])
+
+    @patch("st_transformers_js.v1._component_func")
+    def test_typed_results_cached_in_memory_only(self, mock_component_func):
+        """
+        Test that numpy results are cached in memory and not written to the disk tier.
+        """
+        envelope = {"result": {"__tensor__": True, "dtype": "float32", "shape": [2, 3], "blob": 0}, "meta": {}}
+        mock_component_func.return_value = _tensor_payload(envelope, [EMBEDDING])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ResultCache(disk_dir=tmp)
+            with patch.object(cache, "_write_disk") as mock_write_disk:
+                transformers_js_pipeline("m", "feature-extraction", "hello", result_format="numpy", result_cache=cache)
+                result = transformers_js_pipeline("m", "feature-extraction", "hello", result_format="numpy", result_cache=cache)
+
+            np.testing.assert_array_equal(result, EMBEDDING)
+            self.assertEqual(mock_component_func.call_count, 1)
+            mock_write_disk.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import unittest
+from unittest.mock import patch
+
+from st_transformers_js import transformers_js_pipeline_v1 as transformers_js_pipeline
+from st_transformers_js import streaming
+from st_transformers_js import v2 as transformers_v2
+from st_transformers_js.cache import ResultCache
+
+
+class TestStreamOptions(unittest.TestCase):
+
+    def test_resolve_stream_options(self):
+        """
+        Test that the argument maps to options with defaults and bad options or tasks are rejected.
+        """
+        self.assertIsNone(streaming.resolve_stream_options(None, "text-classification"))
+        self.assertIsNone(streaming.resolve_stream_options(False, "text-generation"))
+        self.assertEqual(streaming.resolve_stream_options(True, "summarization"), {"interval": 0.25})
+        self.assertEqual(streaming.resolve_stream_options({"interval": 0}, "image-to-text"), {"interval": 0})
+        self.assertEqual(streaming.stream_request({"interval": 0.1}), {"interval_ms": 100})
+
+        for bad in ({"interval": -1}, {"interval": True}, {"rate": 1}):
+            with self.subTest(options=bad), self.assertRaises(ValueError):
+                streaming.resolve_stream_options(bad, "text-generation")
+        with self.assertRaises(ValueError):
+            streaming.resolve_stream_options(True, "text-classification")
+        with self.assertRaises(TypeError):
+            streaming.resolve_stream_options("fast", "text-generation")
+
+    def test_token_stream(self):
+        """
+        Test that a snapshot iterates as its text, so st.write_stream can consume it.
+        """
+        partial = streaming.TokenStream.from_value("streaming", partial={"text": "Hello", "tokens": 2})
+        self.assertEqual((list(partial), str(partial), partial.tokens, partial.done), (["Hello"], "Hello", 2, False))
+        self.assertEqual(list(streaming.TokenStream("pending")), [])
+
+        final = streaming.TokenStream.from_value("complete", result=[{"summary_text": "Short."}])
+        self.assertEqual((final.text, final.done), ("Short.", True))
+        self.assertEqual(streaming.result_text([{"translation_text": "Bonjour"}]), "Bonjour")
+        self.assertIsNone(streaming.result_text([{"score": 1.0}]))
+
+
+class TestPipelineStreaming(unittest.TestCase):
+
+    @patch('st_transformers_js.v1._component_func')
+    def test_v1_partial_and_final_values(self, mock_component_func):
+        """
+        Test that v1 returns the partial text, then the result, and ignores another run's value.
+        """
+        args = ("m", "text2text-generation", "Translate this")
+        mock_component_func.return_value = None
+        self.assertEqual(transformers_js_pipeline(*args, stream=True, metrics=False).status, "pending")
+        run_id = mock_component_func.call_args.kwargs["run_id"]
+        self.assertEqual(mock_component_func.call_args.kwargs["stream"]["interval_ms"], 250)
+
+        mock_component_func.return_value = {"partial": {"text": "Tradu", "tokens": 3}, "meta": {"run_id": run_id}}
+        stream = transformers_js_pipeline(*args, stream=True, metrics=False)
+        self.assertEqual((stream.status, stream.text, stream.tokens), ("streaming", "Tradu", 3))
+
+        mock_component_func.return_value = {
+            "result": [{"generated_text": "Traduisez ceci"}], "meta": {"run_id": run_id},
+        }
+        stream = transformers_js_pipeline(*args, stream=True, metrics=False)
+        self.assertEqual((stream.status, stream.text, stream.done), ("complete", "Traduisez ceci", True))
+
+        # Same arguments, same id; a value from other arguments is stale
+        stream = transformers_js_pipeline("m", "text2text-generation", "Other", stream=True, metrics=False)
+        self.assertEqual(stream.status, "pending")
+        self.assertNotEqual(mock_component_func.call_args.kwargs["run_id"], run_id)
+
+    @patch('st_transformers_js.v2._component_func')
+    def test_v2_streaming_state_and_cache(self, mock_component_func):
+        """
+        Test that v2 sends the stream id, reads the partial state and serves cached results as complete.
+        """
+        cache = ResultCache()
+        args = ("m", "text-generation", "Once upon")
+        mock_component_func.return_value = None
+        transformers_v2.transformers_js_pipeline_v2(*args, stream={"interval": 0.1}, result_cache=cache, metrics=False)
+        data = mock_component_func.call_args.kwargs["data"]
+        run_id = data["run_id"]
+        self.assertEqual(data["stream"]["interval_ms"], 100)
+
+        mock_component_func.return_value = {"sync": {"session": "s", "seq": 1, "state": {
+            "status": "streaming", "run_id": run_id, "partial": {"text": "Once upon a", "tokens": 1},
+        }}}
+        stream = transformers_v2.transformers_js_pipeline_v2(*args, stream=True, result_cache=cache, metrics=False)
+        self.assertEqual((stream.status, stream.text), ("streaming", "Once upon a"))
+
+        mock_component_func.return_value = {"sync": {"session": "s", "seq": 2, "state": {
+            "status": "complete", "run_id": run_id, "result": [{"generated_text": "Once upon a time"}],
+        }}}
+        stream = transformers_v2.transformers_js_pipeline_v2(*args, stream=True, result_cache=cache, metrics=False)
+        self.assertEqual((stream.status, stream.text), ("complete", "Once upon a time"))
+
+        mock_component_func.reset_mock()
+        stream = transformers_v2.transformers_js_pipeline_v2(*args, stream=True, result_cache=cache, metrics=False)
+        self.assertTrue(stream.meta["result_cache_hit"])
+        self.assertEqual(stream.text, "Once upon a time")
+        mock_component_func.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
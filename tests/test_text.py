@@ -0,0 +1,179 @@
+import unittest
+from unittest.mock import patch
+
+from st_transformers_js import text
+from st_transformers_js import transformers_js_pipeline_v1 as transformers_js_pipeline
+from st_transformers_js import transformers_js_pipeline_batch
+from st_transformers_js import v2 as transformers_v2
+
+
+def _entity(word, entity="B-PER", index=0):
+    """A transformers.js 2 token-classification entity, which has no offsets."""
+    return {"entity": entity, "score": 0.9, "index": index, "word": word, "start": None, "end": None}
+
+
+class TestTextChunking(unittest.TestCase):
+
+    def test_resolve_text_options(self):
+        """
+        Test that the argument maps to options with defaults and bad options are rejected.
+        """
+        self.assertIsNone(text.resolve_text_options(False))
+        self.assertEqual(text.resolve_text_options(None), {"chunk_tokens": "auto", "stride": "auto"})
+        self.assertEqual(text.resolve_text_options({"chunk_tokens": 100}), {"chunk_tokens": 100, "stride": "auto"})
+        self.assertEqual(text.chunking_for("m", "ner", text.resolve_text_options(True)), (448, 64))
+        self.assertEqual(text.chunking_for("m", "summarization", {"chunk_tokens": 224, "stride": "auto"}), (224, 16))
+
+        for bad in ({"chunk_tokens": 0}, {"stride": -1}, {"chunk_tokens": 10, "stride": 10}, {"size": 1}):
+            with self.subTest(options=bad), self.assertRaises(ValueError):
+                text.resolve_text_options(bad)
+        with self.assertRaises(TypeError):
+            text.resolve_text_options("auto")
+
+    def test_windows_fit_budget_and_overlap(self):
+        """
+        Test that windows stay within the token budget, overlap, and cover the text.
+        """
+        document = "Alice met Bob in Paris. " * 6
+        chunks = text.chunk_text(document, 20, 5)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual((chunks[0][0], chunks[-1][1]), (0, len(document)))
+        for (start, end), (next_start, _) in zip(chunks, chunks[1:]):
+            self.assertLess(next_start, end)
+            self.assertTrue(document[next_start - 1].isspace())
+        for start, end in chunks:
+            self.assertLessEqual(text.estimate_tokens(document[start:end]), 20)
+
+        self.assertEqual(text.chunk_text("Short.", 20, 5), [[0, 6]])
+        self.assertIsNone(text.preprocess_text_input("Short.", "m", "ner", text.resolve_text_options(None)))
+        self.assertIsNone(text.preprocess_text_input(document, "m", "text-classification", {"chunk_tokens": 20, "stride": 5}))
+        # JavaScript slices strings by UTF-16 code unit
+        self.assertEqual(text.utf16_bounds("😀 ab", [[0, 1], [2, 4]]), [[0, 2], [3, 5]])
+
+    def test_ids_and_numbers_count_high(self):
+        """
+        Test that card numbers, hashes and IDs are estimated at no fewer tokens than WordPiece splits them into.
+        """
+        # bert-base-uncased splits these into about 7 and 15 tokens
+        self.assertGreaterEqual(text.estimate_tokens("4111111111111111"), 7)
+        self.assertGreaterEqual(text.estimate_tokens("0x3f2a9c1e5b7d4a21"), 15)
+        self.assertLessEqual(text.estimate_tokens("the invoice"), 4)
+
+        document = " ".join(f"Invoice INV-{i:06d}-{i * 7919:08x} paid." for i in range(200))
+        chunks = text.chunk_text(document, 448, 64)
+        self.assertGreater(len(chunks), 1)
+        for start, end in chunks:
+            # Each invoice is about 16 WordPiece tokens, so at most 28 fit in 448
+            self.assertLessEqual(document[start:end].count("Invoice"), 448 // 16)
+
+    def test_merge_entities(self):
+        """
+        Test that entities get offsets into the whole text and overlapping ones are kept once.
+        """
+        document = "Alice went home. Then Bob met Carol."
+        chunks = [[0, 25], [17, 36]]  # "Then Bob" is in both; the second window owns "Bob"
+        outputs = [
+            [_entity("Alice", index=1), _entity("Bob", index=6)],
+            [_entity("Bob", index=2), _entity("##rol", index=5)],
+        ]
+        merged = text.merge_entities(outputs, chunks, document)
+        self.assertEqual([(e["word"], e["start"], e["end"]) for e in merged], [
+            ("Alice", 0, 5), ("Bob", 22, 25), ("##rol", 32, 35),
+        ])
+        self.assertEqual([e["index"] for e in merged], [1, 2, 5])
+
+    def test_merge_summaries(self):
+        """
+        Test that summaries are joined and a sentence repeated from the previous window is dropped.
+        """
+        merged = text.merge_summaries([
+            [{"summary_text": "Alice went home. Bob arrived."}],
+            [{"summary_text": "Bob arrived! Carol left."}],
+        ])
+        self.assertEqual(merged, [{"summary_text": "Alice went home. Bob arrived. Carol left."}])
+
+        result, error = text.merge_chunked_result(
+            "summarization", {"results": [None, None], "errors": [None, "OOM"]}, [[0, 1], [1, 2]], "ab",
+        )
+        self.assertEqual((result, error), (None, "Text chunk 2 of 2 failed: OOM"))
+
+
+class TestPipelineTextChunking(unittest.TestCase):
+
+    @patch('st_transformers_js.v1._component_func')
+    def test_v1_sends_windows_and_merges(self, mock_component_func):
+        """
+        Test that v1 sends the text once with window offsets and returns the merged entities.
+        """
+        document = "Alice met Bob in Paris. " * 6
+        mock_component_func.return_value = {
+            "result": {"results": [[_entity("Alice")], [], [], [_entity("Paris", "B-LOC")]], "errors": [None] * 4},
+            "meta": {},
+        }
+        value = transformers_js_pipeline(
+            "m", "ner", document, text_chunking={"chunk_tokens": 20, "stride": 5}, return_metadata=True, metrics=False,
+        )
+        kwargs = mock_component_func.call_args.kwargs
+        self.assertEqual(kwargs["inputs"], document)
+        self.assertEqual(kwargs["text_chunks"], text.chunk_text(document, 20, 5))
+        self.assertEqual([(e["word"], e["start"]) for e in value["result"]], [("Alice", 0), ("Paris", 137)])
+        self.assertEqual(value["meta"]["preprocessing"]["chunks"], 4)
+
+        # Turned off, the text is sent whole
+        mock_component_func.return_value = {"result": [], "meta": {}}
+        transformers_js_pipeline("m", "ner", document, text_chunking=False, metrics=False)
+        self.assertIsNone(mock_component_func.call_args.kwargs["text_chunks"])
+
+    @patch('st_transformers_js.v2._component_func')
+    def test_v2_batch_regroups_windows(self, mock_component_func):
+        """
+        Test that a v2 batch sends each window as an item and merges them back per input.
+        """
+        long_text = "First point here. Second point here. Third point here."
+        inputs = [long_text, "Short."]
+        options = {"chunk_tokens": 8, "stride": 2}
+        mock_component_func.return_value = {"status": "processing"}
+        transformers_v2.transformers_js_pipeline_batch_v2("m", "summarization", inputs, text_chunking=options, metrics=False)
+        data = mock_component_func.call_args.kwargs["data"]
+        windows = len(text.chunk_text(long_text, 8, 2))
+        self.assertEqual(len(data["inputs"]), windows + 1)
+        self.assertEqual(data["inputs"][-1], "Short.")
+
+        results = [[{"summary_text": f"Point {i}."}] for i in range(windows)] + [[{"summary_text": "Short."}]]
+        mock_component_func.return_value = {
+            "status": "complete", "result": results, "errors": [None] * (windows + 1),
+            "completed": windows + 1, "total": windows + 1,
+        }
+        state = transformers_v2.transformers_js_pipeline_batch_v2(
+            "m", "summarization", inputs, text_chunking=options, metrics=False,
+        )
+        self.assertEqual(state["result"][0], [{"summary_text": " ".join(f"Point {i}." for i in range(windows))}])
+        self.assertEqual(state["result"][1], [{"summary_text": "Short."}])
+        self.assertEqual((state["completed"], state["total"]), (2, 2))
+        self.assertEqual(state["preprocessing"]["chunks"], windows)
+
+    @patch('st_transformers_js.v1._component_func')
+    def test_v1_batch_regroups_windows(self, mock_component_func):
+        """
+        Test that a v1 batch merges the window results back per input and keeps a failed window's error.
+        """
+        long_text = "First point here. Second point here. Third point here."
+        options = {"chunk_tokens": 8, "stride": 2}
+        windows = len(text.chunk_text(long_text, 8, 2))
+        results = [[{"summary_text": f"Point {i}."}] for i in range(windows)] + [[{"summary_text": "Short."}]]
+        errors = [None] * windows + [None]
+        errors[1] = "out of memory"
+        mock_component_func.return_value = {
+            "result": {"results": results, "errors": errors, "completed": windows + 1, "total": windows + 1},
+            "meta": {},
+        }
+        result = transformers_js_pipeline_batch(
+            "m", "summarization", [long_text, "Short."], text_chunking=options, metrics=False,
+        )
+        self.assertEqual(result["results"], [None, [{"summary_text": "Short."}]])
+        self.assertEqual(result["errors"][0], f"Text chunk 2 of {windows} failed: out of memory")
+        self.assertEqual((result["completed"], result["total"]), (2, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,23 @@
 import unittest
 import base64
+import io
+import os
+import pathlib
+import tempfile
+from datetime import datetime, timezone
 from unittest.mock import patch, MagicMock
 
 from st_transformers_js import transformers_js_pipeline_v1 as transformers_js_pipeline
-from st_transformers_js.helpers import process_inputs
+from st_transformers_js import transformers_js_pipeline_batch
+from st_transformers_js import preload_models
+from st_transformers_js import evict_cached_model, list_cached_models, set_cache_budget
+from st_transformers_js.helpers import (
+    process_inputs,
+    process_batch_inputs,
+    process_model_specs,
+    encode_binary_payload,
+    decode_binary_payload,
+)
 
 # A minimal PNG header
 PNG_HEADER = b'\x89PNG\r\n\x1a\n'
@@ -33,6 +47,8 @@ class TestV1Component(unittest.TestCase):
         called_args = mock_component_func.call_args.kwargs
         self.assertEqual(called_args.get('inputs'), "This is a test sentence.")
         self.assertIsNone(called_args.get('mime_type'))
+        self.assertFalse(called_args.get('shared_worker'))
+        self.assertEqual(called_args.get('model_source'), "hub")
 
     @patch('st_transformers_js.v1._component_func')
     def test_invalid_input_type(self, mock_component_func):
@@ -47,6 +63,231 @@ class TestV1Component(unittest.TestCase):
                 key="test3"
             )
 
+    @patch('st_transformers_js.v1._component_func')
+    def test_binary_transport(self, mock_component_func):
+        """
+        Test that the binary transport sends raw bytes instead of a base64 string.
+        """
+        image_bytes = PNG_HEADER + b'image'
+        with patch.dict('sys.modules', {'magic': None}):
+            transformers_js_pipeline(
+                model_name="test_model",
+                pipeline_type="image-to-text",
+                inputs=image_bytes,
+                transport="binary",
+            )
+        called_args = mock_component_func.call_args.kwargs
+        self.assertIsNone(called_args.get('inputs'))
+        self.assertEqual(called_args.get('inputs_bytes'), image_bytes)
+        self.assertEqual(called_args.get('mime_type'), 'image/png')
+
+        with self.assertRaises(ValueError):
+            transformers_js_pipeline("m", "image-to-text", image_bytes, transport="hex")
+
+    @patch('st_transformers_js.v1._component_func')
+    def test_batch_inputs_sent_in_one_call(self, mock_component_func):
+        """
+        Test that a batch of inputs is processed and sent in a single component call.
+        """
+        image_bytes = PNG_HEADER + b'image'
+        with patch.dict('sys.modules', {'magic': None}):
+            transformers_js_pipeline_batch(
+                model_name="test_model",
+                pipeline_type="text-classification",
+                inputs=["first", image_bytes, "third"],
+                batch_size=2,
+                key="batch1"
+            )
+        mock_component_func.assert_called_once()
+        called_args = mock_component_func.call_args.kwargs
+        self.assertEqual(called_args.get('mode'), "batch")
+        self.assertEqual(called_args.get('batch_size'), 2)
+        self.assertEqual(called_args.get('inputs'), [
+            "first",
+            base64.b64encode(image_bytes).decode('utf-8'),
+            "third",
+        ])
+        self.assertEqual(called_args.get('mime_types'), [None, 'image/png', None])
+
+    @patch('st_transformers_js.v1._component_func')
+    def test_batch_invalid_arguments(self, mock_component_func):
+        """
+        Test that invalid batch inputs and batch sizes are rejected before the component is called.
+        """
+        with self.assertRaises(TypeError):
+            transformers_js_pipeline_batch("m", "text-classification", "not a list")
+        with self.assertRaises(TypeError):
+            transformers_js_pipeline_batch("m", "text-classification", ["ok", 123])
+        with self.assertRaises(ValueError):
+            transformers_js_pipeline_batch("m", "text-classification", ["ok"], batch_size=0)
+        mock_component_func.assert_not_called()
+
+    @patch('st_transformers_js.v1._component_func')
+    def test_result_envelope_unwrapped(self, mock_component_func):
+        """
+        Test that the frontend's result envelope is unwrapped unless metadata is requested.
+        """
+        stats = {"hits": 1, "misses": 1, "size": 1, "max_entries": 2}
+        envelope = {"result": [{"label": "POSITIVE"}], "meta": {"pipeline_cache": stats}}
+        mock_component_func.return_value = envelope
+
+        result = transformers_js_pipeline("m", "text-classification", "hi", pipeline_cache_size=2)
+        self.assertEqual(result, [{"label": "POSITIVE"}])
+        self.assertEqual(mock_component_func.call_args.kwargs.get('pipeline_cache_size'), 2)
+
+        result = transformers_js_pipeline("m", "text-classification", "hi", return_metadata=True)
+        self.assertEqual(result["meta"]["pipeline_cache"], stats)
+
+        mock_component_func.return_value = {"error": "boom", "meta": {}}
+        result = transformers_js_pipeline("m", "text-classification", "hi")
+        self.assertEqual(result, {"error": "boom"})
+
+    @patch('st_transformers_js.v1._component_func')
+    def test_run_id_and_cancel(self, mock_component_func):
+        """
+        Test that runs are identified by their arguments, stale values are dropped and runs can be cancelled.
+        """
+        mock_component_func.return_value = None
+        transformers_js_pipeline("m", "text-classification", "hi", config={"top_k": 2})
+        run_id = mock_component_func.call_args.kwargs["run_id"]
+        self.assertFalse(mock_component_func.call_args.kwargs["cancel"])
+        # An equal config is the same run; other inputs are another
+        transformers_js_pipeline("m", "text-classification", "hi", config={"top_k": 2})
+        self.assertEqual(mock_component_func.call_args.kwargs["run_id"], run_id)
+        transformers_js_pipeline("m", "text-classification", "hello", config={"top_k": 2})
+        self.assertNotEqual(mock_component_func.call_args.kwargs["run_id"], run_id)
+
+        # The value of the earlier run is not returned for the new arguments
+        mock_component_func.return_value = {"result": [{"label": "POSITIVE"}], "meta": {"run_id": run_id}}
+        self.assertIsNone(transformers_js_pipeline("m", "text-classification", "hello", config={"top_k": 2}))
+        self.assertEqual(
+            transformers_js_pipeline("m", "text-classification", "hi", config={"top_k": 2}), [{"label": "POSITIVE"}]
+        )
+
+        mock_component_func.return_value = {"cancelled": True, "meta": {"run_id": run_id}}
+        args = ("m", "text-classification", "hi")
+        self.assertIsNone(transformers_js_pipeline(*args, config={"top_k": 2}, cancel=True))
+        self.assertTrue(mock_component_func.call_args.kwargs["cancel"])
+        value = transformers_js_pipeline(*args, config={"top_k": 2}, return_metadata=True)
+        self.assertTrue(value["cancelled"])
+
+        transformers_js_pipeline_batch("m", "text-classification", ["hi"], cancel=True)
+        kwargs = mock_component_func.call_args.kwargs
+        self.assertTrue(kwargs["cancel"])
+        self.assertNotEqual(kwargs["run_id"], run_id)
+
+    @patch('st_transformers_js.v1._component_func')
+    def test_scheduling_sent_to_frontend(self, mock_component_func):
+        """
+        Test that single runs default to interactive, batches to background, and the queue is in the metadata.
+        """
+        queue = {"priority": "interactive", "depth": 2, "wait_ms": 40.5, "batch_size": 3}
+        mock_component_func.return_value = {"result": [{"label": "POSITIVE"}], "meta": {"queue": queue}}
+        value = transformers_js_pipeline("m", "text-classification", "hi", return_metadata=True, max_concurrency=2)
+        kwargs = mock_component_func.call_args.kwargs
+        self.assertEqual((kwargs["priority"], kwargs["max_concurrency"]), ("interactive", 2))
+        self.assertEqual(value["meta"]["queue"], queue)
+
+        mock_component_func.return_value = None
+        transformers_js_pipeline_batch("m", "text-classification", ["hi"])
+        self.assertEqual(mock_component_func.call_args.kwargs["priority"], "background")
+        with self.assertRaises(ValueError):
+            transformers_js_pipeline("m", "text-classification", "hi", priority="low")
+
+    @patch('st_transformers_js.v1._component_func')
+    def test_load_options_sent_to_frontend(self, mock_component_func):
+        """
+        Test that load options reach the frontend for single and batch calls and are validated.
+        """
+        transformers_js_pipeline("m", "text-classification", "hi", load_options={"quantized": False})
+        self.assertEqual(mock_component_func.call_args.kwargs.get('load_options'), {"quantized": False})
+
+        transformers_js_pipeline("m", "text-classification", "hi")
+        self.assertEqual(mock_component_func.call_args.kwargs.get('load_options'), {})
+
+        transformers_js_pipeline_batch("m", "text-classification", ["a"], load_options={"revision": "v2"})
+        self.assertEqual(mock_component_func.call_args.kwargs.get('load_options'), {"revision": "v2"})
+
+        with self.assertRaises(TypeError):
+            transformers_js_pipeline("m", "text-classification", "hi", load_options={"session_options": object()})
+
+    @patch('st_transformers_js.v1._component_func')
+    def test_runtime_options_sent_to_frontend(self, mock_component_func):
+        """
+        Test that WASM runtime settings reach the frontend and the effective settings come back in meta.
+        """
+        effective = {"num_threads": 1, "simd": True, "proxy": False, "cross_origin_isolated": False, "notes": []}
+        mock_component_func.return_value = {"result": [1], "meta": {"runtime": effective}}
+
+        result = transformers_js_pipeline(
+            "m", "text-classification", "hi", runtime={"num_threads": 4}, return_metadata=True
+        )
+        self.assertEqual(mock_component_func.call_args.kwargs.get('runtime'), {"num_threads": 4})
+        self.assertEqual(result["meta"]["runtime"], effective)
+
+        preload_models([("a", "text-classification")], runtime={"simd": False})
+        self.assertEqual(mock_component_func.call_args.kwargs.get('runtime'), {"simd": False})
+
+        with self.assertRaises(TypeError):
+            transformers_js_pipeline("m", "text-classification", "hi", runtime=4)
+
+    @patch('st_transformers_js.v1._component_func')
+    def test_preload_models(self, mock_component_func):
+        """
+        Test that preloading mounts one hidden component for all models in the shared worker.
+        """
+        status = {"ready": True, "models": [{"model_name": "a", "status": "ready"}]}
+        mock_component_func.return_value = {"result": status, "meta": {}}
+
+        result = preload_models([("a", "text-classification"), ("b", "image-to-text")])
+        self.assertEqual(result, status)
+
+        called_args = mock_component_func.call_args.kwargs
+        self.assertEqual(called_args.get('mode'), "preload")
+        self.assertTrue(called_args.get('shared_worker'))
+        self.assertEqual(called_args.get('key'), "st_transformers_js_preload")
+        self.assertEqual(
+            [(m["model_name"], m["warmup_input"]) for m in called_args.get('models')],
+            [("a", "Warm-up input."), ("b", None)],
+        )
+
+    @patch('st_transformers_js.v1._component_func')
+    def test_model_cache_functions(self, mock_component_func):
+        """
+        Test that the model cache functions send their action and convert last-used times.
+        """
+        listing = {
+            "models": [{"model_name": "a", "bytes": 10, "files": 2, "last_used": 1_700_000_000_000},
+                       {"model_name": "b", "bytes": 5, "files": 1, "last_used": None}],
+            "total_bytes": 15,
+            "evicted": [],
+        }
+        mock_component_func.return_value = {"result": listing, "meta": {}}
+
+        result = list_cached_models()
+        self.assertEqual(result["models"][0]["last_used"], datetime(2023, 11, 14, 22, 13, 20, tzinfo=timezone.utc))
+        self.assertIsNone(result["models"][1]["last_used"])
+        called_args = mock_component_func.call_args.kwargs
+        self.assertEqual((called_args["mode"], called_args["action"], called_args["key"]), ("cache", "list", "st_transformers_js_cache"))
+
+        evict_cached_model("Xenova/a")
+        called_args = mock_component_func.call_args.kwargs
+        self.assertEqual((called_args["action"], called_args["model_name"], called_args["key"]), ("evict", "Xenova/a", None))
+
+        set_cache_budget(2 << 30, persist=True)
+        called_args = mock_component_func.call_args.kwargs
+        self.assertEqual((called_args["action"], called_args["budget_bytes"], called_args["persist"]), ("budget", 2 << 30, True))
+
+        mock_component_func.return_value = None
+        self.assertIsNone(list_cached_models())
+
+        with self.assertRaises(ValueError):
+            evict_cached_model("")
+        with self.assertRaises(ValueError):
+            set_cache_budget(-1)
+        with self.assertRaises(TypeError):
+            set_cache_budget(True)
+
 class TestHelpers(unittest.TestCase):
 
     def test_process_inputs_with_magic(self):
@@ -83,5 +324,157 @@ class TestHelpers(unittest.TestCase):
                     _, mime_type = process_inputs(header)
                     self.assertEqual(mime_type, expected_mime_type)
 
+    def test_process_batch_inputs_keeps_order(self):
+        """
+        Test that batch processing returns values and MIME types in input order.
+        """
+        with patch.dict('sys.modules', {'magic': None}):
+            processed, mime_types = process_batch_inputs(
+                (JPEG_HEADER, "text", GIF_HEADER)
+            )
+        self.assertEqual(processed[1], "text")
+        self.assertEqual(mime_types, ['image/jpeg', None, 'image/gif'])
+
+    def test_process_inputs_zero_copy_sources(self):
+        """
+        Test that bytearray, memoryview, file-like and path inputs are all accepted.
+        """
+        data = PNG_HEADER + b'x' * 100
+        expected_base64 = base64.b64encode(data).decode('utf-8')
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = pathlib.Path(tmp) / "image.png"
+            path.write_bytes(data)
+            # Factories, since file-like sources are consumed by each call
+            sources = {
+                "bytearray": lambda: bytearray(data),
+                "memoryview": lambda: memoryview(data),
+                "BytesIO": lambda: io.BytesIO(data),
+                "BufferedReader": lambda: io.BufferedReader(io.BytesIO(data)),
+                "Path": lambda: path,
+            }
+            with patch.dict('sys.modules', {'magic': None}):
+                for name, make_source in sources.items():
+                    with self.subTest(source=name):
+                        processed, mime_type = process_inputs(make_source())
+                        self.assertEqual(processed, expected_base64)
+                        self.assertEqual(mime_type, 'image/png')
+
+                        processed, _ = process_inputs(make_source(), transport="binary")
+                        self.assertEqual(processed, data)
+
+    def test_process_inputs_memory_maps_large_files(self):
+        """
+        Test that files above the threshold are memory-mapped and then released.
+        """
+        data = JPEG_HEADER + b'y' * 64
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "scan.jpg")
+            with open(path, "wb") as f:
+                f.write(data)
+
+            with patch('st_transformers_js.helpers.MMAP_THRESHOLD', 1), \
+                 patch('st_transformers_js.helpers.mmap.mmap', wraps=__import__('mmap').mmap) as mock_mmap, \
+                 patch.dict('sys.modules', {'magic': None}):
+                processed, mime_type = process_inputs(pathlib.Path(path), transport="binary")
+                with open(path, "rb") as f:
+                    self.assertEqual(process_inputs(f)[0], base64.b64encode(data).decode('utf-8'))
+
+            self.assertEqual(mock_mmap.call_count, 2)
+            self.assertEqual(processed, data)
+            self.assertEqual(mime_type, 'image/jpeg')
+
+    def test_process_inputs_large_files_from_current_position(self):
+        """
+        Test that large files are sent from their position like small ones, and text mode is rejected.
+        """
+        data = JPEG_HEADER + b'y' * 64
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "scan.jpg")
+            with open(path, "wb") as f:
+                f.write(data)
+
+            with patch('st_transformers_js.helpers.MMAP_THRESHOLD', 1), \
+                 patch.dict('sys.modules', {'magic': None}):
+                with open(path, "rb") as f:
+                    f.read(4)
+                    processed, _ = process_inputs(f, transport="binary")
+                    self.assertEqual(processed, data[4:])
+                    self.assertEqual(f.tell(), len(data))
+
+                with open(path, "rb") as f:
+                    process_inputs(f, transport="binary")
+                    self.assertEqual(f.tell(), len(data))
+
+                with open(path, "r") as f:
+                    with self.assertRaises(TypeError):
+                        process_inputs(f)
+
+    def test_mime_sniffing_reads_bounded_header(self):
+        """
+        Test that only the leading bytes are passed to python-magic.
+        """
+        mock_magic = MagicMock()
+        mock_magic.from_buffer.return_value = 'image/png'
+        data = PNG_HEADER + b'z' * 100000
+
+        with patch.dict('sys.modules', {'magic': mock_magic}):
+            process_inputs(data)
+
+        sniffed = mock_magic.from_buffer.call_args.args[0]
+        self.assertEqual(sniffed, data[:2048])
+
+    def test_text_mode_file_rejected(self):
+        """
+        Test that file-like objects opened in text mode are rejected.
+        """
+        with self.assertRaises(TypeError):
+            process_inputs(io.StringIO("text"))
+
+    def test_process_model_specs(self):
+        """
+        Test that preload model specs are normalised and warm-up inputs processed.
+        """
+        with patch.dict('sys.modules', {'magic': None}):
+            specs = process_model_specs([
+                ("gpt", "text-generation"),
+                {"model_name": "vit", "pipeline_type": "image-classification", "warmup_input": PNG_HEADER},
+            ])
+        self.assertEqual(specs[0], {
+            "model_name": "gpt",
+            "pipeline_type": "text-generation",
+            "warmup_input": "Warm-up input.",
+            "mime_type": None,
+            "config": {"max_new_tokens": 1},
+            "load_options": {},
+        })
+        self.assertEqual(specs[1]["warmup_input"], base64.b64encode(PNG_HEADER).decode('utf-8'))
+        self.assertEqual(specs[1]["mime_type"], "image/png")
+
+        self.assertIsNone(process_model_specs([("gpt", "text-generation")], warmup=False)[0]["warmup_input"])
+        specs = process_model_specs(
+            [("gpt", "text-generation"), {"model_name": "b", "pipeline_type": "fill-mask", "load_options": {}}],
+            load_options={"quantized": False},
+        )
+        self.assertEqual([spec["load_options"] for spec in specs], [{"quantized": False}, {}])
+        with self.assertRaises(TypeError):
+            process_model_specs(("gpt", "text-generation"))
+        with self.assertRaises(ValueError):
+            process_model_specs([])
+        with self.assertRaises(ValueError):
+            process_model_specs([{"model_name": "gpt", "pipeline_type": "text-generation", "dtype": "q8"}])
+
+    def test_binary_payload_roundtrip(self):
+        """
+        Test that binary payloads carry the header and blobs unchanged.
+        """
+        payload = encode_binary_payload({"model_name": "m"}, [b"abc", b"", PNG_HEADER])
+        header, blobs = decode_binary_payload(payload)
+        self.assertEqual(header["model_name"], "m")
+        self.assertEqual([bytes(blob) for blob in blobs], [b"abc", b"", PNG_HEADER])
+
+        with self.assertRaises(ValueError):
+            decode_binary_payload(b"nope" + payload[4:])
+
 if __name__ == '__main__':
     unittest.main()
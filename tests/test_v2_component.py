@@ -2,18 +2,9 @@ import unittest
 from unittest.mock import patch, MagicMock, ANY
 import base64
 
-# Mock streamlit before import
-mock_streamlit = MagicMock()
-mock_streamlit.components.v2.component.return_value = MagicMock()
-
-modules = {
-    "streamlit": mock_streamlit,
-    "streamlit.components.v2": mock_streamlit.components.v2,
-}
-
-with patch("os.path.exists", return_value=True):
-    with patch.dict("sys.modules", modules):
-        from st_transformers_js import v2 as transformers_v2
+# The component is only registered with Streamlit on first call, and every
+# test patches it out
+from st_transformers_js import v2 as transformers_v2
 
 class TestComponentV2(unittest.TestCase):
 
@@ -47,6 +38,17 @@ class TestComponentV2(unittest.TestCase):
             "inputs": inputs,
             "mime_type": None,
             "config": config,
+            "pipeline_cache_size": 4,
+            "priority": "interactive",
+            "max_concurrency": 1,
+            "shared_worker": False,
+            "model_source": "hub",
+            "local_model_path": None,
+            "load_options": {},
+            "runtime": {},
+            "progress_interval_ms": 500,
+            "result_format": "json",
+            "run_id": ANY,
         }
         self.mock_component_func.assert_called_once_with(
             data=expected_data,
@@ -75,6 +77,17 @@ class TestComponentV2(unittest.TestCase):
                 "inputs": expected_b64_str,
                 "mime_type": "image/png",
                 "config": {},
+                "pipeline_cache_size": 4,
+                "priority": "interactive",
+                "max_concurrency": 1,
+                "shared_worker": False,
+                "model_source": "hub",
+                "local_model_path": None,
+                "load_options": {},
+                "runtime": {},
+                "progress_interval_ms": 500,
+                "result_format": "json",
+                "run_id": ANY,
             }
 
             self.mock_component_func.assert_called_once_with(
@@ -82,5 +95,303 @@ class TestComponentV2(unittest.TestCase):
                 key="test_img_v2",
             )
 
+    def test_v2_batch_call(self):
+        """Test that the v2 batch entry point sends all inputs in one payload."""
+        transformers_v2.transformers_js_pipeline_batch_v2(
+            model_name="test-model",
+            pipeline_type="text-classification",
+            inputs=["a", "b", "c"],
+            batch_size=2,
+            key="test_batch_v2",
+        )
+
+        expected_data = {
+            "mode": "batch",
+            "model_name": "test-model",
+            "pipeline_type": "text-classification",
+            "inputs": ["a", "b", "c"],
+            "mime_types": [None, None, None],
+            "batch_size": 2,
+            "config": {},
+            "pipeline_cache_size": 4,
+            "priority": "background",
+            "max_concurrency": 1,
+            "shared_worker": False,
+            "model_source": "hub",
+            "local_model_path": None,
+            "load_options": {},
+            "runtime": {},
+            "progress_interval_ms": 500,
+            "result_format": "json",
+            "run_id": ANY,
+        }
+        self.mock_component_func.assert_called_once_with(
+            data=expected_data,
+            key="test_batch_v2",
+        )
+
+    def test_v2_pipeline_cache_size(self):
+        """Test that the pipeline cache size reaches the frontend and is validated."""
+        transformers_v2.transformers_js_pipeline_v2(
+            model_name="test-model",
+            pipeline_type="text-classification",
+            inputs="hi",
+            pipeline_cache_size=2,
+        )
+        data = self.mock_component_func.call_args.kwargs["data"]
+        self.assertEqual(data["pipeline_cache_size"], 2)
+
+        with self.assertRaises(ValueError):
+            transformers_v2.transformers_js_pipeline_v2(
+                model_name="test-model",
+                pipeline_type="text-classification",
+                inputs="hi",
+                pipeline_cache_size=0,
+            )
+
+    def test_v2_result_cache(self):
+        """Test that a completed result is cached and served without mounting the component."""
+        from st_transformers_js.cache import ResultCache
+
+        cache = ResultCache()
+        self.mock_component_func.return_value = {"status": "complete", "result": [{"label": "POSITIVE"}]}
+
+        transformers_v2.transformers_js_pipeline_v2("test-model", "text-classification", "hi", result_cache=cache)
+        cached = transformers_v2.transformers_js_pipeline_v2("test-model", "text-classification", "hi", result_cache=cache)
+
+        self.mock_component_func.assert_called_once()
+        self.assertEqual(cached.status, "complete")
+        self.assertEqual(cached.result, [{"label": "POSITIVE"}])
+        self.assertTrue(cached.result_cache_hit)
+
+    def test_v2_run_id_and_cancel(self):
+        """Test that a state from an earlier run is dropped and a cancelled run reports its status."""
+        self.mock_component_func.return_value = None
+        transformers_v2.transformers_js_pipeline_v2("test-model", "text-classification", "hi", config={"top_k": 2})
+        data = self.mock_component_func.call_args.kwargs["data"]
+        run_id = data["run_id"]
+        self.assertNotIn("cancel", data)
+
+        self.mock_component_func.return_value = {"sync": {"session": "runs", "seq": 1, "state": {
+            "status": "complete", "result": [{"label": "POSITIVE"}], "run_id": run_id,
+        }}}
+        state = transformers_v2.transformers_js_pipeline_v2("test-model", "text-classification", "hello", config={"top_k": 2})
+        self.assertIsNone(state)
+
+        self.mock_component_func.return_value = {"sync": {"session": "runs", "seq": 2, "state": {
+            "status": "cancelled", "message": "Run cancelled.", "run_id": run_id,
+        }}}
+        state = transformers_v2.transformers_js_pipeline_v2(
+            "test-model", "text-classification", "hi", config={"top_k": 2}, cancel=True,
+        )
+        self.assertTrue(self.mock_component_func.call_args.kwargs["data"]["cancel"])
+        self.assertEqual(self.mock_component_func.call_args.kwargs["data"]["run_id"], run_id)
+        self.assertEqual(state.status, "cancelled")
+
+        # Another run's state is pending for a stream too
+        args = ("test-model", "text-generation", "hi")
+        self.assertEqual(transformers_v2.transformers_js_pipeline_v2(*args, stream=True, cancel=True).status, "pending")
+        stream_run_id = self.mock_component_func.call_args.kwargs["data"]["run_id"]
+        self.mock_component_func.return_value = {"sync": {"session": "runs", "seq": 3, "state": {
+            "status": "cancelled", "run_id": stream_run_id,
+        }}}
+        stream = transformers_v2.transformers_js_pipeline_v2(*args, stream=True, cancel=True)
+        self.assertEqual((stream.status, stream.done), ("cancelled", True))
+
+    def test_v2_scheduling(self):
+        """Test that the priority and concurrency limit are sent, validated and kept out of the run id."""
+        self.mock_component_func.return_value = None
+        transformers_v2.transformers_js_pipeline_v2("test-model", "text-classification", "hi")
+        data = self.mock_component_func.call_args.kwargs["data"]
+        self.assertEqual((data["priority"], data["max_concurrency"]), ("interactive", 1))
+        run_id = data["run_id"]
+
+        queue = {"priority": "background", "depth": 3, "wait_ms": 0, "batch_size": 1}
+        self.mock_component_func.return_value = {"sync": {"session": "queue", "seq": 1, "state": {
+            "status": "queued", "queue": queue, "run_id": run_id,
+        }}}
+        state = transformers_v2.transformers_js_pipeline_v2(
+            "test-model", "text-classification", "hi", priority="background", max_concurrency=2,
+        )
+        data = self.mock_component_func.call_args.kwargs["data"]
+        self.assertEqual((data["priority"], data["max_concurrency"], data["run_id"]), ("background", 2, run_id))
+        self.assertEqual((state["status"], state["queue"]["depth"]), ("queued", 3))
+
+        transformers_v2.transformers_js_pipeline_batch_v2("test-model", "text-classification", ["a", "b"])
+        self.assertEqual(self.mock_component_func.call_args.kwargs["data"]["priority"], "background")
+
+        for kwargs in ({"priority": "urgent"}, {"max_concurrency": 0}, {"max_concurrency": True}):
+            with self.subTest(**kwargs), self.assertRaises(ValueError):
+                transformers_v2.transformers_js_pipeline_v2("test-model", "text-classification", "hi", **kwargs)
+
+    def test_v2_binary_transport(self):
+        """Test that the binary transport sends one framed binary payload."""
+        from st_transformers_js.helpers import decode_binary_payload
+
+        with patch.dict('sys.modules', {'magic': None}):
+            transformers_v2.transformers_js_pipeline_v2(
+                model_name="test-model",
+                pipeline_type="image-to-text",
+                inputs=b"\x89PNG\r\n\x1a\nimage",
+                transport="binary",
+                key="test_bin_v2",
+            )
+
+        payload = self.mock_component_func.call_args.kwargs["data"]
+        self.assertIsInstance(payload, bytes)
+        header, blobs = decode_binary_payload(payload)
+        self.assertEqual(header["inputs"], {"blob": 0})
+        self.assertEqual(header["mime_type"], "image/png")
+        self.assertEqual(bytes(blobs[0]), b"\x89PNG\r\n\x1a\nimage")
+
+    def test_v2_shared_worker_flag(self):
+        """Test that the shared worker option reaches the frontend."""
+        transformers_v2.transformers_js_pipeline_batch_v2(
+            model_name="test-model",
+            pipeline_type="text-classification",
+            inputs=["a"],
+            shared_worker=True,
+        )
+        data = self.mock_component_func.call_args.kwargs["data"]
+        self.assertTrue(data["shared_worker"])
+
+    def test_v2_local_model_source(self):
+        """Test that a local model source sends the mirror URL path."""
+        transformers_v2.transformers_js_pipeline_v2(
+            model_name="test-model",
+            pipeline_type="text-classification",
+            inputs="a",
+            model_source="local",
+        )
+        data = self.mock_component_func.call_args.kwargs["data"]
+        self.assertEqual(data["model_source"], "local")
+        self.assertEqual(data["local_model_path"], "/app/static/models/")
+
+        with self.assertRaises(ValueError):
+            transformers_v2.transformers_js_pipeline_v2(
+                model_name="test-model",
+                pipeline_type="text-classification",
+                inputs="a",
+                model_source="cdn",
+            )
+
+    def test_v2_load_options(self):
+        """Test that load options reach the frontend, are validated and separate cached results."""
+        from st_transformers_js.cache import ResultCache
+
+        transformers_v2.transformers_js_pipeline_v2(
+            model_name="test-model",
+            pipeline_type="text-classification",
+            inputs="a",
+            load_options={"quantized": False, "revision": "v2"},
+        )
+        data = self.mock_component_func.call_args.kwargs["data"]
+        self.assertEqual(data["load_options"], {"quantized": False, "revision": "v2"})
+
+        transformers_v2.transformers_js_pipeline_batch_v2("test-model", "text-classification", ["a"], load_options={"quantized": True})
+        self.assertEqual(self.mock_component_func.call_args.kwargs["data"]["load_options"], {"quantized": True})
+
+        cache = ResultCache()
+        self.mock_component_func.return_value = {"status": "complete", "result": [1]}
+        transformers_v2.transformers_js_pipeline_v2("test-model", "text-classification", "a", result_cache=cache)
+        transformers_v2.transformers_js_pipeline_v2(
+            "test-model", "text-classification", "a", result_cache=cache, load_options={"quantized": False}
+        )
+        self.assertEqual(self.mock_component_func.call_count, 4)
+
+        with self.assertRaises(TypeError):
+            transformers_v2.transformers_js_pipeline_v2("test-model", "text-classification", "a", load_options=["quantized"])
+        with self.assertRaises(ValueError):
+            transformers_v2.transformers_js_pipeline_v2(
+                "test-model", "text-classification", "a", load_options={"progress_callback": None}
+            )
+
+    def test_v2_runtime_options(self):
+        """Test that WASM runtime settings reach the frontend and are validated."""
+        transformers_v2.transformers_js_pipeline_v2(
+            "test-model", "text-classification", "a", runtime={"num_threads": 4, "simd": True, "proxy": False}
+        )
+        data = self.mock_component_func.call_args.kwargs["data"]
+        self.assertEqual(data["runtime"], {"num_threads": 4, "simd": True, "proxy": False})
+
+        transformers_v2.preload_models_v2([("a", "feature-extraction")], runtime={"num_threads": "auto"})
+        self.assertEqual(self.mock_component_func.call_args.kwargs["data"]["runtime"], {"num_threads": "auto"})
+
+        for runtime in ({"num_threads": 0}, {"num_threads": True}, {"threads": 2}):
+            with self.subTest(runtime=runtime), self.assertRaises(ValueError):
+                transformers_v2.transformers_js_pipeline_v2("test-model", "text-classification", "a", runtime=runtime)
+        with self.assertRaises(TypeError):
+            transformers_v2.transformers_js_pipeline_batch_v2("test-model", "text-classification", ["a"], runtime={"simd": "yes"})
+
+    def test_v2_preload_models(self):
+        """Test that preloading sends every model spec in one headless component."""
+        transformers_v2.preload_models_v2(
+            [("a", "feature-extraction"), {"model_name": "b", "pipeline_type": "fill-mask", "warmup_input": "x [MASK]"}],
+            model_source="local",
+        )
+        kwargs = self.mock_component_func.call_args.kwargs
+        data = kwargs["data"]
+        self.assertEqual(kwargs["key"], "st_transformers_js_preload_v2")
+        self.assertEqual(data["mode"], "preload")
+        self.assertFalse(data["shared_worker"])
+        self.assertEqual(data["model_source"], "local")
+        self.assertEqual([m["warmup_input"] for m in data["models"]], ["Warm-up input.", "x [MASK]"])
+
+    def test_v2_model_cache_functions(self):
+        """Test that the model cache functions mount the headless component with their action."""
+        self.mock_component_func.return_value = {
+            "sync": {"session": "cache-1", "seq": 1, "state": {
+                "status": "complete",
+                "result": {"models": [{"model_name": "a", "bytes": 10, "last_used": 0}], "evicted": ["b"]},
+            }},
+        }
+        state = transformers_v2.set_cache_budget_v2(1000)
+        kwargs = self.mock_component_func.call_args.kwargs
+        self.assertEqual(kwargs["key"], "st_transformers_js_cache_budget_v2")
+        self.assertEqual(kwargs["data"], {
+            "mode": "cache", "action": "budget", "model_name": None, "budget_bytes": 1000, "persist": False,
+        })
+        self.assertEqual(state.result["evicted"], ["b"])
+        self.assertEqual(state.result["models"][0]["last_used"].timestamp(), 0)
+
+        transformers_v2.list_cached_models_v2()
+        self.assertEqual(self.mock_component_func.call_args.kwargs["data"]["action"], "list")
+        transformers_v2.evict_cached_model_v2("a")
+        self.assertEqual(self.mock_component_func.call_args.kwargs["data"]["model_name"], "a")
+        with self.assertRaises(ValueError):
+            transformers_v2.evict_cached_model_v2(None)
+
+    def test_v2_sync_state_unpacked(self):
+        """Test that the coalesced sync value is unpacked and stale snapshots are dropped."""
+        def sync(seq, state):
+            return {"sync": {"session": "mount-1", "seq": seq, "state": state}}
+
+        self.mock_component_func.return_value = sync(3, {"status": "progress", "progress": 40})
+        state = transformers_v2.transformers_js_pipeline_v2("m", "text-classification", "a", progress_interval=0.25)
+        self.assertEqual(state, {"status": "progress", "progress": 40})
+        self.assertEqual(state.progress, 40)
+        self.assertEqual(self.mock_component_func.call_args.kwargs["data"]["progress_interval_ms"], 250)
+
+        self.mock_component_func.return_value = sync(2, {"status": "initiate"})
+        state = transformers_v2.transformers_js_pipeline_v2("m", "text-classification", "a")
+        self.assertEqual(state.status, "progress")
+
+        self.mock_component_func.return_value = sync(4, {"status": "complete", "result": [1]})
+        state = transformers_v2.transformers_js_pipeline_v2("m", "text-classification", "a")
+        self.assertEqual(state.result, [1])
+
+        with self.assertRaises(ValueError):
+            transformers_v2.transformers_js_pipeline_v2("m", "text-classification", "a", progress_interval=-1)
+    def test_v2_sync_state_kept_in_session_state(self):
+        """Test that the latest snapshots are kept in the user's session state, for a bounded number of mounts."""
+        session_state = {}
+        with patch("streamlit.session_state", session_state), patch.object(transformers_v2, "_MAX_SYNC_SESSIONS", 2):
+            for mount in ("mount-a", "mount-b", "mount-c"):
+                self.mock_component_func.return_value = {"sync": {"session": mount, "seq": 1, "state": {"status": "complete", "result": [1]}}}
+                transformers_v2.transformers_js_pipeline_v2("m", "text-classification", mount)
+
+        self.assertEqual(list(session_state[transformers_v2._SYNC_STATE_KEY]), ["mount-b", "mount-c"])
+
+
 if __name__ == '__main__':
     unittest.main()